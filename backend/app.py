@@ -25,6 +25,22 @@ def create_app(config_name='development'):
         app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
         app.config['WTF_CSRF_ENABLED'] = True
 
+    # Uploads are hashed, stored and parsed while the request body is received
+    try:
+        import config
+        from functions.streaming_upload import StreamingRequest
+        app.request_class = StreamingRequest
+        app.config['MAX_CONTENT_LENGTH'] = config.MAX_UPLOAD_BYTES or None
+    except ImportError:
+        app.logger.warning("streaming_upload not found")
+
+    # Large responses are compressed for clients that accept it
+    try:
+        from functions.response_compression import compress_response
+        app.after_request(compress_response)
+    except ImportError:
+        app.logger.warning("response_compression not found")
+
     # Enable CORS for all routes
     CORS(app)
 
@@ -95,6 +111,21 @@ def create_app(config_name='development'):
     except ImportError:
         app.logger.warning("homepage_routes not found")
 
+    try:
+        from routes.session_routes import session_bp
+        app.register_blueprint(session_bp)
+    except ImportError:
+        app.logger.warning("session_routes not found")
+
+    # Reclaim the graphs and files of expired sessions in the background
+    try:
+        import config
+        from functions.session_gc import session_gc
+        if config.SESSION_GC_ENABLED and not app.config.get('TESTING'):
+            session_gc.start()
+    except ImportError:
+        app.logger.warning("session_gc not found")
+
     # Register main routes
     register_routes(app)
 
@@ -137,6 +168,11 @@ def register_error_handlers(app):
     def bad_request(error):
         return {'error': 'Bad request'}, 400
 
+    @app.errorhandler(413)
+    def request_too_large(error):
+        limit = app.config.get('MAX_CONTENT_LENGTH')
+        return {'error': f'Upload too large (limit: {limit} bytes)'}, 413
+
 # For direct execution (backward compatibility)
 def build_frontend():
     """Build frontend if needed."""
@@ -24,7 +24,7 @@ class BaseConfig:
     CORS_ALLOW_HEADERS = ["Content-Type", "Authorization"]
 
     # File upload settings
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_BYTES', 1024 ** 3)) or None  # 1 GiB; 0 disables the limit
     UPLOAD_FOLDER = 'uploads'
 
     # Logging
@@ -77,7 +77,7 @@ PASSWORD = os.environ.get('VIRTUOSO_PASSWORD')
 AUTH_REQUIRED = USERNAME is not None and PASSWORD is not None
 
 # Triple store type - used to handle store-specific operations
-TRIPLE_STORE_TYPE = "virtuoso"  # Options: "virtuoso", "fuseki", "stardog", etc.
+TRIPLE_STORE_TYPE = os.environ.get("TRIPLE_STORE_TYPE", "virtuoso")  # Options: "virtuoso", "fuseki", "stardog", "embedded"
 
 # Graph URIs
 SHAPES_GRAPH_URI = SHAPES_GRAPH
@@ -92,6 +92,82 @@ ENABLE_DASHBOARD_FEATURES = os.environ.get('ENABLE_DASHBOARD_FEATURES', 'true').
 # LLM Configuration
 SRG_MODEL = os.environ.get("SRG_MODEL", DEFAULT_AI_MODEL)
 
+# Batched repair generation: prompt token budget and maximum violations per request
+SRG_BATCH_MAX_TOKENS = int(os.environ.get("SRG_BATCH_MAX_TOKENS", 12000))
+SRG_BATCH_MAX_SIZE = int(os.environ.get("SRG_BATCH_MAX_SIZE", 10))
+
+# Explain covered constraint components from templates before calling the LLM
+TEMPLATE_FIRST = os.environ.get("TEMPLATE_FIRST", "true").lower() == "true"
+
+# Prompt budgeting: token budget for the violation context sent with each LLM prompt
+LLM_PROMPT_TOKEN_BUDGET = int(os.environ.get("LLM_PROMPT_TOKEN_BUDGET", 4000))
+LLM_PROMPT_SIMILAR_EXAMPLES = int(os.environ.get("LLM_PROMPT_SIMILAR_EXAMPLES", 10))
+
+# Maximum number of similar cases (same type, same missing property) attached to a violation's context
+SIMILAR_CASES_LIMIT = int(os.environ.get("SIMILAR_CASES_LIMIT", 25))
+
+# Persistent LLM response cache (keyed by model, temperature and normalized prompt)
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", "data/llm_cache")
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Background explanation jobs: worker threads, queue bound and persisted job state
+EXPLANATION_WORKERS = int(os.environ.get("EXPLANATION_WORKERS", 4))
+EXPLANATION_QUEUE_SIZE = int(os.environ.get("EXPLANATION_QUEUE_SIZE", 1000))
+EXPLANATION_JOBS_DIR = os.environ.get("EXPLANATION_JOBS_DIR", "data/explanation_jobs")
+
+# Local table of validation sessions (latest session and session listing)
+SESSION_REGISTRY_PATH = os.environ.get("SESSION_REGISTRY_PATH", "data/session_registry.sqlite3")
+
+# Session garbage collection: idle TTL, LRU retention, background interval, off-peak window ("HH:MM-HH:MM")
+SESSION_GC_ENABLED = os.environ.get("SESSION_GC_ENABLED", "false").lower() == "true"
+SESSION_TTL_HOURS = float(os.environ.get("SESSION_TTL_HOURS", 168))
+SESSION_MAX_RETAINED = int(os.environ.get("SESSION_MAX_RETAINED", 500))
+SESSION_GC_INTERVAL_SECONDS = float(os.environ.get("SESSION_GC_INTERVAL_SECONDS", 3600))
+SESSION_GC_WINDOW = os.environ.get("SESSION_GC_WINDOW", "01:00-05:00")
+SESSION_GC_BATCH_SIZE = int(os.environ.get("SESSION_GC_BATCH_SIZE", 20))
+
+# Session archive: cold sessions are exported to compressed N-Quads and rehydrated on first access
+SESSION_ARCHIVE_DIR = os.environ.get("SESSION_ARCHIVE_DIR", "data/session_archive")
+SESSION_ARCHIVE_AFTER_HOURS = float(os.environ.get("SESSION_ARCHIVE_AFTER_HOURS", 0))
+SESSION_ARCHIVE_CODEC = os.environ.get("SESSION_ARCHIVE_CODEC", "zstd")
+SESSION_ARCHIVE_PAGE_SIZE = int(os.environ.get("SESSION_ARCHIVE_PAGE_SIZE", 10000))
+SESSION_REHYDRATE_WAIT_SECONDS = float(os.environ.get("SESSION_REHYDRATE_WAIT_SECONDS", 10))
+
+# Query scheduling on the shared endpoint: global cap (match Virtuoso's ServerThreads), per-session cap, queue timeout
+QUERY_SCHEDULER_ENABLED = os.environ.get("QUERY_SCHEDULER_ENABLED", "true").lower() == "true"
+QUERY_MAX_CONCURRENCY = int(os.environ.get("QUERY_MAX_CONCURRENCY", 10))
+QUERY_TENANT_CONCURRENCY = int(os.environ.get("QUERY_TENANT_CONCURRENCY", 3))
+# Cap of the queries that name no session (dashboards, statistics); only the global cap by default
+QUERY_SHARED_CONCURRENCY = int(os.environ.get("QUERY_SHARED_CONCURRENCY", QUERY_MAX_CONCURRENCY))
+QUERY_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("QUERY_QUEUE_TIMEOUT_SECONDS", 60))
+
+# Hybrid mode: small sessions are also kept in process memory and queried locally
+HYBRID_LOCAL_SESSIONS = os.environ.get("HYBRID_LOCAL_SESSIONS", "true").lower() == "true"
+HYBRID_MAX_TRIPLES = int(os.environ.get("HYBRID_MAX_TRIPLES", 50000))
+HYBRID_MAX_SESSIONS = int(os.environ.get("HYBRID_MAX_SESSIONS", 32))
+HYBRID_MAX_TOTAL_TRIPLES = int(os.environ.get("HYBRID_MAX_TOTAL_TRIPLES", 500000))
+
+# Streaming uploads: request body limit (0 disables it) and decompressed size limit of compressed uploads
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 1024 ** 3))
+MAX_UPLOAD_DECOMPRESSED_BYTES = int(os.environ.get("MAX_UPLOAD_DECOMPRESSED_BYTES", 4 * 1024 ** 3))
+
+# Response compression: large responses are encoded with zstd (if installed) or gzip for clients accepting it
+RESPONSE_COMPRESSION = os.environ.get("RESPONSE_COMPRESSION", "true").lower() == "true"
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", 16384))
+RESPONSE_COMPRESSION_CODEC = os.environ.get("RESPONSE_COMPRESSION_CODEC", "zstd")
+
+# Content-addressed uploads: stored files and parsed/compiled graphs shared by identical uploads
+CONTENT_STORE_DIR = os.environ.get("CONTENT_STORE_DIR", "data/content_store")
+CONTENT_CACHE_MAX_TRIPLES = int(os.environ.get("CONTENT_CACHE_MAX_TRIPLES", 1000000))
+
+# Bulk loading: parallel rdf_loader_run() sessions and load list polling interval
+BULK_LOADER_THREADS = int(os.environ.get("BULK_LOADER_THREADS", 2))
+BULK_LOADER_POLL_SECONDS = float(os.environ.get("BULK_LOADER_POLL_SECONDS", 2))
+
+# Signatures resolved per batched VKG lookup after validation
+VKG_LOOKUP_BATCH_SIZE = int(os.environ.get("VKG_LOOKUP_BATCH_SIZE", 500))
+
 # Providers Key - should be configured in a .env file only
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY')
@@ -140,18 +216,26 @@ DOCKER_CONTAINER_NAME = "virtuoso"  # Name of the Docker container
 # Store-specific configuration
 STORE_CONFIG = {
     "virtuoso": {
-        "isql_path": "/usr/local/virtuoso-opensource/bin/isql",  # Only needed for Virtuoso
-        "isql_port": 1111,
+        # Only needed for Virtuoso
+        "isql_path": os.environ.get("VIRTUOSO_ISQL_PATH", "/usr/local/virtuoso-opensource/bin/isql"),
+        "isql_port": os.environ.get("VIRTUOSO_ISQL_PORT", "1111"),  # "[host:]port" of the ISQL listener
         "bulk_load_enabled": True,
     },
     "fuseki": {
         "admin_endpoint": "http://localhost:3030/$/",  # Example for Fuseki
+        "update_endpoint": os.environ.get("SPARQL_UPDATE_ENDPOINT", ""),  # Defaults to ENDPOINT_URL
         "bulk_load_enabled": False,
     },
     "stardog": {
         "admin_endpoint": "http://localhost:5820",  # Example for Stardog
+        "update_endpoint": os.environ.get("SPARQL_UPDATE_ENDPOINT", ""),  # Defaults to ENDPOINT_URL
         "database": "shacldb",
         "bulk_load_enabled": True,
+    },
+    "embedded": {
+        "store": os.environ.get("EMBEDDED_STORE", "default"),  # rdflib store plugin, e.g. "Oxigraph"
+        "path": os.environ.get("EMBEDDED_STORE_PATH", ""),  # Store directory, or N-Quads snapshot for "default"
+        "bulk_load_enabled": False,
     }
 }
 
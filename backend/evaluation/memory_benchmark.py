@@ -0,0 +1,62 @@
+"""
+Measures the per-violation memory footprint of ConstraintViolation.
+
+Compares the compact (slotted, IRI-interning) class against an equivalent
+plain dataclass with a per-instance __dict__, as the class was defined before.
+Each IRI is rebuilt per violation, as the validator does with str(URIRef).
+
+Usage (from the backend directory):
+    python -m evaluation.memory_benchmark [number_of_violations]
+"""
+
+import sys
+import tracemalloc
+from dataclasses import field, fields, make_dataclass
+
+from functions.xpshacl_engine.xpshacl_architecture import ConstraintViolation, ViolationType
+
+EX = "http://example.org/"
+SH = "http://www.w3.org/ns/shacl#"
+
+PlainConstraintViolation = make_dataclass(
+    "PlainConstraintViolation",
+    [(f.name, f.type, field(default=f.default, default_factory=f.default_factory)) for f in fields(ConstraintViolation)],
+)
+
+
+def _make(cls, count):
+    return [
+        cls(
+            focus_node="".join((EX, "person", str(i))),
+            shape_id="".join((EX, "PersonShape")),
+            constraint_id="".join((SH, "MinCountConstraintComponent")),
+            violation_type=ViolationType.CARDINALITY,
+            property_path="".join((EX, "name")),
+            severity="".join((SH, "Violation")),
+        )
+        for i in range(count)
+    ]
+
+
+def measure(cls, count: int) -> float:
+    """Returns the number of bytes allocated per violation."""
+    tracemalloc.start()
+    violations = _make(cls, count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del violations
+    return size / count
+
+
+def main(count: int = 100_000):
+    before = measure(PlainConstraintViolation, count)
+    after = measure(ConstraintViolation, count)
+    print(f"Violations:       {count}")
+    print(f"Plain dataclass:  {before:.0f} bytes/violation")
+    print(f"Compact:          {after:.0f} bytes/violation")
+    print(f"Reduction:        {100 * (1 - after / before):.1f}%")
+    return before, after
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,53 @@
+"""
+Entry point of the parallel explanation preparation workers.
+
+Spawned workers import the module of their initializer by name. Importing any
+module under `functions` first runs the package's __init__, which loads every
+service (and LiteLLM through phoenix_service) and makes each worker slow to
+start. This module lives outside the package and imports only the modules the
+workers need: `functions` and `functions.xpshacl_engine` are registered as bare
+packages in a fresh worker, so their __init__ modules are never run there.
+"""
+
+import os
+import sys
+import types
+
+FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "functions")
+
+# Per-process state of a worker, set by init_worker
+_worker_state = {}
+
+
+def _bare_package(name: str, path: str):
+    """Registers a package without running its __init__, unless it is imported already."""
+    if name not in sys.modules:
+        package = types.ModuleType(name)
+        package.__path__ = [path]
+        sys.modules[name] = package
+
+
+def init_worker(snapshot_path: str):
+    _bare_package("functions", FUNCTIONS_DIR)
+    _bare_package("functions.xpshacl_engine", os.path.join(FUNCTIONS_DIR, "xpshacl_engine"))
+
+    from functions.xpshacl_engine.context_retriever import ContextRetriever
+    from functions.xpshacl_engine.explanation_context import ExplanationContext
+    from functions.xpshacl_engine.justification_tree_builder import JustificationTreeBuilder
+    from functions.xpshacl_engine.parallel_prep import load_snapshot
+
+    data_graph, shapes_graph = load_snapshot(snapshot_path)
+    explanation_context = ExplanationContext(data_graph, shapes_graph)
+    _worker_state["tree_builder"] = JustificationTreeBuilder(data_graph, shapes_graph, explanation_context)
+    _worker_state["context_retriever"] = ContextRetriever(data_graph, shapes_graph, explanation_context)
+
+
+def prepare_chunk(violations):
+    """Returns `(justification tree root, context)` for each violation of a chunk."""
+    tree_builder = _worker_state["tree_builder"]
+    context_retriever = _worker_state["context_retriever"]
+    tree_builder.prepare(violations)
+    return [
+        (tree_builder.build_justification_tree(violation).root, context_retriever.retrieve_context(violation))
+        for violation in violations
+    ]
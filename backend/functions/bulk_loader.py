@@ -0,0 +1,326 @@
+"""
+Bulk Loader Module
+
+This module ingests RDF files into the triple store as background jobs.
+
+On Virtuoso the files are registered on the bulk loader's `DB.DBA.load_list`
+with `ld_add`, then several `rdf_loader_run()` calls (each in its own ISQL
+session) load them in parallel, one file per loader at a time. While the
+loaders run, the job polls `DB.DBA.load_list` for the state and error of each
+of its files, and once all loaders have returned it runs a `checkpoint` so the
+loaded data survives a restart. Virtuoso reads the files itself: their paths
+must be visible to the server and inside its `DirsAllowed`.
+
+With the embedded store the files are parsed in process, one after another,
+and reported through the same per-file progress.
+
+Key classes:
+- BulkLoadJob: Files, per-file states and progress of one ingest
+- BulkLoader: Starts jobs in background threads and keeps the recent ones
+
+Configuration:
+- BULK_LOADER_THREADS: Parallel `rdf_loader_run()` sessions (default: 2)
+- BULK_LOADER_POLL_SECONDS: Interval between two reads of the load list (default: 2)
+- VIRTUOSO_ISQL_PATH / VIRTUOSO_ISQL_PORT: ISQL binary and "[host:]port" of the server
+"""
+
+import logging
+import os
+import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import config
+from .triple_store import current_store
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+REGISTERING = "registering"
+LOADING = "loading"
+CHECKPOINTING = "checkpointing"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# File states, as in DB.DBA.load_list.ll_state plus a failed state
+FILE_PENDING = "pending"
+FILE_LOADING = "loading"
+FILE_LOADED = "loaded"
+FILE_FAILED = "failed"
+_LL_STATES = {0: FILE_PENDING, 1: FILE_LOADING, 2: FILE_LOADED}
+
+# Marks the load list rows in the ISQL output
+_ROW_MARKER = "LL|"
+# Finished jobs kept for status requests
+MAX_FINISHED_JOBS = 100
+
+
+class BulkLoadError(RuntimeError):
+    """Raised when ISQL fails or a bulk load job finishes with failed files."""
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class Isql:
+    """Runs SQL statements on Virtuoso through the `isql` command line client."""
+
+    def __init__(
+        self,
+        path: str = config.STORE_CONFIG["virtuoso"]["isql_path"],
+        port: str = str(config.STORE_CONFIG["virtuoso"]["isql_port"]),
+        username: str = config.USERNAME or "dba",
+        password: str = config.PASSWORD or "dba",
+    ):
+        self.path = path
+        self.port = port
+        self.username = username
+        self.password = password
+
+    def run(self, statements: str) -> str:
+        """Runs `statements` in one ISQL session and returns its output."""
+        try:
+            process = subprocess.run(
+                [self.path, self.port, self.username, self.password],
+                input=statements,
+                text=True,
+                capture_output=True,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise BulkLoadError(f"ISQL failed: {(e.stderr or e.stdout or '').strip()}") from e
+        except FileNotFoundError as e:
+            raise BulkLoadError(
+                f"ISQL tool not found at {self.path}. Please check if Virtuoso is installed correctly."
+            ) from e
+        # ISQL reports SQL errors on its output and carries on with the next statement
+        errors = [line.strip() for line in process.stdout.splitlines() if line.lstrip().startswith("*** Error")]
+        if errors:
+            raise BulkLoadError(f"ISQL error: {errors[0]}")
+        return process.stdout
+
+
+class BulkLoadJob:
+    """Files, per-file states and progress of one bulk load."""
+
+    def __init__(self, files: List[Tuple[str, str]]):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.status = QUEUED
+        self.files: List[Dict[str, Any]] = [
+            {
+                "path": path,
+                "graph": graph,
+                "state": FILE_PENDING,
+                "error": None,
+                "bytes": os.path.getsize(path) if os.path.isfile(path) else None,
+            }
+            for path, graph in files
+        ]
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the job finished; False if `timeout` expired first."""
+        return self._done.wait(timeout)
+
+    def file(self, path: str) -> Optional[Dict[str, Any]]:
+        return next((f for f in self.files if f["path"] == path), None)
+
+    def progress(self) -> Dict[str, Any]:
+        counts = {state: 0 for state in (FILE_PENDING, FILE_LOADING, FILE_LOADED, FILE_FAILED)}
+        for f in self.files:
+            counts[f["state"]] += 1
+        sizes = [f["bytes"] for f in self.files if f["bytes"] is not None]
+        loaded_bytes = sum(f["bytes"] or 0 for f in self.files if f["state"] == FILE_LOADED)
+        return {
+            "total": len(self.files),
+            "pending": counts[FILE_PENDING],
+            "loading": counts[FILE_LOADING],
+            "loaded": counts[FILE_LOADED],
+            "failed": counts[FILE_FAILED],
+            "bytes_total": sum(sizes) if sizes else None,
+            "bytes_loaded": loaded_bytes if sizes else None,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "progress": self.progress(),
+            "files": [dict(f) for f in self.files],
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": round(end - self.started_at, 3) if self.started_at else None,
+        }
+
+
+class BulkLoader:
+    """
+    Runs bulk load jobs in background threads.
+
+    `isql` is only used with Virtuoso; the embedded store loads the files
+    itself. The store is resolved when a job starts, so tests and
+    configuration changes take effect without recreating the loader.
+    """
+
+    def __init__(
+        self,
+        isql: Optional[Isql] = None,
+        loader_threads: int = config.BULK_LOADER_THREADS,
+        poll_interval: float = config.BULK_LOADER_POLL_SECONDS,
+    ):
+        self.isql = isql or Isql()
+        self.loader_threads = max(1, loader_threads)
+        self.poll_interval = poll_interval
+        self._jobs: "OrderedDict[str, BulkLoadJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- Public API ---
+
+    def submit(self, files: Iterable[Tuple[str, str]], isql: Optional[Isql] = None) -> BulkLoadJob:
+        """
+        Starts loading (path, graph URI) pairs and returns the job immediately.
+
+        `isql` overrides the loader's ISQL connection for this job.
+        """
+        files = list(files)
+        if not files:
+            raise ValueError("At least one file is required.")
+        job = BulkLoadJob(files)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._forget_finished_jobs()
+        threading.Thread(target=self._run, args=(job, isql or self.isql), name=f"bulk-load-{job.job_id}", daemon=True).start()
+        logger.info(f"Bulk load job {job.job_id} queued with {len(files)} files")
+        return job
+
+    def get(self, job_id: str) -> Optional[BulkLoadJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[BulkLoadJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    # --- Job execution ---
+
+    def _run(self, job: BulkLoadJob, isql: Isql):
+        job.started_at = time.time()
+        try:
+            store = current_store()
+            if store.embedded:
+                self._load_embedded(job, store)
+            else:
+                self._load_virtuoso(job, isql)
+            failed = [f for f in job.files if f["state"] == FILE_FAILED]
+            if failed:
+                job.status = FAILED
+                job.error = f"{len(failed)} of {len(job.files)} files failed to load"
+            else:
+                job.status = COMPLETED
+        except Exception as e:
+            logger.error(f"Bulk load job {job.job_id} failed: {e}")
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            job._done.set()
+        logger.info(
+            f"Bulk load job {job.job_id} {job.status} in {job.finished_at - job.started_at:.1f}s: {job.progress()}"
+        )
+
+    def _load_embedded(self, job: BulkLoadJob, store):
+        job.status = LOADING
+        for f in job.files:
+            f["state"] = FILE_LOADING
+            try:
+                store.load_file(f["path"], f["graph"])
+                f["state"] = FILE_LOADED
+            except Exception as e:
+                f["state"] = FILE_FAILED
+                f["error"] = str(e)
+
+    def _load_virtuoso(self, job: BulkLoadJob, isql: Isql):
+        job.status = REGISTERING
+        # Rows left from an earlier load of the same file would make ld_add skip it
+        isql.run("".join(
+            f"DELETE FROM DB.DBA.load_list WHERE ll_file = {_sql_string(f['path'])};\n"
+            f"ld_add({_sql_string(f['path'])}, {_sql_string(f['graph'])});\n"
+            for f in job.files
+        ))
+
+        job.status = LOADING
+        loader_count = min(self.loader_threads, len(job.files))
+        errors: List[str] = []
+        running = [loader_count]
+        finished = threading.Event()
+        lock = threading.Lock()
+
+        def run_loader():
+            try:
+                isql.run("rdf_loader_run();\n")
+            except BulkLoadError as e:
+                errors.append(str(e))
+            finally:
+                with lock:
+                    running[0] -= 1
+                    if not running[0]:
+                        finished.set()
+
+        for i in range(loader_count):
+            threading.Thread(target=run_loader, name=f"bulk-load-{job.job_id}-{i}", daemon=True).start()
+        while not finished.wait(self.poll_interval):
+            try:
+                self._poll(job, isql)
+            except BulkLoadError as e:
+                logger.warning(f"Could not read the load list of bulk load job {job.job_id}: {e}")
+        self._poll(job, isql)
+        if errors:
+            raise BulkLoadError(errors[0])
+
+        job.status = CHECKPOINTING
+        isql.run("checkpoint;\n")
+
+    def _poll(self, job: BulkLoadJob, isql: Isql):
+        """Updates the file states of `job` from DB.DBA.load_list."""
+        paths = ", ".join(_sql_string(f["path"]) for f in job.files)
+        output = isql.run(
+            f"SELECT concat('{_ROW_MARKER}', cast(ll_state AS VARCHAR), '|', coalesce(ll_error, ''), '|', ll_file) "
+            f"FROM DB.DBA.load_list WHERE ll_file IN ({paths});\n"
+        )
+        for line in output.splitlines():
+            line = line.strip()
+            if not line.startswith(_ROW_MARKER):
+                continue
+            state, error, path = line[len(_ROW_MARKER):].split("|", 2)
+            f = job.file(path)
+            if f is None:
+                continue
+            if error:
+                f["state"], f["error"] = FILE_FAILED, error
+            else:
+                f["state"] = _LL_STATES.get(int(state), FILE_PENDING)
+
+    def _forget_finished_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+
+# Process-wide bulk loader used by the landing routes
+bulk_loader = BulkLoader()
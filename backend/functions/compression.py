@@ -0,0 +1,122 @@
+"""
+Compression Module
+
+This module opens compressed files by codec name or file extension, so that
+archives and uploads can be read and written as plain binary streams. It also
+wraps readable streams for decompression (uploads being received) and
+compresses response payloads with the HTTP content coding a client accepts.
+
+gzip and bz2 come with Python; zstd needs the optional `zstandard` package and
+is reported as unavailable without it.
+"""
+
+import bz2
+import gzip
+import os
+from typing import BinaryIO, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+BZ2 = "bz2"
+
+# File extension of each codec
+EXTENSIONS = {GZIP: ".gz", ZSTD: ".zst", BZ2: ".bz2"}
+
+# HTTP content coding of each codec (bzip2 has none and is only used for files)
+CONTENT_ENCODINGS = {GZIP: "gzip", ZSTD: "zstd"}
+
+# Media type of each codec, for compressed downloads
+MIMETYPES = {GZIP: "application/gzip", ZSTD: "application/zstd", BZ2: "application/x-bzip2"}
+
+
+def available(codec: str) -> bool:
+    """Whether a codec can be used in this environment."""
+    if codec == ZSTD:
+        return zstandard is not None
+    return codec in EXTENSIONS
+
+
+def resolve_codec(preferred: Optional[str]) -> str:
+    """Returns the preferred codec if available, gzip otherwise."""
+    return preferred if preferred and available(preferred) else GZIP
+
+
+def codec_for(path: str) -> Optional[str]:
+    """Returns the codec of a file name by its extension, or None for uncompressed files."""
+    extension = os.path.splitext(path)[1].lower()
+    for codec, codec_extension in EXTENSIONS.items():
+        if extension == codec_extension:
+            return codec
+    return None
+
+
+def open_compressed(path: str, mode: str = "rb", codec: Optional[str] = None, level: Optional[int] = None) -> BinaryIO:
+    """
+    Opens a compressed file as a binary stream. `mode` is "rb" or "wb"; the
+    codec defaults to the one of the file extension, and files without a known
+    extension are opened uncompressed.
+    """
+    if mode not in ("rb", "wb"):
+        raise ValueError(f"Unsupported mode: {mode}")
+    codec = codec or codec_for(path)
+
+    if codec is None:
+        return open(path, mode)
+    if codec == GZIP:
+        return gzip.open(path, mode, compresslevel=level or 6)
+    if codec == BZ2:
+        return bz2.open(path, mode, compresslevel=level or 9)
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        raw = open(path, mode)
+        if mode == "wb":
+            return zstandard.ZstdCompressor(level=level or 3).stream_writer(raw, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def decompressing_reader(stream: BinaryIO, codec: Optional[str]) -> BinaryIO:
+    """Wraps a readable binary stream so that reads return its decompressed content."""
+    if codec is None:
+        return stream
+    if codec == GZIP:
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if codec == BZ2:
+        return bz2.BZ2File(stream, mode="rb")
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().stream_reader(stream, closefd=False)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def compress(data: bytes, codec: str, level: Optional[int] = None) -> bytes:
+    """Compresses a payload in one go."""
+    if codec == GZIP:
+        return gzip.compress(data, compresslevel=level or 6)
+    if codec == BZ2:
+        return bz2.compress(data, compresslevel=level or 9)
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=level or 3).compress(data)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def negotiate_encoding(accept_encodings, preferred: Optional[str] = None) -> Optional[str]:
+    """
+    Returns the codec to encode a response with, given the request's
+    Accept-Encoding (werkzeug Accept): the preferred codec if the client
+    accepts it and it is available, else gzip if accepted, else None.
+    """
+    candidates = [preferred, GZIP] if preferred else [GZIP]
+    for codec in candidates:
+        if codec in CONTENT_ENCODINGS and available(codec) and accept_encodings[CONTENT_ENCODINGS[codec]]:
+            return codec
+    return None
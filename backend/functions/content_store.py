@@ -0,0 +1,245 @@
+"""
+Content Store Module
+
+This module deduplicates uploaded files by content. Each file is hashed
+(SHA-256) while it is streamed to disk and stored once under its digest, so
+re-uploading the same shapes or data file keeps a single copy.
+
+Sessions reference shared, immutable graphs derived from the content: a shapes
+file is inserted once into `http://ex.org/Shapes/Content_<digest>` and every
+session validated against it records that graph in its registry entry. The
+session collector drops a shared graph, and deletes a stored file, once no
+registered session references it any more.
+
+Parsed graphs are kept in a bounded LRU by digest, together with the compiled
+pyshacl shapes graph of shapes files, so a repeated upload skips parsing and
+shape compilation as well as the insert.
+
+Key classes:
+- StoredFile: Digest, path and size of a stored upload
+- ContentStore: Content-addressed files, parse cache and compiled shapes
+
+Configuration:
+- CONTENT_STORE_DIR: Directory of the content-addressed uploads
+- CONTENT_CACHE_MAX_TRIPLES: Triples of parsed graphs kept in memory (default: 1000000)
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pyshacl import Validator
+from pyshacl.errors import ValidationFailure
+from rdflib import Graph
+
+import config
+from .compression import codec_for, open_compressed
+from .session_registry import SHARED_DATA_PREFIX, SHARED_SHAPES_PREFIX
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def shared_shapes_graph_uri(digest: str) -> str:
+    return SHARED_SHAPES_PREFIX + digest
+
+
+def shared_data_graph_uri(digest: str) -> str:
+    return SHARED_DATA_PREFIX + digest
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """An uploaded file stored under its content digest."""
+
+    digest: str
+    path: str
+    size: int
+    # True if the content was already stored by an earlier upload
+    reused: bool = False
+
+
+class _Parsed:
+    def __init__(self, graph: Graph):
+        self.graph = graph
+        self.triples = len(graph)
+        # pyshacl ShapesGraph of a shapes file, compiled on first validation
+        self.shapes = None
+        self.lock = threading.Lock()
+
+
+class ContentStore:
+    """Content-addressed upload files with an LRU of parsed and compiled graphs."""
+
+    def __init__(self, root: str = config.CONTENT_STORE_DIR,
+                 max_cached_triples: int = config.CONTENT_CACHE_MAX_TRIPLES):
+        self.root = root
+        self.max_cached_triples = max_cached_triples
+        self._lock = threading.Lock()
+        self._parsed: "OrderedDict[str, _Parsed]" = OrderedDict()
+        self._digest_locks: Dict[str, threading.Lock] = {}
+        self.parse_hits = 0
+        self.parse_misses = 0
+        self.compile_hits = 0
+
+    # --- Files ---
+
+    def path_for(self, digest: str, suffix: str = "") -> str:
+        return os.path.join(self.root, digest[:2], digest + suffix)
+
+    def save(self, stream, suffix: str = "", claim: Optional[Callable[[str], Any]] = None) -> StoredFile:
+        """Streams a file to the store, hashing it on the way; identical content is kept once (see `adopt`)."""
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        handle, temp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(handle, "wb") as out:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            return self.adopt(temp_path, digest.hexdigest(), size, suffix, claim)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def adopt(self, temp_path: str, digest: str, size: int, suffix: str = "",
+              claim: Optional[Callable[[str], Any]] = None) -> StoredFile:
+        """
+        Moves a file already spooled into the store (and hashed) under its digest.
+        `claim` is called with the digest under `lock(digest)`, so the session
+        collector cannot release the content before the caller references it.
+        """
+        path = self.path_for(digest, suffix)
+        with self.lock(digest):
+            if os.path.exists(path):
+                os.remove(temp_path)
+                stored = StoredFile(digest, path, size, reused=True)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+                stored = StoredFile(digest, path, size)
+            if claim is not None:
+                claim(digest)
+        return stored
+
+    def files(self, digest: str) -> List[str]:
+        """Returns the stored files of a digest (one per upload suffix)."""
+        directory = os.path.dirname(self.path_for(digest))
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.startswith(digest)]
+
+    def usage(self, digest: str) -> Tuple[int, int]:
+        """Returns the number of stored files of a digest and their size in bytes."""
+        paths = self.files(digest)
+        return len(paths), sum(os.path.getsize(path) for path in paths)
+
+    def remove(self, digest: str):
+        """Deletes the stored files of a digest and forgets its parsed graph."""
+        self.evict(digest)
+        for path in self.files(digest):
+            os.remove(path)
+
+    def lock(self, digest: str) -> threading.Lock:
+        """Serializes the creation and removal of the shared graphs of a digest."""
+        with self._lock:
+            return self._digest_locks.setdefault(digest, threading.Lock())
+
+    # --- Parsed graphs ---
+
+    def graph(self, stored: StoredFile, format: str = "turtle") -> Graph:
+        """
+        Returns the parsed graph of a stored file, from the cache when the same
+        content was parsed before. The graph is shared: callers must not modify it.
+        """
+        with self._lock:
+            entry = self._parsed.get(stored.digest)
+            if entry is not None:
+                self._parsed.move_to_end(stored.digest)
+                self.parse_hits += 1
+                return entry.graph
+            self.parse_misses += 1
+
+        if codec_for(stored.path):
+            with open_compressed(stored.path) as stream:
+                graph = Graph().parse(source=stream, format=format)
+        else:
+            graph = Graph().parse(stored.path, format=format)
+        return self.cache_graph(stored, graph)
+
+    def cached(self, digest: str) -> bool:
+        """Whether the parsed graph of a content digest is in the cache."""
+        with self._lock:
+            return digest in self._parsed
+
+    def cache_graph(self, stored: StoredFile, graph: Graph) -> Graph:
+        """
+        Keeps a graph parsed from a stored file; returns the cached graph of the
+        same content instead if there is one, so identical uploads share it.
+        """
+        with self._lock:
+            entry = self._parsed.get(stored.digest)
+            if entry is not None:
+                self._parsed.move_to_end(stored.digest)
+                return entry.graph
+            if len(graph) <= self.max_cached_triples:
+                self._parsed[stored.digest] = _Parsed(graph)
+                total = sum(e.triples for e in self._parsed.values())
+                while total > self.max_cached_triples:
+                    _, evicted = self._parsed.popitem(last=False)
+                    total -= evicted.triples
+        return graph
+
+    def validate(self, data_graph: Graph, shapes: StoredFile, shapes_graph: Graph, **options: Any):
+        """
+        Validates `data_graph` like pyshacl.validate and returns (conforms,
+        results graph, results text). The compiled shapes graph of a cached
+        shapes file is reused across validations, one at a time.
+        """
+        with self._lock:
+            entry = self._parsed.get(shapes.digest)
+        if entry is None or entry.graph is not shapes_graph:
+            return _run(Validator(data_graph, shacl_graph=shapes_graph, options=options))
+
+        with entry.lock:
+            validator = Validator(data_graph, shacl_graph=shapes_graph, options=options)
+            if entry.shapes is None:
+                entry.shapes = validator.shacl_graph
+            else:
+                validator.shacl_graph = entry.shapes
+                self.compile_hits += 1
+            return _run(validator)
+
+    def evict(self, digest: str):
+        with self._lock:
+            self._parsed.pop(digest, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cached_graphs": len(self._parsed),
+                "cached_triples": sum(e.triples for e in self._parsed.values()),
+                "parse_hits": self.parse_hits,
+                "parse_misses": self.parse_misses,
+                "compile_hits": self.compile_hits,
+            }
+
+
+def _run(validator: Validator):
+    try:
+        return validator.run()
+    except ValidationFailure as e:
+        return False, e, f"Validation Failure - {e.message}"
+
+
+# Process-wide content store used by the upload routes and the session collector
+content_store = ContentStore()
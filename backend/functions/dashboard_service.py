@@ -1,6 +1,7 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from . import virtuoso_service
+from . import session_registry
 
 def get_dashboard_summary() -> Dict[str, Any]:
     """Get dashboard summary with key metrics."""
@@ -392,7 +393,7 @@ def get_dashboard_data(validation_graph_uri: str = "http://ex.org/ValidationRepo
         if "Session_" in validation_graph_uri:
             # Extract session ID from validation graph URI
             session_id = validation_graph_uri.split("Session_")[1]
-            shapes_graph_uri = f"http://ex.org/Shapes/Session_{session_id}"
+            shapes_graph_uri = session_registry.shapes_graph_of(session_id)
         else:
             # Fallback to default graph for backward compatibility
             shapes_graph_uri = "http://ex.org/Shapes"
@@ -0,0 +1,351 @@
+"""
+Explanation Jobs Module
+
+This module runs AI explanation generation for validation sessions in the
+background, so that the HTTP request that performed the validation can return
+as soon as the basic report is ready.
+
+Each session becomes an `ExplanationJob`. Its violations are grouped by
+violation signature and every signature is queued as one task on a bounded
+queue that is drained by a small pool of worker threads. Results are recorded
+incrementally as each signature completes, together with per-session progress
+counters, and every event is appended to an NDJSON file so that completed
+explanations survive a restart. Signatures whose explanation is already known
+(e.g. found in the VKG right after validation) are recorded immediately and
+never queued.
+
+Key classes:
+- ExplanationJob: Progress counters and incremental results of one session
+- ExplanationJobManager: Bounded task queue, worker pool, persistence and
+  the event feed used to stream results to clients as they are produced
+
+Configuration:
+- EXPLANATION_WORKERS: Number of worker threads (default: 4)
+- EXPLANATION_QUEUE_SIZE: Maximum number of queued signature tasks (default: 1000)
+- EXPLANATION_JOBS_DIR: Directory holding the persisted job files
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+from functions.xpshacl_engine.violation_signature_factory import create_violation_signature
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+INTERRUPTED = "interrupted"
+
+
+class ExplanationJob:
+    """Progress counters and incremental results of the explanation job of one session."""
+
+    def __init__(self, session_id: str, total: int, violation_count: int = 0):
+        self.session_id = session_id
+        self.status = QUEUED
+        self.total = total
+        self.violation_count = violation_count
+        # Ask the LLM even for constraint components the template engine covers
+        self.force_llm = False
+        self.completed = 0
+        self.failed = 0
+        self.results: List[Dict[str, Any]] = []
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+        # Graphs and VKG used to generate the explanations; never persisted
+        self.data_graph = None
+        self.shapes_graph = None
+        self.vkg = None
+        self.explanation_context = None
+
+    @property
+    def done(self) -> bool:
+        return self.completed + self.failed >= self.total
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "violations": self.violation_count,
+        }
+
+    def to_dict(self, include_results: bool = True) -> Dict[str, Any]:
+        data = {
+            "session_id": self.session_id,
+            "status": self.status,
+            "progress": self.progress(),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if include_results:
+            data["explanations"] = list(self.results)
+        return data
+
+
+class ExplanationJobManager:
+    """
+    Runs explanation jobs on a bounded queue drained by worker threads.
+
+    `explain_fn(job, violation)` generates the explanation for one violation,
+    the representative of its signature, and returns a repair object
+    dictionary or None. The worker threads are started lazily on the first
+    submitted job.
+    """
+
+    def __init__(
+        self,
+        explain_fn: Callable[[ExplanationJob, Any], Optional[Dict[str, Any]]],
+        result_cache: Optional[Dict[str, Any]] = None,
+        workers: int = config.EXPLANATION_WORKERS,
+        max_queue_size: int = config.EXPLANATION_QUEUE_SIZE,
+        storage_dir: Optional[str] = config.EXPLANATION_JOBS_DIR,
+    ):
+        self.explain_fn = explain_fn
+        self.result_cache = result_cache if result_cache is not None else {}
+        self.workers = max(1, workers)
+        self.storage_dir = storage_dir
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._jobs: Dict[str, ExplanationJob] = {}
+        self._lock = threading.RLock()
+        # Signalled whenever a job records a result or finishes
+        self._changed = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+
+    # --- Public API ---
+
+    def submit(
+        self,
+        session_id: str,
+        violations: List[Any],
+        data_graph=None,
+        shapes_graph=None,
+        prefetched: Optional[Dict[Any, Dict[str, Any]]] = None,
+        signatures: Optional[List[Any]] = None,
+        force_llm: bool = False,
+    ) -> ExplanationJob:
+        """
+        Queues the explanation job of a session and returns immediately.
+
+        Violations are grouped by signature so that each distinct signature is
+        explained once; the result is shared by all its violations, identified
+        by their position in `violations`. Signatures found in `prefetched`
+        (signature -> explanation) are recorded as results right away and only
+        the others are queued. `signatures` may carry the already computed
+        signature of each violation. `force_llm` has every queued signature
+        explained by the LLM, even when a template covers it.
+        """
+        if signatures is None:
+            signatures = [create_violation_signature(violation) for violation in violations]
+        groups: Dict[Any, List[int]] = {}
+        for index, signature in enumerate(signatures):
+            groups.setdefault(signature, []).append(index)
+
+        job = ExplanationJob(session_id, total=len(groups), violation_count=len(violations))
+        job.data_graph = data_graph
+        job.shapes_graph = shapes_graph
+        job.force_llm = force_llm
+
+        with self._lock:
+            self._jobs[session_id] = job
+        self._persist(job, {"event": "job", **job.to_dict(include_results=False)})
+        self._ensure_workers()
+
+        prefetched = prefetched or {}
+        for signature, indices in groups.items():
+            if signature in prefetched:
+                self._record(job, signature, indices, prefetched[signature])
+                continue
+            try:
+                self._queue.put_nowait((job, signature, violations[indices[0]], indices))
+            except queue.Full:
+                logger.warning(f"Explanation queue is full; skipping signature {signature} of session {session_id}")
+                self._record(job, signature, indices, None, error="queue_full")
+
+        if job.total == 0:
+            self._finish(job)
+        return job
+
+    def get_job(self, session_id: str) -> Optional[ExplanationJob]:
+        """Returns the job of a session, restoring it from disk if necessary."""
+        with self._lock:
+            job = self._jobs.get(session_id)
+        if job is None:
+            job = self._load(session_id)
+            if job is not None:
+                with self._lock:
+                    self._jobs.setdefault(session_id, job)
+        return job
+
+    def iter_events(self, session_id: str, heartbeat: float = 15.0):
+        """
+        Yields `(event, data)` pairs for a session as its job progresses.
+
+        Each recorded result is yielded once as an "explanation" event, followed
+        by a "progress" event; a final "done" event carries the job status. When
+        nothing happens for `heartbeat` seconds, `(None, None)` is yielded so
+        that callers can keep the connection alive.
+        """
+        job = self.get_job(session_id)
+        if job is None:
+            yield "error", {"session_id": session_id, "message": "No explanation job for this session"}
+            return
+
+        sent = 0
+        last_progress = None
+        while True:
+            with self._changed:
+                if sent == len(job.results) and job.progress() == last_progress and job.status in (QUEUED, RUNNING):
+                    self._changed.wait(heartbeat)
+                results = job.results[sent:]
+                progress = job.progress()
+                status = job.status
+
+            sent += len(results)
+            for result in results:
+                yield "explanation", result
+            if progress != last_progress:
+                last_progress = progress
+                yield "progress", {"session_id": session_id, "status": status, "progress": progress}
+            elif not results and status in (QUEUED, RUNNING):
+                yield None, None
+
+            if status not in (QUEUED, RUNNING):
+                yield "done", job.to_dict(include_results=False)
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "workers": len(self._threads),
+            "queued_tasks": self._queue.qsize(),
+            "jobs": {status: sum(1 for job in jobs if job.status == status)
+                     for status in (QUEUED, RUNNING, COMPLETED, INTERRUPTED)},
+        }
+
+    # --- Workers ---
+
+    def _ensure_workers(self):
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._worker, name=f"explanation-worker-{len(self._threads)}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            job, signature, violation, indices = self._queue.get()
+            try:
+                with self._lock:
+                    if job.status == QUEUED:
+                        job.status = RUNNING
+                try:
+                    explanation = self.explain_fn(job, violation)
+                    self._record(job, signature, indices, explanation)
+                except Exception as e:
+                    logger.error(f"Error generating explanation for session {job.session_id}: {e}", exc_info=True)
+                    self._record(job, signature, indices, None, error=str(e))
+            finally:
+                self._queue.task_done()
+
+    def _record(self, job: ExplanationJob, signature, indices: List[int], explanation: Optional[Dict],
+                error: Optional[str] = None):
+        """Stores the result of one signature and updates the job's progress."""
+        entry = None
+        with self._lock:
+            if explanation:
+                entry = {
+                    "signature": str(signature),
+                    "violation_ids": indices,
+                    "explanation": {**explanation, "is_basic": False, "session_id": job.session_id},
+                }
+                job.results.append(entry)
+                job.completed += 1
+            else:
+                job.failed += 1
+            finished = job.done
+            if not finished:
+                self._changed.notify_all()
+
+        self._persist(job, {"event": "result", "result": entry, "error": error})
+        if finished:
+            self._finish(job)
+
+    def _finish(self, job: ExplanationJob):
+        with self._lock:
+            job.status = COMPLETED
+            job.finished_at = time.time()
+            job.data_graph = job.shapes_graph = job.vkg = job.explanation_context = None
+            self.result_cache[job.session_id] = list(job.results)
+            self._changed.notify_all()
+        self._persist(job, {"event": "status", "status": COMPLETED, "finished_at": job.finished_at})
+        logger.info(f"Explanation job for session {job.session_id} finished: {job.progress()}")
+
+    # --- Persistence ---
+
+    def _path(self, session_id: str) -> Optional[str]:
+        if not self.storage_dir:
+            return None
+        safe_id = "".join(c for c in session_id if c.isalnum() or c in "-_")
+        return os.path.join(self.storage_dir, f"{safe_id}.ndjson")
+
+    def _persist(self, job: ExplanationJob, event: Dict[str, Any]):
+        path = self._path(job.session_id)
+        if not path:
+            return
+        try:
+            os.makedirs(self.storage_dir, exist_ok=True)
+            with self._lock, open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, default=str) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to persist explanation job {job.session_id}: {e}")
+
+    def _load(self, session_id: str) -> Optional[ExplanationJob]:
+        """Replays a persisted job file. Jobs that never finished are marked as interrupted."""
+        path = self._path(session_id)
+        if not path or not os.path.exists(path):
+            return None
+
+        job = None
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    event = json.loads(line)
+                    if event["event"] == "job":
+                        job = ExplanationJob(session_id, event["progress"]["total"], event["progress"]["violations"])
+                        job.created_at = event.get("created_at", job.created_at)
+                    elif job is None:
+                        continue
+                    elif event["event"] == "result":
+                        if event.get("result"):
+                            job.results.append(event["result"])
+                            job.completed += 1
+                        else:
+                            job.failed += 1
+                    elif event["event"] == "status":
+                        job.status = event["status"]
+                        job.finished_at = event.get("finished_at")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load persisted explanation job {session_id}: {e}")
+            return None
+
+        if job is None:
+            return None
+        if job.status != COMPLETED:
+            job.status = INTERRUPTED
+        else:
+            self.result_cache[session_id] = list(job.results)
+        return job
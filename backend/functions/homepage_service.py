@@ -1,4 +1,5 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
+from SPARQLWrapper import JSON
+from .triple_store import SPARQLWrapper, endpoint_get
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -923,7 +924,7 @@ def get_most_violated_node_shape(shapes_graph_uri: str = SHAPES_GRAPH_URI, valid
                  sh:property ?propertyShape .
     }}
     """
-    response_shapes = requests.get(ENDPOINT_URL, params={"query": query_shapes, "format": "json"})
+    response_shapes = endpoint_get(ENDPOINT_URL, params={"query": query_shapes, "format": "json"})
     response_shapes.raise_for_status()
     shapes_results = response_shapes.json()["results"]["bindings"]
 
@@ -954,7 +955,7 @@ def get_most_violated_node_shape(shapes_graph_uri: str = SHAPES_GRAPH_URI, valid
           VALUES ?propertyShape {{ {property_shapes_values} }}
         }}
         """
-        response_violations = requests.get(ENDPOINT_URL, params={"query": query_violations, "format": "json"})
+        response_violations = endpoint_get(ENDPOINT_URL, params={"query": query_violations, "format": "json"})
         response_violations.raise_for_status()
         violations_results = response_violations.json()["results"]["bindings"]
 
@@ -999,7 +1000,7 @@ def get_most_violated_path(validation_report_uri: str = VALIDATION_REPORT_URI) -
     """
 
     # Execute the query
-    response = requests.get(
+    response = endpoint_get(
         ENDPOINT_URL,
         params={"query": query, "format": "json"},
     )
@@ -1042,7 +1043,7 @@ def get_most_violated_focus_node(validation_report_uri: str = VALIDATION_REPORT_
     """
 
     # Execute the query
-    response = requests.get(
+    response = endpoint_get(
         ENDPOINT_URL,
         params={"query": query, "format": "json"},
     )
@@ -1085,7 +1086,7 @@ def get_most_frequent_constraint_component(validation_report_uri: str = VALIDATI
     """
 
     # Execute the query
-    response = requests.get(
+    response = endpoint_get(
         ENDPOINT_URL,
         params={"query": query, "format": "json"},
     )
@@ -1124,7 +1125,7 @@ def get_distinct_constraint_components_count(validation_report_uri: str = VALIDA
     """
 
     # Execute the query
-    response = requests.get(
+    response = endpoint_get(
         ENDPOINT_URL,
         params={"query": query, "format": "json"},
     )
@@ -1167,7 +1168,7 @@ def get_distinct_constraints_count_in_shapes(shapes_graph_uri: str = SHAPES_GRAP
     """
 
     # Execute the query
-    response = requests.get(
+    response = endpoint_get(
         ENDPOINT_URL,
         params={"query": query, "format": "json"},
     )
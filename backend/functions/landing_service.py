@@ -1,9 +1,9 @@
-import subprocess
 import sys
 import os
+from typing import Optional
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import ENDPOINT_URL, SHAPES_GRAPH_URI, VALIDATION_REPORT_URI, SHACL_FEATURES
-from SPARQLWrapper import SPARQLWrapper, JSON
+from .bulk_loader import FAILED, BulkLoadError, BulkLoadJob, Isql, bulk_loader
 
 """
 Landing Service Module
@@ -12,9 +12,9 @@ This module provides functionality for loading RDF data into a Virtuoso database
 for SHACL validation visualization. It manages the initial data loading operations
 for the SHACL Dashboard.
 
-The primary function `load_graphs` uses the Virtuoso ISQL command-line interface
-to load SHACL shapes and validation report files into named graphs in the database.
-It handles parameter validation, subprocess execution, and error handling.
+The primary function `load_graphs` submits SHACL shapes and validation report
+files to the bulk loader (see bulk_loader), which loads them into named graphs
+in the database as a background job with per-file progress.
 
 Key functions:
 - load_graphs: Load RDF files containing SHACL shapes and validation reports
@@ -30,58 +30,52 @@ Configuration:
 #SHAPES_GRAPH_URI = "http://ex.org/ShapesGraph"
 #VALIDATION_REPORT_URI = "http://ex.org/ValidationReport"
 
-def load_graphs(directory: str, shapes_file: str, report_file: str, isql_port: str = "1111", username: str = "dba", password: str = "dba"):
+def load_graphs(directory: str, shapes_file: str, report_file: str, isql_port: Optional[str] = None,
+                username: Optional[str] = None, password: Optional[str] = None, wait: bool = True) -> BulkLoadJob:
     """
-    Load two RDF files (ShapesGraph and ValidationReport) into Virtuoso using ISQL.
+    Load two RDF files (ShapesGraph and ValidationReport) with the bulk loader.
 
     Args:
         directory (str): Directory containing the RDF files.
         shapes_file (str): Name of the ShapesGraph file.
         report_file (str): Name of the ValidationReport file.
-        isql_port (str, optional): ISQL port. Default is "1111".
-        username (str, optional): ISQL username. Default is "dba".
-        password (str, optional): ISQL password. Default is "dba".
+        isql_port (str, optional): ISQL "[host:]port". Defaults to VIRTUOSO_ISQL_PORT.
+        username (str, optional): ISQL username. Defaults to VIRTUOSO_USER or "dba".
+        password (str, optional): ISQL password. Defaults to VIRTUOSO_PASSWORD or "dba".
+        wait (bool, optional): Block until the load finished. Default is True.
+
+    Returns:
+        BulkLoadJob: The load job; still running if `wait` is False.
 
     Raises:
         TypeError: If any of the arguments are not strings.
         ValueError: If any of the arguments are empty strings.
+        BulkLoadError: If `wait` is True and the load failed.
     """
     # Validate input types
-    if not all(isinstance(arg, str) for arg in [directory, shapes_file, report_file, isql_port, username, password]):
+    if not all(isinstance(arg, str) for arg in [directory, shapes_file, report_file]):
+        raise TypeError("All arguments must be strings.")
+    if not all(arg is None or isinstance(arg, str) for arg in [isql_port, username, password]):
         raise TypeError("All arguments must be strings.")
 
     # Validate input values
     if not all(arg.strip() for arg in [directory, shapes_file, report_file]):
         raise ValueError("Directory, shapes_file, and report_file cannot be empty strings.")
 
-    # Construct ISQL command for loading RDF files
-    isql_command = f"""
-    ld_dir('{directory}', '{shapes_file}', '{SHAPES_GRAPH_URI}');
-    ld_dir('{directory}', '{report_file}', '{VALIDATION_REPORT_URI}');
-    rdf_loader_run();
-    """
-
-    print("Executing ISQL command to load graphs...")
-
-    try:
-        # Execute ISQL command
-        process = subprocess.run(
-            ["isql", isql_port, username, password],
-            input=isql_command,
-            text=True,
-            capture_output=True,
-            check=True
-        )
-
-        # Output success message
-        print("ISQL command executed successfully!")
-        print(process.stdout)
-
-    except subprocess.CalledProcessError as e:
-        # Handle command execution failure
-        print("ISQL command execution failed!")
-        print(e.stderr)
-
-    except FileNotFoundError:
-        # Handle missing ISQL tool
-        print("ISQL tool not found. Please check if Virtuoso is installed correctly.")
+    isql = None
+    if any(arg is not None for arg in [isql_port, username, password]):
+        default = bulk_loader.isql
+        isql = Isql(default.path, isql_port or default.port, username or default.username, password or default.password)
+
+    job = bulk_loader.submit(
+        [
+            (os.path.join(directory, shapes_file), SHAPES_GRAPH_URI),
+            (os.path.join(directory, report_file), VALIDATION_REPORT_URI),
+        ],
+        isql=isql,
+    )
+    if wait:
+        job.wait()
+        if job.status == FAILED:
+            raise BulkLoadError(job.error)
+    return job
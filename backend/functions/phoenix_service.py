@@ -5,16 +5,24 @@ import time
 from typing import List, Dict, Any, Optional
 from rdflib import Graph, RDF
 from rdflib.namespace import Namespace
-
-# SHACL namespace
-SHACL = Namespace("http://www.w3.org/ns/shacl#")
+import config
 from functions.xpshacl_engine.extended_shacl_validator import ExtendedShaclValidator
 from functions.xpshacl_engine.justification_tree_builder import JustificationTreeBuilder
 from functions.xpshacl_engine.context_retriever import ContextRetriever
-from functions.xpshacl_engine.repair_engine import SuggestionRepairGenerator
-from functions.xpshacl_engine.knowledge_graph import ViolationKnowledgeGraph
+from functions.xpshacl_engine.explanation_context import ExplanationContext
+from functions.xpshacl_engine.repair_engine import SuggestionRepairGenerator, TEMPLATE_MODEL_NAME
+from functions.xpshacl_engine.knowledge_graph import (
+    ViolationKnowledgeGraph, build_explanations_query, explanations_from_rows, signature_uri
+)
 from functions.xpshacl_engine.violation_signature_factory import create_violation_signature
 from .xpshacl_engine.xpshacl_architecture import ConstraintViolation
+from .explanation_jobs import ExplanationJob, ExplanationJobManager
+from .virtuoso_service import execute_sparql_query
+from .violation_table import ViolationTable
+from .session_registry import record_session, VALIDATED
+
+# SHACL namespace
+SHACL = Namespace("http://www.w3.org/ns/shacl#")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,6 +31,9 @@ logger = logging.getLogger(__name__)
 # Global cache for background explanations
 explanation_cache = {}
 
+# Serializes VKG loading and updates across explanation workers
+_vkg_lock = threading.Lock()
+
 def load_vkg_from_virtuoso():
     """
     Load ViolationKnowledgeGraph from Virtuoso database using SPARQL queries.
@@ -42,7 +53,8 @@ def load_vkg_from_virtuoso():
 
         # First, try to use a CONSTRUCT query with SPARQLWrapper directly
         try:
-            from SPARQLWrapper import SPARQLWrapper, DIGEST, TURTLE
+            from SPARQLWrapper import DIGEST, TURTLE
+            from functions.triple_store import SPARQLWrapper
             sparql = SPARQLWrapper(getattr(config, 'ENDPOINT_URL', 'http://localhost:8890/sparql'))
             if getattr(config, 'AUTH_REQUIRED', False):
                 sparql.setCredentials(getattr(config, 'USERNAME', ''), getattr(config, 'PASSWORD', ''))
@@ -127,8 +139,12 @@ def get_cached_explanation(violation: ConstraintViolation):
         logger.error(f"Error getting cached explanation: {str(e)}")
         return None
 
-def generate_enhanced_explanation(violation: ConstraintViolation) -> Optional[Dict[str, Any]]:
-    """Generate enhanced explanation for a violation."""
+
+def generate_enhanced_explanation(violation: ConstraintViolation, force_llm: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Generate enhanced explanation for a violation.
+    `force_llm` asks the LLM even for components a template covers.
+    """
     try:
         vkg = load_vkg_from_virtuoso()
         if not vkg:
@@ -152,11 +168,14 @@ def generate_enhanced_explanation(violation: ConstraintViolation) -> Optional[Di
             context_retriever = ContextRetriever(Graph(), Graph())
             context = context_retriever.retrieve_context(violation)
 
-            srg = SuggestionRepairGenerator(vkg=vkg)
-            repair_object = srg.generate_repair_object(violation, justification_tree, context)
+            srg = SuggestionRepairGenerator(vkg=vkg, template_first=config.TEMPLATE_FIRST)
+            repair_object = srg.generate_repair_object(violation, justification_tree, context, force_llm=force_llm)
 
             if repair_object:
-                vkg.add_violation(signature, srg.last_explanation_output)
+                # Templated explanations are cheap to render again; only LLM output is worth storing
+                output = srg.last_explanation_output
+                if output and output.provided_by_model != TEMPLATE_MODEL_NAME:
+                    vkg.add_violation(signature, output)
                 return {
                     'natural_language_explanation': clean_llm_text(repair_object.get('explanation_natural_language', '')),
                     'correction_suggestions': [clean_llm_text(repair_object.get('suggestion_natural_language', ''))],
@@ -181,15 +200,17 @@ def cache_explanation(violation: ConstraintViolation, explanation: Dict[str, Any
 
 def clear_explanation_cache():
     """Clear the explanation cache."""
-    global explanation_cache
-    explanation_cache = {}
+    # Cleared in place: the routes and the job manager hold references to it
+    explanation_cache.clear()
     logger.info("Explanation cache cleared")
 
-def batch_generate_explanations(violations: List[ConstraintViolation]) -> List[Optional[Dict[str, Any]]]:
+
+def batch_generate_explanations(violations: List[ConstraintViolation],
+                                force_llm: bool = False) -> List[Optional[Dict[str, Any]]]:
     """Generate explanations for multiple violations."""
     explanations = []
     for violation in violations:
-        explanation = generate_enhanced_explanation(violation)
+        explanation = generate_enhanced_explanation(violation, force_llm=force_llm)
         explanations.append(explanation)
     return explanations
 
@@ -300,14 +321,124 @@ def get_cache_hit_rate() -> float:
         return 0.0
     return min(1.0, total_entries / 100.0)  # Simple heuristic
 
-def validate_with_phoenix(data_file_path, shapes_file_path):
-    """Main validation function with Phoenix explanations."""
+
+def _cached_repair_object(cached_explanation) -> Dict[str, Any]:
+    """Formats an explanation stored in the VKG as a repair object."""
+    return {
+        'explanation_natural_language': clean_llm_text(cached_explanation.natural_language_explanation),
+        'suggestion_natural_language': ' '.join(clean_llm_text(s) for s in (cached_explanation.correction_suggestions or [])),
+        'proposed_repair': {'query': cached_explanation.proposed_repair_query or ''}
+    }
+
+
+def lookup_cached_explanations(signatures, language: str = "en") -> Dict[Any, Dict[str, Any]]:
+    """
+    Resolves many violation signatures against the VKG graph in Virtuoso with
+    batched VALUES queries (VKG_LOOKUP_BATCH_SIZE signatures per query) and
+    returns `signature -> repair object` for the signatures that have an explanation.
+    Lookup errors are logged and treated as misses.
+    """
+    by_uri = {}
+    for signature in signatures:
+        by_uri.setdefault(str(signature_uri(signature)), signature)
+    uris = list(by_uri)
+
+    found = {}
+    for start in range(0, len(uris), config.VKG_LOOKUP_BATCH_SIZE):
+        chunk = uris[start:start + config.VKG_LOOKUP_BATCH_SIZE]
+        try:
+            results = execute_sparql_query(build_explanations_query(chunk, language, config.VIOLATION_KG_GRAPH))
+        except Exception as e:
+            logger.warning(f"Batched VKG lookup failed for {len(chunk)} signatures: {e}")
+            continue
+        rows = (
+            tuple((binding.get(name) or {}).get('value') for name in ('sig', 'text', 'suggestions', 'query', 'model'))
+            for binding in results.get('results', {}).get('bindings', [])
+        )
+        for uri, explanation in explanations_from_rows(rows).items():
+            if uri in by_uri:
+                found[by_uri[uri]] = _cached_repair_object(explanation)
+
+    logger.info(f"VKG prefetch: {len(found)} of {len(uris)} signatures already explained")
+    return found
+
+
+def explain_violation_for_job(job, violation: ConstraintViolation,
+                              force_llm: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+    """
+    Generate the enhanced explanation of one violation for a background explanation job.
+    The VKG and the explanation context indexes are built once per job and shared by its workers.
+    `force_llm` (default: the job's) asks the LLM even for components a template covers.
+    """
+    if force_llm is None:
+        force_llm = job.force_llm
+    with _vkg_lock:
+        if job.vkg is None:
+            job.vkg = load_vkg_from_virtuoso() or ViolationKnowledgeGraph()
+        if job.explanation_context is None:
+            job.explanation_context = ExplanationContext(
+                job.data_graph if job.data_graph is not None else Graph(),
+                job.shapes_graph if job.shapes_graph is not None else Graph()
+            )
+    vkg = job.vkg
+    explanation_context = job.explanation_context
+
+    signature = create_violation_signature(violation)
+    cached_explanation = vkg.get_explanation(signature)
+    if cached_explanation:
+        return _cached_repair_object(cached_explanation)
+
+    data_graph = explanation_context.data_graph
+    shapes_graph = explanation_context.shapes_graph
+    tree_builder = JustificationTreeBuilder(data_graph, shapes_graph, explanation_context)
+    justification_tree = tree_builder.build_justification_tree(violation)
+    context = ContextRetriever(data_graph, shapes_graph, explanation_context).retrieve_context(violation)
+
+    srg = SuggestionRepairGenerator(vkg=vkg, template_first=config.TEMPLATE_FIRST)
+    repair_object = srg.generate_repair_object(violation, justification_tree, context, force_llm=force_llm)
+
+    # Templated explanations are cheap to render again; only LLM output is worth storing
+    output = srg.last_explanation_output
+    if repair_object and output and output.provided_by_model != TEMPLATE_MODEL_NAME:
+        with _vkg_lock:
+            vkg.add_violation(signature, output)
+    return repair_object
+
+
+# Background explanation jobs; completed results are published to explanation_cache
+job_manager = ExplanationJobManager(explain_violation_for_job, result_cache=explanation_cache)
+
+
+def explain_violation_on_demand(violation: ConstraintViolation, session_id: Optional[str] = None,
+                                force_llm: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Generate the enhanced explanation of one violation right away (e.g. when a user
+    asks for the LLM explanation), with the graphs of the session's explanation job
+    if they are still in memory.
+    """
+    job = job_manager.get_job(session_id) if session_id else None
+    if job is None:
+        job = ExplanationJob(session_id or "on_demand", total=1)
+    return explain_violation_for_job(job, violation, force_llm=force_llm)
+
+
+def validate_with_phoenix(data_file_path, shapes_file_path, data_graph=None, shapes_graph=None,
+                          data_digest=None, shapes_digest=None, force_llm=False):
+    """
+    Main validation function with Phoenix explanations.
+
+    Graphs already parsed from the files (e.g. while they were uploaded) are
+    used as given; the content digests are recorded with the session.
+    `force_llm` has the background job explain every violation with the LLM.
+    """
     try:
         logger.info(f"Starting validation with data file: {data_file_path}, shapes file: {shapes_file_path}")
 
         # Parse the input files
-        data_graph = Graph().parse(data_file_path, format='turtle')
-        shapes_graph = Graph().parse(shapes_file_path, format='turtle')
+        if data_graph is None:
+            data_graph = Graph().parse(data_file_path, format='turtle')
+        if shapes_graph is None:
+            shapes_graph = Graph().parse(shapes_file_path, format='turtle')
 
         logger.info("Files parsed successfully")
 
@@ -319,15 +450,30 @@ def validate_with_phoenix(data_file_path, shapes_file_path):
 
         # Generate unique session ID for this validation
         session_id = f"validation_{int(time.time())}_{hash(str(violations))}"
+        record_session(
+            session_id, status=VALIDATED, source='phoenix', violation_count=len(violations),
+            data_triples=len(data_graph), shapes_triples=len(shapes_graph),
+            data_digest=data_digest, shapes_digest=shapes_digest
+        )
 
         # Return basic explanations immediately for fast response
         explanations = []
         if violations:
+            # Explanations already in the VKG are attached now; only the misses are generated
+            signatures = [create_violation_signature(violation) for violation in violations]
+            prefetched = lookup_cached_explanations(signatures)
             logger.info(f"Starting background processing for {len(violations)} violations")
+            job_manager.submit(session_id, violations, data_graph, shapes_graph, prefetched=prefetched,
+                               signatures=signatures, force_llm=force_llm)
 
             # Generate basic explanations for immediate response
             violation_explanations = []
             for i, violation in enumerate(violations):
+                cached = prefetched.get(signatures[i])
+                if cached:
+                    violation_explanations.append({**cached, "session_id": session_id, "is_basic": False})
+                    continue
+
                 # Generate basic explanations for immediate response (no LLM calls here!)
                 focus_node = getattr(violation, 'focus_node', 'Unknown resource')
                 constraint_id = getattr(violation, 'constraint_id', 'Unknown constraint')
@@ -390,18 +536,14 @@ def validate_with_phoenix(data_file_path, shapes_file_path):
 
         constraints_map = {}
         if violations:
-            for v in violations:
-                constraint = getattr(v, 'constraint_id', 'Unknown')
+            # Count violations per constraint component with the columnar table
+            table = ViolationTable.from_violations(violations)
+            for constraint, count in table.group_count("component"):
                 if constraint is None:
-                    logger.warning(f"Warning: constraint_id not found in violation object. Violation: {v}")
+                    logger.warning(f"Warning: constraint_id not found for {count} violation objects")
                     constraint = "Unknown"
-                constraint = str(constraint)
-                if constraint not in constraints_map:
-                    constraints_map[constraint] = {
-                        'name': constraint,
-                        'violations': 0
-                    }
-                constraints_map[constraint]['violations'] += 1
+                entry = constraints_map.setdefault(constraint, {'name': constraint, 'violations': 0})
+                entry['violations'] += count
 
         constraints_data = list(constraints_map.values())
 
@@ -0,0 +1,234 @@
+"""
+Query Scheduler Module
+
+This module schedules the SPARQL requests of all tenants on the shared
+triple store endpoint. Every request takes a slot before it is sent:
+
+- at most QUERY_MAX_CONCURRENCY requests run at once (match it to the HTTP
+  ServerThreads of Virtuoso), and
+- at most QUERY_TENANT_CONCURRENCY of them belong to the same session tenant.
+
+When requests wait, slots are granted by weighted fair queuing: each tenant's
+requests get virtual finish tags that advance by the tenant's average query
+duration divided by its weight, and the waiting request with the smallest tag
+runs next. A tenant issuing many slow queries therefore queues behind itself
+instead of delaying everyone else.
+
+The tenant of a request is the validation session named in its query
+(`Session_<id>` graph URIs). Queries without a session (global dashboards,
+statistics, the VKG) share one tenant whose cap is QUERY_SHARED_CONCURRENCY,
+since all users' requests of that kind would otherwise queue behind a
+three-slot limit meant for a single session.
+
+Configuration:
+- QUERY_SCHEDULER_ENABLED: Schedule endpoint requests (default: true)
+- QUERY_MAX_CONCURRENCY: Requests running at once over all tenants (default: 10)
+- QUERY_TENANT_CONCURRENCY: Requests running at once per session (default: 3)
+- QUERY_SHARED_CONCURRENCY: Requests without a session running at once (default: QUERY_MAX_CONCURRENCY)
+- QUERY_QUEUE_TIMEOUT_SECONDS: Longest wait for a slot before failing (default: 60)
+"""
+
+import itertools
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+SHARED_TENANT = "shared"
+_SESSION_PATTERN = re.compile(r"Session_([A-Za-z0-9_-]+)")
+
+# Assumed duration of a tenant's first query, in seconds
+DEFAULT_COST = 0.1
+# Queue times kept for the percentiles in the metrics
+QUEUE_TIME_SAMPLES = 1000
+
+
+class QueryQueueTimeout(TimeoutError):
+    """Raised when a request waited longer than the queue timeout for a slot."""
+
+
+def tenant_of(query: Optional[str]) -> str:
+    """Returns the tenant (session ID) a query belongs to, or the shared tenant."""
+    match = _SESSION_PATTERN.search(query or "")
+    return match.group(1) if match else SHARED_TENANT
+
+
+class _Tenant:
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.running = 0
+        self.waiting = 0
+        self.finish_tag = 0.0
+        self.avg_duration = DEFAULT_COST
+        self.queries = 0
+        self.queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+
+
+class _Waiter:
+    def __init__(self, tenant: str, start_tag: float, tag: float, seq: int):
+        self.tenant = tenant
+        self.start_tag = start_tag
+        self.tag = tag
+        self.seq = seq
+        self.granted = False
+
+
+class QueryScheduler:
+    """Global and per-tenant concurrency caps with weighted fair queuing."""
+
+    def __init__(
+        self,
+        max_concurrency: int = config.QUERY_MAX_CONCURRENCY,
+        tenant_concurrency: int = config.QUERY_TENANT_CONCURRENCY,
+        shared_concurrency: int = config.QUERY_SHARED_CONCURRENCY,
+        queue_timeout: float = config.QUERY_QUEUE_TIMEOUT_SECONDS,
+        enabled: bool = config.QUERY_SCHEDULER_ENABLED,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.tenant_concurrency = max(1, tenant_concurrency)
+        self.shared_concurrency = max(1, shared_concurrency)
+        self.queue_timeout = queue_timeout
+        self.enabled = enabled
+        self._condition = threading.Condition()
+        self._tenants: Dict[str, _Tenant] = {}
+        self._weights: Dict[str, float] = {}
+        self._waiters: List[_Waiter] = []
+        self._running = 0
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._queue_times: Deque[float] = deque(maxlen=QUEUE_TIME_SAMPLES)
+        self._timeouts = 0
+
+    def set_weight(self, tenant: str, weight: float):
+        """Gives a tenant a larger (>1) or smaller (<1) share of the endpoint."""
+        with self._condition:
+            self._weights[tenant] = weight
+            if tenant in self._tenants:
+                self._tenants[tenant].weight = weight
+
+    def _tenant_cap(self, tenant: str) -> int:
+        return self.shared_concurrency if tenant == SHARED_TENANT else self.tenant_concurrency
+
+    @contextmanager
+    def slot(self, tenant: str = SHARED_TENANT):
+        """Holds a query slot for `tenant` while the block runs."""
+        if not self.enabled:
+            yield
+            return
+        self._acquire(tenant)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(tenant, time.monotonic() - started)
+
+    def _acquire(self, tenant: str):
+        queued = time.monotonic()
+        with self._condition:
+            state = self._tenants.get(tenant)
+            if state is None:
+                state = self._tenants[tenant] = _Tenant(self._weights.get(tenant, 1.0))
+            start_tag = max(self._virtual_time, state.finish_tag)
+            state.finish_tag = start_tag + state.avg_duration / state.weight
+            waiter = _Waiter(tenant, start_tag, state.finish_tag, next(self._seq))
+            self._waiters.append(waiter)
+            state.waiting += 1
+            self._dispatch()
+
+            deadline = queued + self.queue_timeout if self.queue_timeout else None
+            while not waiter.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._waiters.remove(waiter)
+                    state.waiting -= 1
+                    self._timeouts += 1
+                    raise QueryQueueTimeout(
+                        f"Query of tenant {tenant} waited more than {self.queue_timeout}s for a slot"
+                    )
+                self._condition.wait(remaining)
+
+            waited = time.monotonic() - queued
+            state.queries += 1
+            state.queue_seconds += waited
+            state.max_queue_seconds = max(state.max_queue_seconds, waited)
+            self._queue_times.append(waited)
+        if waited > 1:
+            logger.debug(f"Query of tenant {tenant} queued for {waited:.2f}s")
+
+    def _release(self, tenant: str, duration: float):
+        with self._condition:
+            state = self._tenants[tenant]
+            state.running -= 1
+            self._running -= 1
+            # Exponentially weighted duration: the cost charged for the tenant's next queries
+            state.avg_duration = 0.8 * state.avg_duration + 0.2 * duration
+            # Idle tenants are forgotten once they owe no service
+            if not state.running and not state.waiting and state.finish_tag <= self._virtual_time:
+                del self._tenants[tenant]
+            self._dispatch()
+
+    def _dispatch(self):
+        """Grants free slots to the eligible waiters with the smallest finish tags (lock held)."""
+        granted = False
+        while self._running < self.max_concurrency:
+            eligible = [
+                waiter for waiter in self._waiters
+                if self._tenants[waiter.tenant].running < self._tenant_cap(waiter.tenant)
+            ]
+            if not eligible:
+                break
+            waiter = min(eligible, key=lambda w: (w.tag, w.seq))
+            self._waiters.remove(waiter)
+            state = self._tenants[waiter.tenant]
+            state.waiting -= 1
+            state.running += 1
+            self._running += 1
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            waiter.granted = True
+            granted = True
+        if granted:
+            self._condition.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns the running and waiting requests, per-tenant counters and queue time percentiles."""
+        with self._condition:
+            samples = sorted(self._queue_times)
+
+            def percentile(p: float) -> float:
+                return round(samples[min(len(samples) - 1, int(p * len(samples)))], 4) if samples else 0.0
+
+            return {
+                "enabled": self.enabled,
+                "max_concurrency": self.max_concurrency,
+                "tenant_concurrency": self.tenant_concurrency,
+                "shared_concurrency": self.shared_concurrency,
+                "running": self._running,
+                "waiting": len(self._waiters),
+                "timeouts": self._timeouts,
+                "queue_time_p50": percentile(0.5),
+                "queue_time_p95": percentile(0.95),
+                "queue_time_max": round(samples[-1], 4) if samples else 0.0,
+                "tenants": {
+                    tenant: {
+                        "running": state.running,
+                        "waiting": state.waiting,
+                        "queries": state.queries,
+                        "avg_queue_seconds": round(state.queue_seconds / state.queries, 4) if state.queries else 0.0,
+                        "max_queue_seconds": round(state.max_queue_seconds, 4),
+                        "avg_duration": round(state.avg_duration, 4),
+                    }
+                    for tenant, state in self._tenants.items()
+                },
+            }
+
+
+# Process-wide scheduler shared by every endpoint client (see triple_store)
+query_scheduler = QueryScheduler()
@@ -0,0 +1,76 @@
+"""
+Response Compression Module
+
+This module compresses large API responses, such as validation reports and
+JSON-LD report graphs, for clients that accept it. Responses larger than
+RESPONSE_COMPRESSION_MIN_BYTES are encoded with the preferred codec (zstd
+when available and accepted, gzip otherwise) and sent with a Content-Encoding
+header, so browsers decompress them transparently.
+
+Report exports can also be downloaded as compressed files (gzip, zstd or
+bzip2). Streamed responses (server-sent events, file downloads), compressed
+files and responses that are already encoded are left as they are.
+
+Configuration:
+- RESPONSE_COMPRESSION: Enable compression of large responses (default: true)
+- RESPONSE_COMPRESSION_MIN_BYTES: Smallest response body compressed (default: 16384)
+- RESPONSE_COMPRESSION_CODEC: Preferred codec, zstd or gzip (default: zstd)
+"""
+
+import logging
+
+from flask import Response, request
+
+import config
+from .compression import CONTENT_ENCODINGS, EXTENSIONS, MIMETYPES, compress, negotiate_encoding, resolve_codec
+
+logger = logging.getLogger(__name__)
+
+# Media types that must reach the client unbuffered, or are compressed already
+UNCOMPRESSED_MIMETYPES = {"text/event-stream", *MIMETYPES.values()}
+
+
+def compress_response(response: Response) -> Response:
+    """after_request hook encoding large responses with a codec the client accepts."""
+    if not config.RESPONSE_COMPRESSION:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    if response.direct_passthrough or response.is_streamed or "Content-Encoding" in response.headers:
+        return response
+    if response.mimetype in UNCOMPRESSED_MIMETYPES:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < config.RESPONSE_COMPRESSION_MIN_BYTES:
+        return response
+
+    codec = negotiate_encoding(request.accept_encodings, config.RESPONSE_COMPRESSION_CODEC)
+    if codec is None:
+        return response
+    try:
+        encoded = compress(body, codec)
+    except Exception as e:
+        logger.warning(f"Could not compress response of {request.path}: {e}")
+        return response
+
+    response.set_data(encoded)
+    response.headers["Content-Encoding"] = CONTENT_ENCODINGS[codec]
+    logger.debug(f"Compressed response of {request.path} with {codec}: {len(body)} -> {len(encoded)} bytes")
+    return response
+
+
+def compressed_download(payload: bytes, filename: str, mimetype: str, codec: str = "") -> Response:
+    """
+    Returns a payload as a file download, compressed with `codec` (gzip, zstd
+    or bz2; unavailable codecs fall back to gzip) when one is given.
+    """
+    if codec:
+        codec = resolve_codec(codec)
+        payload = compress(payload, codec)
+        filename += EXTENSIONS[codec]
+        mimetype = MIMETYPES[codec]
+    response = Response(payload, mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
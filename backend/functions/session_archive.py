@@ -0,0 +1,378 @@
+"""
+Session Archive Module
+
+This module moves cold sessions out of the triple store. Archiving exports every
+graph of a session to one compressed N-Quads file (zstd when the `zstandard`
+package is installed, gzip otherwise) next to a JSON manifest with the graph
+URIs, triple counts and file checksum, verifies the export against the store,
+and then drops the graphs. The session stays in the registry with the
+`archived` status.
+
+Rehydration loads the file back into the same graphs and restores the
+session's status. The bulk loader reads the archive itself when the store can
+(the embedded store, or Virtuoso with gzip archives, which must then be in a
+directory of its `DirsAllowed`); otherwise the graphs are sent as INSERT DATA
+requests of about SESSION_ARCHIVE_PAGE_SIZE triples. It runs in a background
+thread on the first request that needs the session; `ensure_resident` lets the
+routes wait a bounded time for it, so dashboards either get the rehydrated
+session or a "retry later" answer.
+
+Configuration:
+- SESSION_ARCHIVE_DIR: Directory of the session archives
+- SESSION_ARCHIVE_AFTER_HOURS: Idle time after which the collector archives a session (default: 0, which disables archiving)
+- SESSION_ARCHIVE_CODEC: zstd or gzip (zstd falls back to gzip if unavailable)
+- SESSION_ARCHIVE_PAGE_SIZE: Triples fetched per export query and sent per insert
+- SESSION_REHYDRATE_WAIT_SECONDS: Time a request waits for a rehydration to finish
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from rdflib import BNode, Dataset, Graph, Literal, URIRef
+from rdflib.plugins.serializers.nquads import _nq_row
+from rdflib.plugins.serializers.nt import _nt_row
+
+import config
+from . import virtuoso_service
+from . import session_registry as registry_module
+from .bulk_loader import bulk_loader
+from .compression import EXTENSIONS, GZIP, open_compressed, resolve_codec
+from .session_registry import ARCHIVED, REHYDRATING, VALIDATED, session_graph_uris
+from .triple_store import VIRTUOSO_BNODE_PREFIX, current_store
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def term_from_binding(binding: Dict[str, str]):
+    """Converts a SPARQL JSON result binding to an rdflib term."""
+    kind, value = binding["type"], binding["value"]
+    if kind == "bnode" or (kind == "uri" and value.startswith(VIRTUOSO_BNODE_PREFIX)):
+        return BNode("".join(c if c.isalnum() else "_" for c in value))
+    if kind == "uri":
+        return URIRef(value)
+    return Literal(value, lang=binding.get("xml:lang"), datatype=binding.get("datatype"))
+
+
+def triple_pages(graph: Graph, page_size: int) -> Iterator[List[tuple]]:
+    """
+    Splits the triples of a graph into pages of about `page_size` triples.
+    Triples connected through blank nodes stay on one page, since each
+    INSERT DATA request gives blank node labels a scope of their own.
+    """
+    parent: Dict[BNode, BNode] = {}
+
+    def root(node):
+        while parent.setdefault(node, node) != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for s, _, o in graph:
+        if isinstance(s, BNode) and isinstance(o, BNode):
+            parent[root(o)] = root(s)
+
+    groups: Dict[Any, List[tuple]] = {}
+    page: List[tuple] = []
+    for triple in graph:
+        node = triple[0] if isinstance(triple[0], BNode) else triple[2]
+        if isinstance(node, BNode):
+            groups.setdefault(root(node), []).append(triple)
+        else:
+            page.append(triple)
+            if len(page) >= page_size:
+                yield page
+                page = []
+    for group in groups.values():
+        if page and len(page) + len(group) > page_size:
+            yield page
+            page = []
+        page.extend(group)
+    if page:
+        yield page
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SessionArchive:
+    """Exports cold sessions to compressed N-Quads files and loads them back on demand."""
+
+    def __init__(
+        self,
+        registry=None,
+        archive_dir: str = config.SESSION_ARCHIVE_DIR,
+        codec: str = config.SESSION_ARCHIVE_CODEC,
+        page_size: int = config.SESSION_ARCHIVE_PAGE_SIZE,
+        wait_seconds: float = config.SESSION_REHYDRATE_WAIT_SECONDS,
+        execute_query: Optional[Callable[[str], Dict]] = None,
+        execute_update: Optional[Callable[[str], Any]] = None,
+        loader: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ):
+        # None: the process-wide session registry, resolved at run time
+        self._registry = registry
+        self.archive_dir = archive_dir
+        self.codec = codec
+        self.page_size = max(1, page_size)
+        self.wait_seconds = wait_seconds
+        # None: the virtuoso_service functions, resolved at run time
+        self._execute_query = execute_query
+        self._execute_update = execute_update
+        # Loads an archive file into the store; defaults to the bulk loader, or paged inserts
+        self.loader = loader or self._load_archive
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._session_locks: Dict[str, threading.Lock] = {}
+        self._inflight: Dict[str, threading.Event] = {}
+
+    @property
+    def registry(self):
+        return self._registry if self._registry is not None else registry_module.session_registry
+
+    def session_dir(self, session_id: str) -> str:
+        return os.path.join(self.archive_dir, session_id)
+
+    def manifest(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the manifest of an archived session, or None."""
+        path = os.path.join(self.session_dir(session_id), MANIFEST_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # --- Archiving ---
+
+    def archive(self, session_id: str) -> Dict[str, Any]:
+        """
+        Exports the graphs of a session, verifies the triple counts, records the
+        archive in the registry and drops the graphs. Returns the manifest.
+        """
+        with self._session_lock(session_id):
+            entry = self.registry.get(session_id)
+            if entry is None:
+                raise KeyError(session_id)
+            if entry["status"] == ARCHIVED:
+                return self.manifest(session_id)
+            if entry["status"] != VALIDATED:
+                raise ValueError(f"Session {session_id} is {entry['status']} and cannot be archived")
+
+            counts = self._count_triples(session_graph_uris(session_id, entry))
+            codec = resolve_codec(self.codec)
+            directory = self.session_dir(session_id)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, "graphs.nq" + EXTENSIONS[codec])
+            partial = path + ".partial"
+
+            started = time.time()
+            written = {}
+            try:
+                with open_compressed(partial, "wb", codec) as out:
+                    for uri in counts:
+                        written[uri] = self._export_graph(uri, out)
+                if written != counts:
+                    raise RuntimeError(f"Export of session {session_id} is incomplete: {written} != {counts}")
+                os.replace(partial, path)
+            except Exception:
+                if os.path.exists(partial):
+                    os.remove(partial)
+                raise
+
+            manifest = {
+                "session_id": session_id,
+                "archived_at": time.time(),
+                "file": os.path.basename(path),
+                "codec": codec,
+                "bytes": os.path.getsize(path),
+                "sha256": file_digest(path),
+                "graphs": counts,
+                "status": entry["status"],
+            }
+            manifest_path = os.path.join(directory, MANIFEST_NAME)
+            with open(manifest_path + ".partial", "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(manifest_path + ".partial", manifest_path)
+
+            self.registry.update(session_id, status=ARCHIVED, archive_path=path)
+            if counts:
+                self._update(" ;\n".join(f"DROP SILENT GRAPH <{uri}>" for uri in counts))
+            logger.info(
+                f"Archived session {session_id}: {sum(counts.values())} triples in {len(counts)} graphs, "
+                f"{manifest['bytes']} bytes ({codec}, {time.time() - started:.1f}s)"
+            )
+            return manifest
+
+    def _export_graph(self, graph_uri: str, out) -> int:
+        """Writes one graph as N-Quads, a page of triples per query. Returns the number of triples."""
+        context = URIRef(graph_uri)
+        written = offset = 0
+        while True:
+            query = f"""
+            SELECT ?s ?p ?o
+            WHERE {{ GRAPH <{graph_uri}> {{ ?s ?p ?o }} }}
+            ORDER BY ?s ?p ?o
+            LIMIT {self.page_size} OFFSET {offset}
+            """
+            bindings = self._query(query).get("results", {}).get("bindings", [])
+            for binding in bindings:
+                triple = tuple(term_from_binding(binding[name]) for name in ("s", "p", "o"))
+                out.write(_nq_row(triple, context).encode("utf-8"))
+            written += len(bindings)
+            if len(bindings) < self.page_size:
+                return written
+            offset += self.page_size
+
+    def _count_triples(self, graphs) -> Dict[str, int]:
+        """Counts the triples of the non-empty graphs among `graphs`."""
+        values = " ".join(f"<{uri}>" for uri in graphs)
+        query = f"""
+        SELECT ?g (COUNT(*) AS ?triples)
+        WHERE {{
+            VALUES ?g {{ {values} }}
+            GRAPH ?g {{ ?s ?p ?o }}
+        }}
+        GROUP BY ?g
+        """
+        bindings = self._query(query).get("results", {}).get("bindings", [])
+        counts = {binding["g"]["value"]: int(binding["triples"]["value"]) for binding in bindings}
+        return {uri: counts[uri] for uri in graphs if counts.get(uri)}
+
+    # --- Rehydration ---
+
+    def rehydrate(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Loads an archived session back into the store and restores its status.
+        Returns the manifest, or None if the session is not archived.
+        """
+        with self._session_lock(session_id):
+            entry = self.registry.get(session_id)
+            if entry is None or entry["status"] not in (ARCHIVED, REHYDRATING):
+                return None
+            manifest = self.manifest(session_id)
+            if manifest is None:
+                raise FileNotFoundError(f"No archive manifest for session {session_id}")
+            path = os.path.join(self.session_dir(session_id), manifest["file"])
+
+            started = time.time()
+            self.registry.update(session_id, status=REHYDRATING)
+            try:
+                if file_digest(path) != manifest["sha256"]:
+                    raise RuntimeError(f"Archive of session {session_id} is corrupt (checksum mismatch)")
+                self.loader(path, manifest)
+            except Exception:
+                self.registry.update(session_id, status=ARCHIVED)
+                raise
+
+            self.registry.update(session_id, status=manifest.get("status", VALIDATED), archive_path=None)
+            shutil.rmtree(self.session_dir(session_id), ignore_errors=True)
+            logger.info(f"Rehydrated session {session_id} in {time.time() - started:.1f}s")
+            return manifest
+
+    def _load_archive(self, path: str, manifest: Dict[str, Any]):
+        """Has the bulk loader read the archive when the store can, and inserts it in pages otherwise."""
+        if not manifest["graphs"]:
+            return
+        store = current_store()
+        bulk = store.embedded or (store.name == "virtuoso" and manifest["codec"] == GZIP)
+        if self._execute_update is not None or not bulk:
+            self._insert_graphs(path, manifest)
+            return
+
+        # N-Quads carry their graphs; the graph given to the loader is only a default
+        job = bulk_loader.submit([(os.path.abspath(path), next(iter(manifest["graphs"])))])
+        job.wait()
+        if job.error:
+            raise RuntimeError(f"Bulk load of the archive failed: {job.error}")
+        counts = self._count_triples(manifest["graphs"])
+        if counts != manifest["graphs"]:
+            raise RuntimeError(f"Rehydrated graphs have {counts} triples, expected {manifest['graphs']}")
+
+    def _insert_graphs(self, path: str, manifest: Dict[str, Any]):
+        """Parses an archive and inserts each graph with INSERT DATA requests of about `page_size` triples."""
+        dataset = Dataset()
+        with open_compressed(path, "rb", manifest["codec"]) as f:
+            dataset.parse(source=f, format="nquads")
+        for uri, expected in manifest["graphs"].items():
+            graph = dataset.graph(URIRef(uri))
+            if len(graph) != expected:
+                raise RuntimeError(f"Archived graph {uri} has {len(graph)} triples, expected {expected}")
+            for page in triple_pages(graph, self.page_size):
+                self._update(f"""
+                INSERT DATA {{
+                    GRAPH <{uri}> {{
+                        {"".join(_nt_row(triple) for triple in page)}
+                    }}
+                }}
+                """)
+
+    def request_rehydration(self, session_id: str) -> threading.Event:
+        """Starts a background rehydration unless one is running; the event is set when it ends."""
+        with self._lock:
+            event = self._inflight.get(session_id)
+            if event is None:
+                event = threading.Event()
+                self._inflight[session_id] = event
+                threading.Thread(
+                    target=self._rehydrate_in_background, args=(session_id, event),
+                    name=f"rehydrate-{session_id}", daemon=True,
+                ).start()
+        return event
+
+    def _rehydrate_in_background(self, session_id: str, event: threading.Event):
+        try:
+            self.rehydrate(session_id)
+            self.errors.pop(session_id, None)
+        except Exception as e:
+            logger.error(f"Rehydration of session {session_id} failed: {e}", exc_info=True)
+            self.errors[session_id] = str(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(session_id, None)
+            event.set()
+
+    def ensure_resident(self, session_id: Optional[str], wait: Optional[float] = None) -> bool:
+        """
+        Returns True when the session's graphs are in the store. An archived
+        session is rehydrated in the background and waited for up to `wait`
+        seconds; False means it is still rehydrating (or failed to).
+        """
+        if not session_id:
+            return True
+        try:
+            entry = self.registry.get(session_id)
+        except Exception as e:
+            logger.warning(f"Could not read session {session_id}: {e}")
+            return True
+        if entry is None or entry["status"] not in (ARCHIVED, REHYDRATING):
+            return True
+
+        self.request_rehydration(session_id).wait(self.wait_seconds if wait is None else wait)
+        entry = self.registry.get(session_id)
+        return entry is not None and entry["status"] not in (ARCHIVED, REHYDRATING)
+
+    # --- Helpers ---
+
+    def _session_lock(self, session_id: str) -> threading.Lock:
+        with self._lock:
+            return self._session_locks.setdefault(session_id, threading.Lock())
+
+    def _query(self, query: str) -> Dict:
+        return (self._execute_query or virtuoso_service.execute_sparql_query)(query)
+
+    def _update(self, query: str):
+        return (self._execute_update or virtuoso_service.execute_sparql_update)(query)
+
+
+# Process-wide archive used by the session collector and the routes
+session_archive = SessionArchive()
@@ -0,0 +1,385 @@
+"""
+Session Garbage Collector Module
+
+This module reclaims the storage of dead validation sessions. Every upload
+leaves `Session_*` named graphs in the triple store (and uploads made before
+the content store, a directory under `uploads/`). Nothing else ever removes
+them, so the store's buffer pool and disk fill up and global queries slow down.
+
+A session is collected when it was not used for SESSION_TTL_HOURS, or when more
+than SESSION_MAX_RETAINED sessions exist (least recently used first). The
+sessions come from the session registry; upload directories of sessions the
+registry does not know (e.g. created before it existed) are treated as
+sessions last used at the directory's modification time.
+
+Graphs are dropped with batched `DROP SILENT GRAPH` updates, and only inside
+the off-peak window (SESSION_GC_WINDOW, e.g. "01:00-05:00" local time) unless a
+run is forced. Each run reports the reclaimed sessions, graphs, triples, files
+and bytes.
+
+Sessions idle for SESSION_ARCHIVE_AFTER_HOURS but not yet expired are archived
+instead: their graphs move to compressed files (see session_archive) and come
+back on first access. Collecting an archived session deletes its archive.
+
+Shared content graphs and stored upload files (see content_store) are
+reference counted through the registry: they are released when the last
+session referencing their digest is collected.
+
+Configuration:
+- SESSION_GC_ENABLED: Run the collector in a background thread (default: false)
+- SESSION_TTL_HOURS: Idle time after which a session is collected (default: 168)
+- SESSION_MAX_RETAINED: Maximum number of retained sessions (default: 500)
+- SESSION_GC_INTERVAL_SECONDS: Time between background runs (default: 3600)
+- SESSION_GC_WINDOW: Off-peak window for background runs; empty means any time
+- SESSION_GC_BATCH_SIZE: Graphs dropped per update request (default: 20)
+- SESSION_ARCHIVE_AFTER_HOURS: Idle time after which a session is archived (default: 0, which disables archiving)
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import config
+from . import virtuoso_service
+from . import session_registry as registry_module
+from .content_store import shared_data_graph_uri, shared_shapes_graph_uri
+from .session_registry import REHYDRATING, VALIDATED, VALIDATING, session_graph_uris
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_window(window: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parses "HH:MM-HH:MM" into start and end minutes of the day; None means no restriction."""
+    if not window or not window.strip():
+        return None
+
+    def to_minutes(text: str) -> int:
+        hours, _, minutes = text.strip().partition(":")
+        return int(hours) * 60 + int(minutes or 0)
+
+    start, end = window.split("-", 1)
+    return to_minutes(start), to_minutes(end)
+
+
+def in_window(window: Optional[Tuple[int, int]], now: Optional[datetime] = None) -> bool:
+    """Whether `now` (local time) falls in the window; windows may wrap around midnight."""
+    if window is None:
+        return True
+    now = now or datetime.now()
+    minute = now.hour * 60 + now.minute
+    start, end = window
+    if start <= end:
+        return start <= minute < end
+    return minute >= start or minute < end
+
+
+def _path_size(path: str) -> Tuple[int, int]:
+    """Returns `(files, bytes)` under a file or directory."""
+    if os.path.isfile(path):
+        return 1, os.path.getsize(path)
+    files = size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+                files += 1
+            except OSError:
+                pass
+    return files, size
+
+
+class SessionGarbageCollector:
+    """Drops the graphs and files of expired sessions, in batches and off-peak."""
+
+    def __init__(
+        self,
+        registry=None,
+        uploads_dir: str = os.path.join(BACKEND_DIR, "uploads"),
+        ttl_hours: float = config.SESSION_TTL_HOURS,
+        max_sessions: int = config.SESSION_MAX_RETAINED,
+        batch_size: int = config.SESSION_GC_BATCH_SIZE,
+        window: Optional[str] = config.SESSION_GC_WINDOW,
+        interval: float = config.SESSION_GC_INTERVAL_SECONDS,
+        execute_query: Optional[Callable[[str], Dict]] = None,
+        execute_update: Optional[Callable[[str], Any]] = None,
+        archive=None,
+        archive_after_hours: float = config.SESSION_ARCHIVE_AFTER_HOURS,
+        content=None,
+    ):
+        # None: the process-wide session registry, resolved at run time
+        self._registry = registry
+        self.uploads_dir = uploads_dir
+        self.ttl = ttl_hours * 3600
+        self.max_sessions = max_sessions
+        self.batch_size = max(1, batch_size)
+        self.window_text = window or None
+        self.window = parse_window(window)
+        self.interval = interval
+        # None: the virtuoso_service functions, resolved at run time
+        self._execute_query = execute_query
+        self._execute_update = execute_update
+        # None: the process-wide session archive, resolved at run time
+        self._archive = archive
+        self.archive_after = archive_after_hours * 3600
+        # None: the process-wide content store, resolved at run time
+        self._content = content
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def registry(self):
+        return self._registry if self._registry is not None else registry_module.session_registry
+
+    @property
+    def content(self):
+        if self._content is None:
+            from .content_store import content_store
+            return content_store
+        return self._content
+
+    @property
+    def archive(self):
+        if self._archive is None:
+            from .session_archive import session_archive
+            return session_archive
+        return self._archive
+
+    # --- Selection ---
+
+    def expired_sessions(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the registry entries to collect: sessions idle for longer than the
+        TTL, plus the least recently used ones beyond `max_sessions`. Sessions that
+        are still validating are only collected once they exceed the TTL.
+        """
+        now = now or time.time()
+        selected = {entry["session_id"]: entry for entry in self.registry.unused_since(now - self.ttl)}
+        if self.max_sessions and self.max_sessions > 0:
+            for entry in self.registry.least_recently_used(skip=self.max_sessions):
+                if entry["status"] not in (VALIDATING, REHYDRATING):
+                    selected.setdefault(entry["session_id"], entry)
+        return list(selected.values())
+
+    def cold_sessions(self, exclude: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Returns validated sessions idle for longer than the archive threshold, except `exclude`."""
+        if not self.archive_after or self.archive_after <= 0:
+            return []
+        exclude = set(exclude)
+        return [
+            entry["session_id"]
+            for entry in self.registry.unused_since((now or time.time()) - self.archive_after)
+            if entry["status"] == VALIDATED and entry["session_id"] not in exclude
+        ]
+
+    def orphaned_uploads(self, known: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Returns upload directories of unregistered sessions not modified within the TTL."""
+        if not os.path.isdir(self.uploads_dir):
+            return []
+        cutoff = (now or time.time()) - self.ttl
+        known = set(known)
+        orphans = []
+        for name in sorted(os.listdir(self.uploads_dir)):
+            path = os.path.join(self.uploads_dir, name)
+            if name not in known and os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                if self.registry.get(name) is None:
+                    orphans.append(name)
+        return orphans
+
+    # --- Collection ---
+
+    def collect(self, force: bool = False, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Runs one collection and returns its report. Outside the off-peak window the
+        run is skipped unless `force` is set; `dry_run` only reports what would be reclaimed.
+        """
+        started = time.time()
+        report: Dict[str, Any] = {
+            "started_at": started,
+            "dry_run": dry_run,
+            "skipped": None,
+            "sessions": [],
+            "graphs_dropped": 0,
+            "triples_reclaimed": 0,
+            "files_deleted": 0,
+            "bytes_reclaimed": 0,
+            "sessions_archived": [],
+            "content_released": [],
+            "errors": [],
+        }
+        if not force and not in_window(self.window):
+            report["skipped"] = "outside_window"
+            return report
+        if not self._run_lock.acquire(blocking=False):
+            report["skipped"] = "already_running"
+            return report
+
+        try:
+            entries = self.expired_sessions(started)
+            sessions = [(entry["session_id"], entry) for entry in entries]
+            sessions += [(name, None) for name in self.orphaned_uploads([s for s, _ in sessions], started)]
+            report["sessions"] = [session_id for session_id, _ in sessions]
+
+            graphs = [uri for session_id, entry in sessions for uri in session_graph_uris(session_id, entry)]
+            paths = [
+                (session_id, path)
+                for session_id, _ in sessions
+                for path in (os.path.join(self.uploads_dir, session_id), self.archive.session_dir(session_id))
+                if os.path.exists(path)
+            ]
+
+            dropped_sessions = set(report["sessions"])
+            for start in range(0, len(graphs), self.batch_size):
+                batch = graphs[start:start + self.batch_size]
+                try:
+                    triples = self._count_triples(batch)
+                    if not dry_run:
+                        self._drop_graphs(batch)
+                    report["graphs_dropped"] += sum(1 for uri in batch if triples.get(uri))
+                    report["triples_reclaimed"] += sum(triples.values())
+                except Exception as e:
+                    logger.error(f"Failed to drop {len(batch)} session graphs: {e}")
+                    report["errors"].append(str(e))
+                    # Keep the registry entries (and files) of sessions whose graphs are still there
+                    dropped_sessions -= {session_id for session_id, entry in sessions
+                                         if set(session_graph_uris(session_id, entry)) & set(batch)}
+
+            for session_id, path in paths:
+                if session_id not in dropped_sessions:
+                    continue
+                files, size = _path_size(path)
+                try:
+                    if not dry_run and os.path.isdir(path):
+                        shutil.rmtree(path)
+                    elif not dry_run:
+                        os.remove(path)
+                    report["files_deleted"] += files
+                    report["bytes_reclaimed"] += size
+                except OSError as e:
+                    logger.error(f"Failed to delete {path}: {e}")
+                    report["errors"].append(str(e))
+
+            if not dry_run:
+                for session_id in dropped_sessions:
+                    self.registry.remove(session_id)
+
+            # Shared content goes once the last session referencing it is gone
+            digests = {entry.get(column) for session_id, entry in sessions
+                       if entry and session_id in dropped_sessions
+                       for column in ("data_digest", "shapes_digest")} - {None}
+            for digest in sorted(digests):
+                self._release_content(digest, dropped_sessions, report, dry_run)
+
+            for session_id in self.cold_sessions(report["sessions"], started):
+                try:
+                    if not dry_run:
+                        self.archive.archive(session_id)
+                    report["sessions_archived"].append(session_id)
+                except Exception as e:
+                    logger.error(f"Failed to archive session {session_id}: {e}")
+                    report["errors"].append(str(e))
+        finally:
+            self._run_lock.release()
+
+        report["duration"] = round(time.time() - started, 3)
+        if not dry_run:
+            self.last_report = report
+        logger.info(
+            f"Session GC: {len(report['sessions'])} sessions, {report['graphs_dropped']} graphs, "
+            f"{report['triples_reclaimed']} triples, {report['files_deleted']} files, "
+            f"{report['bytes_reclaimed']} bytes, {len(report['sessions_archived'])} archived"
+            f"{' (dry run)' if dry_run else ''}"
+        )
+        return report
+
+    def _release_content(self, digest: str, dropped_sessions: Set[str], report: Dict[str, Any], dry_run: bool):
+        """Drops the shared graphs and stored files of a digest no remaining session references."""
+        content = self.content
+        with content.lock(digest):
+            referencing = {
+                session_id
+                for column in ("data_digest", "shapes_digest")
+                for session_id in self.registry.referencing(column, digest)
+            }
+            if referencing - dropped_sessions:
+                return
+            graphs = [shared_shapes_graph_uri(digest), shared_data_graph_uri(digest)]
+            try:
+                triples = self._count_triples(graphs)
+                files, size = content.usage(digest)
+                if not dry_run:
+                    self._drop_graphs(graphs)
+                    content.remove(digest)
+            except Exception as e:
+                logger.error(f"Failed to release shared content {digest}: {e}")
+                report["errors"].append(str(e))
+                return
+        report["content_released"].append(digest)
+        report["graphs_dropped"] += sum(1 for uri in graphs if triples.get(uri))
+        report["triples_reclaimed"] += sum(triples.values())
+        report["files_deleted"] += files
+        report["bytes_reclaimed"] += size
+
+    def _count_triples(self, graphs: List[str]) -> Dict[str, int]:
+        """Counts the triples of several graphs with one query."""
+        values = " ".join(f"<{uri}>" for uri in graphs)
+        query = f"""
+        SELECT ?g (COUNT(*) AS ?triples)
+        WHERE {{
+            VALUES ?g {{ {values} }}
+            GRAPH ?g {{ ?s ?p ?o }}
+        }}
+        GROUP BY ?g
+        """
+        result = (self._execute_query or virtuoso_service.execute_sparql_query)(query)
+        return {
+            binding["g"]["value"]: int(binding["triples"]["value"])
+            for binding in result.get("results", {}).get("bindings", [])
+        }
+
+    def _drop_graphs(self, graphs: List[str]):
+        """Drops several graphs in one update request."""
+        execute_update = self._execute_update or virtuoso_service.execute_sparql_update
+        execute_update(" ;\n".join(f"DROP SILENT GRAPH <{uri}>" for uri in graphs))
+
+    # --- Background thread ---
+
+    def start(self):
+        """Starts the background collector thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-gc", daemon=True)
+        self._thread.start()
+        logger.info(f"Session GC started (TTL {self.ttl / 3600:g}h, max {self.max_sessions} sessions)")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.collect()
+            except Exception as e:
+                logger.error(f"Session GC run failed: {e}", exc_info=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "ttl_hours": self.ttl / 3600,
+            "max_sessions": self.max_sessions,
+            "interval_seconds": self.interval,
+            "window": self.window_text,
+            "last_report": self.last_report,
+        }
+
+
+# Process-wide collector, started by the application factory
+session_gc = SessionGarbageCollector()
@@ -0,0 +1,275 @@
+"""
+Session Registry Module
+
+This module keeps a small local table of validation sessions, so that the
+latest session and the session list can be found without scanning every named
+graph of the triple store.
+
+Each upload or validation registers its session ID, creation time, graph URIs,
+triple counts and status. The table lives in SQLite and is indexed by creation
+time, so the latest-session lookup and paged listings are index seeks whose
+cost does not grow with the number of tenants.
+
+Configuration:
+- SESSION_REGISTRY_PATH: SQLite database file of the registry
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Session states
+VALIDATING = "validating"
+VALIDATED = "validated"
+FAILED = "failed"
+ARCHIVED = "archived"
+REHYDRATING = "rehydrating"
+
+# Named graphs created per session, by prefix
+SESSION_GRAPH_PREFIXES = (
+    "http://ex.org/ValidationReport/Session_",
+    "http://ex.org/Data/Session_",
+    "http://ex.org/Shapes/Session_",
+    "http://ex.org/ShapesGraph/Session_",
+)
+
+# Graphs shared by all sessions uploading the same content (see content_store)
+SHARED_SHAPES_PREFIX = "http://ex.org/Shapes/Content_"
+SHARED_DATA_PREFIX = "http://ex.org/Data/Content_"
+
+
+def is_shared_graph(uri: Optional[str]) -> bool:
+    return bool(uri) and uri.startswith((SHARED_SHAPES_PREFIX, SHARED_DATA_PREFIX))
+
+
+def session_graph_uris(session_id: str, entry: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Returns every named graph a session may have created, including the ones
+    recorded in its registry entry. Shared content graphs are not included.
+    """
+    uris = [prefix + session_id for prefix in SESSION_GRAPH_PREFIXES]
+    for column in ("validation_graph", "data_graph", "shapes_graph"):
+        uri = (entry or {}).get(column)
+        if uri and uri not in uris and not is_shared_graph(uri):
+            uris.append(uri)
+    return uris
+
+
+# Columns that can be set through register() and update()
+FIELDS = (
+    "created_at", "updated_at", "accessed_at", "status", "source",
+    "validation_graph", "data_graph", "shapes_graph",
+    "data_triples", "shapes_triples", "violation_count", "archive_path",
+    "data_digest", "shapes_digest",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    accessed_at REAL,
+    status TEXT NOT NULL,
+    source TEXT,
+    validation_graph TEXT,
+    data_graph TEXT,
+    shapes_graph TEXT,
+    data_triples INTEGER,
+    shapes_triples INTEGER,
+    violation_count INTEGER,
+    archive_path TEXT,
+    data_digest TEXT,
+    shapes_digest TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_created_at ON sessions (created_at);
+"""
+
+# Columns added after the first release of the table: name -> type
+_MIGRATIONS = {"accessed_at": "REAL", "archive_path": "TEXT", "data_digest": "TEXT", "shapes_digest": "TEXT"}
+
+
+class SessionRegistry:
+    """SQLite table of validation sessions, indexed by creation time."""
+
+    def __init__(self, path: str = config.SESSION_REGISTRY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    # --- Writes ---
+
+    def register(self, session_id: str, status: str = VALIDATING, **fields: Any) -> Dict[str, Any]:
+        """Records a new session, or updates the given fields of an existing one."""
+        now = time.time()
+        values = {"created_at": now, "updated_at": now, "status": status, **self._checked(fields)}
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" for _ in values)
+        # A re-registered session keeps its creation time
+        updates = ", ".join(f"{column} = excluded.{column}" for column in values if column != "created_at")
+        self._execute(
+            f"INSERT INTO sessions (session_id, {columns}) VALUES (?, {placeholders}) "
+            f"ON CONFLICT(session_id) DO UPDATE SET {updates}",
+            (session_id, *values.values()),
+        )
+        return self.get(session_id)
+
+    def update(self, session_id: str, **fields: Any) -> bool:
+        """Updates fields of a session. Returns False if the session is unknown."""
+        values = {**self._checked(fields), "updated_at": time.time()}
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        cursor = self._execute(
+            f"UPDATE sessions SET {assignments} WHERE session_id = ?", (*values.values(), session_id)
+        )
+        return cursor.rowcount > 0
+
+    def touch(self, session_id: str) -> bool:
+        """Records that a session was just used (its last access time drives LRU retention)."""
+        cursor = self._execute("UPDATE sessions SET accessed_at = ? WHERE session_id = ?", (time.time(), session_id))
+        return cursor.rowcount > 0
+
+    def remove(self, session_id: str) -> bool:
+        cursor = self._execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    # --- Reads ---
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM sessions WHERE session_id = ?", (session_id,))
+        return rows[0] if rows else None
+
+    def latest(self, with_validation_graph: bool = False) -> Optional[Dict[str, Any]]:
+        """Returns the most recently created session (optionally only one whose report is in the store)."""
+        condition = "WHERE validation_graph IS NOT NULL " if with_validation_graph else ""
+        rows = self._query(f"SELECT * FROM sessions {condition}ORDER BY created_at DESC LIMIT 1")
+        return rows[0] if rows else None
+
+    def list(self, limit: int = 50, before: Optional[float] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Returns sessions from newest to oldest. `before` is a creation time
+        cursor: pass the `created_at` of the last session of a page to get the next.
+        """
+        conditions, params = [], []
+        if before is not None:
+            conditions.append("created_at < ?")
+            params.append(before)
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        return self._query(f"SELECT * FROM sessions {where}ORDER BY created_at DESC LIMIT ?", (*params, limit))
+
+    def least_recently_used(self, skip: int = 0) -> List[Dict[str, Any]]:
+        """Returns the sessions from least to most recently used, except the `skip` most recently used."""
+        rows = self._query(
+            "SELECT * FROM sessions ORDER BY COALESCE(accessed_at, created_at) DESC LIMIT -1 OFFSET ?", (skip,)
+        )
+        rows.reverse()
+        return rows
+
+    def unused_since(self, cutoff: float) -> List[Dict[str, Any]]:
+        """Returns the sessions not used since `cutoff` (by last access, or creation if never accessed)."""
+        return self._query(
+            "SELECT * FROM sessions WHERE COALESCE(accessed_at, created_at) < ? ORDER BY created_at", (cutoff,)
+        )
+
+    def referencing(self, column: str, value: Any) -> List[str]:
+        """Returns the IDs of the sessions whose `column` equals `value` (reference counting of shared content)."""
+        self._checked({column: value})
+        return [row["session_id"] for row in self._query(f"SELECT session_id FROM sessions WHERE {column} = ?", (value,))]
+
+    def count(self) -> int:
+        return self._query("SELECT COUNT(*) AS total FROM sessions")[0]["total"]
+
+    # --- SQLite ---
+
+    @staticmethod
+    def _checked(fields: Dict[str, Any]) -> Dict[str, Any]:
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown session fields: {', '.join(sorted(unknown))}")
+        return fields
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.executescript(_SCHEMA)
+            existing = {row["name"] for row in connection.execute("PRAGMA table_info(sessions)")}
+            for column, column_type in _MIGRATIONS.items():
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE sessions ADD COLUMN {column} {column_type}")
+            # Last use, for TTL and LRU retention
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (COALESCE(accessed_at, created_at))"
+            )
+            self._connection = connection
+        return self._connection
+
+    def _execute(self, statement: str, params=()) -> sqlite3.Cursor:
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                return connection.execute(statement, params)
+
+    def _query(self, statement: str, params=()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._connect().execute(statement, params).fetchall()]
+
+
+# Process-wide registry used by the upload, validation and dashboard routes
+session_registry = SessionRegistry()
+
+
+def record_session(session_id: str, status: str = VALIDATING, **fields: Any):
+    """Registers a session, logging instead of failing the request if the registry is unavailable."""
+    try:
+        session_registry.register(session_id, status=status, **fields)
+    except Exception as e:
+        logger.warning(f"Could not register session {session_id}: {e}")
+
+
+def touch_session(session_id: Optional[str]):
+    """Marks a session as used by a request; errors are logged, never raised."""
+    if not session_id:
+        return
+    try:
+        session_registry.touch(session_id)
+    except Exception as e:
+        logger.warning(f"Could not touch session {session_id}: {e}")
+
+
+def sessions_referencing(column: str, value: Any) -> List[str]:
+    """Returns the sessions referencing shared content; errors are logged and give no sessions."""
+    try:
+        return session_registry.referencing(column, value)
+    except Exception as e:
+        logger.warning(f"Could not look up sessions referencing {value}: {e}")
+        return []
+
+
+def update_session(session_id: str, **fields: Any):
+    """Updates a registered session, logging instead of failing the request on errors."""
+    try:
+        session_registry.update(session_id, **fields)
+    except Exception as e:
+        logger.warning(f"Could not update session {session_id}: {e}")
+
+
+def shapes_graph_of(session_id: str) -> str:
+    """Returns the shapes graph a session was validated against (shared or session-specific)."""
+    try:
+        entry = session_registry.get(session_id)
+    except Exception as e:
+        logger.warning(f"Could not look up session {session_id}: {e}")
+        entry = None
+    return (entry or {}).get("shapes_graph") or f"http://ex.org/Shapes/Session_{session_id}"
@@ -1,10 +1,10 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
+from SPARQLWrapper import JSON
+from .triple_store import SPARQLWrapper, endpoint_get
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import ENDPOINT_URL, SHAPES_GRAPH_URI, VALIDATION_REPORT_URI, SHACL_FEATURES
 import math
-import requests
 import time 
 import csv 
 
@@ -759,7 +759,7 @@ def get_distribution_of_violations_per_constraint(
     """
 
     # Execute SPARQL query
-    response = requests.get(
+    response = endpoint_get(
         ENDPOINT_URL,
         params={"query": query, "format": "json"},
     )
@@ -848,7 +848,7 @@ def get_correlation_of_constraints_and_violations(
                  <http://www.w3.org/ns/shacl#property> ?propertyShape .
     }}
     """
-    response = requests.get(ENDPOINT_URL, params={"query": query_shapes, "format": "json"})
+    response = endpoint_get(ENDPOINT_URL, params={"query": query_shapes, "format": "json"})
     response.raise_for_status()
     shapes_results = response.json()["results"]["bindings"]
 
@@ -879,7 +879,7 @@ def get_correlation_of_constraints_and_violations(
                 <{property_shape}> ?predicate ?object .
             }}
             """
-            resp_constraints = requests.get(ENDPOINT_URL, params={"query": query_constraints, "format": "json"})
+            resp_constraints = endpoint_get(ENDPOINT_URL, params={"query": query_constraints, "format": "json"})
             resp_constraints.raise_for_status()
             constraints_results = resp_constraints.json()["results"]["bindings"]
 
@@ -900,7 +900,7 @@ def get_correlation_of_constraints_and_violations(
             }}
             GROUP BY ?constraintComponent
             """
-            resp_violations = requests.get(ENDPOINT_URL, params={"query": query_violations, "format": "json"})
+            resp_violations = endpoint_get(ENDPOINT_URL, params={"query": query_violations, "format": "json"})
             resp_violations.raise_for_status()
             violation_results = resp_violations.json()["results"]["bindings"]
 
@@ -976,7 +976,7 @@ def get_node_shape_details_table(limit: int = None, offset: int = None, shapes_g
         query += f"OFFSET {offset}\n"
 
     # Execute the query
-    response = requests.get(
+    response = endpoint_get(
         ENDPOINT_URL,
         params={"query": query, "format": "json"},
     )
@@ -1102,7 +1102,7 @@ def get_node_shape_with_most_unique_constraints(validation_report_uri: str = VAL
     """
 
     # Execute the query
-    response = requests.get(
+    response = endpoint_get(
         ENDPOINT_URL,
         params={"query": query, "format": "json"},
     )
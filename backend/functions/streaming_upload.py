@@ -0,0 +1,314 @@
+"""
+Streaming Upload Module
+
+This module handles uploaded files while the request body arrives, instead of
+saving the whole body first and reading it back. `StreamingRequest`, the
+application's request class, gives every uploaded file an `UploadSink` as its
+stream. The sink hashes each chunk and spools it to a temporary file inside
+the content store, so when the body has been received the file only needs to
+be moved under its digest (see content_store).
+
+For views marked with `parse_uploads`, N-Triples files are also fed to a
+parser thread chunk by chunk and parsed line by line as they arrive. The
+parser is abandoned when the finished file turns out to be in the parse cache
+of the content store already. Turtle and the other formats can only be parsed
+once the whole document is there, so they are parsed after the upload, from
+the stored file, and only if the parse cache does not hold the content.
+Compressed files (`.gz`, `.bz2`, and `.zst` with the `zstandard`
+package) are decompressed on the way into the parser, while the stored copy
+stays compressed.
+
+Key classes:
+- UploadSink: Hashing, spooling and parsing stream of one uploaded file
+- StreamingRequest: Flask request class that creates the sinks
+- ReceivedUpload: Stored file and parsed graph of a finished upload
+
+Configuration:
+- MAX_UPLOAD_BYTES: Largest accepted request body (default: 1 GiB, 0 for no limit)
+- MAX_UPLOAD_DECOMPRESSED_BYTES: Largest decompressed size of a compressed upload (default: 4 GiB)
+"""
+
+import hashlib
+import io
+import logging
+import os
+import queue
+import tempfile
+import threading
+from typing import Any, Callable, Optional
+
+from flask import Request, current_app
+from rdflib import Graph
+
+import config
+from .compression import EXTENSIONS, codec_for, decompressing_reader
+from .content_store import StoredFile, content_store as default_content_store
+
+logger = logging.getLogger(__name__)
+
+# rdflib format of each RDF file extension
+RDF_FORMATS = {".ttl": "turtle", ".nt": "nt", ".n3": "n3", ".rdf": "xml"}
+# Formats parsed incrementally while the file is received
+STREAMING_FORMATS = {"nt"}
+COMPRESSED_EXTENSIONS = tuple(EXTENSIONS.values())
+
+# Chunks buffered between the request and the parser thread
+PARSE_QUEUE_CHUNKS = 64
+READ_SIZE = 1024 * 1024
+
+
+def split_extension(filename: str):
+    """Returns the RDF extension and the compression extension ("" if none) of a file name."""
+    name = (filename or "").lower()
+    base, extension = os.path.splitext(name)
+    if extension in COMPRESSED_EXTENSIONS:
+        return os.path.splitext(base)[1], extension
+    return extension, ""
+
+
+def rdf_format(filename: str) -> Optional[str]:
+    """Returns the rdflib format of an RDF file name, or None for other files."""
+    return RDF_FORMATS.get(split_extension(filename)[0])
+
+
+def upload_suffix(filename: str) -> str:
+    """Returns the suffix a file is stored with, e.g. ".ttl" or ".nt.gz"."""
+    return "".join(split_extension(filename))
+
+
+def parse_uploads(view: Callable) -> Callable:
+    """Marks a view whose RDF uploads are parsed while they are received."""
+    view.parse_uploads = True
+    return view
+
+
+class UploadTooLarge(ValueError):
+    """Raised when a compressed upload expands beyond MAX_UPLOAD_DECOMPRESSED_BYTES."""
+
+
+class _ParseAbandoned(Exception):
+    """Stops a parser thread whose result is not needed any more."""
+
+
+class _ChunkReader(io.RawIOBase):
+    """Readable stream over the chunks a sink passes to its parser thread; None ends it."""
+
+    def __init__(self, chunks: "queue.Queue", name: str, abandoned: threading.Event):
+        self.chunks = chunks
+        self.name = name
+        self.abandoned = abandoned
+        self._pending = b""
+        self.eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.abandoned.is_set():
+            raise _ParseAbandoned()
+        while not self._pending and not self.eof:
+            chunk = self.chunks.get()
+            if chunk is None:
+                self.eof = True
+            else:
+                self._pending = chunk
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class _LimitedReader(io.RawIOBase):
+    """Readable stream failing once more than `limit` bytes were read (decompression bombs)."""
+
+    def __init__(self, stream, limit: int, name: str):
+        self.stream = stream
+        self.limit = limit
+        self.name = name
+        self.total = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.stream.read(len(buffer))
+        self.total += len(data)
+        if self.limit and self.total > self.limit:
+            raise UploadTooLarge(f"{self.name} expands to more than {self.limit} bytes")
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class UploadSink:
+    """
+    Stream of one uploaded file: hashes and spools the chunks written by the
+    form parser, and optionally parses N-Triples in a background thread. It
+    reads back like the spooled file, so `FileStorage.save()` and `read()` still work.
+    """
+
+    def __init__(self, filename: str, store=None, parse: bool = False,
+                 max_decompressed: int = config.MAX_UPLOAD_DECOMPRESSED_BYTES):
+        self.filename = filename or ""
+        self.store = store or default_content_store
+        self.format = rdf_format(self.filename) if parse else None
+        if self.format not in STREAMING_FORMATS:
+            self.format = None
+        self.graph: Optional[Graph] = None
+        self.parse_error: Optional[Exception] = None
+        self.stored: Optional[StoredFile] = None
+        self._digest = hashlib.sha256()
+        self._size = 0
+        os.makedirs(self.store.root, exist_ok=True)
+        handle, self._temp_path = tempfile.mkstemp(dir=self.store.root, suffix=".part")
+        self._file = os.fdopen(handle, "w+b")
+        self._chunks: Optional["queue.Queue"] = None
+        self._parser: Optional[threading.Thread] = None
+        self._abandoned = threading.Event()
+        if self.format:
+            self._chunks = queue.Queue(maxsize=PARSE_QUEUE_CHUNKS)
+            self._parser = threading.Thread(
+                target=self._parse, args=(max_decompressed,), name=f"parse-{self.filename}", daemon=True
+            )
+            self._parser.start()
+
+    # --- Writing (form parser) ---
+
+    def write(self, data: bytes) -> int:
+        self._digest.update(data)
+        self._file.write(data)
+        self._size += len(data)
+        if self._chunks is not None and self.parse_error is None:
+            self._chunks.put(bytes(data))
+        return len(data)
+
+    def finish(self, claim: Optional[Callable[[str], Any]] = None) -> StoredFile:
+        """
+        Waits for the parser, or abandons it if the content was parsed before,
+        and moves the spooled file under its digest (idempotent; see
+        `ContentStore.adopt` for `claim`).
+        """
+        if self.stored is None:
+            self._file.flush()
+            digest = self._digest.hexdigest()
+            if self._parser is not None and self.store.cached(digest):
+                self._abandoned.set()
+            self._end_parse()
+            self.stored = self.store.adopt(self._temp_path, digest, self._size, upload_suffix(self.filename), claim)
+        return self.stored
+
+    # --- Reading (FileStorage) ---
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self):
+        self._file.flush()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def close(self):
+        self._end_parse()
+        self._file.close()
+        # Never finished: the request did not use the file
+        if self.stored is None and os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    # --- Parsing ---
+
+    def _parse(self, max_decompressed: int):
+        reader = _ChunkReader(self._chunks, self.filename, self._abandoned)
+        stream = io.BufferedReader(reader, READ_SIZE)
+        try:
+            codec = codec_for(self.filename)
+            if codec:
+                stream = io.BufferedReader(
+                    _LimitedReader(decompressing_reader(stream, codec), max_decompressed, self.filename),
+                    READ_SIZE,
+                )
+            graph = Graph()
+            graph.parse(source=stream, format=self.format)
+            self.graph = graph
+        except Exception as e:
+            if self._abandoned.is_set():
+                logger.debug(f"Stopped parsing {self.filename}: its content was parsed before")
+            else:
+                logger.warning(f"Could not parse upload {self.filename}: {e}")
+                self.parse_error = e
+        finally:
+            # Let the writer finish even if parsing stopped early
+            while not reader.eof:
+                reader.eof = self._chunks.get() is None
+
+    def _end_parse(self):
+        if self._parser is not None and self._parser.is_alive():
+            self._chunks.put(None)
+            self._parser.join()
+
+
+class StreamingRequest(Request):
+    """Request whose uploaded files are hashed, stored and parsed while the body is read."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        view = current_app.view_functions.get(self.endpoint) if self.endpoint else None
+        return UploadSink(filename or "", parse=getattr(view, "parse_uploads", False))
+
+
+class ReceivedUpload:
+    """Stored file and parsed graph of an uploaded file."""
+
+    def __init__(self, stored: StoredFile, filename: str, graph: Optional[Graph] = None,
+                 error: Optional[Exception] = None, store=None):
+        self.stored = stored
+        self.filename = filename
+        self.format = rdf_format(filename) or "turtle"
+        self.store = store or default_content_store
+        self._graph = graph
+        self._error = error
+
+    @property
+    def path(self) -> str:
+        return self.stored.path
+
+    def graph(self) -> Graph:
+        """Returns the parsed graph (shared with identical uploads); raises the parse error if parsing failed."""
+        if self._error is not None:
+            raise self._error
+        if self._graph is None:
+            self._graph = self.store.graph(self.stored, format=self.format)
+        return self._graph
+
+
+def receive_upload(file_storage, store=None, claim: Optional[Callable[[str], Any]] = None) -> ReceivedUpload:
+    """
+    Finishes an uploaded file: stored under its digest and, if it was parsed
+    while received, with its graph. Files not received through an UploadSink
+    are stored (and later parsed) from their stream. `claim` records a
+    reference to the digest before the collector may release it (see
+    `ContentStore.adopt`).
+    """
+    store = store or default_content_store
+    sink = file_storage.stream
+    if not isinstance(sink, UploadSink):
+        stored = store.save(sink, upload_suffix(file_storage.filename), claim)
+        return ReceivedUpload(stored, file_storage.filename, store=store)
+
+    stored = sink.finish(claim)
+    graph = store.cache_graph(stored, sink.graph) if sink.graph is not None else None
+    return ReceivedUpload(stored, file_storage.filename, graph=graph, error=sink.parse_error, store=store)
@@ -0,0 +1,414 @@
+"""
+Triple Store Module
+
+This module is the SPARQL client layer between the services and the triple
+store. The services build their requests with the `SPARQLWrapper` and
+`endpoint_get` of this module, and the configured backend answers them:
+
+- "virtuoso", "fuseki", "stardog": a remote SPARQL endpoint (ENDPOINT_URL,
+  and SPARQL_UPDATE_ENDPOINT for stores with a separate update endpoint).
+  Requests are sent over HTTP with the store's credentials and HTTP
+  authentication scheme (digest for Virtuoso, basic otherwise), and take a
+  slot of the query scheduler. The endpoint and credentials the services set
+  on a wrapper are ignored in favour of the store's.
+- "embedded": an in-process rdflib Dataset, for single-node deployments and
+  tests. Requests are answered without any network hop, with the same SPARQL
+  JSON results a remote endpoint returns.
+
+The embedded store mimics the Virtuoso behaviour the services rely on: the
+default graph is the union of all named graphs, FROM selects named graphs of
+the store (nothing is fetched from the web), and blank nodes are reported as
+`nodeID://` identifiers that later queries can refer to as `<nodeID://...>`.
+Blank nodes stay blank nodes in the store, so `isBlank()` holds as on Virtuoso.
+
+It uses the rdflib store plugin EMBEDDED_STORE ("default" is in memory;
+"Oxigraph" with oxrdflib or "BerkeleyDB" persist in EMBEDDED_STORE_PATH). An
+in-memory store with a path is loaded from an N-Quads snapshot at start and
+saved to it at exit.
+
+With a remote backend, small sessions can also be served locally (hybrid
+mode): after an upload, their graphs are kept in a bounded LRU of embedded
+stores, and queries that only name graphs of one resident session are
+answered from it. The remote store stays the durable copy; any update naming
+a resident graph evicts its session.
+
+Configuration:
+- TRIPLE_STORE_TYPE: virtuoso, fuseki, stardog or embedded (default: virtuoso)
+- EMBEDDED_STORE: rdflib store plugin of the embedded store (default: default)
+- EMBEDDED_STORE_PATH: Directory or snapshot file of the embedded store
+- HYBRID_LOCAL_SESSIONS: Serve small sessions from process memory (default: true)
+- HYBRID_MAX_TRIPLES: Largest session kept in memory, in triples (default: 50000)
+- HYBRID_MAX_SESSIONS: Sessions kept in memory (default: 32)
+- HYBRID_MAX_TOTAL_TRIPLES: Triples kept in memory over all sessions (default: 500000)
+"""
+
+import atexit
+import json
+from abc import ABC, abstractmethod
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+import requests
+import rdflib.plugins.sparql
+from requests.auth import HTTPBasicAuth, HTTPDigestAuth
+from rdflib import BNode, Dataset, Graph, URIRef, Variable
+from rdflib.util import guess_format
+from SPARQLWrapper import SPARQLWrapper as BaseSPARQLWrapper, BASIC, DIGEST, JSON
+
+import config
+from .compression import codec_for, open_compressed
+from .query_scheduler import query_scheduler, tenant_of
+
+logger = logging.getLogger(__name__)
+
+EMBEDDED = "embedded"
+# Virtuoso returns blank nodes as "nodeID://..." IRIs in some result formats
+VIRTUOSO_BNODE_PREFIX = "nodeID://"
+_NODE_ID_PATTERN = re.compile(r"<nodeID://([^>]+)>")
+# Graphs a query or update names explicitly
+_GRAPH_REFERENCE_PATTERN = re.compile(r"(?:FROM\s+NAMED|FROM|GRAPH|WITH|INTO)\s*<([^>]+)>", re.IGNORECASE)
+_GRAPH_VARIABLE_PATTERN = re.compile(r"GRAPH\s*[?$]", re.IGNORECASE)
+
+
+class TripleStore(ABC):
+    """Backend interface: SPARQL queries and updates against one store."""
+
+    name = "base"
+    embedded = False
+
+    @abstractmethod
+    def query(self, query: str, format: str = JSON) -> Any:
+        """Runs a query; SELECT and ASK results use the SPARQL JSON results format."""
+
+    @abstractmethod
+    def update(self, update: str):
+        """Runs a SPARQL update."""
+
+
+class RemoteStore(TripleStore):
+    """A triple store behind a SPARQL protocol endpoint (Virtuoso, Fuseki, Stardog)."""
+
+    def __init__(
+        self,
+        name: str = "virtuoso",
+        endpoint: str = config.ENDPOINT_URL,
+        update_endpoint: Optional[str] = None,
+        username: Optional[str] = config.USERNAME,
+        password: Optional[str] = config.PASSWORD,
+        auth: str = DIGEST,
+    ):
+        self.name = name
+        self.endpoint = endpoint
+        self.update_endpoint = update_endpoint or endpoint
+        self.username = username
+        self.password = password
+        self.auth = auth
+
+    def _client(self, endpoint: str, text: str) -> BaseSPARQLWrapper:
+        sparql = BaseSPARQLWrapper(endpoint)
+        if self.username is not None and self.password is not None:
+            sparql.setCredentials(self.username, self.password)
+        sparql.setHTTPAuth(self.auth)
+        sparql.setQuery(text)
+        return sparql
+
+    def query(self, query: str, format: str = JSON) -> Any:
+        sparql = self._client(self.endpoint, query)
+        sparql.setReturnFormat(format)
+        return sparql.query().convert()
+
+    def update(self, update: str):
+        sparql = self._client(self.update_endpoint, update)
+        sparql.setMethod("POST")
+        sparql.query()
+
+    def get(self, params: Dict[str, Any], **kwargs) -> requests.Response:
+        """Sends a protocol GET request (e.g. with a `format` parameter) to the query endpoint."""
+        if self.username is not None and self.password is not None:
+            auth_class = HTTPDigestAuth if self.auth == DIGEST else HTTPBasicAuth
+            kwargs.setdefault("auth", auth_class(self.username, self.password))
+        return requests.get(self.endpoint, params=params, **kwargs)
+
+
+class EmbeddedStore(TripleStore):
+    """An rdflib Dataset in this process, answering like a Virtuoso endpoint."""
+
+    name = EMBEDDED
+    embedded = True
+
+    def __init__(self, store: str = "default", path: Optional[str] = None):
+        # FROM <graph> must select a graph of the store, never download it
+        rdflib.plugins.sparql.SPARQL_LOAD_GRAPHS = False
+        self.path = path
+        self.snapshot = None
+        self._lock = threading.RLock()
+        self.dataset = Dataset(store=store, default_union=True)
+        if path and store != "default":
+            self.dataset.open(path, create=True)
+        elif path:
+            self.snapshot = path
+            if os.path.exists(path):
+                self.dataset.parse(path, format="nquads")
+                logger.info(f"Loaded {len(self.dataset)} triples into the embedded store from {path}")
+            atexit.register(self.save)
+
+    def query(self, query: str, format: str = JSON) -> Any:
+        query, bindings = _bind_node_ids(query)
+        with self._lock:
+            result = self.dataset.query(query, initBindings=bindings)
+            if result.type in ("SELECT", "ASK"):
+                return _report_node_ids(json.loads(result.serialize(format="json")))
+            # CONSTRUCT and DESCRIBE: the graph, serialized in the requested format
+            rdf_format = {"turtle": "turtle", "n3": "n3", "xml": "xml", "rdf+xml": "xml"}.get(format, "json-ld")
+            serialized = result.graph.serialize(format=rdf_format)
+            return json.loads(serialized) if rdf_format == "json-ld" else serialized.encode("utf-8")
+
+    def update(self, update: str):
+        update, bindings = _bind_node_ids(update)
+        with self._lock:
+            self.dataset.update(update, initBindings=bindings)
+
+    def load_file(self, path: str, graph_uri: str, format: Optional[str] = None):
+        """
+        Parses an RDF file into a named graph (the embedded counterpart of the
+        bulk loader). Compressed files are decompressed while they are parsed.
+        """
+        codec = codec_for(path)
+        format = format or guess_format(os.path.splitext(path)[0] if codec else path) or "turtle"
+        with self._lock:
+            target = self.dataset.graph(URIRef(graph_uri))
+            if codec:
+                with open_compressed(path) as stream:
+                    target.parse(source=stream, format=format)
+            else:
+                target.parse(path, format=format)
+
+    def add_graph(self, graph_uri: str, graph: Graph):
+        """Copies an in-memory graph into a named graph of the store."""
+        with self._lock:
+            target = self.dataset.graph(URIRef(graph_uri))
+            for triple in graph:
+                target.add(triple)
+
+    def save(self):
+        """Writes the N-Quads snapshot of an in-memory store with a path."""
+        if not self.snapshot:
+            return
+        with self._lock:
+            directory = os.path.dirname(self.snapshot)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.dataset.serialize(self.snapshot + ".partial", format="nquads")
+            os.replace(self.snapshot + ".partial", self.snapshot)
+
+
+def _bind_node_ids(text: str):
+    """
+    Replaces the `<nodeID://...>` references of a request by variables bound
+    to the blank nodes they name, since SPARQL has no syntax for a stored blank node.
+    """
+    variables: Dict[str, Variable] = {}
+
+    def bind(match):
+        variable = variables.setdefault(match.group(1), Variable(f"nodeID_{len(variables)}"))
+        return "?" + variable
+
+    text = _NODE_ID_PATTERN.sub(bind, text)
+    return text, {variable: BNode(node_id) for node_id, variable in variables.items()}
+
+
+def _report_node_ids(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Reports blank nodes of SPARQL JSON results with their nodeID, as Virtuoso does."""
+    for row in results.get("results", {}).get("bindings", []):
+        for value in row.values():
+            if value.get("type") == "bnode":
+                value["value"] = VIRTUOSO_BNODE_PREFIX + value["value"]
+    return results
+
+
+def create_store(store_type: str = config.TRIPLE_STORE_TYPE) -> TripleStore:
+    """Creates the backend for a TRIPLE_STORE_TYPE, with its STORE_CONFIG entry."""
+    settings: Dict[str, Any] = config.STORE_CONFIG.get(store_type, {})
+    if store_type == EMBEDDED:
+        return EmbeddedStore(store=settings.get("store") or "default", path=settings.get("path") or None)
+    if store_type == "virtuoso":
+        return RemoteStore("virtuoso")
+    if store_type in config.STORE_CONFIG:
+        return RemoteStore(store_type, update_endpoint=settings.get("update_endpoint") or None, auth=BASIC)
+    raise ValueError(f"Unknown triple store type: {store_type}")
+
+
+# Process-wide backend used by every SPARQL client of the services
+triple_store = create_store()
+
+
+def current_store() -> TripleStore:
+    return triple_store
+
+
+class LocalSessionCache:
+    """Bounded LRU of small sessions held in embedded stores, in front of a remote store."""
+
+    def __init__(
+        self,
+        max_triples: int = config.HYBRID_MAX_TRIPLES,
+        max_sessions: int = config.HYBRID_MAX_SESSIONS,
+        max_total_triples: int = config.HYBRID_MAX_TOTAL_TRIPLES,
+        enabled: bool = config.HYBRID_LOCAL_SESSIONS,
+    ):
+        self.max_triples = max_triples
+        self.max_sessions = max_sessions
+        self.max_total_triples = max_total_triples
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # session ID -> (store, triples), least recently used first
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        # graph URI -> sessions holding it (shared content graphs belong to several)
+        self._owners: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, session_id: str, graphs: Dict[str, Graph]) -> bool:
+        """
+        Keeps a session's graphs in memory, after they were written to the
+        remote store. Returns False if the session is too large (or hybrid mode is off).
+        """
+        triples = sum(len(graph) for graph in graphs.values())
+        if not self.enabled or triple_store.embedded or not graphs or triples > self.max_triples:
+            return False
+        store = EmbeddedStore()
+        for uri, graph in graphs.items():
+            store.add_graph(uri, graph)
+
+        with self._lock:
+            self._remove(session_id)
+            self._sessions[session_id] = (store, triples)
+            for uri in graphs:
+                self._owners.setdefault(uri, set()).add(session_id)
+            total = sum(size for _, size in self._sessions.values())
+            while len(self._sessions) > self.max_sessions or total > self.max_total_triples:
+                evicted, (_, size) = next(iter(self._sessions.items()))
+                self._remove(evicted)
+                total -= size
+        return session_id in self._sessions
+
+    def evict(self, session_id: str):
+        with self._lock:
+            self._remove(session_id)
+
+    def store_for(self, query: Optional[str]) -> Optional[EmbeddedStore]:
+        """Returns the embedded store that can answer a query alone, or None for the remote store."""
+        if not self._sessions or not query or _GRAPH_VARIABLE_PATTERN.search(query):
+            return None
+        graphs = set(_GRAPH_REFERENCE_PATTERN.findall(query))
+        with self._lock:
+            owners = set.intersection(*(self._owners.get(uri, set()) for uri in graphs)) if graphs else set()
+            if not owners:
+                if any(uri in self._owners for uri in graphs):
+                    self.misses += 1
+                return None
+            # The most recently used session holding every graph
+            session_id = next(s for s in reversed(self._sessions) if s in owners)
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return self._sessions[session_id][0]
+
+    def invalidate(self, update: Optional[str]):
+        """Evicts the sessions whose graphs an update writes to or drops."""
+        if not self._sessions or not update:
+            return
+        with self._lock:
+            for uri in _GRAPH_REFERENCE_PATTERN.findall(update):
+                for session_id in list(self._owners.get(uri, ())):
+                    self._remove(session_id)
+
+    def _remove(self, session_id: str):
+        if self._sessions.pop(session_id, None) is not None:
+            for uri in [uri for uri, owners in self._owners.items() if session_id in owners]:
+                self._owners[uri].discard(session_id)
+                if not self._owners[uri]:
+                    del self._owners[uri]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sessions": len(self._sessions),
+                "triples": sum(size for _, size in self._sessions.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Small sessions served from process memory in hybrid mode
+local_sessions = LocalSessionCache()
+
+
+# --- Clients used by the services ---
+
+class _StoreResult:
+    """Stands in for the SPARQLWrapper QueryResult of a request answered by the backend."""
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def convert(self) -> Any:
+        return self.value
+
+
+class _StoreResponse:
+    """Stands in for the requests.Response of an endpoint request answered by the backend."""
+
+    status_code = 200
+
+    def __init__(self, value: Dict[str, Any]):
+        self.value = value
+        self.text = json.dumps(value)
+
+    def raise_for_status(self):
+        pass
+
+    def json(self) -> Dict[str, Any]:
+        return self.value
+
+
+class SPARQLWrapper(BaseSPARQLWrapper):
+    """
+    SPARQLWrapper answered by the configured backend: remote requests go to
+    the store's endpoints and take a slot of the query scheduler, embedded
+    ones (and those of resident sessions) run in process.
+    """
+
+    def query(self):
+        store = triple_store
+        if self.isSparqlUpdateRequest():
+            if store.embedded:
+                store.update(self.queryString)
+                return _StoreResult(None)
+            local_sessions.invalidate(self.queryString)
+            with query_scheduler.slot(tenant_of(self.queryString)):
+                store.update(self.queryString)
+            return _StoreResult(None)
+        return _StoreResult(_run_query(self.queryString, self.returnFormat))
+
+
+def endpoint_get(url: str, params: Optional[Dict[str, Any]] = None, **kwargs):
+    """`requests.get` for endpoint requests, answered by the configured backend (`url` is the store's endpoint)."""
+    query = (params or {}).get("query")
+    store = triple_store if triple_store.embedded else local_sessions.store_for(query)
+    if store is not None:
+        return _StoreResponse(store.query(query))
+    with query_scheduler.slot(tenant_of(query)):
+        return triple_store.get(params, **kwargs)
+
+
+def _run_query(query: str, format: str) -> Any:
+    store = triple_store if triple_store.embedded else local_sessions.store_for(query)
+    if store is not None:
+        return store.query(query, format)
+    with query_scheduler.slot(tenant_of(query)):
+        return triple_store.query(query, format)
@@ -0,0 +1,139 @@
+"""
+Columnar violation table for in-process analytics over validation results.
+
+Each column (focus node, shape, path, component, severity) is dictionary
+encoded: the distinct values are stored once, in order of first appearance,
+and every row holds an integer code in a NumPy array. Group-by, top-k,
+ordering and histograms then run as vectorized array operations instead of
+Python loops over violation objects.
+
+Tables are built from `ConstraintViolation` objects, or from any iterable of
+rows ordered like `COLUMNS`.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("focus_node", "shape", "path", "component", "severity")
+
+# ConstraintViolation attribute of each column
+VIOLATION_ATTRIBUTES = {
+    "focus_node": "focus_node",
+    "shape": "shape_id",
+    "path": "property_path",
+    "component": "constraint_id",
+    "severity": "severity",
+}
+
+
+class _ColumnEncoder:
+    """Assigns integer codes to values in order of first appearance."""
+
+    __slots__ = ("values", "codes", "_index")
+
+    def __init__(self):
+        self.values: List[Optional[str]] = []
+        self.codes: List[int] = []
+        self._index: Dict[Optional[str], int] = {}
+
+    def append(self, value: Optional[str]):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+
+class ViolationTable:
+    """Dictionary-encoded, NumPy-backed columns of a validation report."""
+
+    def __init__(self, codes: Dict[str, np.ndarray], dictionaries: Dict[str, List[Optional[str]]]):
+        self.codes = codes
+        self.dictionaries = dictionaries
+        self.row_count = len(next(iter(codes.values()))) if codes else 0
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    # --- Construction ---
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Optional[str]]]) -> "ViolationTable":
+        """Builds a table from an iterable of rows ordered like `COLUMNS`."""
+        encoders = [_ColumnEncoder() for _ in COLUMNS]
+        for row in rows:
+            for encoder, value in zip(encoders, row):
+                encoder.append(None if value is None else str(value))
+        return cls(
+            {name: np.asarray(encoder.codes, dtype=np.int32) for name, encoder in zip(COLUMNS, encoders)},
+            {name: encoder.values for name, encoder in zip(COLUMNS, encoders)},
+        )
+
+    @classmethod
+    def from_violations(cls, violations: Iterable[Any]) -> "ViolationTable":
+        """Builds a table from `ConstraintViolation` objects, in their order."""
+        attributes = [VIOLATION_ATTRIBUTES[name] for name in COLUMNS]
+        return cls.from_rows(
+            tuple(getattr(violation, attribute, None) for attribute in attributes)
+            for violation in violations
+        )
+
+    # --- Analytics ---
+
+    def value_counts(self, column: str) -> np.ndarray:
+        """Returns the number of rows per dictionary code of a column."""
+        return np.bincount(self.codes[column], minlength=len(self.dictionaries[column]))
+
+    def group_count(self, column: str) -> List[Tuple[Optional[str], int]]:
+        """Returns `(value, count)` pairs in order of first appearance."""
+        counts = self.value_counts(column)
+        return [(value, int(count)) for value, count in zip(self.dictionaries[column], counts) if count]
+
+    def group_by(self, columns: Sequence[str], limit: Optional[int] = None) -> List[Tuple[Tuple[Optional[str], ...], int]]:
+        """
+        Returns `(values, count)` pairs for each distinct combination of the
+        given columns, ordered by decreasing count (ties in first-appearance order).
+        `limit` keeps only the most frequent combinations.
+        """
+        if not self.row_count:
+            return []
+        key = np.zeros(self.row_count, dtype=np.int64)
+        for column in columns:
+            key = key * len(self.dictionaries[column]) + self.codes[column]
+        _, first_rows, counts = np.unique(key, return_index=True, return_counts=True)
+        order = np.lexsort((first_rows, -counts))[:limit]
+        return [
+            (tuple(self.dictionaries[column][self.codes[column][first_rows[i]]] for column in columns), int(counts[i]))
+            for i in order
+        ]
+
+    def top_k(self, column: str, k: int) -> List[Tuple[Optional[str], int]]:
+        """Returns the `k` most frequent values of a column (ties in first-appearance order)."""
+        counts = self.value_counts(column)
+        order = np.argsort(-counts, kind="stable")[:k]
+        return [(self.dictionaries[column][code], int(counts[code])) for code in order if counts[code]]
+
+    def order_by(self, column: str, descending: bool = False) -> np.ndarray:
+        """
+        Returns the row indices sorted by the values of a column (missing values
+        sort as the empty string). The sort is stable: equal values keep row order.
+        """
+        sort_keys = [value or "" for value in self.dictionaries[column]]
+        distinct = sorted(set(sort_keys))
+        # Dense ranks, so that equal values (e.g. None and "") share a rank
+        position = {value: rank for rank, value in enumerate(distinct)}
+        ranks = np.asarray([position[value] for value in sort_keys], dtype=np.int64)
+        row_ranks = ranks[self.codes[column]]
+        return np.argsort(-row_ranks if descending else row_ranks, kind="stable")
+
+    def histogram(self, column: str, bins: Any = "auto") -> Tuple[np.ndarray, np.ndarray]:
+        """Returns `(counts, bin_edges)` of the number of violations per value of a column."""
+        counts = self.value_counts(column)
+        counts = counts[counts > 0]
+        if not len(counts):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        return np.histogram(counts, bins=np.histogram_bin_edges(counts, bins=bins))
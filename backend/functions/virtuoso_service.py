@@ -1,10 +1,11 @@
 import os
 import sys
 import logging
-from SPARQLWrapper import SPARQLWrapper, JSON, DIGEST
+from SPARQLWrapper import JSON, DIGEST
 from rdflib import Graph
 
 import config
+from .triple_store import SPARQLWrapper
 
 logging.basicConfig(filename='virtuoso.log', level=logging.DEBUG)
 
@@ -1,10 +1,10 @@
-import logging, os
-from typing import Dict, List
+import logging, os, re
+from typing import Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass, field
 
 from rdflib import Graph, URIRef, Namespace, Literal
-from rdflib.namespace import RDFS, SH
-from rdflib.term import BNode
+from rdflib.namespace import RDF, RDFS, SH
+from rdflib.term import BNode, Node
 from rdflib.serializer import Serializer
 
 # Assuming these are defined correctly in xpshacl_architecture
@@ -13,6 +13,8 @@ from .xpshacl_architecture import (
     ShapeId,
     DomainContext,
 )
+from .explanation_context import ExplanationContext, ensure_explanation_context
+import config
 
 log_level = os.environ.get("FLASK_LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
@@ -26,40 +28,126 @@ def _serialize_focus_node(focus_node: URIRef, graph: Graph) -> str:
     """
     Serializes the subgraph related to a focus node into a Turtle snippet.
     This includes traversing blank nodes to get the full object definition.
+    Use a shared FocusNodeSerializer when serializing many nodes of one graph.
     """
-    sub_graph = Graph()
-    nodes_to_visit = {focus_node}
-    visited_nodes = set()
-
-    while nodes_to_visit:
-        current_node = nodes_to_visit.pop()
-        if current_node in visited_nodes:
-            continue
-        visited_nodes.add(current_node)
-
-        for s, p, o in graph.triples((current_node, None, None)):
-            sub_graph.add((s, p, o))
-            if isinstance(o, BNode):
-                nodes_to_visit.add(o)
-        
-        # Also add triples where the blank node is the object
-        if isinstance(current_node, BNode):
-            for s, p, o in graph.triples((None, None, current_node)):
-                sub_graph.add((s, p, o))
-
-    # Bind prefixes from the main graph for a cleaner output
-    for prefix, namespace in graph.namespace_manager.namespaces():
-        sub_graph.bind(prefix, namespace)
-        
-    return sub_graph.serialize(format="turtle").strip()
+    return FocusNodeSerializer(graph).serialize(focus_node)
+
+
+_LOCAL_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_\-]*$")
+
+
+class FocusNodeSerializer:
+    """
+    Per-run, memoized serializer of focus node descriptions.
+
+    `describe()` extracts the concise bounded description (CBD) of a node: its
+    triples plus, recursively, those of the blank nodes it references.
+    `serialize()` writes it as Turtle with a small dedicated writer. Both are
+    computed once per focus node. The namespace table is read from the graph
+    once, instead of being re-bound into a fresh Graph for every violation.
+    Only the prefixes actually used are emitted.
+    """
+
+    def __init__(self, graph: Graph):
+        self.graph = graph
+        # Longest namespaces first so the most specific prefix wins
+        self._namespaces = sorted(
+            ((str(namespace), prefix) for prefix, namespace in graph.namespace_manager.namespaces()),
+            key=lambda item: -len(item[0]),
+        )
+        self._descriptions: Dict[Node, List[Tuple[Node, Node, Node]]] = {}
+        self._serialized: Dict[Node, str] = {}
+
+    def describe(self, focus_node: Node) -> List[Tuple[Node, Node, Node]]:
+        """Returns the CBD triples of a node, without duplicates."""
+        triples = self._descriptions.get(focus_node)
+        if triples is not None:
+            return triples
+
+        triples = []
+        seen = set()
+        nodes_to_visit = [focus_node]
+        visited_nodes = set()
+        while nodes_to_visit:
+            current_node = nodes_to_visit.pop()
+            if current_node in visited_nodes:
+                continue
+            visited_nodes.add(current_node)
+
+            found = list(self.graph.triples((current_node, None, None)))
+            # Also add triples where the blank node is the object
+            if isinstance(current_node, BNode):
+                found += list(self.graph.triples((None, None, current_node)))
+            for triple in found:
+                if triple not in seen:
+                    seen.add(triple)
+                    triples.append(triple)
+                if isinstance(triple[2], BNode):
+                    nodes_to_visit.append(triple[2])
+
+        self._descriptions[focus_node] = triples
+        return triples
+
+    def serialize(self, focus_node: Node) -> str:
+        """Returns the CBD of a node as a Turtle snippet."""
+        text = self._serialized.get(focus_node)
+        if text is None:
+            text = self._serialized[focus_node] = self._write_turtle(self.describe(focus_node))
+        return text
+
+    def _format(self, term: Node, used: Dict[str, str]) -> str:
+        if isinstance(term, Literal):
+            lexical = Literal(str(term), lang=term.language).n3()
+            return f"{lexical}^^{self._format(term.datatype, used)}" if term.datatype else lexical
+        if isinstance(term, BNode):
+            return f"_:{term}"
+        uri = str(term)
+        for namespace, prefix in self._namespaces:
+            if uri.startswith(namespace) and _LOCAL_NAME.match(uri[len(namespace):]):
+                used[prefix] = namespace
+                return f"{prefix}:{uri[len(namespace):]}"
+        return f"<{uri}>"
+
+    def _write_turtle(self, triples: List[Tuple[Node, Node, Node]]) -> str:
+        used: Dict[str, str] = {}
+        by_subject: Dict[Node, Dict[Node, List[Node]]] = {}
+        for s, p, o in triples:
+            by_subject.setdefault(s, {}).setdefault(p, []).append(o)
+
+        statements = []
+        for subject, predicates in by_subject.items():
+            predicate_lists = []
+            for predicate, objects in predicates.items():
+                verb = "a" if predicate == RDF.type else self._format(predicate, used)
+                predicate_lists.append(f"{verb} {', '.join(self._format(o, used) for o in objects)}")
+            statements.append(f"{self._format(subject, used)} " + " ;\n    ".join(predicate_lists) + " .")
+
+        header = "\n".join(f"@prefix {prefix}: <{namespace}> ." for prefix, namespace in sorted(used.items()))
+        return "\n\n".join(part for part in (header, "\n\n".join(statements)) if part)
+
+
+def _stride_sample(items: Sequence, size: int) -> List:
+    """Deterministically picks `size` evenly spaced items, keeping their order."""
+    if len(items) <= size:
+        return list(items)
+    step = len(items) / size
+    return [items[int(i * step)] for i in range(size)]
 
 
 class ContextRetriever:
     """Retrieves relevant domain context for explaining a violation"""
 
-    def __init__(self, data_graph: Graph, shapes_graph: Graph):
+    def __init__(
+        self,
+        data_graph: Graph,
+        shapes_graph: Graph,
+        explanation_context: Optional[ExplanationContext] = None,
+    ):
         self.data_graph = data_graph
         self.shapes_graph = shapes_graph
+        self.explanation_context = ensure_explanation_context(
+            explanation_context, data_graph, shapes_graph
+        )
 
     def retrieve_context(self, violation: ConstraintViolation) -> DomainContext:
         """Retrieves domain context relevant to a constraint violation"""
@@ -67,8 +155,11 @@ class ContextRetriever:
 
         context.ontology_fragments = self._get_ontology_fragments(violation)
         context.shape_documentation = self._get_shape_documentation(violation.shape_id)
-        context.similar_cases = self._get_similar_cases(violation)
-        context.domain_rules = self._get_domain_rules(violation)
+        context.similar_cases, context.similar_cases_total = self._find_similar_cases(violation)
+        # Domain rules depend only on the property path, so they are looked up once per path
+        context.domain_rules = list(self.explanation_context.cached(
+            ("domain_rules", violation.property_path), lambda: self._get_domain_rules(violation)
+        ))
 
         return context
 
@@ -76,98 +167,90 @@ class ContextRetriever:
         """Retrieves relevant ontology fragments based on the violation"""
         fragments = []
         focus_uri = URIRef(violation.focus_node)
-        for s, p, o in self.data_graph.triples((focus_uri, None, None)):
-            # Format Literals correctly in N3
-            if isinstance(o, Literal):
-                 # Handle Literals with specific arguments for n3()
-                 o_n3 = o.n3() if hasattr(o, 'n3') else f'"{str(o)}"'
-            elif hasattr(o, 'n3'): # Check if other types (URIRef, BNode) have n3()
-                 o_n3 = o.n3()
-            else:
-                 # Handle unexpected types that cannot be serialized this way
-                 print(f"Warning: Cannot serialize unexpected RDF term type: {type(o)} with value {o}")
-                 o_n3 = f'"{str(o)}"'
-            fragments.append(f"{s.n3()} {p.n3()} {o_n3} .")
+        for p, values in self.explanation_context.predicates_of(focus_uri).items():
+            for o in values:
+                # Format Literals correctly in N3
+                if isinstance(o, Literal):
+                     # Handle Literals with specific arguments for n3()
+                     o_n3 = o.n3() if hasattr(o, 'n3') else f'"{str(o)}"'
+                elif hasattr(o, 'n3'): # Check if other types (URIRef, BNode) have n3()
+                     o_n3 = o.n3()
+                else:
+                     # Handle unexpected types that cannot be serialized this way
+                     print(f"Warning: Cannot serialize unexpected RDF term type: {type(o)} with value {o}")
+                     o_n3 = f'"{str(o)}"'
+                fragments.append(f"{focus_uri.n3()} {p.n3()} {o_n3} .")
         return fragments
 
     def _get_shape_documentation(self, shape_id: ShapeId) -> List[str]:
         """Retrieves documentation associated with a shape"""
         documentation = []
         shape_uri = URIRef(shape_id)
-        for comment in self.shapes_graph.objects(shape_uri, RDFS.comment):
+        for comment in self.explanation_context.shape_values(shape_uri, RDFS.comment):
             documentation.append(str(comment))
-        for name in self.shapes_graph.objects(shape_uri, SH.name):
+        for name in self.explanation_context.shape_values(shape_uri, SH.name):
              documentation.append(f"Shape Name: {str(name)}")
         return documentation
 
     def _get_similar_cases(self, violation: ConstraintViolation) -> List[Dict]:
         """
-        Finds 'similar cases' in the data graph.
-        Queries for nodes of the same type and checks for property absence in Python.
+        Finds 'similar cases' in the data graph: other nodes of the focus node's
+        types that also lack a value for the violated property.
 
         Returns a list of dictionaries, each containing the URI ('node') and type ('node_type')
-        of a similar node.
+        of a similar node. At most SIMILAR_CASES_LIMIT cases are returned.
+        """
+        return self._find_similar_cases(violation)[0]
+
+    def _find_similar_cases(self, violation: ConstraintViolation) -> Tuple[List[Dict], Optional[int]]:
         """
-        similar_nodes_data = []
-        processed_nodes = set()
+        Returns a deterministic sample of the similar cases and their total count.
 
+        The candidate list ("nodes of these types missing this property") and its
+        sample are computed once per (types, property) pair by the shared
+        explanation context, so each violation only filters out its focus node.
+        """
         # 1. Identify the focus node and property path
         focus_node_uri = URIRef(violation.focus_node)
         if violation.property_path is None:
              logger.debug("Cannot find similar cases without a property path in the violation.")
-             return []
+             return [], None
         property_path_uri = URIRef(violation.property_path)
 
         # 2. Find types of the focus node
-        try:
-            query_focus_type = "SELECT ?type WHERE { ?focus_node a ?type . }"
-            results_type = self.data_graph.query(query_focus_type, initBindings={'focus_node': focus_node_uri})
-            focus_node_types = {row["type"] for row in results_type if isinstance(row["type"], URIRef)}
-            if not focus_node_types:
-                 logger.warning(f"Could not determine RDF type for focus node {focus_node_uri}")
-                 return []
-        except Exception as e:
-             logger.error(f"Error querying focus node type for {focus_node_uri}: {e}")
-             return []
-
-        # 3. For each type, query all nodes of that type and filter in Python
-        for node_type_uri in focus_node_types:
-            logger.debug(f"Searching for similar cases of type {node_type_uri} (Python filtering)")
-            try:
-                # Simpler query: Get all nodes of the specified type (excluding focus node)
-                query_nodes_of_type = """
-                SELECT ?node
-                WHERE {
-                    ?node a ?node_type .
-                    FILTER(?node != ?focus_node)
-                }
-                """
-                bindings = {'node_type': node_type_uri, 'focus_node': focus_node_uri}
-                results_nodes = self.data_graph.query(query_nodes_of_type, initBindings=bindings)
-
-                # Iterate through potential nodes and check property existence in Python
-                for row in results_nodes:
-                    node_uri = row["node"]
-                    # Ensure we're dealing with a valid URI and haven't processed it
-                    if isinstance(node_uri, URIRef):
-                        node_uri_str = str(node_uri)
-                        if node_uri_str not in processed_nodes:
-                            # Check if the property exists for this node
-                            # Using next() is slightly more efficient than checking len(list(...))
-                            property_exists = next(self.data_graph.objects(node_uri, property_path_uri), None)
-
-                            if property_exists is None: # Property does NOT exist
-                                similar_nodes_data.append({
-                                    "node": node_uri_str,
-                                    "node_type": str(node_type_uri)
-                                })
-                            processed_nodes.add(node_uri_str) # Mark as processed even if property exists
-
-            except Exception as e:
-                logger.error(f"Error processing similar nodes (Python filter) for type {node_type_uri}: {e}")
-
-        logger.debug(f"Found {len(similar_nodes_data)} similar cases for violation at {focus_node_uri} (Python filtering)")
-        return similar_nodes_data
+        focus_node_types = tuple(
+            t for t in dict.fromkeys(self.explanation_context.types_of(focus_node_uri)) if isinstance(t, URIRef)
+        )
+        if not focus_node_types:
+             logger.warning(f"Could not determine RDF type for focus node {focus_node_uri}")
+             return [], None
+
+        # 3. Nodes of those types without the property, shared across violations
+        index = self.explanation_context
+        missing = index.nodes_missing_predicate(focus_node_types, property_path_uri)
+        missing_nodes = index.cached(
+            ("missing_node_set", focus_node_types, property_path_uri), lambda: {node for node, _ in missing}
+        )
+        total = len(missing) - (1 if focus_node_uri in missing_nodes else 0)
+
+        limit = config.SIMILAR_CASES_LIMIT
+        if limit and limit > 0:
+            # One extra candidate so that the sample is still full once the focus node is removed
+            candidates = index.cached(
+                ("missing_sample", focus_node_types, property_path_uri, limit),
+                lambda: _stride_sample(missing, limit + 1),
+            )
+        else:
+            candidates, limit = missing, len(missing)
+
+        similar_nodes_data = [
+            {"node": str(node), "node_type": str(node_type)}
+            for node, node_type in candidates
+            if node != focus_node_uri
+        ][:limit]
+
+        logger.debug(f"Found {total} similar cases for violation at {focus_node_uri}, returning {len(similar_nodes_data)}")
+        return similar_nodes_data, total
 
 
     def _get_domain_rules(self, violation: ConstraintViolation) -> list[str]:
@@ -0,0 +1,214 @@
+"""
+Explanation Context
+-------------------
+Per-dataset lookup structures shared by every JustificationTreeBuilder and
+ContextRetriever call of a validation run.
+
+Building trees and context for many violations repeatedly asks the same graphs
+the same questions: the namespace prefixes, the types of a node, the instances
+of a class, the values of a predicate for a subject and the parameters of a
+shape. An `ExplanationContext` is created once per run. It answers these
+questions from indexes that are filled lazily on first use, so each answer is
+computed once and reused by every later call.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from rdflib import Graph, Namespace, URIRef
+from rdflib.namespace import RDF, RDFS, SH
+from rdflib.term import Node
+
+# Useful namespaces
+SCHEMA = Namespace("http://schema.org/")
+FOAF = Namespace("http://xmlns.com/foaf/0.1/")
+
+
+def collect_prefixes(data_graph: Graph, shapes_graph: Graph) -> Dict[str, str]:
+    """Collect namespace prefixes from both graphs for nicer output"""
+    prefixes = {}
+    prefixes.update(dict(data_graph.namespaces()))
+    prefixes.update(dict(shapes_graph.namespaces()))
+    # Add default prefixes if not already present
+    for prefix, namespace in (("sh", SH), ("rdf", RDF), ("rdfs", RDFS), ("schema", SCHEMA), ("foaf", FOAF)):
+        if prefix not in prefixes:
+            prefixes[prefix] = str(namespace)
+    return prefixes
+
+
+class ExplanationContext:
+    """
+    Shared, lazily built indexes over the data and shapes graphs of one run.
+
+    All lookups return values in the same order as the equivalent
+    `Graph.triples()` calls. Call `invalidate()` after modifying the data graph.
+    """
+
+    def __init__(self, data_graph: Graph, shapes_graph: Graph):
+        self.data_graph = data_graph
+        self.shapes_graph = shapes_graph
+        self.prefixes = collect_prefixes(data_graph, shapes_graph)
+
+        self._types: Dict[Node, List[Node]] = {}                        # node -> rdf:type values
+        self._instances: Dict[Node, List[Node]] = {}                    # class -> instances
+        self._predicates: Dict[Node, Dict[Node, List[Node]]] = {}       # subject -> predicate -> values
+        self._subjects_with: Dict[Node, Set[Node]] = {}                 # predicate -> subjects using it
+        self._shape_params: Dict[tuple, List[Node]] = {}                # (shape, predicate) -> values
+        self._evidence: Dict[tuple, Tuple[int, str]] = {}               # (subject, predicate) -> (count, evidence)
+        self._type_evidence: Dict[Node, str] = {}                       # node -> rdf:type evidence
+        self._memo: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Drops the data graph indexes after the data graph was modified (e.g. by a repair)."""
+        with self._lock:
+            self._types.clear()
+            self._instances.clear()
+            self._predicates.clear()
+            self._subjects_with.clear()
+            self._evidence.clear()
+            self._type_evidence.clear()
+            self._memo.clear()
+
+    # --- Data graph ---
+
+    def predicates_of(self, subject: Node) -> Dict[Node, List[Node]]:
+        """Returns the predicate -> values index of a subject."""
+        index = self._predicates.get(subject)
+        if index is None:
+            index = {}
+            for predicate, obj in self.data_graph.predicate_objects(subject):
+                index.setdefault(predicate, []).append(obj)
+            self._predicates[subject] = index
+        return index
+
+    def values(self, subject: Node, predicate: Node) -> List[Node]:
+        """Returns the values of `predicate` for `subject`."""
+        return self.predicates_of(subject).get(predicate, [])
+
+    def types_of(self, node: Node) -> List[Node]:
+        """Returns the rdf:type values of a node."""
+        types = self._types.get(node)
+        if types is None:
+            types = self._types[node] = list(self.data_graph.objects(node, RDF.type))
+        return types
+
+    def instances_of(self, cls: Node) -> List[Node]:
+        """Returns the instances of a class."""
+        instances = self._instances.get(cls)
+        if instances is None:
+            instances = self._instances[cls] = list(self.data_graph.subjects(RDF.type, cls))
+        return instances
+
+    def subjects_with(self, predicate: Node) -> Set[Node]:
+        """Returns the set of subjects that have at least one value for `predicate`."""
+        subjects = self._subjects_with.get(predicate)
+        if subjects is None:
+            subjects = self._subjects_with[predicate] = set(self.data_graph.subjects(predicate, None))
+        return subjects
+
+    def nodes_missing_predicate(self, types: Sequence[Node], predicate: Node) -> List[Tuple[URIRef, Node]]:
+        """
+        Returns `(node, type)` pairs for the IRI instances of `types` that have no
+        value for `predicate`, in type-index order and without duplicates.
+        Computed once per (types, predicate) pair.
+        """
+        types = tuple(types)
+
+        def compute():
+            with_predicate = self.subjects_with(predicate)
+            seen = set()
+            missing = []
+            for node_type in types:
+                for node in self.instances_of(node_type):
+                    if isinstance(node, URIRef) and node not in seen:
+                        seen.add(node)
+                        if node not in with_predicate:
+                            missing.append((node, node_type))
+            return missing
+
+        return self.cached(("nodes_missing_predicate", types, predicate), compute)
+
+    # --- Evidence ---
+
+    def property_evidence(self, subject: Node, predicate: Node) -> Tuple[int, str]:
+        """
+        Returns the number of values of `predicate` for `subject` and the
+        matching triples as N-Triples lines (the evidence of a justification node).
+        """
+        key = (subject, predicate)
+        evidence = self._evidence.get(key)
+        if evidence is None:
+            self.prefetch_property_evidence([key])
+            evidence = self._evidence[key]
+        return evidence
+
+    def prefetch_property_evidence(self, pairs: Iterable[Tuple[Node, Node]]) -> int:
+        """
+        Computes value counts and evidence for many (subject, predicate) pairs in
+        one pass grouped by subject: each subject's predicate index is read once
+        for all of its pairs, and the subject's N3 form is rendered once.
+        Pairs that are already cached are skipped. Returns the number of pairs computed.
+        """
+        by_subject: Dict[Node, List[Node]] = {}
+        for subject, predicate in pairs:
+            if (subject, predicate) not in self._evidence:
+                predicates = by_subject.setdefault(subject, [])
+                if predicate not in predicates:
+                    predicates.append(predicate)
+
+        computed = 0
+        for subject, predicates in by_subject.items():
+            index = self.predicates_of(subject)
+            subject_n3 = subject.n3()
+            for predicate in predicates:
+                objects = index.get(predicate, [])
+                prefix = f"{subject_n3} {predicate.n3()} "
+                evidence = "".join(f"{prefix}{obj.n3()} .\n" for obj in objects)
+                self._evidence[(subject, predicate)] = (len(objects), evidence)
+                computed += 1
+        return computed
+
+    def type_evidence(self, node: Node) -> str:
+        """Returns the rdf:type triples of a node as N-Triples lines."""
+        evidence = self._type_evidence.get(node)
+        if evidence is None:
+            prefix = f"{node.n3()} {RDF.type.n3()} "
+            evidence = self._type_evidence[node] = "".join(f"{prefix}{obj.n3()} .\n" for obj in self.types_of(node))
+        return evidence
+
+    # --- Shapes graph ---
+
+    def shape_values(self, shape: Node, predicate: Node) -> List[Node]:
+        """Returns the values of a shape parameter (e.g. sh:datatype, sh:pattern)."""
+        key = (shape, predicate)
+        values = self._shape_params.get(key)
+        if values is None:
+            values = self._shape_params[key] = list(self.shapes_graph.objects(shape, predicate))
+        return values
+
+    def shape_value(self, shape: Node, predicate: Node) -> Optional[Node]:
+        """Returns the last value of a shape parameter, or None if the shape has none."""
+        values = self.shape_values(shape, predicate)
+        return values[-1] if values else None
+
+    # --- Other derived values ---
+
+    def cached(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Memoizes an arbitrary derived value for the lifetime of the context."""
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        value = compute()
+        with self._lock:
+            return self._memo.setdefault(key, value)
+
+
+def ensure_explanation_context(
+    explanation_context: Optional[ExplanationContext], data_graph: Graph, shapes_graph: Graph
+) -> ExplanationContext:
+    """Returns the given context, or a new one for the graphs when none is shared."""
+    if explanation_context is not None:
+        return explanation_context
+    return ExplanationContext(data_graph, shapes_graph)
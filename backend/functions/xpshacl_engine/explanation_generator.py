@@ -1,5 +1,4 @@
 import os
-import json
 import logging
 from typing import List, Dict, Tuple, Optional
 import ollama
@@ -18,6 +17,8 @@ from .xpshacl_architecture import (
 from .context_retriever import ContextRetriever
 from .extended_shacl_validator import ExtendedShaclValidator
 from .justification_tree_builder import JustificationTreeBuilder
+from .prompt_budget import compact_json, compact_prompt_context
+from .response_cache import cached_completion
 
 load_dotenv()
 
@@ -79,6 +80,22 @@ class ExplanationGenerator:
             if not openai.api_key:
                 raise ValueError("ANTHROPIC_API_KEY environment variable not set.")
 
+    def _chat(self, prompt: str) -> str:
+        """Calls the OpenAI-compatible Chat Completion API through the response cache."""
+        messages = [{"role": "user", "content": prompt}]
+
+        def generate():
+            response = openai.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+            )
+            return response.choices[0].message.content
+
+        # Empty answers are not worth keeping
+        return cached_completion(
+            self.model_name, messages, None, generate, validate=lambda content: bool(content.strip())
+        )
+
     def _generate_explanation_text(
         self,
         violation: ConstraintViolation,
@@ -89,19 +106,16 @@ class ExplanationGenerator:
         """
         Internal helper that calls the OpenAI Chat Completion and returns a raw string.
         """
+        sections = compact_prompt_context(violation, justification_tree, context)
         prompt = f"Explain the following SHACL violation in {language} (ISO 639-1 code): {violation.message or 'Unknown violation'}. "
-        prompt += f"Justification: {json.dumps(justification_tree.to_dict(), indent=2, default=str)}. "
+        prompt += f"Justification: {compact_json(sections['justification_tree'])}. "
         prompt += (
-            f"Relevant context: {json.dumps(context.__dict__, indent=2, default=str)}. "
+            f"Relevant context: {compact_json(sections['context'])}. "
         )
         prompt += explanations_prompt
 
         try:
-            response = openai.chat.completions.create(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            return response.choices[0].message.content.strip()
+            return self._chat(prompt).strip()
         except Exception as e:
             logger.error(f"OpenAI API error: {e}")
             return f"Error generating explanation in {language}: {e}"
@@ -116,16 +130,12 @@ class ExplanationGenerator:
         SUGGESTION_SEPARATOR = "\n\n" # Define separator consistently
 
         prompt = f"Consider the following SHACL violation (context language is {language}, ISO 639-1 code): {violation.message or 'Unknown violation'}.\n"
-        prompt += f"Relevant context: {json.dumps(context.__dict__, indent=2, default=str)}.\n\n"
+        prompt += f"Relevant context: {compact_json(compact_prompt_context(violation, context=context)['context'])}.\n\n"
         prompt += f"Provide possible correction suggestions for this violation IN THE LANGUAGE '{language.upper()}' (ISO 639-1 code: {language}). Combine all suggestions into a single response, perhaps using numbered points or distinct paragraphs.\n\n"
         prompt += suggestions_prompt # Append the original detailed instructions
 
         try:
-            response = openai.chat.completions.create(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            response_content = response.choices[0].message.content.strip()
+            response_content = self._chat(prompt).strip()
 
             # --- Combine into single string ---
             # Although we ask the LLM for a single block, if it happens to use
@@ -237,11 +247,12 @@ class LocalExplanationGenerator:
     ) -> Dict[str, Tuple[str, List[str]]]:
         """Generates natural language explanations for a violation using Ollama for multiple languages"""
         output = {}
+        sections = compact_prompt_context(violation, justification_tree, context)
         for lang in languages:
             prompt_explanation = f"Explain the following SHACL violation in {lang}: {violation.message or 'Unknown violation'}. "
-            prompt_explanation += f"Justification: {json.dumps(justification_tree.to_dict(), indent=2, default=str)}. "
+            prompt_explanation += f"Justification: {compact_json(sections['justification_tree'])}. "
             prompt_explanation += (
-                f"Relevant context: {json.dumps(context.__dict__, indent=2, default=str)}. "
+                f"Relevant context: {compact_json(sections['context'])}. "
             )
             prompt_explanation += explanations_prompt
 
@@ -254,7 +265,7 @@ class LocalExplanationGenerator:
 
             prompt_suggestions = f"Given the following SHACL violation in {lang}: {violation.message or 'Unknown violation'}. "
             prompt_suggestions += (
-                f"Relevant context: {json.dumps(context.__dict__, indent=2, default=str)}. "
+                f"Relevant context: {compact_json(sections['context'])}. "
             )
             prompt_suggestions += suggestions_prompt
 
@@ -274,7 +285,7 @@ class LocalExplanationGenerator:
         """Generates correction suggestions for a violation using Ollama for a specific language"""
         prompt = f"Given the following SHACL violation in {language} (ISO 639-1 code): {violation.message or 'Unknown violation'}. "
         prompt += (
-            f"Relevant context: {json.dumps(context.__dict__, indent=2, default=str)}. "
+            f"Relevant context: {compact_json(compact_prompt_context(violation, context=context)['context'])}. "
         )
         prompt += suggestions_prompt
 
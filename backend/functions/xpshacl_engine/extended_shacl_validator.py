@@ -8,8 +8,8 @@ from typing import List
 import time
 import exrex
 
-from .xpshacl_architecture import ConstraintViolation, ViolationType
-from .context_retriever import _serialize_focus_node
+from .xpshacl_architecture import ConstraintViolation, LazyContext, ViolationType
+from .context_retriever import FocusNodeSerializer
 
 # SHACL namespace
 SH = "http://www.w3.org/ns/shacl#"
@@ -63,9 +63,19 @@ class ExtendedShaclValidator:
 
         return self._extract_violations_from_graph(results_graph, data_graph)
 
+    @staticmethod
+    def _describe_focus_node(serializer: FocusNodeSerializer, focus_node) -> str:
+        try:
+            return serializer.serialize(focus_node)
+        except Exception as e:
+            logger.warning(f"Could not serialize focus node {focus_node}: {e}")
+            return ""
+
     def _extract_violations_from_graph(self, results_graph: Graph, data_graph: Graph) -> List[ConstraintViolation]:
         """Extracts ConstraintViolation objects from a validation report graph."""
         violations = []
+        # One memoized serializer per run: focus nodes with many violations are described once
+        focus_node_serializer = FocusNodeSerializer(data_graph)
         # Query the results graph to find all validation results
         validation_results = results_graph.subjects(
             predicate=RDF.type, object=URIRef(SH + "ValidationResult")
@@ -87,7 +97,8 @@ class ExtendedShaclValidator:
                 constraint_id=str(constraint_component_obj) if constraint_component_obj else "",
                 violation_type=self._get_violation_(constraint_component_obj),
                 property_path=str(result_path_obj) if result_path_obj else "",
-                value=str(value_obj) if value_obj else None
+                value=str(value_obj) if value_obj else None,
+                context=LazyContext()
             )
 
             # --- PHOENIX CONTEXT ENRICHMENT ---
@@ -146,13 +157,12 @@ class ExtendedShaclValidator:
             violations.append(violation)
 
             # --- PHOENIX CONTEXT ENRICHMENT FOR FOCUS NODE DEFINITION ---
+            # Serialized lazily, only when a consumer reads it
             if violation.focus_node:
-                try:
-                    violation.context["focusNodeDefinition"] = _serialize_focus_node(
-                        URIRef(violation.focus_node), data_graph
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not serialize focus node {violation.focus_node}: {e}")
+                violation.context.set_lazy(
+                    "focusNodeDefinition",
+                    lambda node=focus_node_obj: self._describe_focus_node(focus_node_serializer, node),
+                )
             # --- END ENRICHMENT ---
 
         return violations
\ No newline at end of file
@@ -6,9 +6,10 @@ These trees represent the formal reasoning behind a validation failure.
 """
 
 import logging
-from typing import Dict
-from rdflib import Graph, URIRef, Namespace
-from rdflib.namespace import RDF, RDFS, SH
+import re
+from typing import Any, Dict, Iterable, Optional
+from rdflib import Graph, URIRef
+from rdflib.namespace import SH
 
 from .xpshacl_architecture import (
     ConstraintViolation,
@@ -17,12 +18,45 @@ from .xpshacl_architecture import (
     ViolationType,
     NodeId,
 )
+from .explanation_context import ExplanationContext, ensure_explanation_context
 
 logger = logging.getLogger("phoenix.justification")
 
-# Useful namespaces
-SCHEMA = Namespace("http://schema.org/")
-FOAF = Namespace("http://xmlns.com/foaf/0.1/")
+# Justification trees are compiled once per (shape, constraint, path, ...) into a
+# template whose violation-specific parts are slots, delimited by private-use characters.
+_SLOT_START, _SLOT_END = "\ue000", "\ue001"
+_SLOT_PATTERN = re.compile(f"{_SLOT_START}([^{_SLOT_END}]*){_SLOT_END}")
+_URI_SUFFIX = "|uri"
+
+
+def _slot(name: str) -> str:
+    return f"{_SLOT_START}{name}{_SLOT_END}"
+
+
+def _is_slot(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(_SLOT_START) and value.endswith(_SLOT_END)
+
+
+class _SlotContext(dict):
+    """Violation context used while compiling a template: every lookup returns a slot."""
+
+    def __init__(self):
+        super().__init__()
+        self.defaults: Dict[str, Any] = {}
+
+    def get(self, key, default=None):
+        self.defaults.setdefault(key, default)
+        return _slot(f"context:{key}")
+
+
+class _JustificationTemplate:
+    """A compiled justification tree and the defaults of the context values it uses."""
+
+    __slots__ = ("root", "context_defaults")
+
+    def __init__(self, root: JustificationNode, context_defaults: Dict[str, Any]):
+        self.root = root
+        self.context_defaults = context_defaults
 
 
 class JustificationTreeBuilder:
@@ -30,35 +64,40 @@ class JustificationTreeBuilder:
     Constructs logical justification trees for SHACL constraint violations.
     """
 
-    def __init__(self, data_graph: Graph, shapes_graph: Graph):
+    def __init__(
+        self,
+        data_graph: Graph,
+        shapes_graph: Graph,
+        explanation_context: Optional[ExplanationContext] = None,
+    ):
         """
         Initialize the justification tree builder.
 
         Args:
             data_graph: RDFLib Graph containing the data that was validated
             shapes_graph: RDFLib Graph containing the SHACL shapes used for validation
+            explanation_context: Shared per-dataset indexes; created on demand when omitted
         """
         self.data_graph = data_graph
         self.shapes_graph = shapes_graph
-        self._prefixes = self._collect_prefixes()
-
-    def _collect_prefixes(self) -> Dict[str, str]:
-        """Collect namespace prefixes from both graphs for nicer output"""
-        prefixes = {}
-        prefixes.update(dict(self.data_graph.namespaces()))
-        prefixes.update(dict(self.shapes_graph.namespaces()))
-        # Add default prefixes if not already present
-        if "sh" not in prefixes:
-            prefixes["sh"] = str(SH)
-        if "rdf" not in prefixes:
-            prefixes["rdf"] = str(RDF)
-        if "rdfs" not in prefixes:
-            prefixes["rdfs"] = str(RDFS)
-        if "schema" not in prefixes:
-            prefixes["schema"] = str(SCHEMA)
-        if "foaf" not in prefixes:
-            prefixes["foaf"] = str(FOAF)
-        return prefixes
+        self.explanation_context = ensure_explanation_context(
+            explanation_context, data_graph, shapes_graph
+        )
+        self._prefixes = self.explanation_context.prefixes
+
+    def prepare(self, violations: Iterable[ConstraintViolation]) -> None:
+        """
+        Precomputes the value counts and data evidence of all (focus node, property path)
+        pairs of a validation run in one grouped pass, so that building the trees of
+        large reports does not re-scan the same pairs for every violation.
+        """
+        pairs = [
+            (URIRef(violation.focus_node), URIRef(violation.property_path))
+            for violation in violations
+            if violation.property_path
+        ]
+        computed = self.explanation_context.prefetch_property_evidence(pairs)
+        logger.debug(f"Prefetched evidence for {computed} (focus node, property) pairs")
 
     def build_justification_tree(
         self,
@@ -67,12 +106,98 @@ class JustificationTreeBuilder:
         """
         Build a justification tree for a constraint violation.
 
+        The tree structure and all shape-derived statements are compiled once per
+        (shape, constraint, type, path, value presence) and instantiated with the
+        focus node, value, counts and data evidence of each violation.
+
         Args:
             violation: The constraint violation to explain
 
         Returns:
             A justification tree explaining the violation
         """
+        key = (
+            "justification_template",
+            violation.shape_id,
+            violation.constraint_id,
+            violation.violation_type,
+            violation.property_path,
+            bool(violation.value),
+            bool(violation.message),
+        )
+        template = self.explanation_context.cached(key, lambda: self._compile_template(violation))
+        root = self._instantiate(template.root, self._slot_resolver(violation, template))
+        return JustificationTree(root=root, violation=violation)
+
+    def _compile_template(self, violation: ConstraintViolation) -> _JustificationTemplate:
+        """Builds the tree of a placeholder violation whose instance-specific values are slots."""
+        slot_context = _SlotContext()
+        placeholder = ConstraintViolation(
+            focus_node=_slot("focus"),
+            shape_id=violation.shape_id,
+            constraint_id=violation.constraint_id,
+            violation_type=violation.violation_type,
+            property_path=violation.property_path,
+            value=_slot("value") if violation.value else violation.value,
+            message=_slot("message") if violation.message else violation.message,
+            severity=violation.severity,
+            context=slot_context,
+        )
+        return _JustificationTemplate(self._build_tree(placeholder), slot_context.defaults)
+
+    def _slot_resolver(self, violation: ConstraintViolation, template: _JustificationTemplate):
+        """Returns a function computing (once) the value of a slot for a violation."""
+        values: Dict[str, str] = {}
+
+        def resolve(match) -> str:
+            name = match.group(1)
+            if name not in values:
+                values[name] = self._slot_value(violation, template, name)
+            return values[name]
+
+        return resolve
+
+    def _slot_value(self, violation: ConstraintViolation, template: _JustificationTemplate, name: str) -> str:
+        if name.endswith(_URI_SUFFIX):
+            return self._format_uri(self._slot_value(violation, template, name[:-len(_URI_SUFFIX)]))
+        kind, _, argument = name.partition(":")
+        if kind == "focus":
+            value = violation.focus_node
+        elif kind == "value":
+            value = violation.value
+        elif kind == "message":
+            value = violation.message
+        elif kind == "context":
+            value = violation.context.get(argument, template.context_defaults.get(argument))
+        elif kind == "actual_count":
+            value = self._actual_count(violation, argument)
+        elif kind == "actual_values_count":
+            value = self._actual_values_count(violation)
+        elif kind == "data_evidence":
+            value = self._generate_data_evidence(violation.focus_node, argument)
+        elif kind == "type_evidence":
+            value = self._generate_type_evidence(violation.focus_node)
+        else:
+            raise KeyError(f"Unknown justification template slot: {name}")
+        return str(value)
+
+    def _instantiate(self, node: JustificationNode, resolve) -> JustificationNode:
+        """Copies a template node, filling in its slots."""
+        statement = node.statement
+        if _SLOT_START in statement:
+            statement = _SLOT_PATTERN.sub(resolve, statement)
+        evidence = node.evidence
+        if evidence is not None and _SLOT_START in evidence:
+            evidence = _SLOT_PATTERN.sub(resolve, evidence)
+        return JustificationNode(
+            statement=statement,
+            type=node.type,
+            evidence=evidence,
+            children=[self._instantiate(child, resolve) for child in node.children],
+        )
+
+    def _build_tree(self, violation: ConstraintViolation) -> JustificationNode:
+        """Builds the justification tree of a violation and returns its root."""
         # Create the root node of the justification tree
         root_statement = (
             f"Node {self._format_uri(violation.focus_node)} fails to conform to "
@@ -96,7 +221,7 @@ class JustificationTreeBuilder:
         else:
             self._build_generic_justification(violation, root)
 
-        return JustificationTree(root=root, violation=violation)
+        return root
 
     def _build_cardinality_justification(
         self,
@@ -129,12 +254,7 @@ class JustificationTreeBuilder:
             min_count = violation.context.get("minCount", "at least 1")
 
             # Count actual values in the data
-            actual_count = violation.context.get("actualCount")
-            if actual_count is None:
-                # If not available in context, compute it
-                actual_count = self._count_property_values(
-                    violation.focus_node, property_path
-                )
+            actual_count = self._actual_count(violation, property_path)
 
             data_statement = (
                 f"The data shows that node {self._format_uri(violation.focus_node)} "
@@ -161,8 +281,7 @@ class JustificationTreeBuilder:
 
             # --- BUG FIX ---
             # The actual values are in the context. Use their length instead of recounting.
-            actual_values = violation.context.get("actualValues", [])
-            actual_count = len(actual_values)
+            actual_count = self._actual_values_count(violation)
             # --- END BUG FIX ---
 
             data_statement = (
@@ -226,21 +345,13 @@ class JustificationTreeBuilder:
 
         # Add reasoning
         if "DatatypeConstraintComponent" in violation.constraint_id:
-            datatype = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.datatype, None)
-            ):
-                datatype = str(o)
+            datatype = self._shape_param(violation, SH.datatype)
 
             if datatype:
                 reasoning = f"The value does not match the required datatype {self._format_uri(datatype)}"
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
         elif "ClassConstraintComponent" in violation.constraint_id:
-            required_class = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.ClassConstraintComponent, None)
-            ):
-                required_class = str(o)
+            required_class = self._shape_param(violation, SH.ClassConstraintComponent)
 
             if required_class:
                 reasoning = f"The value is not an instance of the required class {self._format_uri(required_class)}"
@@ -290,40 +401,24 @@ class JustificationTreeBuilder:
 
         # Add specific reasoning based on the constraint type
         if "MinExclusiveConstraintComponent" in violation.constraint_id:
-            min_value = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.minExclusive, None)
-            ):
-                min_value = str(o)
+            min_value = self._shape_param(violation, SH.minExclusive)
             if min_value:
                 reasoning = f"The value provided does not comply with the minimum value restriction {min_value}"
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
         elif "MinInclusiveConstraintComponent" in violation.constraint_id:
-            min_value = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.minInclusive, None)
-            ):
-                min_value = str(o)
+            min_value = self._shape_param(violation, SH.minInclusive)
             if min_value:
                 reasoning = f"The value provided does not comply with the minimum value restriction {min_value}"
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
         elif "MaxExclusiveConstraintComponent" in violation.constraint_id:
-            max_value = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.maxExclusive, None)
-            ):
-                max_value = str(o)
+            max_value = self._shape_param(violation, SH.maxExclusive)
 
             if max_value:
                 reasoning = f"The value provided does not comply with the maximum value restriction {max_value}"
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
 
         elif "MaxInclusiveConstraintComponent" in violation.constraint_id:
-            max_value = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.maxInclusive, None)
-            ):
-                max_value = str(o)
+            max_value = self._shape_param(violation, SH.maxInclusive)
 
             if max_value:
                 reasoning = f"The value provided does not comply with the maximum value restriction {max_value}"
@@ -364,10 +459,7 @@ class JustificationTreeBuilder:
             )
         # Add specific reasoning based on the constraint type
         if "PatternConstraintComponent" in violation.constraint_id:
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.pattern, None)
-            ):
-                pattern = str(o)
+            pattern = self._shape_param(violation, SH.pattern) or ""
             if pattern:
                 reasoning = (
                     f"The value provided does not comply with the pattern {pattern}."
@@ -375,11 +467,7 @@ class JustificationTreeBuilder:
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
 
             # Add flag information if present
-            flags = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.flags, None)
-            ):
-                flags = str(o)
+            flags = self._shape_param(violation, SH.flags)
             if flags:
                 reasoning = f"The pattern uses flags {flags}."
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
@@ -418,39 +506,25 @@ class JustificationTreeBuilder:
             )
 
         if "EqualsConstraintComponent" in violation.constraint_id:
-            equals_property = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.equals, None)
-            ):
-                equals_property = str(o)
+            equals_property = self._shape_param(violation, SH.equals)
             if equals_property:
                 reasoning = f"The shape states that property {self._format_uri(property_path)} must have the same values as {self._format_uri(equals_property)}."
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
 
         elif "DisjointConstraintComponent" in violation.constraint_id:
-            disjoint_property = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.disjoint, None)
-            ):
-                disjoint_property = str(o)
+            disjoint_property = self._shape_param(violation, SH.disjoint)
             if disjoint_property:
                 reasoning = f"The shape states that property {self._format_uri(property_path)} must not have any of the same values as {self._format_uri(disjoint_property)}."
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
 
         elif "LessThanConstraintComponent" in violation.constraint_id:
-            less_than_property = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.lessThan, None)
-            ):
-                less_than_property = str(o)
+            less_than_property = self._shape_param(violation, SH.lessThan)
 
             if less_than_property:
                 # Retrieve all the values related to the two properties
                 less_than_values = [
                     str(o)
-                    for s, p, o in self.data_graph.triples(
-                        (URIRef(focus_node), URIRef(less_than_property), None)
-                    )
+                    for o in self.explanation_context.values(URIRef(focus_node), URIRef(less_than_property))
                 ]
 
                 if len(less_than_values) > 0:
@@ -460,19 +534,13 @@ class JustificationTreeBuilder:
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
 
         elif "LessThanOrEqualsConstraintComponent" in violation.constraint_id:
-            less_or_equals_property = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.lessThanOrEquals, None)
-            ):
-                less_or_equals_property = str(o)
+            less_or_equals_property = self._shape_param(violation, SH.lessThanOrEquals)
 
             if less_or_equals_property:
                 # Retrieve all the values related to the two properties
                 less_than_or_equals_values = [
                     str(o)
-                    for s, p, o in self.data_graph.triples(
-                        (URIRef(focus_node), URIRef(less_or_equals_property), None)
-                    )
+                    for o in self.explanation_context.values(URIRef(focus_node), URIRef(less_or_equals_property))
                 ]
 
                 if len(less_than_or_equals_values) > 0:
@@ -515,41 +583,25 @@ class JustificationTreeBuilder:
             )
 
         if "EqualsConstraintComponent" in violation.constraint_id:
-            equals_property = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.equals, None)
-            ):
-                equals_property = str(o)
+            equals_property = self._shape_param(violation, SH.equals)
             if equals_property:
                 reasoning = f"The shape states that property {self._format_uri(property_path)} must have the same values as {self._format_uri(equals_property)}."
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
 
         elif "DisjointConstraintComponent" in violation.constraint_id:
-            disjoint_property = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.disjoint, None)
-            ):
-                disjoint_property = str(o)
+            disjoint_property = self._shape_param(violation, SH.disjoint)
             if disjoint_property:
                 reasoning = f"The shape states that property {self._format_uri(property_path)} must not have any of the same values as {self._format_uri(disjoint_property)}."
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
 
         elif "LessThanConstraintComponent" in violation.constraint_id:
-            less_than_property = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.lessThan, None)
-            ):
-                less_than_property = str(o)
+            less_than_property = self._shape_param(violation, SH.lessThan)
             if less_than_property:
                 reasoning = f"The shape states that the value of property {self._format_uri(property_path)} must be less than the value of {self._format_uri(less_than_property)}."
                 root.add_child(JustificationNode(statement=reasoning, type="inference"))
 
         elif "LessThanOrEqualsConstraintComponent" in violation.constraint_id:
-            less_or_equals_property = None
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.lessThanOrEquals, None)
-            ):
-                less_or_equals_property = str(o)
+            less_or_equals_property = self._shape_param(violation, SH.lessThanOrEquals)
 
             if less_or_equals_property:
                 reasoning = f"The shape states that the value of property {self._format_uri(property_path)} must be less than or equal to the value of {self._format_uri(less_or_equals_property)}."
@@ -574,40 +626,28 @@ class JustificationTreeBuilder:
         # Add specific reasoning based on the constraint type
         if "NotConstraintComponent" in violation.constraint_id:
             # Find the 'sh:not' shape that contains the nested violation
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.NotConstraintComponent, None)
-            ):
-                not_shape_id = o
+            not_shape_id = self.explanation_context.shape_value(URIRef(violation.shape_id), SH.NotConstraintComponent)
 
             reasoning = f"The shape {self._format_uri(violation.shape_id)} includes a negation of the shape {self._format_uri(not_shape_id)}. This means that, for the resource to be valid, it cannot comply with the rules of the shape {self._format_uri(not_shape_id)}"
             root.add_child(JustificationNode(statement=reasoning, type="inference"))
 
         elif "AndConstraintComponent" in violation.constraint_id:
             # Find the 'sh:and' shape that contains the list of shapes
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.AndConstraintComponent, None)
-            ):
-                and_shape_list = o
+            and_shape_list = self.explanation_context.shape_value(URIRef(violation.shape_id), SH.AndConstraintComponent)
 
             reasoning = f"The shape {self._format_uri(violation.shape_id)} includes a conjunction of the shapes listed in {self._format_uri(and_shape_list)}. This means that, for the resource to be valid, it must comply with all rules of the shapes listed in {self._format_uri(and_shape_list)}"
             root.add_child(JustificationNode(statement=reasoning, type="inference"))
 
         elif "OrConstraintComponent" in violation.constraint_id:
             # Find the 'sh:or' shape that contains the list of shapes
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.OrConstraintComponent, None)
-            ):
-                or_shape_list = o
+            or_shape_list = self.explanation_context.shape_value(URIRef(violation.shape_id), SH.OrConstraintComponent)
 
             reasoning = f"The shape {self._format_uri(violation.shape_id)} includes a disjunction of the shapes listed in {self._format_uri(or_shape_list)}. This means that, for the resource to be valid, it must comply with at least one of the shapes listed in {self._format_uri(or_shape_list)}"
             root.add_child(JustificationNode(statement=reasoning, type="inference"))
 
         elif "XoneConstraintComponent" in violation.constraint_id:
             # Find the 'sh:xone' shape that contains the list of shapes
-            for s, p, o in self.shapes_graph.triples(
-                (URIRef(violation.shape_id), SH.XoneConstraintComponent, None)
-            ):
-                xone_shape_list = o
+            xone_shape_list = self.explanation_context.shape_value(URIRef(violation.shape_id), SH.XoneConstraintComponent)
 
             reasoning = f"The shape {self._format_uri(violation.shape_id)} includes an exclusive disjunction of the shapes listed in {self._format_uri(xone_shape_list)}. This means that, for the resource to be valid, it must comply with exactly one of the shapes listed in {self._format_uri(xone_shape_list)}"
             root.add_child(JustificationNode(statement=reasoning, type="inference"))
@@ -630,11 +670,20 @@ class JustificationTreeBuilder:
         """
         Formats a URI for human-readable output.
         """
+        if _is_slot(uri):
+            return f"{uri[:-1]}{_URI_SUFFIX}{_SLOT_END}"
         # Simple formatting - can be improved with prefix mappings, etc.
         if uri.startswith("http://") or uri.startswith("https://"):
             return f"<{uri}>"
         return uri
 
+    def _shape_param(self, violation: ConstraintViolation, predicate: URIRef) -> Optional[str]:
+        """
+        Returns the value of a parameter (e.g. sh:datatype) of the violated shape as a string.
+        """
+        value = self.explanation_context.shape_value(URIRef(violation.shape_id), predicate)
+        return str(value) if value is not None else None
+
     def _get_shape_constraint_text(self, violation: ConstraintViolation) -> str:
         """
         Retrieves the constraint text from the shapes graph.
@@ -643,48 +692,51 @@ class JustificationTreeBuilder:
         shape_node = URIRef(violation.shape_id)
 
         # Try to get the constraint value
-        constraint_value = None
-        for s, p, o in self.shapes_graph.triples((shape_node, None, None)):
-            if str(p) == str(constraint_node):
-                constraint_value = o
-                break
+        constraint_values = self.explanation_context.shape_values(shape_node, constraint_node)
+        constraint_value = constraint_values[0] if constraint_values else None
 
         if constraint_value:
             return f"The shape {self._format_uri(violation.shape_id)} has a constraint {self._format_uri(violation.constraint_id)} with value {constraint_value}."
         else:
             return f"The shape {self._format_uri(violation.shape_id)} has a constraint {self._format_uri(violation.constraint_id)}."
 
+    def _actual_count(self, violation: ConstraintViolation, property_path: str):
+        """
+        Returns the actual number of values from the violation context, counting them
+        in the data when the validator did not report it.
+        """
+        if _is_slot(violation.focus_node):
+            return _slot(f"actual_count:{property_path}")
+        actual_count = violation.context.get("actualCount")
+        if actual_count is None:
+            # If not available in context, compute it
+            actual_count = self._count_property_values(violation.focus_node, property_path)
+        return actual_count
+
+    def _actual_values_count(self, violation: ConstraintViolation):
+        """Returns the number of actual values reported in the violation context."""
+        if _is_slot(violation.focus_node):
+            return _slot("actual_values_count")
+        return len(violation.context.get("actualValues", []))
+
     def _count_property_values(self, focus_node: NodeId, property_path: str) -> int:
         """
         Counts the number of values for a given property path of a focus node.
         """
-        count = 0
-        focus_uri = URIRef(focus_node)
-        property_uri = URIRef(property_path)
-
-        for s, p, o in self.data_graph.triples((focus_uri, property_uri, None)):
-            count += 1
-        return count
+        return self.explanation_context.property_evidence(URIRef(focus_node), URIRef(property_path))[0]
 
     def _generate_data_evidence(self, focus_node: NodeId, property_path: str) -> str:
         """
         Generates evidence from the data graph for a given focus node and property path.
         """
-        evidence = ""
-        focus_uri = URIRef(focus_node)
-        property_uri = URIRef(property_path)
-
-        for s, p, o in self.data_graph.triples((focus_uri, property_uri, None)):
-            evidence += f"{s.n3()} {p.n3()} {o.n3()} .\n"
-        return evidence
+        if _is_slot(focus_node):
+            return _slot(f"data_evidence:{property_path}")
+        return self.explanation_context.property_evidence(URIRef(focus_node), URIRef(property_path))[1]
 
     def _generate_type_evidence(self, focus_node: NodeId) -> str:
         """
         Generates evidence about the type of a focus node from the data graph.
         """
-        evidence = ""
-        focus_uri = URIRef(focus_node)
-
-        for s, p, o in self.data_graph.triples((focus_uri, RDF.type, None)):
-            evidence += f"{s.n3()} {p.n3()} {o.n3()} .\n"
-        return evidence
+        if _is_slot(focus_node):
+            return _slot("type_evidence")
+        return self.explanation_context.type_evidence(URIRef(focus_node))
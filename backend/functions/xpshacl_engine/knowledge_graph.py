@@ -28,6 +28,63 @@ PHOENIX = Namespace("http://www.w3.org/ns/phoenix#") # Namespace for PHOENIX fee
 # Define the separator used for joining/splitting suggestions
 SUGGESTION_SEPARATOR = "\n\n"
 
+def signature_uri(sig: ViolationSignature) -> URIRef:
+    """Create a stable URIRef for a given signature."""
+    params = sig.constraint_params if sig.constraint_params else {}
+    sorted_params = sorted(params.items())
+    property_path_str = str(sig.property_path) if sig.property_path else "None"
+    violation_type_str = str(sig.violation_type) if sig.violation_type else "None"
+
+    signature_string = (
+        f"{sig.constraint_id}|{property_path_str}|{violation_type_str}|{sorted_params}"
+    )
+    hex_digest = hashlib.md5(signature_string.encode("utf-8")).hexdigest()
+    return XSH[f"sig_{hex_digest}"]
+
+
+def build_explanations_query(sig_uris: List[str], language: str = "en", graph_uri: Optional[str] = None) -> str:
+    """
+    Builds one SELECT query returning the explanation text, suggestions and
+    repair query of many signatures at once (a VALUES block instead of one
+    lookup per signature). `graph_uri` restricts the lookup to a named graph.
+    """
+    values = " ".join(f"<{uri}>" for uri in sig_uris)
+    language = language.replace('"', "")
+    patterns = f"""
+        VALUES ?sig {{ {values} }}
+        ?sig <{XSH.hasExplanation}> ?expl .
+        ?expl <{XSH.naturalLanguageText}> ?text .
+        FILTER(lang(?text) = "{language}")
+        OPTIONAL {{
+            ?expl <{XSH.correctionSuggestions}> ?suggestions .
+            FILTER(lang(?suggestions) = "{language}")
+        }}
+        OPTIONAL {{ ?expl <{PHOENIX.hasRepairQuery}> ?query . }}
+        OPTIONAL {{ ?expl <{XSH.providedByModel}> ?model . }}"""
+    if graph_uri:
+        patterns = f"\n        GRAPH <{graph_uri}> {{{patterns}\n        }}"
+    return f"SELECT ?sig ?text ?suggestions ?query ?model WHERE {{{patterns}\n}}"
+
+
+def explanations_from_rows(rows) -> Dict[str, ExplanationOutput]:
+    """
+    Turns `(sig, text, suggestions, query, model)` rows of the explanations query
+    into ExplanationOutput objects keyed by signature URI (first row wins).
+    """
+    explanations: Dict[str, ExplanationOutput] = {}
+    for sig, text, suggestions, query, model in rows:
+        sig = str(sig)
+        if sig in explanations or text is None:
+            continue
+        explanations[sig] = ExplanationOutput(
+            natural_language_explanation=str(text),
+            correction_suggestions=str(suggestions).split(SUGGESTION_SEPARATOR) if suggestions is not None else None,
+            provided_by_model=str(model) if model is not None else None,
+            proposed_repair_query=str(query) if query is not None else None,
+        )
+    return explanations
+
+
 class ViolationKnowledgeGraph:
     def __init__(
         self,
@@ -68,16 +125,7 @@ class ViolationKnowledgeGraph:
 
     def signature_to_uri(self, sig: ViolationSignature) -> URIRef:
         """Create a stable URIRef for a given signature. (Using existing logic)"""
-        params = sig.constraint_params if sig.constraint_params else {}
-        sorted_params = sorted(params.items())
-        property_path_str = str(sig.property_path) if sig.property_path else "None"
-        violation_type_str = str(sig.violation_type) if sig.violation_type else "None"
-
-        signature_string = (
-            f"{sig.constraint_id}|{property_path_str}|{violation_type_str}|{sorted_params}"
-        )
-        hex_digest = hashlib.md5(signature_string.encode("utf-8")).hexdigest()
-        return XSH[f"sig_{hex_digest}"]
+        return signature_uri(sig)
 
     # --- NEW METHOD FOR PHOENIX FEEDBACK ---
     def add_remediation_feedback(self, signature: ViolationSignature, repair_query: str, action: str):
@@ -260,6 +308,21 @@ class ViolationKnowledgeGraph:
             proposed_repair_query=repair_query
         )
 
+    def get_explanations(
+        self, sigs: List[ViolationSignature], language: str = "en"
+    ) -> Dict[ViolationSignature, ExplanationOutput]:
+        """
+        Batched `get_explanation`: resolves many signatures with a single query and
+        returns the ones that have an explanation in `language`. Only the text,
+        suggestions, repair query and model are returned, not the stored violation,
+        tree and context.
+        """
+        by_uri = {str(self.signature_to_uri(sig)): sig for sig in sigs}
+        if not by_uri:
+            return {}
+        rows = self.graph.query(build_explanations_query(list(by_uri), language))
+        return {by_uri[uri]: explanation for uri, explanation in explanations_from_rows(rows).items()}
+
     def add_violation(self, sig: ViolationSignature, explanation: ExplanationOutput, language: str = "en"):
         """
         Add a new violation signature and explanation to the KG with a language tag.
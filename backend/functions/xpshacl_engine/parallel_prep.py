@@ -0,0 +1,117 @@
+"""
+Parallel Explanation Preparation
+--------------------------------
+Builds justification trees and domain context for many violations in worker
+processes, so this CPU-bound, pure-Python stage scales with the number of cores
+instead of serializing on the GIL.
+
+The data and shapes graphs are written once to a read-only pickle snapshot,
+which keeps blank node identifiers and namespace bindings (an N-Triples snapshot
+would relabel blank nodes and is slower to load). Each worker loads the snapshot
+once in its initializer and keeps a JustificationTreeBuilder and ContextRetriever
+over a shared ExplanationContext for its whole lifetime. Tasks then carry only
+violations and return trees and contexts, never graphs.
+
+The worker entry points live in the top-level `explanation_prep_worker` module,
+so spawned workers do not import the whole `functions` package.
+"""
+
+import logging
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import List, Optional, Sequence, Tuple
+
+from rdflib import Graph
+
+import explanation_prep_worker
+from .xpshacl_architecture import (
+    ConstraintViolation,
+    DomainContext,
+    JustificationTree,
+    LazyContext,
+)
+
+logger = logging.getLogger(__name__)
+
+# Below this many violations per worker, process start-up outweighs the gain
+MIN_VIOLATIONS_PER_WORKER = 50
+
+
+def write_snapshot(data_graph: Graph, shapes_graph: Graph, directory: str) -> str:
+    """Writes both graphs to a read-only snapshot file. Returns its path."""
+    path = os.path.join(directory, "graphs.pickle")
+    with open(path, "wb") as f:
+        pickle.dump((data_graph, shapes_graph), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.chmod(path, 0o400)
+    return path
+
+
+def load_snapshot(path: str) -> Tuple[Graph, Graph]:
+    """Loads the `(data_graph, shapes_graph)` written by `write_snapshot`."""
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _transferable(violation: ConstraintViolation) -> ConstraintViolation:
+    """
+    Returns a copy of a violation that can be pickled: values of a LazyContext that
+    were not computed yet (e.g. the focus node definition) are left out, since
+    trees and context do not depend on them.
+    """
+    context = violation.context
+    if isinstance(context, LazyContext):
+        context = {key: context[key] for key in context if context.is_computed(key)}
+    return replace(violation, context=dict(context))
+
+
+def prepare_explanations_parallel(
+    violations: Sequence[ConstraintViolation],
+    data_graph: Graph,
+    shapes_graph: Graph,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> List[Tuple[JustificationTree, DomainContext]]:
+    """
+    Builds `(justification_tree, context)` for each violation, in order, using a
+    pool of worker processes that share a snapshot of the graphs.
+
+    Violations are sorted by shape and constraint before they are partitioned,
+    so each worker reuses its compiled justification templates and context lookups.
+    """
+    workers = workers or os.cpu_count() or 1
+    if not violations:
+        return []
+
+    order = sorted(range(len(violations)), key=lambda i: (str(violations[i].shape_id), str(violations[i].constraint_id)))
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(order) // (workers * 4)))
+    chunks = [order[start:start + chunk_size] for start in range(0, len(order), chunk_size)]
+
+    snapshot_dir = tempfile.mkdtemp(prefix="xpshacl_snapshot_")
+    try:
+        snapshot_path = write_snapshot(data_graph, shapes_graph, snapshot_dir)
+
+        results: List[Optional[Tuple[JustificationTree, DomainContext]]] = [None] * len(violations)
+        # Spawned workers do not inherit the threads and locks of a running server
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=explanation_prep_worker.init_worker,
+            initargs=(snapshot_path,),
+        ) as executor:
+            futures = [
+                executor.submit(explanation_prep_worker.prepare_chunk, [_transferable(violations[i]) for i in chunk])
+                for chunk in chunks
+            ]
+            for chunk, future in zip(chunks, futures):
+                for i, (root, context) in zip(chunk, future.result()):
+                    results[i] = (JustificationTree(root=root, violation=violations[i]), context)
+        logger.info(f"Prepared {len(violations)} explanations in {len(chunks)} chunks across {workers} processes")
+        return results
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
@@ -0,0 +1,159 @@
+"""
+Prompt budgeting and context compaction for LLM calls.
+
+Violations on popular classes can carry thousands of similar cases, long
+ontology fragment lists and a large `focusNodeDefinition` Turtle snippet.
+`compact_prompt_context` reduces the violation, justification tree and domain
+context to a dictionary that fits a token budget. It keeps the essential fields
+and summarizes similar cases by type, then adds the remaining material in order
+of relevance to the violated property until the budget is spent. Omitted
+material is counted so the model knows the context was truncated.
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from .xpshacl_architecture import ConstraintViolation, DomainContext, JustificationTree
+
+logger = logging.getLogger(__name__)
+
+FOCUS_NODE_DEFINITION_KEY = "focusNodeDefinition"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, model-agnostic token estimate (roughly four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def compact_json(data: Any) -> str:
+    """Serializes data as JSON without indentation or superfluous whitespace."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _local_name(uri: Optional[str]) -> Optional[str]:
+    if not uri:
+        return None
+    return uri.rstrip("/#").rsplit("#", 1)[-1].rsplit("/", 1)[-1] or None
+
+
+def _mentions(text: str, property_path: Optional[str], local_name: Optional[str]) -> bool:
+    if not property_path:
+        return False
+    return property_path in text or (local_name is not None and f":{local_name}" in text)
+
+
+def compact_prompt_context(
+    violation: ConstraintViolation,
+    justification_tree: Optional[JustificationTree] = None,
+    context: Optional[DomainContext] = None,
+    max_tokens: Optional[int] = None,
+    max_similar_examples: int = config.LLM_PROMPT_SIMILAR_EXAMPLES,
+) -> Dict[str, Any]:
+    """
+    Returns `{"violation", "justification_tree", "context"}` dictionaries whose
+    compact JSON fits within `max_tokens` (default: LLM_PROMPT_TOKEN_BUDGET).
+
+    The violation (without its focus node definition), the justification tree,
+    shape documentation, domain rules and a per-type summary of similar cases
+    are always included. The remaining budget is filled in this order:
+    focus node definition lines and ontology fragments that mention the
+    violated property, example similar cases, then the other fragments and
+    definition lines.
+    """
+    if max_tokens is None:
+        max_tokens = config.LLM_PROMPT_TOKEN_BUDGET
+
+    violation_dict = violation.to_dict()
+    violation_context = dict(violation_dict.get("context") or {})
+    focus_definition = violation_context.pop(FOCUS_NODE_DEFINITION_KEY, None)
+    violation_dict["context"] = violation_context
+
+    tree_dict = justification_tree.to_dict() if justification_tree is not None else None
+
+    similar_cases = list(context.similar_cases) if context is not None else []
+    similar_total = len(similar_cases)
+    if context is not None and context.similar_cases_total is not None:
+        similar_total = max(similar_total, context.similar_cases_total)
+    fragments = list(context.ontology_fragments) if context is not None else []
+    by_type: Dict[str, int] = {}
+    for case in similar_cases:
+        node_type = str(case.get("node_type", "unknown")) if isinstance(case, dict) else "unknown"
+        by_type[node_type] = by_type.get(node_type, 0) + 1
+
+    context_dict: Optional[Dict[str, Any]] = None
+    if context is not None:
+        context_dict = {
+            "ontology_fragments": [],
+            "shape_documentation": list(context.shape_documentation),
+            "similar_cases": {"total": similar_total, "by_type": by_type, "examples": []},
+            "domain_rules": list(context.domain_rules),
+        }
+
+    used = estimate_tokens(compact_json(
+        {"violation": violation_dict, "justification_tree": tree_dict, "context": context_dict}
+    ))
+
+    # --- Rank the optional material by relevance to the violated property ---
+    property_path = violation.property_path
+    local_name = _local_name(property_path)
+    definition_lines = [line for line in (focus_definition or "").splitlines() if line.strip()]
+    prefix_lines = [line for line in definition_lines if line.lstrip().lower().startswith("@prefix")]
+    body_lines = [line for line in definition_lines if line not in prefix_lines]
+
+    candidates: List[Tuple[str, Any]] = []
+    candidates += [("definition", line) for line in body_lines if _mentions(line, property_path, local_name)]
+    candidates += [("fragment", f) for f in fragments if _mentions(f, property_path, local_name)]
+    if context_dict is not None:
+        candidates += [("example", case) for case in similar_cases[:max_similar_examples]]
+    candidates += [("fragment", f) for f in fragments if not _mentions(f, property_path, local_name)]
+    candidates += [("definition", line) for line in body_lines if not _mentions(line, property_path, local_name)]
+
+    kept_definition = set()
+    kept_fragments = set()
+    examples: List[Any] = []
+    definition_started = False
+    for kind, item in candidates:
+        cost = estimate_tokens(compact_json(item)) + 1
+        if kind == "definition" and not definition_started:
+            # The prefixes are only worth sending together with at least one statement
+            cost += sum(estimate_tokens(line) + 1 for line in prefix_lines)
+        if used + cost > max_tokens:
+            continue
+        used += cost
+        if kind == "definition":
+            kept_definition.add(item)
+            definition_started = True
+        elif kind == "fragment":
+            kept_fragments.add(item)
+        else:
+            examples.append(item)
+
+    omitted: Dict[str, int] = {}
+    if definition_lines:
+        lines = prefix_lines + [line for line in body_lines if line in kept_definition] if kept_definition else []
+        if len(lines) < len(definition_lines):
+            omitted["focus_node_definition_lines"] = len(definition_lines) - len(lines)
+        if lines:
+            violation_context[FOCUS_NODE_DEFINITION_KEY] = "\n".join(lines)
+    elif focus_definition is not None:
+        violation_context[FOCUS_NODE_DEFINITION_KEY] = focus_definition
+
+    if context_dict is not None:
+        context_dict["ontology_fragments"] = [f for f in fragments if f in kept_fragments]
+        context_dict["similar_cases"]["examples"] = examples
+        if len(kept_fragments) < len(fragments):
+            omitted["ontology_fragments"] = len(fragments) - len(context_dict["ontology_fragments"])
+        if len(examples) < similar_total:
+            omitted["similar_cases"] = similar_total - len(examples)
+
+    if omitted:
+        violation_dict["omitted_for_brevity"] = omitted
+        logger.debug(f"Compacted prompt context for {violation.focus_node}: omitted {omitted}")
+    if used > max_tokens:
+        logger.warning(
+            f"Essential prompt context for {violation.focus_node} exceeds the budget ({used} > {max_tokens} tokens)"
+        )
+
+    return {"violation": violation_dict, "justification_tree": tree_dict, "context": context_dict}
@@ -1,8 +1,11 @@
 import os
+import copy
 import json
 import logging
+import re
 import time
-from typing import Dict, Optional
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 import litellm
 
@@ -13,6 +16,10 @@ from .xpshacl_architecture import (
     ExplanationOutput,
 )
 from .knowledge_graph import ViolationKnowledgeGraph
+from .prompt_budget import compact_json, compact_prompt_context, estimate_tokens
+from .response_cache import cached_completion
+from .template_engine import rdf_term, template_engine
+from .violation_signature import ViolationSignature
 from .violation_signature_factory import create_violation_signature
 import config
 
@@ -61,31 +68,91 @@ JSON Structure:
 }
 '''
 
+BATCH_REPAIR_INSTRUCTIONS = '''
+BATCH MODE: You will be given SEVERAL violations at once, each introduced by a header "### Violation <index>".
+This overrides the single-object instruction above: return ONLY a JSON array containing exactly one
+repair object per violation.
+Every repair object MUST follow the JSON structure above and MUST additionally contain the integer
+field "index" with the index of the violation it answers.
+'''
+
+BATCH_REPAIR_SYSTEM_PROMPT = REPAIR_SYSTEM_PROMPT + BATCH_REPAIR_INSTRUCTIONS
+
+# provided_by_model of repair objects rendered by the template engine
+TEMPLATE_MODEL_NAME = "template_engine"
+
+REQUIRED_REPAIR_KEYS = ["explanation_natural_language", "suggestion_natural_language", "proposed_repair"]
+
+
+def _clean_text(text):
+    """Remove literal newlines and collapse the odd spacing some models produce."""
+    if not text:
+        return text
+    # Replace literal \n and normalize whitespace
+    cleaned = re.sub(r'\\n\s*', '', text)
+    # Normalize all whitespace to single spaces
+    cleaned = ' '.join(cleaned.split())
+    return cleaned.strip()
+
+
+def _is_repair_json(content: str) -> bool:
+    """Whether an LLM response is a repair object; only those are kept in the response cache."""
+    try:
+        repair_object = json.loads(content)
+    except (TypeError, ValueError):
+        return False
+    return (
+        isinstance(repair_object, dict)
+        and all(key in repair_object for key in REQUIRED_REPAIR_KEYS)
+        and isinstance(repair_object["proposed_repair"], dict)
+    )
+
+
+def _is_batch_json(content: str) -> bool:
+    """Whether a batched LLM response is a JSON array (or an object wrapping one)."""
+    try:
+        response = json.loads(content)
+    except (TypeError, ValueError):
+        return False
+    if isinstance(response, dict):
+        return any(isinstance(value, list) for value in response.values())
+    return isinstance(response, list)
+
+
 class SuggestionRepairGenerator:
     """
     Generates a structured repair object, including a formal SPARQL query, using an LLM.
     This is the core of the PHOENIX framework's "actionability" feature.
     """
 
-    def __init__(self, vkg: ViolationKnowledgeGraph, model_name: str = config.SRG_MODEL):
+    def __init__(
+        self,
+        vkg: ViolationKnowledgeGraph,
+        model_name: str = config.SRG_MODEL,
+        template_first: bool = False,
+    ):
         self.vkg = vkg
         self.model_name = model_name
+        # Answer covered constraint components from the template engine, without an LLM call
+        self.template_first = template_first
         self.last_explanation_output: Optional[ExplanationOutput] = None
+        self.last_explanation_outputs: List[Optional[ExplanationOutput]] = []
 
-    def generate_repair_object(
+    def _describe_violation(
         self,
         violation: ConstraintViolation,
         justification_tree: JustificationTree,
         context: DomainContext,
-        language: str = "en",
-    ) -> Optional[Dict]:
+    ) -> str:
         """
-        Calls the LLM to generate a structured JSON repair object for a given violation.
+        Builds the violation-specific part of a repair prompt, compacted to the
+        prompt token budget, including the historical feedback stored in the
+        VKG for the violation's signature.
         """
-        prompt = f"Generate a structured repair object for the following SHACL violation in '{language}'.\n\n"
-        prompt += f"Violation Details: {json.dumps(violation.to_dict(), indent=2, default=str)}\n\n"
-        prompt += f"Justification Tree: {json.dumps(justification_tree.to_dict(), indent=2, default=str)}\n\n"
-        prompt += f"Relevant Context: {json.dumps(context.to_dict(), indent=2, default=str)}\n\n"
+        sections = compact_prompt_context(violation, justification_tree, context)
+        prompt = f"Violation Details: {compact_json(sections['violation'])}\n\n"
+        prompt += f"Justification Tree: {compact_json(sections['justification_tree'])}\n\n"
+        prompt += f"Relevant Context: {compact_json(sections['context'])}\n\n"
 
         # --- PHOENIX FEEDBACK LOOP ---
         signature = create_violation_signature(violation)
@@ -107,72 +174,118 @@ class SuggestionRepairGenerator:
             
             prompt += feedback_summary
         # --- END FEEDBACK LOOP ---
+        return prompt
 
-        logger.debug(f"Sending following prompt to LLM:\n{prompt}")
+    def _completion(self, system_prompt: str, prompt: str, validate=None) -> str:
+        """
+        Sends a single chat completion through LiteLLM (or the response cache) and returns the raw content.
+        Only responses passing `validate` are cached.
+        """
+        start_time = time.perf_counter()
 
-        try:
-            start_time = time.perf_counter()
-            
-            # --- UNIFIED LLM CALL USING LITELLM ---
-            # Automatically select the correct provider and API key
-            model_name = self.model_name
-            if "gemini" in model_name and not model_name.startswith("gemini/"):
-                model_name = f"gemini/{model_name}"
+        # --- UNIFIED LLM CALL USING LITELLM ---
+        # Automatically select the correct provider and API key
+        model_name = self.model_name
+        if "gemini" in model_name and not model_name.startswith("gemini/"):
+            model_name = f"gemini/{model_name}"
+
+        # GPT-5 models only support temperature=1
+        temperature = 0.1 if "gpt-5" not in model_name else 1.0
 
-            # GPT-5 models only support temperature=1
-            temperature = 0.1 if "gpt-5" not in model_name else 1.0
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
 
+        def generate():
             response = litellm.completion(
                 model=model_name,
-                messages=[
-                    {"role": "system", "content": REPAIR_SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=messages,
                 temperature=temperature,  # Lower temperature for more consistent responses (except GPT-5)
             )
-            # --- END UNIFIED CALL ---
+            return response['choices'][0]['message']['content']
 
-            end_time = time.perf_counter()
-            logger.info(f"LLM call took {end_time - start_time:.4f} seconds.")
+        content = cached_completion(model_name, messages, temperature, generate, validate=validate)
+        # --- END UNIFIED CALL ---
 
-            response_content = response['choices'][0]['message']['content']
-            logger.info(f"Raw response content from LLM: {response_content}")
+        end_time = time.perf_counter()
+        logger.info(f"LLM call took {end_time - start_time:.4f} seconds.")
 
-            # Clean the response content - remove extra whitespace between characters
-            def clean_text(text):
-                if not text:
-                    return text
-                import re
-                # Replace literal \n and normalize whitespace
-                cleaned = re.sub(r'\\n\s*', '', text)
-                # Normalize all whitespace to single spaces
-                cleaned = ' '.join(cleaned.split())
-                return cleaned.strip()
+        return content
 
-            # Parse and clean the JSON response
-            repair_object = json.loads(response_content)
+    def _parse_repair_object(self, repair_object) -> Optional[Dict]:
+        """Cleans the text fields of a repair object and checks it has the expected keys."""
+        if not isinstance(repair_object, dict):
+            return None
 
-            # Clean text fields to remove weird spacing
-            if 'explanation_natural_language' in repair_object:
-                repair_object['explanation_natural_language'] = clean_text(repair_object['explanation_natural_language'])
-            if 'suggestion_natural_language' in repair_object:
-                repair_object['suggestion_natural_language'] = clean_text(repair_object['suggestion_natural_language'])
-            
-            # Simple validation to ensure the response has the expected keys
-            required_keys = ["explanation_natural_language", "suggestion_natural_language", "proposed_repair"]
-            if not all(key in repair_object for key in required_keys):
+        # Clean text fields to remove weird spacing
+        if 'explanation_natural_language' in repair_object:
+            repair_object['explanation_natural_language'] = _clean_text(repair_object['explanation_natural_language'])
+        if 'suggestion_natural_language' in repair_object:
+            repair_object['suggestion_natural_language'] = _clean_text(repair_object['suggestion_natural_language'])
+
+        # Simple validation to ensure the response has the expected keys
+        if not all(key in repair_object for key in REQUIRED_REPAIR_KEYS):
+            return None
+        if not isinstance(repair_object["proposed_repair"], dict):
+            return None
+        return repair_object
+
+    def _make_explanation_output(
+        self,
+        repair_object: Dict,
+        violation: ConstraintViolation,
+        justification_tree: JustificationTree,
+        context: DomainContext,
+    ) -> ExplanationOutput:
+        return ExplanationOutput(
+            natural_language_explanation=repair_object["explanation_natural_language"],
+            correction_suggestions=[repair_object["suggestion_natural_language"]],
+            violation=violation,
+            justification_tree=justification_tree,
+            retrieved_context=context,
+            provided_by_model=self.model_name,
+            proposed_repair_query=repair_object.get("proposed_repair", {}).get("query")
+        )
+
+    def generate_repair_object(
+        self,
+        violation: ConstraintViolation,
+        justification_tree: JustificationTree,
+        context: DomainContext,
+        language: str = "en",
+        force_llm: bool = False,
+    ) -> Optional[Dict]:
+        """
+        Calls the LLM to generate a structured JSON repair object for a given violation.
+
+        With `template_first`, English repair objects for the constraint components
+        covered by the template engine are rendered locally instead; `force_llm`
+        asks the LLM anyway (e.g. for a richer explanation on demand).
+        """
+        if self.template_first and not force_llm and language == "en":
+            repair_object = self._generate_template_repair(violation, justification_tree, context)
+            if repair_object is not None:
+                return repair_object
+
+        prompt = f"Generate a structured repair object for the following SHACL violation in '{language}'.\n\n"
+        prompt += self._describe_violation(violation, justification_tree, context)
+
+        logger.debug(f"Sending following prompt to LLM:\n{prompt}")
+
+        try:
+            response_content = self._completion(REPAIR_SYSTEM_PROMPT, prompt, validate=_is_repair_json)
+            logger.info(f"Raw response content from LLM: {response_content}")
+
+            # Parse and clean the JSON response
+            repair_object = self._parse_repair_object(json.loads(response_content))
+            if repair_object is None:
                 logger.error(f"LLM response missing required keys: {response_content}")
                 return None
             
             # --- Create and store ExplanationOutput ---
-            self.last_explanation_output = ExplanationOutput(
-                natural_language_explanation=repair_object["explanation_natural_language"],
-                correction_suggestions=[repair_object["suggestion_natural_language"]],
-                violation=violation,
-                justification_tree=justification_tree,
-                retrieved_context=context,
-                provided_by_model=self.model_name,
-                proposed_repair_query=repair_object.get("proposed_repair", {}).get("query")
+            self.last_explanation_output = self._make_explanation_output(
+                repair_object, violation, justification_tree, context
             )
             
             return repair_object
@@ -182,6 +295,227 @@ class SuggestionRepairGenerator:
             # Generate a fallback repair query
             return self._generate_fallback_repair(violation, justification_tree, context, language)
 
+    def generate_repair_objects_batch(
+        self,
+        items: List[Tuple[ConstraintViolation, JustificationTree, DomainContext]],
+        language: str = "en",
+        max_prompt_tokens: int = config.SRG_BATCH_MAX_TOKENS,
+        max_batch_size: int = config.SRG_BATCH_MAX_SIZE,
+    ) -> List[Optional[Dict]]:
+        """
+        Generates repair objects for many violations while sending the system prompt
+        only once per request.
+
+        Violations sharing a signature are sent once. The distinct ones are packed
+        into requests of at most ``max_batch_size`` violations and roughly
+        ``max_prompt_tokens`` prompt tokens, and the LLM is asked for a JSON array of
+        repair objects. Each returned item is validated on its own; only the items
+        that are missing or invalid are retried through ``generate_repair_object``.
+
+        With ``template_first``, violations covered by the template engine are
+        rendered locally and never sent.
+
+        The other violations of a signature get a copy of its repair object with
+        their own focus node and value substituted (see ``_adapt_repair``).
+
+        Returns a list aligned with ``items``. The matching ExplanationOutput objects
+        are available in ``last_explanation_outputs``.
+        """
+        results: List[Optional[Dict]] = [None] * len(items)
+        outputs: List[Optional[ExplanationOutput]] = [None] * len(items)
+
+        # Only one violation per signature needs to be sent to the LLM
+        groups: Dict[ViolationSignature, List[int]] = {}
+        for index, (violation, justification_tree, context) in enumerate(items):
+            if self.template_first and language == "en":
+                repair_object = self._generate_template_repair(violation, justification_tree, context)
+                if repair_object is not None:
+                    results[index] = repair_object
+                    outputs[index] = self.last_explanation_output
+                    continue
+            groups.setdefault(create_violation_signature(violation), []).append(index)
+        representatives = [indices[0] for indices in groups.values()]
+
+        sections = {index: self._describe_violation(*items[index]) for index in representatives}
+        batches = self._pack_batches(representatives, sections, max_prompt_tokens, max_batch_size)
+
+        retry = []
+        for batch in batches:
+            if len(batch) == 1:
+                retry.extend(batch)
+                continue
+
+            parsed = self._request_batch(batch, sections, language)
+            for index in batch:
+                repair_object = parsed.get(index)
+                if repair_object is None:
+                    retry.append(index)
+                    continue
+                violation, justification_tree, context = items[index]
+                results[index] = repair_object
+                outputs[index] = self._make_explanation_output(
+                    repair_object, violation, justification_tree, context
+                )
+
+        if retry:
+            logger.info(f"Generating {len(retry)} repair object(s) individually")
+        for index in retry:
+            self.last_explanation_output = None
+            results[index] = self.generate_repair_object(*items[index], language)
+            outputs[index] = self.last_explanation_output
+
+        # Adapt the representative's result to the other violations of its signature
+        for indices in groups.values():
+            representative = indices[0]
+            if results[representative] is None:
+                continue
+            for index in indices[1:]:
+                violation, justification_tree, context = items[index]
+                results[index] = self._adapt_repair(results[representative], items[representative][0], violation)
+                if outputs[representative] is not None:
+                    # Keeps the model of the representative, which may be a fallback
+                    outputs[index] = replace(
+                        self._make_explanation_output(results[index], violation, justification_tree, context),
+                        provided_by_model=outputs[representative].provided_by_model,
+                    )
+
+        self.last_explanation_outputs = outputs
+        return results
+
+    @staticmethod
+    def _adapt_repair(repair_object: Dict, representative: ConstraintViolation, violation: ConstraintViolation) -> Dict:
+        """
+        Returns a copy of the repair object generated for `representative` that
+        applies to `violation`, another violation of the same signature: the
+        representative's focus node and value are replaced by the violation's own.
+        """
+        query_terms = {f"<{representative.focus_node}>": f"<{violation.focus_node}>"}
+        if representative.value not in (None, "") and violation.value not in (None, ""):
+            query_terms[rdf_term(representative.value)] = rdf_term(violation.value)
+        query_pattern = re.compile("|".join(re.escape(term) for term in query_terms))
+        # Focus nodes in the texts are matched as whole IRIs (ex:p1 is not a prefix of ex:p10)
+        text_pattern = re.compile(re.escape(str(representative.focus_node)) + r"(?![\w/#-])")
+
+        adapted = copy.deepcopy(repair_object)
+        for key in ("explanation_natural_language", "suggestion_natural_language"):
+            if isinstance(adapted.get(key), str):
+                adapted[key] = text_pattern.sub(lambda _: str(violation.focus_node), adapted[key])
+        proposed_repair = adapted.get("proposed_repair")
+        if isinstance(proposed_repair, dict) and isinstance(proposed_repair.get("query"), str):
+            proposed_repair["query"] = query_pattern.sub(lambda m: query_terms[m.group(0)], proposed_repair["query"])
+        return adapted
+
+    def _pack_batches(
+        self,
+        indices: List[int],
+        sections: Dict[int, str],
+        max_prompt_tokens: int,
+        max_batch_size: int,
+    ) -> List[List[int]]:
+        """Greedily packs violation sections into batches that respect the token budget."""
+        base_tokens = estimate_tokens(BATCH_REPAIR_SYSTEM_PROMPT) + 50
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = base_tokens
+
+        for index in indices:
+            section_tokens = estimate_tokens(sections[index]) + 10
+            if current and (
+                current_tokens + section_tokens > max_prompt_tokens
+                or len(current) >= max_batch_size
+            ):
+                batches.append(current)
+                current, current_tokens = [], base_tokens
+            current.append(index)
+            current_tokens += section_tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _request_batch(
+        self, batch: List[int], sections: Dict[int, str], language: str
+    ) -> Dict[int, Dict]:
+        """
+        Sends one batched request and returns the valid repair objects keyed by
+        item index. Invalid or missing items are simply left out.
+        """
+        prompt = f"Generate structured repair objects for the following {len(batch)} SHACL violations in '{language}'.\n\n"
+        for index in batch:
+            prompt += f"### Violation {index}\n{sections[index]}\n"
+
+        logger.debug(f"Sending batched prompt to LLM:\n{prompt}")
+
+        try:
+            response_content = self._completion(BATCH_REPAIR_SYSTEM_PROMPT, prompt, validate=_is_batch_json)
+            response = json.loads(response_content)
+        except Exception as e:
+            logger.error(f"Batched repair generation failed, retrying items individually: {e}")
+            return {}
+
+        # Some models wrap the array in an object, e.g. {"repairs": [...]}
+        if isinstance(response, dict):
+            response = next((value for value in response.values() if isinstance(value, list)), [response])
+        if not isinstance(response, list):
+            logger.error(f"Batched LLM response is not a JSON array: {response_content}")
+            return {}
+
+        parsed: Dict[int, Dict] = {}
+        for item in response:
+            if not isinstance(item, dict):
+                continue
+            try:
+                index = int(item.pop("index"))
+            except (KeyError, TypeError, ValueError):
+                continue
+            repair_object = self._parse_repair_object(item)
+            if index in batch and index not in parsed and repair_object is not None:
+                parsed[index] = repair_object
+
+        missing = len(batch) - len(parsed)
+        if missing:
+            logger.warning(f"{missing} of {len(batch)} items in a batched LLM response were invalid")
+        return parsed
+
+    def _generate_template_repair(
+        self,
+        violation: ConstraintViolation,
+        justification_tree: JustificationTree,
+        context: DomainContext,
+        provided_by_model: str = TEMPLATE_MODEL_NAME,
+    ) -> Optional[Dict]:
+        """
+        Renders the repair object of a violation from the template engine, or
+        returns None when its constraint component has no template.
+        """
+        violation_context = violation.context or {}
+        allowed_values = violation_context.get("allowedValues")
+        repair_object = template_engine.render(
+            violation.constraint_id,
+            violation.focus_node,
+            violation.property_path,
+            violation.value,
+            pattern=violation_context.get("pattern"),
+            example=violation_context.get("exampleValue"),
+            allowed_values=allowed_values if isinstance(allowed_values, (list, tuple)) else None,
+            max_value=violation_context.get("maxValue"),
+            min_value=violation_context.get("minValue"),
+        )
+        if repair_object is None:
+            return None
+
+        repair_object["violation_signature"] = f"{provided_by_model}_{violation.constraint_id}_{violation.property_path}"
+        self.last_explanation_output = ExplanationOutput(
+            natural_language_explanation=repair_object["explanation_natural_language"],
+            correction_suggestions=[repair_object["suggestion_natural_language"]],
+            violation=violation,
+            justification_tree=justification_tree,
+            retrieved_context=context,
+            provided_by_model=provided_by_model,
+            proposed_repair_query=repair_object["proposed_repair"]["query"]
+        )
+        return repair_object
+
     def _generate_fallback_repair(
         self,
         violation: ConstraintViolation,
@@ -193,58 +527,19 @@ class SuggestionRepairGenerator:
         Generate a fallback repair query when LLM fails
         """
         try:
+            repair_object = self._generate_template_repair(
+                violation, justification_tree, context, provided_by_model="fallback_generator"
+            )
+            if repair_object is not None:
+                return repair_object
+
             constraint_component = getattr(violation, 'constraint_id', '')
             focus_node = getattr(violation, 'focus_node', '')
             property_path = getattr(violation, 'property_path', '')
             value = getattr(violation, 'value', '')
 
-            # Generate query based on constraint type
-            if 'MinCountConstraintComponent' in constraint_component:
-                # Missing value - generate INSERT with reasonable default
-                default_value = self._get_default_value_for_property(property_path, context)
-                sparql_query = f"""
-INSERT DATA {{
-  GRAPH <http://ex.org/ValidationReport/Session_UNKNOWN> {{
-    <{focus_node}> <{property_path}> {default_value} .
-  }}
-}}
-"""
-                explanation = f"This data record is incomplete. The '{property_path}' attribute is required but missing."
-                suggestion = f"Add a value for the '{property_path}' attribute to complete the record."
-
-            elif 'MaxCountConstraintComponent' in constraint_component:
-                # Too many values - generate DELETE
-                sparql_query = f"""
-DELETE WHERE {{
-  GRAPH <http://ex.org/ValidationReport/Session_UNKNOWN> {{
-    <{focus_node}> <{property_path}> {value} .
-  }}
-}}
-"""
-                explanation = f"This data record has too many values for the '{property_path}' attribute."
-                suggestion = f"Remove extra values from the '{property_path}' attribute to comply with the constraint."
-
-            elif 'DatatypeConstraintComponent' in constraint_component:
-                # Wrong datatype - generate DELETE/INSERT with correct typing
-                correct_value = self._fix_datatype_value(value, context)
-                sparql_query = f"""
-DELETE WHERE {{
-  GRAPH <http://ex.org/ValidationReport/Session_UNKNOWN> {{
-    <{focus_node}> <{property_path}> {value} .
-  }}
-}};
-INSERT DATA {{
-  GRAPH <http://ex.org/ValidationReport/Session_UNKNOWN> {{
-    <{focus_node}> <{property_path}> {correct_value} .
-  }}
-}}
-"""
-                explanation = f"This data record has an incorrect data type for the '{property_path}' attribute."
-                suggestion = f"Change the value of '{property_path}' to the correct data type."
-
-            else:
-                # Generic constraint - provide a template
-                sparql_query = f"""
+            # Generic constraint - provide a template
+            sparql_query = f"""
 # Modify this query based on the specific constraint requirements
 DELETE WHERE {{
   GRAPH <http://ex.org/ValidationReport/Session_UNKNOWN> {{
@@ -257,8 +552,8 @@ INSERT DATA {{
   }}
 }}
 """
-                explanation = f"The data record violates a constraint on the '{property_path}' attribute."
-                suggestion = f"Review and correct the '{property_path}' value according to the constraint requirements."
+            explanation = f"The data record violates a constraint on the '{property_path}' attribute."
+            suggestion = f"Review and correct the '{property_path}' value according to the constraint requirements."
 
             # Create ExplanationOutput for storage
             self.last_explanation_output = ExplanationOutput(
@@ -284,48 +579,3 @@ INSERT DATA {{
         except Exception as e:
             logger.error(f"Error generating fallback repair: {e}")
             return None
-
-    def _get_default_value_for_property(self, property_path: str, context: DomainContext) -> str:
-        """
-        Generate a sensible default value for a given property
-        """
-        property_lower = property_path.lower()
-
-        if any(keyword in property_lower for keyword in ['name', 'label', 'title']):
-            return '"Unknown Name"'
-        elif any(keyword in property_lower for keyword in ['email', 'mail']):
-            return '"unknown@example.com"'
-        elif any(keyword in property_lower for keyword in ['date', 'created', 'modified']):
-            return f"\"{time.strftime('%Y-%m-%d')}\"^^xsd:date"
-        elif any(keyword in property_lower for keyword in ['age', 'count', 'number', 'quantity']):
-            return '"0"^^xsd:integer'
-        elif any(keyword in property_lower for keyword in ['description', 'comment', 'text']):
-            return '""'
-        elif any(keyword in property_lower for keyword in ['url', 'link', 'uri']):
-            return '"http://example.org"'
-        else:
-            return '""'  # Default to empty string
-
-    def _fix_datatype_value(self, value: str, context: DomainContext) -> str:
-        """
-        Fix a value to have the correct datatype
-        """
-        # Try to determine if it should be numeric
-        try:
-            int(value)
-            return f'"{value}"^^xsd:integer'
-        except ValueError:
-            pass
-
-        try:
-            float(value)
-            return f'"{value}"^^xsd:decimal'
-        except ValueError:
-            pass
-
-        # Check if it looks like a date
-        if any(char in value for char in ['-', '/']) and len(value) > 8:
-            return f'"{value}"^^xsd:date'
-
-        # Default to string
-        return f'"{value}"'
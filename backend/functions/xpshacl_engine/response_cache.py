@@ -0,0 +1,184 @@
+"""
+Persistent response cache for LLM generations.
+
+Responses are stored on disk keyed by a SHA-256 digest of the model name, the
+temperature and the whitespace-normalized prompt messages, so re-running an
+evaluation or a demo dataset returns the stored generations without calling
+the provider. Entries are sharded into sub-directories by digest prefix, and the
+cache is bounded in size. When it grows beyond `max_bytes` the least recently
+used entries (by file modification time, refreshed on every hit) are evicted.
+
+Callers pass a `validate` callback to `cached_completion` so that only responses
+they can parse are stored; a cached entry that fails it is invalidated and
+generated again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text: str) -> str:
+    """Collapses whitespace so formatting-only prompt differences share an entry."""
+    return " ".join(str(text).split())
+
+
+class ResponseCache:
+    """Disk-backed, size-bounded cache of raw LLM responses."""
+
+    def __init__(self, directory: str = config.LLM_CACHE_DIR, max_bytes: int = config.LLM_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: Optional[float] = None) -> str:
+        payload = {
+            "model": model,
+            "temperature": temperature,
+            "messages": [{"role": m.get("role"), "content": _normalize(m.get("content", ""))} for m in messages],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                response = json.load(f)["response"]
+            os.utime(path)  # Refresh recency for LRU eviction
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return response
+
+    def put(self, key: str, response: str, model: Optional[str] = None):
+        path = self._path(key)
+        data = json.dumps({"model": model, "created_at": time.time(), "response": response})
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with self._lock:
+                total = self._current_size()
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._total_bytes = total + len(data.encode("utf-8")) - previous
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+        except OSError as e:
+            logger.warning(f"Failed to store LLM response in cache: {e}")
+
+    def invalidate(self, key: str):
+        """Removes one entry, e.g. a stored response that can no longer be parsed."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def _current_size(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        return self._total_bytes
+
+    def _evict(self):
+        """Removes least recently used entries until the cache is back to 90% of its bound."""
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for _, size, path in sorted(self._entries()):
+            if self._total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._total_bytes -= size
+            evicted += 1
+        logger.info(f"Evicted {evicted} LLM cache entries; cache size is now {self._total_bytes} bytes")
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in list(self._entries()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide response cache."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
+
+
+def cached_completion(
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float],
+    generate: Callable[[], str],
+    validate: Optional[Callable[[str], bool]] = None,
+) -> str:
+    """
+    Returns the cached response for these messages, or calls `generate()` and
+    stores its result. Nothing is stored when `generate()` raises, or when
+    `validate(response)` is false; cached responses that fail `validate` are
+    invalidated and generated again.
+    """
+    if not config.LLM_CACHE_ENABLED:
+        return generate()
+
+    cache = get_response_cache()
+    key = cache.make_key(model, messages, temperature)
+    cached = cache.get(key)
+    if cached is not None:
+        if validate is None or validate(cached):
+            logger.info(f"LLM response cache hit for model {model}")
+            return cached
+        logger.warning(f"Invalidating unparseable cached LLM response for model {model}")
+        cache.invalidate(key)
+
+    response = generate()
+    if response is not None and (validate is None or validate(response)):
+        cache.put(key, response, model=model)
+    return response
@@ -0,0 +1,380 @@
+"""
+Template Engine
+---------------
+Compiled, per-constraint-component templates for explanations, suggestions and
+SPARQL repair queries.
+
+This is the first tier of explanation: a registered component is explained in
+microseconds without any network call. The LLM is only used for components the
+registry does not cover, or when a caller explicitly asks for it. The same
+templates serve the basic explanations of the `/api/explanation` route and
+the fallback repairs of the SuggestionRepairGenerator.
+
+Templates are `string.Template` strings. The variables available to them are
+`focus_node`, `property_path`, `value`, `value_term` (the value as an RDF term),
+`graph` (the session's validation report graph), `corrected_value`,
+`allowed_value`, `allowed_values` and any extra parameter passed to `render`
+(e.g. `pattern`, `example`, `min_value`, `max_value`). The `$user_provided_value`
+placeholder is left in place; it is filled with user input at repair time.
+"""
+
+import logging
+import re
+from string import Template
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+USER_PROVIDED_VALUE = "$user_provided_value"
+
+# --- Repair query templates, shared by several components ---
+QUERY_TEMPLATES = {
+    "insert_user_value": """
+INSERT DATA {
+  GRAPH <$graph> {
+    <$focus_node> <$property_path> $user_provided_value .
+  }
+}""",
+    "delete_value": """
+DELETE WHERE {
+  GRAPH <$graph> {
+    <$focus_node> <$property_path> $value_term .
+  }
+}""",
+    "replace_datatype": """
+DELETE WHERE {
+  GRAPH <$graph> {
+    <$focus_node> <$property_path> $value_term .
+  }
+};
+INSERT DATA {
+  GRAPH <$graph> {
+    <$focus_node> <$property_path> $corrected_value .
+  }
+}""",
+    "replace_with_user_value": """
+DELETE WHERE {
+  GRAPH <$graph> {
+    <$focus_node> <$property_path> $value_term .
+  }
+};
+INSERT DATA {
+  GRAPH <$graph> {
+    <$focus_node> <$property_path> $user_provided_value .
+  }
+}""",
+    "replace_with_allowed_value": """
+DELETE WHERE {
+  GRAPH <$graph> {
+    <$focus_node> <$property_path> $value_term .
+  }
+};
+INSERT DATA {
+  GRAPH <$graph> {
+    <$focus_node> <$property_path> "$allowed_value" .
+  }
+}""",
+}
+
+
+def component_name(constraint_id: Optional[str]) -> str:
+    """Returns the local name of a constraint component IRI or CURIE (e.g. `MinCountConstraintComponent`)."""
+    return re.split(r"[#/:]", str(constraint_id or ""))[-1]
+
+
+def session_graph(session_id: Optional[str]) -> str:
+    """Returns the validation report graph of a session."""
+    return f"http://ex.org/ValidationReport/Session_{session_id or 'UNKNOWN'}"
+
+
+def rdf_term(value: Optional[str]) -> str:
+    """Formats a violating value as an RDF term for a query pattern."""
+    if value is None or value == "":
+        return USER_PROVIDED_VALUE
+    value = str(value)
+    if value.startswith(("http://", "https://", "urn:")):
+        return f"<{value}>"
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def convert_to_iso_date(date_str):
+    """Convert various date formats to ISO format (YYYY-MM-DD)"""
+    # Handle formats like "March 1st, 2023" or "Mar 1, 2023"
+    month_patterns = {
+        'january': '01', 'jan': '01', 'february': '02', 'feb': '02',
+        'march': '03', 'mar': '03', 'april': '04', 'apr': '04',
+        'may': '05', 'june': '06', 'jun': '06', 'july': '07', 'jul': '07',
+        'august': '08', 'aug': '08', 'september': '09', 'sep': '09', 'sept': '09',
+        'october': '10', 'oct': '10', 'november': '11', 'nov': '11',
+        'december': '12', 'dec': '12'
+    }
+
+    # Pattern 1: "March 1st, 2023" or "Mar 1st, 2023"
+    pattern1 = r'(\w+)\s+(\d+)(?:st|nd|rd|th)?,?\s*(\d{4})'
+    match1 = re.match(pattern1, date_str, re.IGNORECASE)
+    if match1:
+        month_name, day, year = match1.groups()
+        month = month_patterns.get(month_name.lower(), month_name.lower())
+        if month and month.isdigit():
+            return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+
+    # Pattern 2: "2023-03-01" or "2023/03/01"
+    pattern2 = r'(\d{4})[-/](\d{2})[-/](\d{2})'
+    match2 = re.match(pattern2, date_str)
+    if match2:
+        return f"{match2.group(1)}-{match2.group(2)}-{match2.group(3)}"
+
+    # Pattern 3: "01/03/2023" (DD/MM/YYYY)
+    pattern3 = r'(\d{2})[-/](\d{2})[-/](\d{4})'
+    match3 = re.match(pattern3, date_str)
+    if match3:
+        return f"{match3.group(3)}-{match3.group(2)}-{match3.group(1)}"
+
+    return None
+
+
+def corrected_datatype_value(value, property_path):
+    """Fix datatype for a value based on property context (PHOENIX approach)"""
+    if not value:
+        return '""'
+
+    lower_path = property_path.lower() if property_path else ''
+
+    # Handle date conversions (like "March 1st, 2023" → "2023-03-01")
+    if any(keyword in lower_path for keyword in ['date', 'created', 'modified', 'hire', 'start', 'end']):
+        converted_date = convert_to_iso_date(value)
+        if converted_date:
+            return f'"{converted_date}"^^xsd:date'
+
+    # Try to determine if it should be numeric
+    try:
+        int(value)
+        if any(keyword in lower_path for keyword in ['age', 'count', 'number', 'id']):
+            return f'"{value}"^^xsd:integer'
+    except ValueError:
+        pass
+
+    try:
+        float(value)
+        if any(keyword in lower_path for keyword in ['price', 'amount', 'salary']):
+            return f'"{value}"^^xsd:decimal'
+    except ValueError:
+        pass
+
+    # Check for email pattern
+    if '@' in value and any(keyword in lower_path for keyword in ['email', 'mail']):
+        return f'"{value}"'
+
+    # Check for URL/URI
+    if value.startswith(('http://', 'https://', 'ftp://')) or any(keyword in lower_path for keyword in ['url', 'uri', 'link']):
+        return f'"{value}"'
+
+    # Default to string
+    return f'"{value}"'
+
+
+class ComponentTemplate:
+    """One compiled variant of a component's explanation, suggestion and repair query."""
+
+    __slots__ = ("explanation", "suggestion", "query", "requires")
+
+    def __init__(self, explanation: str, suggestion: str, query: Optional[str] = None, requires: Iterable[str] = ()):
+        self.explanation = Template(explanation)
+        self.suggestion = Template(suggestion)
+        self.query = Template(QUERY_TEMPLATES.get(query, query)) if query else None
+        self.requires = tuple(requires)
+
+
+class TemplateEngine:
+    """Registry of compiled templates, keyed by constraint component."""
+
+    def __init__(self):
+        self._registry: Dict[str, List[ComponentTemplate]] = {}
+
+    def register(
+        self,
+        component: str,
+        explanation: str,
+        suggestion: str,
+        query: Optional[str] = None,
+        requires: Iterable[str] = (),
+    ):
+        """
+        Registers a template variant for a component. `query` is the name of a shared
+        query template or a template string. Variants are tried in registration order;
+        the first whose `requires` parameters are all non-empty is used.
+        """
+        self._registry.setdefault(component_name(component).lower(), []).append(
+            ComponentTemplate(explanation, suggestion, query, requires)
+        )
+
+    def covers(self, constraint_id: Optional[str]) -> bool:
+        return bool(self._variants(constraint_id))
+
+    def _variants(self, constraint_id: Optional[str]) -> List[ComponentTemplate]:
+        """
+        Returns the variants of a component. Components without templates of their
+        own fall back to the first registered component contained in their name
+        (e.g. QualifiedMinCount uses the MinCount templates).
+        """
+        name = component_name(constraint_id).lower()
+        if not name:
+            return []
+        if name in self._registry:
+            return self._registry[name]
+        return next((variants for key, variants in self._registry.items() if key in name), [])
+
+    def render(
+        self,
+        constraint_id: Optional[str],
+        focus_node: Optional[str],
+        property_path: Optional[str],
+        value: Optional[str] = None,
+        session_id: Optional[str] = None,
+        **params: Any,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Renders the repair object of a violation, or returns None when no template
+        covers its constraint component.
+        """
+        variants = self._variants(constraint_id)
+        if not variants:
+            return None
+
+        variables = self._variables(focus_node, property_path, value, session_id, params)
+        for variant in variants:
+            if all(variables.get(name) for name in variant.requires):
+                query = variant.query.safe_substitute(variables).strip() if variant.query else None
+                return {
+                    "explanation_natural_language": variant.explanation.safe_substitute(variables),
+                    "suggestion_natural_language": variant.suggestion.safe_substitute(variables),
+                    "proposed_repair": {"type": "SPARQL_UPDATE", "query": query},
+                }
+        return None
+
+    def render_query(
+        self,
+        name: str,
+        focus_node: Optional[str],
+        property_path: Optional[str],
+        value: Optional[str] = None,
+        session_id: Optional[str] = None,
+        **params: Any,
+    ) -> str:
+        """Renders one of the shared `QUERY_TEMPLATES` by name."""
+        variables = self._variables(focus_node, property_path, value, session_id, params)
+        return Template(QUERY_TEMPLATES[name]).safe_substitute(variables)
+
+    @staticmethod
+    def _variables(focus_node, property_path, value, session_id, params) -> Dict[str, Any]:
+        allowed_values = [str(v) for v in (params.pop("allowed_values", None) or [])]
+        variables = {
+            "focus_node": focus_node if focus_node is not None else "",
+            "property_path": property_path if property_path is not None else "",
+            "value": value if value is not None else "",
+            "value_term": rdf_term(value),
+            "graph": session_graph(session_id),
+            "corrected_value": corrected_datatype_value(value, property_path),
+            "allowed_values": ", ".join(allowed_values),
+            "allowed_value": allowed_values[0] if allowed_values else "CORRECT_VALUE",
+        }
+        variables.update({key: "" if val is None else val for key, val in params.items()})
+        if variables.get("allowed_value") in (None, ""):
+            variables["allowed_value"] = "CORRECT_VALUE"
+        return variables
+
+
+def build_default_template_engine() -> TemplateEngine:
+    """Returns an engine with the built-in templates of the core SHACL components."""
+    engine = TemplateEngine()
+    engine.register(
+        "MinCountConstraintComponent",
+        "This data record is incomplete. The '$property_path' attribute is required but missing from '$focus_node'.",
+        "Add a value for the '$property_path' attribute to '$focus_node' to complete the record.",
+        "insert_user_value",
+    )
+    engine.register(
+        "MaxCountConstraintComponent",
+        "This data record has too many values. "
+        "The '$property_path' attribute for '$focus_node' exceeds the maximum allowed number of values.",
+        "Remove extra values from the '$property_path' attribute for '$focus_node' to comply with the constraint.",
+        "delete_value",
+    )
+    engine.register(
+        "DatatypeConstraintComponent",
+        "This data record has an incorrect data type. "
+        "The '$property_path' attribute for '$focus_node' should be a different data type than '$value'.",
+        "Change the value of '$property_path' for '$focus_node' to the correct data type.",
+        "replace_datatype",
+    )
+    engine.register(
+        "PatternConstraintComponent",
+        "The value '$value' for '$property_path' doesn't match the required pattern '$pattern'.",
+        "Change the value to match the pattern. Example of a valid value: '$example'.",
+        "replace_with_user_value",
+        requires=("pattern", "example"),
+    )
+    engine.register(
+        "PatternConstraintComponent",
+        "The value '$value' for '$property_path' doesn't match the required pattern '$pattern'.",
+        "Change the value to match the required pattern '$pattern'.",
+        "replace_with_user_value",
+        requires=("pattern",),
+    )
+    engine.register(
+        "PatternConstraintComponent",
+        "The value for '$property_path' doesn't match the required format.",
+        "Change the value to match the required format.",
+        "replace_with_user_value",
+    )
+    engine.register(
+        "InConstraintComponent",
+        "The value '$value' for '$property_path' is not in the list of allowed values.",
+        "Change the value to one of the allowed options: $allowed_values.",
+        "replace_with_allowed_value",
+        requires=("allowed_values",),
+    )
+    engine.register(
+        "InConstraintComponent",
+        "The value for '$property_path' is not in the allowed list.",
+        "Change the value to one of the allowed options.",
+        "replace_with_allowed_value",
+    )
+    engine.register(
+        "MaxInclusiveConstraintComponent",
+        "The value '$value' for '$property_path' exceeds the maximum allowed value of $max_value.",
+        "Change the value to be less than or equal to $max_value.",
+        "delete_value",
+        requires=("max_value",),
+    )
+    engine.register(
+        "MaxInclusiveConstraintComponent",
+        "The value '$value' for '$property_path' exceeds the maximum allowed value.",
+        "Change the value to be less than or equal to the maximum allowed value.",
+        "delete_value",
+    )
+    engine.register(
+        "MinInclusiveConstraintComponent",
+        "The value '$value' for '$property_path' is below the minimum allowed value of $min_value.",
+        "Change the value to be greater than or equal to $min_value.",
+        "insert_user_value",
+        requires=("min_value",),
+    )
+    engine.register(
+        "MinInclusiveConstraintComponent",
+        "The value '$value' for '$property_path' is below the minimum allowed value.",
+        "Change the value to be greater than or equal to the minimum allowed value.",
+        "insert_user_value",
+    )
+    engine.register(
+        "LessThanOrEqualsConstraintComponent",
+        "The value '$value' for '$property_path' violates the less-than-or-equals constraint.",
+        "Change the value to be less than or equal to the required value.",
+        "delete_value",
+    )
+    return engine
+
+
+# Process-wide engine with the built-in templates
+template_engine = build_default_template_engine()
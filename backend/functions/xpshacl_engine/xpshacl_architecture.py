@@ -5,9 +5,10 @@ This module defines the core data structures used throughout the xpSHACL system,
 including constraint violations, justification trees, and context information.
 """
 
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass, field, fields
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 
 # --- Enums ---
@@ -28,7 +29,106 @@ NodeId = str
 ShapeId = str
 
 
+# --- Lazily Computed Context Values ---
+class _LazyValue:
+    """Placeholder for a context value that is computed on first access."""
+
+    __slots__ = ("factory",)
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+
+    def __repr__(self) -> str:
+        return "<not computed yet>"
+
+
+class LazyContext(dict):
+    """
+    A dict whose values can be registered as factories with `set_lazy()`.
+    A factory runs the first time its key is read (indexing, get, items,
+    values, iteration, copy, comparison) and its result replaces it.
+    Keys are visible immediately, so `in` and `len()` never trigger computation.
+    """
+
+    def set_lazy(self, key: str, factory: Callable[[], Any]) -> None:
+        dict.__setitem__(self, key, _LazyValue(factory))
+
+    def is_computed(self, key: str) -> bool:
+        return not isinstance(dict.get(self, key), _LazyValue)
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, _LazyValue):
+            value = value.factory()
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        dict.__setitem__(self, key, default)
+        return default
+
+    def __iter__(self):
+        # Overriding __iter__ also stops dict(lazy_context) from copying the raw placeholders
+        return iter(list(dict.keys(self)))
+
+    def items(self):
+        return [(key, self[key]) for key in dict.keys(self)]
+
+    def values(self):
+        return [self[key] for key in dict.keys(self)]
+
+    def copy(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return dict(self.items()) == (dict(other.items()) if isinstance(other, LazyContext) else other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+
+# --- Compact Instances ---
+def _slotted(cls):
+    """
+    Rebuilds a dataclass with `__slots__`, so instances carry no per-instance
+    `__dict__` (the equivalent of `dataclass(slots=True)`, which needs Python 3.10).
+    Field defaults live in the generated `__init__`, so they can be dropped from
+    the class namespace.
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    namespace = dict(cls.__dict__)
+    for name in field_names:
+        namespace.pop(name, None)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = field_names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+def _intern(value):
+    """Interns plain strings so repeated IRIs share one object across violations."""
+    return sys.intern(value) if type(value) is str else value
+
+
 # --- Data Classes ---
+@_slotted
 @dataclass
 class ConstraintViolation:
     """
@@ -47,6 +147,14 @@ class ConstraintViolation:
     context: Dict = field(default_factory=dict)
     allowed_values: Optional[List[str]] = None
 
+    def __post_init__(self):
+        # Focus nodes, shapes, components and paths repeat across many violations
+        self.focus_node = _intern(self.focus_node)
+        self.shape_id = _intern(self.shape_id)
+        self.constraint_id = _intern(self.constraint_id)
+        self.property_path = _intern(self.property_path)
+        self.severity = _intern(self.severity)
+
     def to_dict(self) -> Dict:
         """Convert ConstraintViolation to a dictionary."""
         # Handle both enum and string values for violation_type
@@ -88,6 +196,7 @@ class ConstraintViolation:
         )
 
 
+@_slotted
 @dataclass
 class JustificationNode:
     """Represents a node in a justification tree."""
@@ -126,6 +235,7 @@ class JustificationNode:
         )
 
 
+@_slotted
 @dataclass
 class JustificationTree:
     """Represents a logical justification tree for a SHACL violation."""
@@ -149,6 +259,7 @@ class JustificationTree:
         )
 
 
+@_slotted
 @dataclass
 class DomainContext:
     """
@@ -160,6 +271,8 @@ class DomainContext:
     shape_documentation: List[str] = field(default_factory=list)
     similar_cases: List[Dict] = field(default_factory=list)
     domain_rules: List[str] = field(default_factory=list)
+    # Number of similar cases found before sampling (None when not sampled)
+    similar_cases_total: Optional[int] = None
 
     def to_dict(self) -> Dict:
         """Convert DomainContext to a dictionary."""
@@ -167,6 +280,7 @@ class DomainContext:
             "ontology_fragments": self.ontology_fragments,
             "shape_documentation": self.shape_documentation,
             "similar_cases": self.similar_cases,
+            "similar_cases_total": self.similar_cases_total,
             "domain_rules": self.domain_rules,
         }
 
@@ -186,9 +300,11 @@ class DomainContext:
             domain_rules=data.get(
                 "domain_rules",
             ),
+            similar_cases_total=data.get("similar_cases_total"),
         )
 
 
+@_slotted
 @dataclass
 class ExplanationOutput:
     """
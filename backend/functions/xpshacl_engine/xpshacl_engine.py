@@ -4,10 +4,12 @@ import tempfile
 import subprocess
 import logging
 import time
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from rdflib import Graph
 from pyshacl import validate
 
+from .explanation_context import ExplanationContext
+from .parallel_prep import MIN_VIOLATIONS_PER_WORKER, prepare_explanations_parallel
 from .repair_engine import SuggestionRepairGenerator
 
 # Alias for compatibility with tests
@@ -155,16 +157,11 @@ class XPSHACLEngine:
             model_name = self.config.get('model', 'gpt-4o-mini-2024-07-18')
             self.explanation_generator = ExplanationGenerator(model_name=model_name)
 
-        explanations = []
-        for violation in violations:
-            # Build justification tree
-            tree_builder = JustificationTreeBuilder(data_graph, shapes_graph)
-            justification_tree = tree_builder.build_justification_tree(violation)
-
-            # Retrieve context
-            context_retriever = ContextRetriever(data_graph, shapes_graph)
-            context = context_retriever.retrieve_context(violation)
+        # Justification trees and context for all violations of the run
+        prepared = self._prepare_explanations(violations, data_graph, shapes_graph)
 
+        explanations = []
+        for violation, (justification_tree, context) in zip(violations, prepared):
             # Generate explanation using the generator
             # Use the alias method that tests expect
             explanation_result = self.explanation_generator.generate_explanation(
@@ -194,6 +191,35 @@ class XPSHACLEngine:
         self._statistics['explanations_generated'] += len(explanations)
         return explanations
 
+    def _prepare_explanations(
+        self, violations: List[ConstraintViolation], data_graph: Graph, shapes_graph: Graph
+    ) -> List[Tuple[JustificationTree, DomainContext]]:
+        """
+        Builds the justification tree and domain context of each violation.
+
+        With the `parallel_workers` option set above 1 and enough violations, the work
+        is partitioned across worker processes sharing a snapshot of the graphs.
+        Otherwise a shared builder and retriever are used in-process.
+        """
+        workers = int(self.config.get('parallel_workers', 0) or 0)
+        if workers > 1 and len(violations) >= 2 * MIN_VIOLATIONS_PER_WORKER:
+            workers = min(workers, len(violations) // MIN_VIOLATIONS_PER_WORKER)
+            try:
+                return prepare_explanations_parallel(violations, data_graph, shapes_graph, workers=workers)
+            except Exception as e:
+                logger.warning(f"Parallel explanation preparation failed, continuing in-process: {e}")
+
+        # Shared per-dataset indexes, builder and retriever for the whole run
+        explanation_context = ExplanationContext(data_graph, shapes_graph)
+        tree_builder = JustificationTreeBuilder(data_graph, shapes_graph, explanation_context)
+        context_retriever = ContextRetriever(data_graph, shapes_graph, explanation_context)
+        tree_builder.prepare(violations)
+
+        return [
+            (tree_builder.build_justification_tree(violation), context_retriever.retrieve_context(violation))
+            for violation in violations
+        ]
+
     def generate_repairs(self, shapes_graph: Graph, data_graph: Graph) -> List[Dict]:
         """
         Generate repair suggestions for all violations in a dataset.
@@ -211,22 +237,25 @@ class XPSHACLEngine:
 
         # Initialize repair engine if needed
         if self.repair_engine is None:
-            self.repair_engine = RepairEngine(vkg=self.knowledge_graph)
-
-        repairs = []
-        for violation in violations:
-            # Build justification tree
-            tree_builder = JustificationTreeBuilder(data_graph, shapes_graph)
-            justification_tree = tree_builder.build_justification_tree(violation)
+            self.repair_engine = RepairEngine(
+                vkg=self.knowledge_graph, template_first=self.config.get('template_first', False)
+            )
 
-            # Retrieve context
-            context_retriever = ContextRetriever(data_graph, shapes_graph)
-            context = context_retriever.retrieve_context(violation)
+        # Justification trees and context for all violations of the run
+        prepared = [
+            (violation, justification_tree, context)
+            for violation, (justification_tree, context)
+            in zip(violations, self._prepare_explanations(violations, data_graph, shapes_graph))
+        ]
 
+        if self.config.get('batch_repairs', False):
+            # Pack distinct violation signatures into shared LLM requests
+            generated = self.repair_engine.generate_repair_objects_batch(prepared)
+        else:
             # Generate repair using the alias method that tests expect
-            repair = self.repair_engine.generate_repair(violation, justification_tree, context)
-            if repair:
-                repairs.append(repair)
+            generated = [self.repair_engine.generate_repair(*item) for item in prepared]
+
+        repairs = [repair for repair in generated if repair]
 
         self._statistics['repairs_generated'] += len(repairs)
         return repairs
@@ -397,6 +426,11 @@ def main():
     vkg = ViolationKnowledgeGraph(ontology_path=ontology_path, kg_path=kg_path)
     srg = SuggestionRepairGenerator(vkg=vkg)
 
+    # Shared per-dataset indexes, builder and retriever for the whole run
+    explanation_context = ExplanationContext(data_graph, shapes_graph)
+    tree_builder = JustificationTreeBuilder(data_graph, shapes_graph, explanation_context)
+    context_retriever = ContextRetriever(data_graph, shapes_graph, explanation_context)
+
     # --- Main Remediation Loop ---
     for violation in violations:
         logger.info(f"\n{'='*20}\nProcessing violation for focus node: {violation.focus_node}\n{'='*20}")
@@ -415,9 +449,7 @@ def main():
             }
         else:
             logger.info("No cached explanation found. Generating new suggestion...")
-            tree_builder = JustificationTreeBuilder(data_graph, shapes_graph)
             justification_tree = tree_builder.build_justification_tree(violation)
-            context_retriever = ContextRetriever(data_graph, shapes_graph)
             context = context_retriever.retrieve_context(violation)
             
             repair_object = srg.generate_repair_object(violation, justification_tree, context)
@@ -470,6 +502,7 @@ def main():
 
         if was_successful:
             logger.info("Repair successfully applied.")
+            explanation_context.invalidate()
             vkg.add_remediation_feedback(signature, repair_query, user_action)
         else:
             logger.error("Repair failed verification. Graph not modified.")
@@ -1,16 +1,35 @@
 from flask import Blueprint, jsonify, request
 from functions.dashboard_service import get_dashboard_data
 from functions import virtuoso_service
+from functions.session_registry import session_registry, shapes_graph_of, touch_session
+from functions.session_archive import session_archive
+from functions.query_scheduler import query_scheduler
+from functions.triple_store import local_sessions
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
 def get_most_recent_session_id():
     """
-    Find the most recent session ID by looking at validation report graphs.
+    Find the most recent session ID, from the session registry.
     Returns the session ID without the 'Session_' prefix, or None if no sessions found.
     """
     try:
-        # Query to find all session-specific validation report graphs and get the most recent one
+        latest = session_registry.latest(with_validation_graph=True)
+        if latest:
+            return latest['session_id']
+    except Exception as e:
+        print(f"Error reading the session registry: {e}")
+
+    # Sessions uploaded before the registry existed are only known to the triple store
+    return _scan_most_recent_session_id()
+
+
+def _scan_most_recent_session_id():
+    """
+    Find a session ID by scanning the validation report graphs of the triple store.
+    Ordered by graph IRI, so the result is not necessarily the latest session.
+    """
+    try:
         query = """
         SELECT ?sessionGraph
         WHERE {
@@ -38,6 +57,7 @@ def get_most_recent_session_id():
         print(f"Error finding most recent session: {e}")
         return None
 
+
 @dashboard_bp.route('/api/test-violation-count', methods=['GET'])
 def test_violation_count():
     """Test endpoint to directly check violation count"""
@@ -45,7 +65,7 @@ def test_violation_count():
         session_id = request.args.get('session_id')
         if session_id:
             validation_graph_uri = f"http://ex.org/ValidationReport/Session_{session_id}"
-            shapes_graph_uri = f"http://ex.org/ShapesGraph/Session_{session_id}"
+            shapes_graph_uri = shapes_graph_of(session_id)
         else:
             validation_graph_uri = "http://ex.org/ValidationReport"
             shapes_graph_uri = "http://ex.org/ShapesGraph"
@@ -93,7 +113,7 @@ def debug_shapes_graph():
     try:
         session_id = request.args.get('session_id', 'fee25bee')
         validation_graph_uri = f"http://ex.org/ValidationReport/Session_{session_id}"
-        shapes_graph_uri = f"http://ex.org/ShapesGraph/Session_{session_id}"
+        shapes_graph_uri = shapes_graph_of(session_id)
 
         # Test direct SPARQL queries
         results = {}
@@ -174,41 +194,23 @@ def get_dashboard_data_route():
             validation_graph_uri = f"http://ex.org/ValidationReport/Session_{session_id}"
         else:
             # Try to find the most recent session automatically
-            try:
-                # Inline SPARQL query to find most recent session
-                query = """
-                SELECT ?sessionGraph
-                WHERE {
-                    GRAPH ?graphName {
-                        ?report a <http://www.w3.org/ns/shacl#ValidationReport> .
-                    }
-                    FILTER(strstarts(str(?graphName), "http://ex.org/ValidationReport/Session_"))
-                    BIND(?graphName AS ?sessionGraph)
-                }
-                ORDER BY DESC(?sessionGraph)
-                LIMIT 1
-                """
-
-                result = virtuoso_service.execute_sparql_query(query)
-                bindings = result.get('results', {}).get('bindings', [])
-
-                if bindings:
-                    session_graph_uri = bindings[0].get('sessionGraph', {}).get('value', '')
-                    if 'Session_' in session_graph_uri:
-                        session_id = session_graph_uri.split('Session_')[1]
-                        validation_graph_uri = f"http://ex.org/ValidationReport/Session_{session_id}"
-                        print(f"Auto-selected most recent session: {session_id}")
-                    else:
-                        validation_graph_uri = "http://ex.org/ValidationReport"
-                        print("Invalid session graph format, using default empty graph")
-                else:
-                    # No sessions found, use default graph (will be empty)
-                    validation_graph_uri = "http://ex.org/ValidationReport"
-                    print("No sessions found, using default empty graph")
-            except Exception as e:
-                print(f"Error finding most recent session: {e}")
+            session_id = get_most_recent_session_id()
+            if session_id:
+                validation_graph_uri = f"http://ex.org/ValidationReport/Session_{session_id}"
+                print(f"Auto-selected most recent session: {session_id}")
+            else:
+                # No sessions found, use default graph (will be empty)
                 validation_graph_uri = "http://ex.org/ValidationReport"
-
+                print("No sessions found, using default empty graph")
+
+        touch_session(session_id)
+        # Archived sessions are loaded back into the store first
+        if not session_archive.ensure_resident(session_id):
+            return jsonify({
+                'status': 'rehydrating',
+                'session_id': session_id,
+                'error': session_archive.errors.get(session_id)
+            }), 202, {'Retry-After': '5'}
         data = get_dashboard_data(validation_graph_uri)
         return jsonify({
             **data,
@@ -217,3 +219,12 @@ def get_dashboard_data_route():
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@dashboard_bp.route('/api/query-metrics', methods=['GET'])
+def get_query_metrics():
+    """
+    Get the SPARQL query scheduler state
+    Returns running and waiting queries, per-session counters, queue time percentiles
+    and the sessions served from memory
+    """
+    return jsonify({**query_scheduler.metrics(), 'local_sessions': local_sessions.stats()}), 200
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from functions import load_graphs
+from functions.bulk_loader import BulkLoadError, bulk_loader
+from functions.streaming_upload import receive_upload
 
 # Define a Blueprint for landing-related routes
 landing_bp = Blueprint('landing', __name__)
@@ -17,11 +19,17 @@ def load_graphs_route():
     {
         "directory": "directory/path",
         "shapes_file": "shapes.ttl",
-        "report_file": "report.ttl"
+        "report_file": "report.ttl",
+        "wait": true
     }
+
+    The files are loaded by a bulk load job and the request blocks until it
+    finished. With "wait": false it returns at once and the progress of the
+    job is available at /load-graphs/<job_id>.
     
     Returns:
         200 OK: Graphs loaded successfully
+        202 Accepted: Load job started (no wait)
         400 Bad Request: Missing parameters or invalid inputs
         500 Server Error: Database error or loading failure
     """
@@ -38,10 +46,13 @@ def load_graphs_route():
             return jsonify({'error': 'directory, shapes_file, and report_file are required'}), 400
 
         # Call the load_graphs function
-        load_graphs(directory, shapes_file, report_file)
+        wait = data.get("wait", True) is not False
+        job = load_graphs(directory, shapes_file, report_file, wait=wait)
 
         # Return success response
-        return jsonify({'message': 'Graphs loaded successfully'}), 200
+        if wait:
+            return jsonify({'message': 'Graphs loaded successfully', 'job': job.to_dict()}), 200
+        return jsonify({'message': 'Graph loading started', 'job': job.to_dict()}), 202
 
     except TypeError as e:
         # Handle type errors from load_graphs function
@@ -51,6 +62,78 @@ def load_graphs_route():
         # Handle value errors from load_graphs function
         return jsonify({'error': f"Value error: {str(e)}"}), 400
 
+    except BulkLoadError as e:
+        # Handle failed loads
+        return jsonify({'error': f"Load error: {str(e)}"}), 500
+
     except Exception as e:
         # Handle other exceptions
         return jsonify({'error': f"Unexpected error: {str(e)}"}), 500
+
+
+# Route to start a bulk load of many files
+@landing_bp.route('/bulk-load', methods=['POST'])
+def bulk_load_route():
+    """
+    Load many RDF files into named graphs as one background bulk load job.
+
+    Request JSON body:
+    {
+        "files": [{"path": "/data/part-1.nt", "graph": "http://ex.org/Data"}, ...]
+    }
+
+    Returns:
+        202 Accepted: Job started, with its ID and initial progress
+        400 Bad Request: Missing or invalid file list
+    """
+    data = request.get_json(silent=True) or {}
+    files = data.get("files")
+    if not isinstance(files, list) or not files:
+        return jsonify({'error': 'files must be a non-empty list'}), 400
+    if not all(isinstance(f, dict) and f.get("path") and f.get("graph") for f in files):
+        return jsonify({'error': 'every file needs a path and a graph'}), 400
+
+    job = bulk_loader.submit([(f["path"], f["graph"]) for f in files])
+    return jsonify(job.to_dict()), 202
+
+
+# Route to upload files and bulk load them
+@landing_bp.route('/bulk-load/upload', methods=['POST'])
+def bulk_load_upload_route():
+    """
+    Bulk load uploaded RDF files into one named graph.
+
+    Multipart form: one or more "files" and the target "graph". The files are
+    hashed and stored while they are received and loaded from the stored copy,
+    without being read again by the application.
+
+    Returns:
+        202 Accepted: Job started, with its ID and initial progress
+        400 Bad Request: Missing files or graph
+    """
+    graph = request.form.get("graph")
+    files = [f for f in request.files.getlist("files") if f.filename]
+    if not graph or not files:
+        return jsonify({'error': 'files and graph are required'}), 400
+
+    uploads = [receive_upload(f) for f in files]
+    job = bulk_loader.submit([(upload.path, graph) for upload in uploads])
+    return jsonify(job.to_dict()), 202
+
+
+# Route to list the recent bulk load jobs
+@landing_bp.route('/bulk-load', methods=['GET'])
+def list_bulk_loads():
+    """Returns the running and recently finished bulk load jobs."""
+    return jsonify({'jobs': [job.to_dict() for job in bulk_loader.jobs()]}), 200
+
+
+# Route to get the progress of a bulk load job
+@landing_bp.route('/bulk-load/<job_id>', methods=['GET'])
+@landing_bp.route('/load-graphs/<job_id>', methods=['GET'])
+def get_bulk_load(job_id):
+    """Returns the status, progress and per-file states of a bulk load job."""
+    job = bulk_loader.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict()), 200
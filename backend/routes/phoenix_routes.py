@@ -1,11 +1,12 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.utils import secure_filename
-import os
-from functions.phoenix_service import validate_with_phoenix, explanation_cache
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import json
+from functions.phoenix_service import validate_with_phoenix, explanation_cache, job_manager
+from functions.streaming_upload import parse_uploads, receive_upload
 
 phoenix_bp = Blueprint('phoenix_bp', __name__)
 
 @phoenix_bp.route('/api/validate-phoenix', methods=['POST'])
+@parse_uploads
 def validate_phoenix_route():
     # Handle both naming conventions for file upload
     data_file = None
@@ -29,22 +30,25 @@ def validate_phoenix_route():
     if not data_file or not shapes_file:
         return jsonify({'error': 'Missing data or shapes file'}), 400
 
-    # Create a temporary directory
-    temp_dir = 'temp'
-    os.makedirs(temp_dir, exist_ok=True)
-
-    data_filename = secure_filename(data_file.filename)
-    shapes_filename = secure_filename(shapes_file.filename)
-
-    data_file_path = os.path.join(temp_dir, data_filename)
-    shapes_file_path = os.path.join(temp_dir, shapes_filename)
+    # The files were stored by content hash while they were received, and their
+    # graphs come from the parse cache when the same content was uploaded before;
+    # the session collector removes them with the session.
+    data_upload = receive_upload(data_file)
+    shapes_upload = receive_upload(shapes_file)
+    try:
+        data_graph, shapes_graph = data_upload.graph(), shapes_upload.graph()
+    except Exception as e:
+        return jsonify({'error': f'Could not parse uploaded files: {e}'}), 400
 
-    data_file.save(data_file_path)
-    shapes_file.save(shapes_file_path)
+    # force_llm=true has the background job explain every violation with the LLM,
+    # including those a template covers
+    force_llm = request.values.get('force_llm', 'false').lower() == 'true'
 
-    # The cleanup of the temporary files will be handled by the background thread
-    # after the explanations have been generated.
-    conforms, report_graph_json, report_text, explanations, violations, constraints = validate_with_phoenix(data_file_path, shapes_file_path)
+    conforms, report_graph_json, report_text, explanations, violations, constraints = validate_with_phoenix(
+        data_upload.path, shapes_upload.path, data_graph=data_graph, shapes_graph=shapes_graph,
+        data_digest=data_upload.stored.digest, shapes_digest=shapes_upload.stored.digest,
+        force_llm=force_llm
+    )
 
     return jsonify({
         'conforms': conforms,
@@ -62,12 +66,30 @@ def get_explanations(session_id):
     Returns the AI-generated explanations when they are ready.
     """
     try:
+        # Looking up the job first restores persisted results into the cache
+        job = job_manager.get_job(session_id)
+
         if session_id in explanation_cache:
             explanations = explanation_cache[session_id]
             return jsonify({
                 'status': 'completed',
-                'explanations': explanations
+                'explanations': explanations,
+                'progress': job.progress() if job else None
             })
+        elif job is not None and job.status == 'interrupted':
+            return jsonify({
+                'status': 'interrupted',
+                'explanations': list(job.results),
+                'progress': job.progress(),
+                'message': 'AI explanation generation was interrupted; partial results are returned.'
+            })
+        elif job is not None:
+            return jsonify({
+                'status': job.status,
+                'explanations': list(job.results),
+                'progress': job.progress(),
+                'message': 'AI explanations are still being generated. Please try again in a moment.'
+            }), 202
         else:
             return jsonify({
                 'status': 'processing',
@@ -77,4 +99,32 @@ def get_explanations(session_id):
         return jsonify({
             'status': 'error',
             'message': f'Error fetching explanations: {str(e)}'
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+def _format_sse(event, data):
+    """Formats one Server-Sent Events message; events without a name are sent as keep-alive comments."""
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@phoenix_bp.route('/api/explanations/<session_id>/stream', methods=['GET'])
+def stream_explanations(session_id):
+    """
+    Stream the explanations of a validation session as Server-Sent Events.
+    Each explanation is pushed as soon as it is generated, followed by a
+    progress event; the stream ends with a "done" event.
+    """
+    def generate():
+        for event, data in job_manager.iter_events(session_id):
+            yield _format_sse(event, data)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
@@ -0,0 +1,100 @@
+from flask import Blueprint, jsonify, request
+from functions.session_registry import session_registry
+from functions.session_gc import session_gc
+from functions.session_archive import session_archive
+
+session_bp = Blueprint('sessions', __name__)
+
+
+@session_bp.route('/api/sessions', methods=['GET'])
+def list_sessions():
+    """
+    List validation sessions from newest to oldest
+    Pages with ?limit= and ?before=<created_at of the last session of the previous page>
+    """
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        before = request.args.get('before', type=float)
+        sessions = session_registry.list(limit=limit, before=before, status=request.args.get('status'))
+        return jsonify({
+            'sessions': sessions,
+            'next_before': sessions[-1]['created_at'] if len(sessions) == limit else None
+        }), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to list sessions: {str(e)}'}), 500
+
+
+@session_bp.route('/api/sessions/latest', methods=['GET'])
+def get_latest_session():
+    """Get the most recently created session"""
+    try:
+        session = session_registry.latest()
+        if session is None:
+            return jsonify({'error': 'No sessions found'}), 404
+        return jsonify(session), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to read sessions: {str(e)}'}), 500
+
+
+@session_bp.route('/api/sessions/<session_id>', methods=['GET'])
+def get_session(session_id):
+    """Get the registry entry of one session"""
+    try:
+        session = session_registry.get(session_id)
+        if session is None:
+            return jsonify({'error': 'Session not found'}), 404
+        return jsonify(session), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to read session: {str(e)}'}), 500
+
+
+@session_bp.route('/api/sessions/gc', methods=['GET'])
+def get_session_gc_status():
+    """Get the session garbage collector settings and its last report"""
+    return jsonify(session_gc.status()), 200
+
+
+@session_bp.route('/api/sessions/gc', methods=['POST'])
+def run_session_gc():
+    """
+    Run the session garbage collector now
+    JSON body: {"dry_run": bool, "force": bool}; force runs outside the off-peak window
+    """
+    try:
+        options = request.get_json(silent=True) or {}
+        report = session_gc.collect(force=bool(options.get('force')), dry_run=bool(options.get('dry_run')))
+        return jsonify(report), 409 if report.get('skipped') == 'already_running' else 200
+    except Exception as e:
+        return jsonify({'error': f'Session garbage collection failed: {str(e)}'}), 500
+
+
+@session_bp.route('/api/sessions/<session_id>/archive', methods=['POST'])
+def archive_session(session_id):
+    """Export a session's graphs to a compressed archive and drop them from the store"""
+    try:
+        return jsonify(session_archive.archive(session_id)), 200
+    except KeyError:
+        return jsonify({'error': 'Session not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': f'Failed to archive session: {str(e)}'}), 500
+
+
+@session_bp.route('/api/sessions/<session_id>/rehydrate', methods=['POST'])
+def rehydrate_session(session_id):
+    """
+    Load an archived session back into the store
+    Returns 202 while the rehydration is still running
+    """
+    try:
+        if session_registry.get(session_id) is None:
+            return jsonify({'error': 'Session not found'}), 404
+        resident = session_archive.ensure_resident(session_id, wait=request.args.get('wait', type=float))
+        return jsonify({
+            'session_id': session_id,
+            'status': session_registry.get(session_id)['status'],
+            'error': session_archive.errors.get(session_id)
+        }), 200 if resident else 202
+    except Exception as e:
+        return jsonify({'error': f'Failed to rehydrate session: {str(e)}'}), 500
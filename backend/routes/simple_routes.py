@@ -2,9 +2,13 @@
 from flask import Blueprint, jsonify, request
 from functions.logging_config import get_logger
 from functions import virtuoso_service
-from functions.phoenix_service import explanation_cache, load_vkg_from_virtuoso
+from functions.phoenix_service import explain_violation_on_demand, explanation_cache, job_manager, load_vkg_from_virtuoso
+from functions.session_registry import shapes_graph_of, touch_session
+from functions.session_archive import session_archive
 from functions.xpshacl_engine.violation_signature_factory import create_violation_signature
 from functions.xpshacl_engine.repair_engine import SuggestionRepairGenerator
+from functions.xpshacl_engine.template_engine import template_engine, corrected_datatype_value, convert_to_iso_date
+from functions.xpshacl_engine.xpshacl_architecture import ConstraintViolation, ViolationType
 import re
 from datetime import datetime
 import exrex
@@ -23,6 +27,14 @@ def get_violations():
         session_id = request.args.get('session_id')
         if session_id:
             validation_graph_uri = f"http://ex.org/ValidationReport/Session_{session_id}"
+            touch_session(session_id)
+            # Archived sessions are loaded back into the store first
+            if not session_archive.ensure_resident(session_id):
+                return jsonify({
+                    'status': 'rehydrating',
+                    'session_id': session_id,
+                    'error': session_archive.errors.get(session_id)
+                }), 202, {'Retry-After': '5'}
         else:
             # Fallback to default graph for backward compatibility
             validation_graph_uri = "http://ex.org/ValidationReport"
@@ -99,7 +111,8 @@ def get_explanations(session_id):
     Returns AI-generated explanations if available, otherwise basic ones
     """
     try:
-
+        # Looking up the job first restores persisted results into the cache
+        job = job_manager.get_job(session_id)
 
         # Check if we have enhanced explanations in the cache
         if session_id in explanation_cache:
@@ -111,6 +124,17 @@ def get_explanations(session_id):
                 'has_enhanced': True
             }), 200
 
+        # Job still running (or interrupted): return the explanations generated so far
+        if job is not None:
+            return jsonify({
+                'explanations': list(job.results),
+                'session_id': session_id,
+                'has_enhanced': False,
+                'status': job.status,
+                'progress': job.progress(),
+                'message': 'Enhanced explanations are still being generated'
+            }), 200
+
         # If no enhanced explanations available, return empty
         return jsonify({
             'explanations': [],
@@ -133,6 +157,8 @@ def generate_explanation():
         data = request.get_json()
         violation = data.get('violation', {})
         session_id = data.get('session_id')
+        # force_llm asks the LLM even for constraint components a template covers
+        force_llm = str(data.get('force_llm', request.args.get('force_llm', 'false'))).lower() == 'true'
 
         if not violation:
             return jsonify({'error': 'Violation data is required'}), 400
@@ -141,9 +167,13 @@ def generate_explanation():
 
         # Try to use PHOENIX if available, but fallback to basic explanation
         try:
-            # Try to import and use PHOENIX service
-            
+            if force_llm:
+                repair_object = explain_violation_on_demand(_constraint_violation(violation), session_id, force_llm=True)
+                if repair_object:
+                    repair_object["has_enhanced"] = True
+                    return jsonify(repair_object), 200
 
+            # Try to import and use PHOENIX service
 
             # Convert dict to violation-like object
             class ViolationObj:
@@ -189,66 +219,19 @@ def generate_explanation():
         # Generate contextual information like PHOENIX does
         constraint_info = _get_constraint_info(constraint_id, property_path, value, session_id)
 
-        # Generate more specific basic explanation based on constraint type
-        constraint_name = constraint_id.split('#')[-1] if '#' in constraint_id else constraint_id.split('/')[-1]
-
-        # More specific constraint detection - check for exact matches first
-        if 'mincount' in constraint_name.lower() and 'count' in constraint_name.lower():
-            explanation = f"This data record is incomplete. The '{property_path}' attribute is required but missing from '{focus_node}'."
-            suggestion = f"Add a value for the '{property_path}' attribute to '{focus_node}' to complete the record."
-            query = _generate_mincount_query(focus_node, property_path, session_id)
-        elif 'maxcount' in constraint_name.lower() and 'count' in constraint_name.lower():
-            explanation = f"This data record has too many values. The '{property_path}' attribute for '{focus_node}' exceeds the maximum allowed number of values."
-            suggestion = f"Remove extra values from the '{property_path}' attribute for '{focus_node}' to comply with the constraint."
-            query = _generate_maxcount_query(focus_node, property_path, value, session_id)
-        elif 'datatype' in constraint_name.lower():
-            explanation = f"This data record has an incorrect data type. The '{property_path}' attribute for '{focus_node}' should be a different data type than '{value}'."
-            suggestion = f"Change the value of '{property_path}' for '{focus_node}' to the correct data type."
-            query = _generate_datatype_query(focus_node, property_path, value, session_id)
-        elif 'pattern' in constraint_name.lower() and 'constraintcomponent' in constraint_name.lower():
-            pattern = constraint_info.get('pattern', '')
-            example = constraint_info.get('exampleValue', '')
-            if pattern:
-                explanation = f"The value '{value}' for '{property_path}' doesn't match the required pattern '{pattern}'."
-                if example:
-                    suggestion = f"Change the value to match the pattern. Example of a valid value: '{example}'."
-                else:
-                    suggestion = f"Change the value to match the required pattern '{pattern}'."
-            else:
-                explanation = f"The value for '{property_path}' doesn't match the required format."
-                suggestion = f"Change the value to match the required format."
-            query = _generate_pattern_query(focus_node, property_path, value, session_id, example)
-        elif 'inconstraintcomponent' in constraint_name.lower():
-            allowed_values = constraint_info.get('allowedValues', [])
-            if allowed_values:
-                explanation = f"The value '{value}' for '{property_path}' is not in the list of allowed values."
-                suggestion = f"Change the value to one of the allowed options: {', '.join(allowed_values)}."
-            else:
-                explanation = f"The value for '{property_path}' is not in the allowed list."
-                suggestion = f"Change the value to one of the allowed options."
-            query = _generate_in_query(focus_node, property_path, value, session_id, allowed_values[0] if allowed_values else 'CORRECT_VALUE')
-        elif 'maxinclusive' in constraint_name.lower():
-            max_value = constraint_info.get('maxValue', '')
-            if max_value:
-                explanation = f"The value '{value}' for '{property_path}' exceeds the maximum allowed value of {max_value}."
-                suggestion = f"Change the value to be less than or equal to {max_value}."
-            else:
-                explanation = f"The value '{value}' for '{property_path}' exceeds the maximum allowed value."
-                suggestion = f"Change the value to be less than or equal to the maximum allowed value."
-            query = _generate_maxcount_query(focus_node, property_path, value, session_id)
-        elif 'mininclusive' in constraint_name.lower():
-            min_value = constraint_info.get('minValue', '')
-            if min_value:
-                explanation = f"The value '{value}' for '{property_path}' is below the minimum allowed value of {min_value}."
-                suggestion = f"Change the value to be greater than or equal to {min_value}."
-            else:
-                explanation = f"The value '{value}' for '{property_path}' is below the minimum allowed value."
-                suggestion = f"Change the value to be greater than or equal to the minimum allowed value."
-            query = _generate_mincount_query(focus_node, property_path, session_id)
-        elif 'lessthanorequals' in constraint_name.lower():
-            explanation = f"The value '{value}' for '{property_path}' violates the less-than-or-equals constraint."
-            suggestion = f"Change the value to be less than or equal to the required value."
-            query = _generate_maxcount_query(focus_node, property_path, value, session_id)
+        # Templated explanation for the known constraint components
+        rendered = template_engine.render(
+            constraint_id, focus_node, property_path, value, session_id,
+            pattern=constraint_info.get('pattern'),
+            example=constraint_info.get('exampleValue'),
+            allowed_values=constraint_info.get('allowedValues'),
+            max_value=constraint_info.get('maxValue'),
+            min_value=constraint_info.get('minValue'),
+        )
+        if rendered:
+            explanation = rendered["explanation_natural_language"]
+            suggestion = rendered["suggestion_natural_language"]
+            query = rendered["proposed_repair"]["query"]
         else:
             explanation = f"The data record '{focus_node}' violates a quality constraint. The '{property_path}' attribute with value '{value}' doesn't meet requirements."
             suggestion = f"Review and correct the '{property_path}' value for '{focus_node}' to ensure data quality."
@@ -308,6 +291,23 @@ def apply_repair():
 
 
 # Helper functions for enhanced contextual explanations (similar to PHOENIX approach)
+def _constraint_violation(violation):
+    """Builds the ConstraintViolation of a violation sent by the frontend."""
+    try:
+        violation_type = ViolationType(violation.get('violation_type'))
+    except ValueError:
+        violation_type = ViolationType.OTHER
+    return ConstraintViolation(
+        focus_node=violation.get('focus_node', ''),
+        shape_id=violation.get('shape_id', ''),
+        constraint_id=violation.get('constraint_id', ''),
+        violation_type=violation_type,
+        property_path=violation.get('property_path'),
+        value=violation.get('value'),
+        message=violation.get('message'),
+        severity=violation.get('severity'),
+    )
+
 def _get_constraint_info(constraint_id, property_path, value, session_id):
     """
     Generate contextual information for constraints, similar to how PHOENIX provides regex examples
@@ -419,8 +419,8 @@ def _get_constraint_info(constraint_id, property_path, value, session_id):
     elif 'in' in constraint_name.lower():
         try:
 
-            # Use session-specific shapes graph
-            shapes_graph_uri = f"http://ex.org/Shapes/Session_{session_id}" if session_id else "http://ex.org/ShapesGraph"
+            # Use the shapes graph the session was validated against (shared or session-specific)
+            shapes_graph_uri = shapes_graph_of(session_id) if session_id else "http://ex.org/ShapesGraph"
             logger.info(f"Querying sh:in constraints from shapes graph: {shapes_graph_uri}")
 
             # Query sh:in constraints to find allowed values
@@ -483,68 +483,31 @@ def _generate_pattern_example(pattern):
 
 def _generate_mincount_query(focus_node, property_path, session_id):
     """Generate INSERT query for missing values with $user_provided_value placeholder (PHOENIX approach)"""
-    return f"""
-INSERT DATA {{
-  GRAPH <http://ex.org/ValidationReport/Session_{session_id or 'UNKNOWN'}> {{
-    <{focus_node}> <{property_path}> $user_provided_value .
-  }}
-}}"""
+    return template_engine.render_query("insert_user_value", focus_node, property_path, session_id=session_id)
 
 
 def _generate_maxcount_query(focus_node, property_path, value, session_id):
     """Generate DELETE query for too many values"""
-    return f"""
-DELETE WHERE {{
-  GRAPH <http://ex.org/ValidationReport/Session_{session_id or 'UNKNOWN'}> {{
-    <{focus_node}> <{property_path}> "{value}" .
-  }}
-}}"""
+    return template_engine.render_query("delete_value", focus_node, property_path, value, session_id)
 
 
 def _generate_datatype_query(focus_node, property_path, value, session_id):
     """Generate DELETE/INSERT query for datatype corrections (PHOENIX approach)"""
-    corrected_value = _get_corrected_datatype(value, property_path)
-    return f"""
-DELETE WHERE {{
-  GRAPH <http://ex.org/ValidationReport/Session_{session_id or 'UNKNOWN'}> {{
-    <{focus_node}> <{property_path}> "{value}" .
-  }}
-}};
-INSERT DATA {{
-  GRAPH <http://ex.org/ValidationReport/Session_{session_id or 'UNKNOWN'}> {{
-    <{focus_node}> <{property_path}> {corrected_value} .
-  }}
-}}"""
+    return template_engine.render_query("replace_datatype", focus_node, property_path, value, session_id)
 
 
 def _generate_pattern_query(focus_node, property_path, value, session_id, example_value):
     """Generate DELETE/INSERT query for pattern violations (PHOENIX approach)"""
-    return f"""
-DELETE WHERE {{
-  GRAPH <http://ex.org/ValidationReport/Session_{session_id or 'UNKNOWN'}> {{
-    <{focus_node}> <{property_path}> "{value}" .
-  }}
-}};
-INSERT DATA {{
-  GRAPH <http://ex.org/ValidationReport/Session_{session_id or 'UNKNOWN'}> {{
-    <{focus_node}> <{property_path}> $user_provided_value .
-  }}
-}}"""
+    return template_engine.render_query(
+        "replace_with_user_value", focus_node, property_path, value, session_id, example=example_value
+    )
 
 
 def _generate_in_query(focus_node, property_path, value, session_id, allowed_value):
     """Generate DELETE/INSERT query for in constraint violations"""
-    return f"""
-DELETE WHERE {{
-  GRAPH <http://ex.org/ValidationReport/Session_{session_id or 'UNKNOWN'}> {{
-    <{focus_node}> <{property_path}> "{value}" .
-  }}
-}};
-INSERT DATA {{
-  GRAPH <http://ex.org/ValidationReport/Session_{session_id or 'UNKNOWN'}> {{
-    <{focus_node}> <{property_path}> "{allowed_value}" .
-  }}
-}}"""
+    return template_engine.render_query(
+        "replace_with_allowed_value", focus_node, property_path, value, session_id, allowed_value=allowed_value
+    )
 
 
 def _get_default_for_property(property_path):
@@ -571,92 +534,9 @@ def _get_default_for_property(property_path):
         return '""'
 
 
-def _get_corrected_datatype(value, property_path):
-    """Fix datatype for a value based on property context (PHOENIX approach)"""
-    if not value:
-        return '""'
-
-    lower_path = property_path.lower() if property_path else ''
-
-    # Handle date conversions (like "March 1st, 2023" → "2023-03-01")
-    if any(keyword in lower_path for keyword in ['date', 'created', 'modified', 'hire', 'start', 'end']):
-        converted_date = _convert_to_iso_date(value)
-        if converted_date:
-            return f'"{converted_date}"^^xsd:date'
-
-    # Try to determine if it should be numeric
-    try:
-        int(value)
-        if any(keyword in lower_path for keyword in ['age', 'count', 'number', 'id']):
-            return f'"{value}"^^xsd:integer'
-    except ValueError:
-        pass
-
-    try:
-        float(value)
-        if any(keyword in lower_path for keyword in ['price', 'amount', 'salary']):
-            return f'"{value}"^^xsd:decimal'
-    except ValueError:
-        pass
-
-    # Check for email pattern
-    if '@' in value and any(keyword in lower_path for keyword in ['email', 'mail']):
-        return f'"{value}"'
-
-    # Check for URL/URI
-    if value.startswith(('http://', 'https://', 'ftp://')) or any(keyword in lower_path for keyword in ['url', 'uri', 'link']):
-        return f'"{value}"'
-
-    # Default to string
-    return f'"{value}"'
-
-def _convert_to_iso_date(date_str):
-    """Convert various date formats to ISO format (YYYY-MM-DD)"""
-    import re
-    from datetime import datetime
-
-    # Handle formats like "March 1st, 2023" or "Mar 1, 2023"
-    month_patterns = {
-        'january': '01', 'jan': '01', 'february': '02', 'feb': '02',
-        'march': '03', 'mar': '03', 'april': '04', 'apr': '04',
-        'may': '05', 'june': '06', 'jun': '06', 'july': '07', 'jul': '07',
-        'august': '08', 'aug': '08', 'september': '09', 'sep': '09', 'sept': '09',
-        'october': '10', 'oct': '10', 'november': '11', 'nov': '11',
-        'december': '12', 'dec': '12'
-    }
-
-    # Pattern 1: "March 1st, 2023" or "Mar 1st, 2023"
-    pattern1 = r'(\w+)\s+(\d+)(?:st|nd|rd|th)?,?\s*(\d{4})'
-    match1 = re.match(pattern1, date_str, re.IGNORECASE)
-    if match1:
-        month_name, day, year = match1.groups()
-        month = month_patterns.get(month_name.lower(), month_name.lower())
-        if month and month.isdigit():
-            return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-
-    # Pattern 2: "2023-03-01" or "2023/03/01"
-    pattern2 = r'(\d{4})[-/](\d{2})[-/](\d{2})'
-    match2 = re.match(pattern2, date_str)
-    if match2:
-        return f"{match2.group(1)}-{match2.group(2)}-{match2.group(3)}"
-
-    # Pattern 3: "01/03/2023" (DD/MM/YYYY)
-    pattern3 = r'(\d{2})[-/](\d{2})[-/](\d{4})'
-    match3 = re.match(pattern3, date_str)
-    if match3:
-        return f"{match3.group(3)}-{match3.group(2)}-{match3.group(1)}"
-
-    # Pattern 4: "03/01/2023" (MM/DD/YYYY)
-    pattern4 = r'(\d{2})[-/](\d{2})[-/](\d{4})'
-    match4 = re.match(pattern4, date_str)
-    if match4:
-        # This will match the same as pattern3, we need to differentiate
-        # Assume MM/DD/YYYY if month is 12 or less
-        month = int(match4.group(1))
-        if month <= 12:
-            return f"{match4.group(3)}-{match4.group(1).zfill(2)}-{match4.group(2).zfill(2)}"
-
-    return None
+# Kept under their former names for the helpers and tests of this module
+_get_corrected_datatype = corrected_datatype_value
+_convert_to_iso_date = convert_to_iso_date
 
 
 def _get_violation_context(violation, session_id):
@@ -735,8 +615,8 @@ def _get_violation_context(violation, session_id):
     elif 'in' in constraint_name.lower():
         try:
 
-            # Use session-specific shapes graph
-            shapes_graph_uri = f"http://ex.org/Shapes/Session_{session_id}" if session_id else "http://ex.org/ShapesGraph"
+            # Use the shapes graph the session was validated against (shared or session-specific)
+            shapes_graph_uri = shapes_graph_of(session_id) if session_id else "http://ex.org/ShapesGraph"
             logger.debug(f"Querying sh:in constraints from shapes graph: {shapes_graph_uri}")
 
             in_query = f"""
@@ -1,10 +1,14 @@
 # upload_routes.py
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
-import os
 import datetime
 from config import SRG_MODEL, OPENAI_API_KEY, ANTHROPIC_API_KEY, GEMINI_API_KEY, USERNAME, PASSWORD
 from functions import virtuoso_service
+from functions.session_registry import record_session, update_session, sessions_referencing, VALIDATED, FAILED
+from functions.triple_store import local_sessions
+from functions.content_store import content_store, shared_shapes_graph_uri
+from functions.compression import available, codec_for
+from functions.streaming_upload import parse_uploads, receive_upload, split_extension
 import rdflib
 import requests
 from requests.auth import HTTPBasicAuth
@@ -14,18 +18,27 @@ SHACL = rdflib.Namespace("http://www.w3.org/ns/shacl#")
 
 upload_bp = Blueprint('upload', __name__)
 
-# Allowed file extensions
+# Allowed file extensions, optionally followed by a compression extension
 ALLOWED_EXTENSIONS = {'ttl', 'rdf', 'n3', 'nt'}
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    extension, compression = split_extension(filename)
+    if compression and not available(codec_for(filename)):
+        return False
+    return extension.lstrip('.') in ALLOWED_EXTENSIONS
 
 @upload_bp.route('/api/upload/files', methods=['POST'])
+@parse_uploads
 def upload_files():
     """
     Upload data and shapes files for validation
     Uses backend configuration for AI settings
     Implements tenant isolation using session-specific graphs
+
+    Files are hashed and stored by content hash while the request body is
+    received (N-Triples is also parsed on the way). A shapes file uploaded
+    before is neither parsed, compiled nor inserted again, and its sessions
+    share one shapes graph.
     """
     # Debug: Print database credentials being used
     print(f"DEBUG: Using database credentials - User: {USERNAME}, Password: {PASSWORD}")
@@ -44,7 +57,7 @@ def upload_files():
 
         # Check if files have allowed extensions
         if not (allowed_file(data_file.filename) and allowed_file(shapes_file.filename)):
-            return jsonify({'error': 'Invalid file extension. Allowed: ttl, rdf, n3, nt'}), 400
+            return jsonify({'error': 'Invalid file extension. Allowed: ttl, rdf, n3, nt (optionally .gz, .bz2 or .zst)'}), 400
 
         # Generate unique session ID for tenant isolation
         import uuid
@@ -52,23 +65,21 @@ def upload_files():
 
         # Create tenant-specific graph URIs
         validation_graph_uri = f"http://ex.org/ValidationReport/Session_{session_id}"
-        data_graph_uri = f"http://ex.org/Data/Session_{session_id}"
-        shapes_graph_uri = f"http://ex.org/Shapes/Session_{session_id}"
-
-        # Create upload directory if it doesn't exist
-        upload_dir = os.path.join(os.path.dirname(__file__), '..', 'uploads', session_id)
-        if not os.path.exists(upload_dir):
-            os.makedirs(upload_dir)
+        record_session(session_id, source='upload')
 
-        # Save files
+        # Files were hashed and stored under their content hash while they were received
         data_filename = secure_filename(data_file.filename)
         shapes_filename = secure_filename(shapes_file.filename)
 
-        data_path = os.path.join(upload_dir, f"data_{data_filename}")
-        shapes_path = os.path.join(upload_dir, f"shapes_{shapes_filename}")
+        # The digests are recorded while the content is locked, so the session
+        # collector cannot release it before this session references it
+        data_upload = receive_upload(data_file, claim=lambda digest: update_session(session_id, data_digest=digest))
+        shapes_upload = receive_upload(shapes_file, claim=lambda digest: update_session(session_id, shapes_digest=digest))
+        data_stored, shapes_stored = data_upload.stored, shapes_upload.stored
+        data_path, shapes_path = data_stored.path, shapes_stored.path
 
-        data_file.save(data_path)
-        shapes_file.save(shapes_path)
+        # Sessions validated against the same shapes share one immutable shapes graph
+        shapes_graph_uri = shared_shapes_graph_uri(shapes_stored.digest)
 
         # Perform SHACL validation on uploaded files
         try:
@@ -76,28 +87,23 @@ def upload_files():
             print(f"Data file: {data_path}")
             print(f"Shapes file: {shapes_path}")
 
-            # Load the data and shapes graphs
-            data_graph = rdflib.Graph()
-            shapes_graph = rdflib.Graph()
-
-            data_graph.parse(data_path, format='turtle')
-            shapes_graph.parse(shapes_path, format='turtle')
+            # Parsed graphs, shared with earlier uploads of the same content
+            data_graph = data_upload.graph()
+            shapes_graph = shapes_upload.graph()
             print(f"Parsed {len(data_graph)} data triples and {len(shapes_graph)} shape triples")
 
             # Perform SHACL validation
-            from pyshacl import validate
             print("Starting PySHACL validation...")
 
-            # Validate data against shapes
-            conforms, results_graph, results_text = validate(
+            # Validate data against shapes, reusing the compiled shapes of a known shapes file
+            conforms, results_graph, results_text = content_store.validate(
                 data_graph,
-                shacl_graph=shapes_graph,
-                ont_graph=None,
+                shapes_stored,
+                shapes_graph,
                 inference='rdfs',
                 abort_on_first=False,
                 allow_infos=False,
                 allow_warnings=False,
-                meta_shacl=False,
                 debug=False
             )
             print(f"Validation result: conforms={conforms}, has_results={results_graph is not None}")
@@ -121,19 +127,30 @@ def upload_files():
                     """
                     virtuoso_service.execute_sparql_update(insert_query)
                     print(f"Successfully stored validation results in Virtuoso using direct INSERT for session {session_id}")
+                    update_session(session_id, validation_graph=validation_graph_uri)
+                    stored_graphs = {validation_graph_uri: results_graph}
 
-                    # Store shapes graph for dashboard statistics
+                    # Store shapes graph for dashboard statistics, once per shapes content
                     try:
-                        shapes_nt_data = shapes_graph.serialize(format='nt')
-                        shapes_insert_query = f"""
-                        INSERT DATA {{
-                            GRAPH <{shapes_graph_uri}> {{
-                                {shapes_nt_data}
-                            }}
-                        }}
-                        """
-                        virtuoso_service.execute_sparql_update(shapes_insert_query)
-                        print(f"Successfully stored shapes graph in Virtuoso using direct INSERT for session {session_id}")
+                        with content_store.lock(shapes_stored.digest):
+                            if sessions_referencing('shapes_graph', shapes_graph_uri):
+                                print(f"Shapes graph {shapes_graph_uri} already stored, shared with session {session_id}")
+                            else:
+                                shapes_nt_data = shapes_graph.serialize(format='nt')
+                                shapes_insert_query = f"""
+                                INSERT DATA {{
+                                    GRAPH <{shapes_graph_uri}> {{
+                                        {shapes_nt_data}
+                                    }}
+                                }}
+                                """
+                                virtuoso_service.execute_sparql_update(shapes_insert_query)
+                                print(
+                                    "Successfully stored shapes graph in Virtuoso using direct INSERT "
+                                    f"for session {session_id}"
+                                )
+                            update_session(session_id, shapes_graph=shapes_graph_uri)
+                        stored_graphs[shapes_graph_uri] = shapes_graph
                     except Exception as shapes_error:
                         print(f"Error storing shapes graph in Virtuoso: {shapes_error}")
                         # Continue without storing shapes graph
@@ -153,6 +170,10 @@ def upload_files():
                         print(f"Error counting violations: {e}")
                         violation_count = 0
 
+                    # Small sessions are also served from memory; Virtuoso keeps the durable copy
+                    if local_sessions.put(session_id, stored_graphs):
+                        print(f"Session {session_id} is served from memory")
+
                 except Exception as e:
                     print(f"Error storing validation results in Virtuoso: {e}")
                     print(f"Exception type: {type(e)}")
@@ -161,6 +182,10 @@ def upload_files():
                     # Continue without storing in Virtuoso - still return validation results
                     violation_count = 0
 
+                update_session(
+                    session_id, status=VALIDATED, violation_count=violation_count,
+                    data_triples=len(data_graph), shapes_triples=len(shapes_graph)
+                )
                 return jsonify({
                     'message': 'Files validated successfully',
                     'data_file': data_filename,
@@ -169,9 +194,14 @@ def upload_files():
                     'violation_count': violation_count,
                     'validation_results': results_text,
                     'session_id': session_id,
-                    'validation_graph_uri': validation_graph_uri
+                    'validation_graph_uri': validation_graph_uri,
+                    'reused_content': {'data': data_stored.reused, 'shapes': shapes_stored.reused}
                 }), 200
             else:
+                update_session(
+                    session_id, status=VALIDATED, violation_count=0,
+                    data_triples=len(data_graph), shapes_triples=len(shapes_graph)
+                )
                 return jsonify({
                     'message': 'Validation completed - no violations found',
                     'data_file': data_filename,
@@ -180,11 +210,13 @@ def upload_files():
                     'violation_count': 0,
                     'validation_results': 'No violations found',
                     'session_id': session_id,
-                    'validation_graph_uri': validation_graph_uri
+                    'validation_graph_uri': validation_graph_uri,
+                    'reused_content': {'data': data_stored.reused, 'shapes': shapes_stored.reused}
                 }), 200
 
         except Exception as validation_error:
             print(f"Validation error: {validation_error}")
+            update_session(session_id, status=FAILED)
             # If validation fails, still return upload success but note the validation issue
             return jsonify({
                 'message': 'Files uploaded but validation failed',
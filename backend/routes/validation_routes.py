@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from rdflib import Graph
-from functions.validation import validate
+from functions.compression import EXTENSIONS
+from functions.response_compression import compressed_download
+from functions.validation import validate, export_validation_report
 
 validation_bp = Blueprint('validation', __name__)
 
@@ -24,3 +26,22 @@ def validate_route():
     result_graph = validate(data_graph, shapes_graph, validation_report)
 
     return jsonify({'validation_report': result_graph.serialize(format='turtle')}), 200
+
+
+@validation_bp.route('/api/validation/<session_id>/export', methods=['GET'])
+def export_report_route(session_id):
+    """
+    Download the validation report of a session. `compress` (gzip, zstd or
+    bz2) returns it as a compressed file; without it, large reports are still
+    sent compressed to clients accepting a content coding.
+    """
+    codec = request.args.get('compress', '')
+    if codec and codec not in EXTENSIONS:
+        return jsonify({'error': f'Unsupported compression: {codec}. Use one of {sorted(EXTENSIONS)}'}), 400
+
+    export = export_validation_report(session_id, format=request.args.get('format', 'json'))
+    if 'error' in export:
+        return jsonify(export), 400
+
+    return compressed_download(export['report'].encode('utf-8'), f"validation_report_{session_id}.json",
+                               'application/json', codec)
@@ -181,6 +181,42 @@ def mock_env_vars(monkeypatch):
     monkeypatch.setenv("DATABASE_URL", "mock://localhost:1111")
     monkeypatch.setenv("SECRET_KEY", "test-secret-key")
 
+
+@pytest.fixture(autouse=True)
+def disable_llm_response_cache(monkeypatch):
+    """Keep mocked LLM calls from being served by (or written to) the on-disk response cache."""
+    import config
+    monkeypatch.setattr(config, "LLM_CACHE_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def isolated_session_registry(monkeypatch, tmp_path):
+    """Give each test an empty session registry instead of the one under data/."""
+    from functions.session_registry import SessionRegistry
+    registry = SessionRegistry(str(tmp_path / "sessions.sqlite3"))
+    for module in ("functions.session_registry", "routes.dashboard_routes", "routes.session_routes"):
+        monkeypatch.setattr(f"{module}.session_registry", registry, raising=False)
+    return registry
+
+
+@pytest.fixture(autouse=True)
+def isolated_local_sessions(monkeypatch):
+    """Give each test an empty cache of in-memory sessions."""
+    from functions.triple_store import LocalSessionCache
+    cache = LocalSessionCache()
+    for module in ("functions.triple_store", "routes.upload_routes", "routes.dashboard_routes"):
+        monkeypatch.setattr(f"{module}.local_sessions", cache, raising=False)
+    return cache
+
+
+@pytest.fixture
+def embedded_triple_store(monkeypatch):
+    """Answer every SPARQL client of the services from an empty in-process store."""
+    from functions.triple_store import EmbeddedStore
+    store = EmbeddedStore()
+    monkeypatch.setattr("functions.triple_store.triple_store", store)
+    return store
+
 @pytest.fixture
 def temp_file(tmp_path):
     """Create a temporary file for testing."""
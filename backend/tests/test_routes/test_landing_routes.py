@@ -0,0 +1,25 @@
+"""
+Test landing routes API endpoints.
+"""
+
+import json
+from unittest.mock import Mock, patch
+
+
+class TestLandingRoutes:
+    """Test landing routes functionality."""
+
+    @patch('routes.landing_routes.load_graphs')
+    def test_load_graphs_waits_by_default(self, mock_load_graphs, client):
+        """Test that graph loading blocks unless the caller opts out."""
+        mock_load_graphs.return_value = Mock(to_dict=Mock(return_value={"job_id": "job-1", "status": "done"}))
+        body = {"directory": "/data", "shapes_file": "shapes.ttl", "report_file": "report.ttl"}
+
+        response = client.post('/load-graphs', json=body)
+        assert response.status_code == 200
+        assert mock_load_graphs.call_args.kwargs["wait"] is True
+
+        response = client.post('/load-graphs', json={**body, "wait": False})
+        assert response.status_code == 202
+        assert json.loads(response.data)["job"]["job_id"] == "job-1"
+        assert mock_load_graphs.call_args.kwargs["wait"] is False
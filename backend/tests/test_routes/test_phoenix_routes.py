@@ -0,0 +1,31 @@
+"""
+Test PHOENIX routes API endpoints.
+"""
+
+from unittest.mock import patch
+
+
+class TestPhoenixRoutes:
+    """Test PHOENIX routes functionality."""
+
+    @patch('routes.phoenix_routes.job_manager')
+    def test_stream_explanations(self, mock_job_manager, client):
+        """Test that explanations are streamed as Server-Sent Events."""
+        mock_job_manager.iter_events.return_value = iter([
+            ('progress', {'status': 'running', 'progress': {'total': 1, 'completed': 0}}),
+            (None, None),
+            ('explanation', {'signature': 's1', 'violation_ids': [0]}),
+            ('done', {'status': 'completed'})
+        ])
+
+        response = client.get('/api/explanations/session_123/stream')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+
+        body = response.get_data(as_text=True)
+        assert 'event: progress\n' in body
+        assert ': keep-alive\n\n' in body
+        assert 'event: explanation\ndata: {"signature": "s1", "violation_ids": [0]}\n\n' in body
+        assert body.rstrip().endswith('data: {"status": "completed"}')
+        mock_job_manager.iter_events.assert_called_once_with('session_123')
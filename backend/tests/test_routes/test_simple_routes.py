@@ -95,6 +95,22 @@ class TestSimpleRoutes:
         assert data['has_enhanced'] is False
         assert 'message' in data
 
+    @patch('routes.simple_routes.job_manager')
+    def test_get_explanations_job_in_progress(self, mock_job_manager, client):
+        """Test getting partial explanations while the job is running."""
+        job = Mock(status='running', results=[{'signature': 's1', 'violation_ids': [0], 'explanation': {}}])
+        job.progress.return_value = {'total': 2, 'completed': 1, 'failed': 0, 'violations': 3}
+        mock_job_manager.get_job.return_value = job
+
+        response = client.get('/api/explanations/session_123')
+        assert response.status_code == 200
+
+        data = json.loads(response.data)
+        assert data['has_enhanced'] is False
+        assert data['status'] == 'running'
+        assert data['progress']['completed'] == 1
+        assert len(data['explanations']) == 1
+
     @patch('routes.simple_routes.virtuoso_service')
     def test_get_explanations_error(self, mock_virtuoso, client):
         """Test explanations endpoint error handling."""
@@ -532,4 +548,42 @@ class TestSimpleRoutes:
 
         for value, property_path, expected in test_cases:
             result = _get_corrected_datatype(value, property_path)
-            assert result == expected
\ No newline at end of file
+            assert result == expected
+
+    def test_get_violation_context_in_uses_the_shared_shapes_graph(self, embedded_triple_store, sample_shapes_ttl):
+        """Test that sh:in values are read from the shapes graph the session was validated against."""
+        from rdflib import Graph
+        from functions import session_registry
+        from functions.content_store import shared_shapes_graph_uri
+        from routes.simple_routes import _get_violation_context
+
+        shapes_graph_uri = shared_shapes_graph_uri("ab" * 32)
+        embedded_triple_store.add_graph(shapes_graph_uri, Graph().parse(data=sample_shapes_ttl, format='turtle'))
+        session_registry.session_registry.register('session_123', shapes_graph=shapes_graph_uri)
+
+        violation = {
+            'constraint_id': 'http://www.w3.org/ns/shacl#InConstraintComponent',
+            'property_path': 'http://example.org/ns#status',
+            'context': {}
+        }
+        context = _get_violation_context(violation, 'session_123')
+
+        assert sorted(context['allowedValues']) == ['Active', 'Inactive', 'Pending']
+
+    @patch('routes.simple_routes.explain_violation_on_demand')
+    def test_generate_explanation_force_llm(self, mock_explain, client):
+        """Test that force_llm asks the LLM for a violation a template covers."""
+        mock_explain.return_value = {"explanation_natural_language": "From the LLM", "proposed_repair": {}}
+        violation = {
+            'focus_node': 'http://example.org/alice',
+            'constraint_id': 'http://www.w3.org/ns/shacl#MinCountConstraintComponent',
+            'property_path': 'http://example.org/ns#name',
+            'violation_type': 'unknown'
+        }
+
+        response = client.post('/api/explanation?force_llm=true', json={'violation': violation, 'session_id': 'abc'})
+
+        assert response.status_code == 200
+        assert response.get_json()['has_enhanced'] is True
+        (constraint_violation, session_id), kwargs = mock_explain.call_args
+        assert constraint_violation.violation_type.value == 'other' and session_id == 'abc' and kwargs['force_llm']
@@ -0,0 +1,119 @@
+"""
+Test the bulk loader jobs.
+"""
+
+import gzip
+import subprocess
+import threading
+from unittest.mock import patch
+
+import pytest
+from rdflib import URIRef
+
+from functions.bulk_loader import (
+    COMPLETED,
+    FAILED,
+    FILE_FAILED,
+    FILE_LOADED,
+    BulkLoader,
+    BulkLoadError,
+    Isql,
+)
+
+
+class FakeIsql:
+    """Records the statements sent to ISQL and answers load list queries from `states`."""
+
+    def __init__(self, states):
+        self.states = states
+        self.statements = []
+        self.loaders_running = 0
+        self.max_loaders_running = 0
+        self._lock = threading.Lock()
+        self._release = threading.Event()
+
+    def run(self, statements):
+        with self._lock:
+            self.statements.append(statements)
+        if "rdf_loader_run" in statements:
+            with self._lock:
+                self.loaders_running += 1
+                self.max_loaders_running = max(self.max_loaders_running, self.loaders_running)
+            self._release.wait(5)
+            with self._lock:
+                self.loaders_running -= 1
+            return ""
+        if "load_list WHERE ll_file IN" in statements:
+            return "\n".join(f"LL|{state}|{error}|{path}" for path, (state, error) in self.states.items())
+        return ""
+
+    def finish_loaders(self):
+        self._release.set()
+
+
+class TestBulkLoader:
+    """Test registration, parallel loaders, progress polling and checkpointing."""
+
+    def test_virtuoso_job_loads_in_parallel_and_checkpoints(self):
+        isql = FakeIsql({"/data/a.nt": (2, ""), "/data/b.nt": (2, ""), "/data/c.nt": (2, "")})
+        loader = BulkLoader(isql=isql, loader_threads=2, poll_interval=0.01)
+
+        job = loader.submit([("/data/a.nt", "http://g/a"), ("/data/b.nt", "http://g/a"), ("/data/c.nt", "http://g/c")])
+        threading.Timer(0.1, isql.finish_loaders).start()
+        assert job.wait(5)
+
+        assert job.status == COMPLETED
+        assert job.progress()["loaded"] == 3
+        assert isql.max_loaders_running == 2
+        registration = isql.statements[0]
+        assert "ld_add('/data/a.nt', 'http://g/a');" in registration
+        assert "DELETE FROM DB.DBA.load_list WHERE ll_file = '/data/c.nt';" in registration
+        assert isql.statements[-1].strip() == "checkpoint;"
+        assert loader.get(job.job_id) is job
+
+    def test_failed_files_fail_the_job_with_their_errors(self):
+        isql = FakeIsql({"/data/a.nt": (2, ""), "/data/it's.nt": (2, "37000: SP029: TURTLE RDF loader, line 3: syntax error")})
+        isql.finish_loaders()
+        job = BulkLoader(isql=isql, poll_interval=0.01).submit([("/data/a.nt", "http://g"), ("/data/it's.nt", "http://g")])
+        assert job.wait(5)
+
+        assert job.status == FAILED
+        assert job.file("/data/a.nt")["state"] == FILE_LOADED
+        assert job.file("/data/it's.nt")["state"] == FILE_FAILED
+        assert "syntax error" in job.file("/data/it's.nt")["error"]
+        assert "'/data/it''s.nt'" in isql.statements[0]
+
+    def test_isql_errors_are_raised(self):
+        output = "*** Error 42000: [Virtuoso Driver][Virtuoso Server]SR008: Function ld_add needs a string\n"
+        with patch("functions.bulk_loader.subprocess.run",
+                   return_value=subprocess.CompletedProcess([], 0, stdout=output, stderr="")):
+            with pytest.raises(BulkLoadError, match="SR008"):
+                Isql().run("ld_add(1, 2);")
+
+        with patch("functions.bulk_loader.subprocess.run", side_effect=FileNotFoundError()):
+            with pytest.raises(BulkLoadError, match="not found"):
+                Isql().run("checkpoint;")
+
+    def test_embedded_store_loads_the_files_itself(self, embedded_triple_store, tmp_path, sample_shapes_ttl):
+        good = tmp_path / "shapes.ttl"
+        good.write_text(sample_shapes_ttl)
+        bad = tmp_path / "broken.ttl"
+        bad.write_text("this is not turtle")
+
+        job = BulkLoader(isql=FakeIsql({})).submit([(str(good), "http://g/shapes"), (str(bad), "http://g/broken")])
+        assert job.wait(5)
+
+        assert job.status == FAILED
+        assert job.progress()["loaded"] == 1 and job.progress()["failed"] == 1
+        assert job.progress()["bytes_total"] == good.stat().st_size + bad.stat().st_size
+        assert len(embedded_triple_store.dataset.graph(URIRef("http://g/shapes"))) > 0
+
+    def test_embedded_store_loads_compressed_files(self, embedded_triple_store, tmp_path):
+        path = tmp_path / "data.nt.gz"
+        path.write_bytes(gzip.compress(b"<http://example.org/s> <http://example.org/p> <http://example.org/o> .\n"))
+
+        job = BulkLoader(isql=FakeIsql({})).submit([(str(path), "http://g/data")])
+        assert job.wait(5)
+
+        assert job.status == COMPLETED
+        assert len(embedded_triple_store.dataset.graph(URIRef("http://g/data"))) == 1
@@ -0,0 +1,137 @@
+"""
+Test content-addressed uploads and the reference counting of shared content.
+"""
+
+import io
+from unittest.mock import Mock, patch
+
+import pytest
+from rdflib import RDF, Graph, URIRef
+
+from functions.content_store import ContentStore, shared_shapes_graph_uri
+from functions.session_gc import SessionGarbageCollector
+from functions.session_registry import SessionRegistry, VALIDATED, session_graph_uris
+
+HOUR = 3600
+SH_RESULT = URIRef("http://www.w3.org/ns/shacl#ValidationResult")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ContentStore(str(tmp_path / "content"), max_cached_triples=1000)
+
+
+class TestContentStore:
+    """Test hashing on save, the parse cache and compiled shapes reuse."""
+
+    def test_identical_uploads_are_stored_once(self, store, sample_shapes_ttl):
+        first = store.save(io.BytesIO(sample_shapes_ttl.encode()), ".ttl")
+        second = store.save(io.BytesIO(sample_shapes_ttl.encode()), ".ttl")
+        other = store.save(io.BytesIO(b"<urn:a> <urn:b> <urn:c> ."), ".nt")
+
+        assert first.path == second.path and not first.reused and second.reused
+        assert other.digest != first.digest
+        assert store.usage(first.digest) == (1, len(sample_shapes_ttl.encode()))
+
+        store.remove(first.digest)
+        assert store.usage(first.digest) == (0, 0)
+
+    def test_claim_runs_under_the_digest_lock(self, store):
+        held = []
+        stored = store.save(io.BytesIO(b"<urn:a> <urn:b> <urn:c> ."), ".nt",
+                            claim=lambda digest: held.append((digest, store.lock(digest).locked())))
+
+        assert held == [(stored.digest, True)]
+        assert not store.lock(stored.digest).locked()
+
+    def test_repeated_validation_skips_parse_and_compilation(self, store, sample_shapes_ttl, sample_data_ttl):
+        shapes = store.save(io.BytesIO(sample_shapes_ttl.encode()), ".ttl")
+        data = store.save(io.BytesIO(sample_data_ttl.encode()), ".ttl")
+
+        results = []
+        for _ in range(2):
+            data_graph, shapes_graph = store.graph(data), store.graph(shapes)
+            conforms, report, _ = store.validate(data_graph, shapes, shapes_graph, inference="rdfs")
+            results.append((conforms, len(report)))
+
+        assert results[0] == results[1] and results[0][0] is False
+        stats = store.stats()
+        assert stats["parse_misses"] == 2 and stats["parse_hits"] == 2
+        assert stats["compile_hits"] == 1
+
+    def test_parse_cache_is_bounded(self, tmp_path):
+        store = ContentStore(str(tmp_path / "content"), max_cached_triples=3)
+        small = [store.save(io.BytesIO(f"<urn:s{i}> <urn:p> <urn:o> .".encode()), ".nt") for i in range(2)]
+        for stored in small:
+            store.graph(stored, format="nt")
+        big = store.save(io.BytesIO(b"".join(f"<urn:s> <urn:p> <urn:o{i}> .\n".encode() for i in range(5))), ".nt")
+        store.graph(big, format="nt")
+
+        assert store.stats()["cached_graphs"] == 2
+
+
+class TestSharedContentCollection:
+    """Test that shared graphs and files are released with the last session referencing them."""
+
+    def test_shared_graphs_are_not_session_graphs(self):
+        entry = {"shapes_graph": shared_shapes_graph_uri("ab" * 32)}
+        assert entry["shapes_graph"] not in session_graph_uris("s1", entry)
+
+    def test_content_is_released_with_its_last_session(self, store, tmp_path):
+        registry = SessionRegistry(str(tmp_path / "sessions.sqlite3"))
+        shapes = store.save(io.BytesIO(b"<urn:a> <urn:b> <urn:c> ."), ".nt")
+        now = 1000 * HOUR
+        for session_id, age in (("old", 48), ("new", 1)):
+            with patch("functions.session_registry.time.time", return_value=now - age * HOUR):
+                registry.register(session_id, status=VALIDATED, shapes_digest=shapes.digest,
+                                  shapes_graph=shared_shapes_graph_uri(shapes.digest))
+
+        def query(text):
+            bindings = [{"g": {"value": shared_shapes_graph_uri(shapes.digest)}, "triples": {"value": "1"}}] \
+                if shapes.digest in text else []
+            return {"results": {"bindings": bindings}}
+
+        update = Mock()
+        collector = SessionGarbageCollector(
+            registry=registry, uploads_dir=str(tmp_path / "uploads"), ttl_hours=24,
+            max_sessions=0, window="", execute_query=Mock(side_effect=query), execute_update=update,
+            archive_after_hours=0, content=store,
+        )
+
+        with patch("functions.session_gc.time.time", return_value=now):
+            report = collector.collect(force=True)
+        assert report["sessions"] == ["old"] and report["content_released"] == []
+        assert store.usage(shapes.digest)[0] == 1
+        assert not any(shapes.digest in call.args[0] for call in update.call_args_list)
+
+        with patch("functions.session_gc.time.time", return_value=now + 48 * HOUR):
+            report = collector.collect(force=True)
+        assert report["content_released"] == [shapes.digest]
+        assert store.usage(shapes.digest)[0] == 0
+        assert f"DROP SILENT GRAPH <{shared_shapes_graph_uri(shapes.digest)}>" in update.call_args_list[-1].args[0]
+
+
+class TestSharedLocalSessions:
+    """Test that sessions sharing a content graph are all served from memory."""
+
+    def test_shared_graph_is_answered_by_the_querying_session(self):
+        from functions.triple_store import LocalSessionCache
+
+        cache = LocalSessionCache(max_triples=100, max_sessions=4, max_total_triples=1000, enabled=True)
+        shapes_uri = shared_shapes_graph_uri("cd" * 32)
+        shapes = Graph()
+        shapes.add((URIRef("http://example.org/PersonShape"), RDF.type, URIRef("http://www.w3.org/ns/shacl#NodeShape")))
+        stores = {}
+        for session_id in ("a", "b"):
+            report = Graph()
+            report_uri = f"http://ex.org/ValidationReport/Session_{session_id}"
+            report.add((URIRef(f"http://example.org/{session_id}"), RDF.type, SH_RESULT))
+            assert cache.put(session_id, {report_uri: report, shapes_uri: shapes})
+            stores[session_id] = cache.store_for(f"SELECT * FROM <{report_uri}> WHERE {{ ?s ?p ?o }}")
+
+        query = (f"SELECT * FROM <http://ex.org/ValidationReport/Session_a> FROM <{shapes_uri}> "
+                 f"WHERE {{ ?s ?p ?o }}")
+        assert cache.store_for(query) is stores["a"]
+
+        cache.invalidate(f"DROP SILENT GRAPH <{shapes_uri}>")
+        assert cache.stats()["sessions"] == 0
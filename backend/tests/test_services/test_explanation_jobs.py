@@ -0,0 +1,180 @@
+"""
+Test background explanation jobs.
+"""
+
+import threading
+import time
+
+from functions.explanation_jobs import ExplanationJobManager
+from functions.xpshacl_engine.xpshacl_architecture import ConstraintViolation, ViolationType
+
+
+def _violation(focus_node, path="name"):
+    return ConstraintViolation(
+        focus_node=focus_node,
+        shape_id="ex:PersonShape",
+        constraint_id="http://www.w3.org/ns/shacl#MinCountConstraintComponent",
+        violation_type=ViolationType.CARDINALITY,
+        property_path=f"http://example.org/{path}",
+    )
+
+
+def _wait_for(job, timeout=5.0):
+    deadline = time.time() + timeout
+    while job.status != "completed" and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class TestExplanationJobManager:
+    """Test the explanation worker pool and its job state."""
+
+    def test_job_explains_each_signature_once(self, tmp_path):
+        """Violations sharing a signature are explained by a single task."""
+        calls = []
+
+        def explain(job, violation):
+            calls.append(violation.focus_node)
+            return {"explanation_natural_language": f"Explanation for {violation.property_path}"}
+
+        cache = {}
+        manager = ExplanationJobManager(explain, result_cache=cache, workers=2, storage_dir=str(tmp_path))
+        violations = [_violation("ex:a"), _violation("ex:b"), _violation("ex:c", path="email")]
+
+        job = manager.submit("session_1", violations)
+        _wait_for(job)
+
+        assert job.status == "completed"
+        assert job.progress() == {"total": 2, "completed": 2, "failed": 0, "violations": 3}
+        assert len(calls) == 2
+        assert sorted(sorted(r["violation_ids"]) for r in job.results) == [[0, 1], [2]]
+        assert cache["session_1"] == job.results
+
+    def test_failures_are_counted(self, tmp_path):
+        """A failing task is counted and does not stop the job."""
+        def explain(job, violation):
+            if violation.property_path.endswith("broken"):
+                raise RuntimeError("LLM unavailable")
+            return {"explanation_natural_language": "ok"}
+
+        manager = ExplanationJobManager(explain, workers=1, storage_dir=str(tmp_path))
+        job = manager.submit("session_2", [_violation("ex:a"), _violation("ex:b", path="broken")])
+        _wait_for(job)
+
+        assert job.status == "completed"
+        assert job.completed == 1
+        assert job.failed == 1
+
+    def test_partial_results_are_visible_while_running(self, tmp_path):
+        """Results are recorded as each signature completes."""
+        release = threading.Event()
+
+        def explain(job, violation):
+            if violation.property_path.endswith("slow"):
+                release.wait(5)
+            return {"explanation_natural_language": violation.property_path}
+
+        manager = ExplanationJobManager(explain, workers=1, storage_dir=str(tmp_path))
+        job = manager.submit("session_3", [_violation("ex:a"), _violation("ex:b", path="slow")])
+
+        deadline = time.time() + 5
+        while job.completed < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        assert job.status == "running"
+        assert len(job.results) == 1
+
+        release.set()
+        _wait_for(job)
+        assert job.status == "completed"
+
+    def test_queue_full_marks_tasks_failed(self, tmp_path):
+        """Tasks that do not fit in the bounded queue are failed instead of blocking."""
+        release = threading.Event()
+
+        def explain(job, violation):
+            release.wait(5)
+            return {"explanation_natural_language": "ok"}
+
+        manager = ExplanationJobManager(explain, workers=1, max_queue_size=1, storage_dir=str(tmp_path))
+        violations = [_violation("ex:a", path=f"p{i}") for i in range(5)]
+        job = manager.submit("session_4", violations)
+
+        assert job.failed >= 3
+        release.set()
+        _wait_for(job)
+        assert job.status == "completed"
+        assert job.completed + job.failed == 5
+
+    def test_persisted_jobs_are_restored(self, tmp_path):
+        """Completed jobs are reloaded from disk; unfinished ones are reported as interrupted."""
+        manager = ExplanationJobManager(lambda job, v: {"explanation_natural_language": "ok"},
+                                        workers=1, storage_dir=str(tmp_path))
+        job = manager.submit("session_5", [_violation("ex:a")])
+        _wait_for(job)
+
+        cache = {}
+        restored = ExplanationJobManager(lambda job, v: None, result_cache=cache, storage_dir=str(tmp_path))
+        reloaded = restored.get_job("session_5")
+        assert reloaded.status == "completed"
+        assert reloaded.results == job.results
+        assert "session_5" in cache
+
+        (tmp_path / "session_6.ndjson").write_text(
+            '{"event": "job", "session_id": "session_6", "status": "queued", '
+            '"progress": {"total": 2, "completed": 0, "failed": 0, "violations": 2}}\n'
+        )
+        interrupted = restored.get_job("session_6")
+        assert interrupted.status == "interrupted"
+        assert "session_6" not in cache
+
+    def test_iter_events_streams_results_as_they_complete(self, tmp_path):
+        """Each result is delivered once, followed by progress and a final done event."""
+        manager = ExplanationJobManager(lambda job, v: {"explanation_natural_language": v.property_path},
+                                        workers=2, storage_dir=str(tmp_path))
+        manager.submit("session_7", [_violation("ex:a"), _violation("ex:b", path="email")])
+
+        events = list(manager.iter_events("session_7", heartbeat=0.05))
+        names = [event for event, _ in events if event]
+
+        assert names.count("explanation") == 2
+        assert names[-1] == "done"
+        assert events[-1][1]["status"] == "completed"
+        assert "progress" in names
+
+    def test_force_llm_is_a_job_option(self, tmp_path):
+        """force_llm is recorded on the job for its explain function."""
+        seen = []
+
+        def explain(job, violation):
+            seen.append(job.force_llm)
+            return {"explanation_natural_language": "ok"}
+
+        manager = ExplanationJobManager(explain, workers=1, storage_dir=str(tmp_path))
+        _wait_for(manager.submit("session_9", [_violation("ex:a")], force_llm=True))
+
+        assert seen == [True]
+
+    def test_iter_events_unknown_session(self, tmp_path):
+        """Unknown sessions yield a single error event."""
+        manager = ExplanationJobManager(lambda job, v: None, storage_dir=str(tmp_path))
+        assert [event for event, _ in manager.iter_events("missing")] == ["error"]
+
+    def test_prefetched_signatures_are_not_queued(self, tmp_path):
+        """Explanations found before submission are recorded at once; only misses are generated."""
+        from functions.xpshacl_engine.violation_signature_factory import create_violation_signature
+
+        calls = []
+
+        def explain(job, violation):
+            calls.append(violation.property_path)
+            return {"explanation_natural_language": "generated"}
+
+        manager = ExplanationJobManager(explain, workers=1, storage_dir=str(tmp_path))
+        violations = [_violation("ex:a"), _violation("ex:b", path="email"), _violation("ex:c")]
+        prefetched = {create_violation_signature(violations[0]): {"explanation_natural_language": "from VKG"}}
+
+        job = manager.submit("session_8", violations, prefetched=prefetched)
+        _wait_for(job)
+
+        assert calls == ["http://example.org/email"]
+        results = {r["explanation"]["explanation_natural_language"]: sorted(r["violation_ids"]) for r in job.results}
+        assert results == {"from VKG": [0, 2], "generated": [1]}
@@ -124,6 +124,40 @@ class TestPhoenixService:
         assert len(result['correction_suggestions']) == 2
         assert 'proposed_repair_query' in result
 
+    @patch('functions.xpshacl_engine.repair_engine.litellm.completion')
+    @patch('functions.phoenix_service.load_vkg_from_virtuoso')
+    def test_generate_enhanced_explanation_vkg_miss(self, mock_load_vkg, mock_completion, sample_violation):
+        """Test that a VKG miss generates a new explanation and stores it."""
+        import json
+        from functions import phoenix_service
+        from functions.xpshacl_engine.xpshacl_architecture import ConstraintViolation, ViolationType
+
+        mock_vkg = Mock()
+        mock_vkg.get_explanation.return_value = None
+        mock_vkg.get_feedback_for_signature.return_value = []
+        mock_load_vkg.return_value = mock_vkg
+        mock_completion.return_value = {"choices": [{"message": {"content": json.dumps({
+            "explanation_natural_language": "The name is not capitalized.",
+            "suggestion_natural_language": "Capitalize the name.",
+            "proposed_repair": {"type": "SPARQL_UPDATE", "query": "DELETE DATA {}"},
+        })}}]}
+        violation = ConstraintViolation(
+            focus_node=sample_violation['focus_node'],
+            shape_id=sample_violation['sourceShape'],
+            constraint_id=sample_violation['sourceConstraintComponent'],
+            violation_type=ViolationType.PATTERN,
+            property_path=sample_violation['resultPath'],
+            value=sample_violation['value'],
+        )
+
+        with patch('config.LLM_CACHE_ENABLED', False):
+            result = phoenix_service.generate_enhanced_explanation(violation, force_llm=True)
+
+        assert result['natural_language_explanation'] == "The name is not capitalized."
+        assert result['proposed_repair_query'] == "DELETE DATA {}"
+        mock_completion.assert_called_once()
+        mock_vkg.add_violation.assert_called_once()
+
     @patch('functions.phoenix_service.load_vkg_from_virtuoso')
     def test_generate_enhanced_explanation_no_vkg(self, mock_load_vkg, sample_violation):
         """Test enhanced explanation generation when VKG is unavailable."""
@@ -353,4 +387,74 @@ class TestPhoenixService:
         with patch('time.time', return_value=time.time() + 61):
             # Should be expired and removed
             phoenix_service.clean_expired_cache()
-            assert cache_key not in phoenix_service.explanation_cache
\ No newline at end of file
+            assert cache_key not in phoenix_service.explanation_cache
+
+    def test_lookup_cached_explanations_batches_signatures(self, tmp_path):
+        """Known signatures are resolved in batched VALUES queries against the VKG graph."""
+        import json
+        from rdflib import Dataset, URIRef
+        import config
+        from functions import phoenix_service
+        from functions.xpshacl_engine.knowledge_graph import ViolationKnowledgeGraph
+        from functions.xpshacl_engine.violation_signature import ViolationSignature
+        from functions.xpshacl_engine.xpshacl_architecture import ExplanationOutput
+
+        known = ViolationSignature("sh:MinCountConstraintComponent", "ex:name", "cardinality", {})
+        other = ViolationSignature("sh:MinCountConstraintComponent", "ex:email", "cardinality", {})
+        unknown = ViolationSignature("sh:PatternConstraintComponent", "ex:code", "pattern", {})
+
+        vkg = ViolationKnowledgeGraph(ontology_path=str(tmp_path / "none.ttl"), kg_path=str(tmp_path / "kg.ttl"))
+        vkg.add_violation(known, ExplanationOutput("Name is missing", ["Add a name"], proposed_repair_query="INSERT DATA {}"))
+        vkg.add_violation(other, ExplanationOutput("Email is missing", ["Add an email"]))
+        store = Dataset()
+        graph = store.graph(URIRef(config.VIOLATION_KG_GRAPH))
+        for triple in vkg.graph:
+            graph.add(triple)
+
+        queries = []
+
+        def run_query(query):
+            queries.append(query)
+            return json.loads(store.query(query).serialize(format="json"))
+
+        with patch('functions.phoenix_service.execute_sparql_query', side_effect=run_query), \
+                patch('config.VKG_LOOKUP_BATCH_SIZE', 2):
+            found = phoenix_service.lookup_cached_explanations([known, other, unknown, known])
+
+        assert len(queries) == 2
+        assert set(found) == {known, other}
+        assert found[known]['explanation_natural_language'] == "Name is missing"
+        assert found[known]['proposed_repair']['query'] == "INSERT DATA {}"
+
+    def test_lookup_cached_explanations_treats_errors_as_misses(self):
+        from functions import phoenix_service
+        from functions.xpshacl_engine.violation_signature import ViolationSignature
+
+        signature = ViolationSignature("sh:MinCountConstraintComponent", "ex:name", "cardinality", {})
+        with patch('functions.phoenix_service.execute_sparql_query', side_effect=ConnectionError("down")):
+            assert phoenix_service.lookup_cached_explanations([signature]) == {}
+
+    def test_force_llm_reaches_the_repair_generator(self):
+        """The job's force_llm option, or an explicit one, is passed to the generator."""
+        from functions import phoenix_service
+        from functions.explanation_jobs import ExplanationJob
+        from functions.xpshacl_engine.xpshacl_architecture import ConstraintViolation, ViolationType
+
+        violation = ConstraintViolation(
+            focus_node="ex:a", shape_id="ex:PersonShape",
+            constraint_id="http://www.w3.org/ns/shacl#MinCountConstraintComponent",
+            violation_type=ViolationType.CARDINALITY, property_path="ex:name",
+        )
+        job = ExplanationJob("session_force", total=1)
+        job.force_llm = True
+        vkg = Mock()
+        vkg.get_explanation.return_value = None
+
+        with patch('functions.phoenix_service.load_vkg_from_virtuoso', return_value=vkg), \
+                patch('functions.phoenix_service.SuggestionRepairGenerator') as mock_srg:
+            mock_srg.return_value.generate_repair_object.return_value = {"explanation_natural_language": "llm"}
+            phoenix_service.explain_violation_for_job(job, violation)
+            phoenix_service.explain_violation_on_demand(violation, force_llm=False)
+
+        first, second = mock_srg.return_value.generate_repair_object.call_args_list
+        assert first.kwargs["force_llm"] is True and second.kwargs["force_llm"] is False
@@ -0,0 +1,144 @@
+"""
+Test the tenant-aware SPARQL query scheduler.
+"""
+
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from functions.query_scheduler import SHARED_TENANT, QueryQueueTimeout, QueryScheduler, tenant_of
+from functions.triple_store import SPARQLWrapper, endpoint_get
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+class _Query(threading.Thread):
+    """Holds a slot of `tenant` until released; records the grant order."""
+
+    def __init__(self, scheduler, tenant, order):
+        super().__init__(daemon=True)
+        self.scheduler, self.tenant, self.order = scheduler, tenant, order
+        self.done = threading.Event()
+
+    def run(self):
+        with self.scheduler.slot(self.tenant):
+            self.order.append(self.tenant)
+            self.done.wait(5)
+
+
+def _start(scheduler, tenant, order, waiting=None):
+    query = _Query(scheduler, tenant, order)
+    query.start()
+    if waiting is not None:
+        _wait_for(lambda: scheduler.metrics()["waiting"] == waiting)
+    return query
+
+
+class TestQueryScheduler:
+    """Test concurrency caps, fair queuing and metrics."""
+
+    def test_tenant_of_session_graphs(self):
+        assert tenant_of("SELECT * FROM <http://ex.org/ValidationReport/Session_1a2b3c4d> {}") == "1a2b3c4d"
+        assert tenant_of("SELECT * WHERE { ?s ?p ?o }") == SHARED_TENANT
+        assert tenant_of(None) == SHARED_TENANT
+
+    def test_tenant_cap_leaves_room_for_other_tenants(self):
+        scheduler = QueryScheduler(max_concurrency=3, tenant_concurrency=2, queue_timeout=5)
+        order = []
+        heavy = [_start(scheduler, "heavy", order) for _ in range(2)]
+        _wait_for(lambda: len(order) == 2)
+        queued = _start(scheduler, "heavy", order, waiting=1)
+        light = _start(scheduler, "light", order)
+
+        _wait_for(lambda: order[-1] == "light")
+        assert scheduler.metrics()["tenants"]["heavy"]["waiting"] == 1
+
+        for query in heavy + [light, queued]:
+            query.done.set()
+        _wait_for(lambda: len(order) == 4)
+
+    def test_shared_tenant_has_its_own_cap(self):
+        scheduler = QueryScheduler(max_concurrency=6, tenant_concurrency=1, shared_concurrency=4, queue_timeout=5)
+        order = []
+        shared = [_start(scheduler, SHARED_TENANT, order) for _ in range(4)]
+        _wait_for(lambda: len(order) == 4)
+        queued = _start(scheduler, SHARED_TENANT, order, waiting=1)
+
+        assert scheduler.metrics()["tenants"][SHARED_TENANT]["running"] == 4
+        for query in shared + [queued]:
+            query.done.set()
+        _wait_for(lambda: len(order) == 5)
+
+    def test_weighted_fair_queuing_interleaves_tenants(self):
+        scheduler = QueryScheduler(max_concurrency=1, tenant_concurrency=1, queue_timeout=5)
+        order = []
+        first = _start(scheduler, "heavy", order)
+        _wait_for(lambda: order == ["heavy"])
+        backlog = [_start(scheduler, "heavy", order, waiting=n) for n in (1, 2, 3)]
+        light = _start(scheduler, "light", order, waiting=4)
+
+        first.done.set()
+        _wait_for(lambda: len(order) == 2)
+        # The light tenant overtakes the heavy tenant's backlog
+        assert order[1] == "light"
+
+        for query in backlog + [light]:
+            query.done.set()
+        _wait_for(lambda: len(order) == 5)
+        metrics = scheduler.metrics()
+        assert metrics["running"] == 0 and metrics["waiting"] == 0
+        assert metrics["queue_time_max"] > 0
+
+    def test_queue_timeout(self):
+        scheduler = QueryScheduler(max_concurrency=1, tenant_concurrency=1, queue_timeout=0.05)
+        order = []
+        holder = _start(scheduler, "a", order)
+        _wait_for(lambda: order == ["a"])
+
+        with pytest.raises(QueryQueueTimeout):
+            with scheduler.slot("b"):
+                pass
+
+        holder.done.set()
+        assert scheduler.metrics()["timeouts"] == 1
+
+    def test_disabled_scheduler_does_not_limit(self):
+        scheduler = QueryScheduler(max_concurrency=1, tenant_concurrency=1, enabled=False)
+        with scheduler.slot("a"), scheduler.slot("a"):
+            assert scheduler.metrics()["running"] == 0
+
+
+class TestScheduledClients:
+    """Test that remote endpoint clients take slots of the process-wide scheduler."""
+
+    def test_sparql_wrapper_queries_take_a_slot(self):
+        from functions.query_scheduler import query_scheduler
+
+        seen = []
+        sparql = SPARQLWrapper("http://localhost:8890/sparql")
+        sparql.setQuery("SELECT * FROM <http://ex.org/Data/Session_abc> WHERE { ?s ?p ?o }")
+
+        def query():
+            seen.append(query_scheduler.metrics()["tenants"]["abc"]["running"])
+            return Mock()
+
+        with patch("functions.triple_store.BaseSPARQLWrapper.query", side_effect=query):
+            sparql.query()
+
+        assert seen == [1]
+
+    def test_endpoint_get_passes_through_to_requests(self, monkeypatch):
+        from functions.triple_store import RemoteStore
+
+        monkeypatch.setattr("functions.triple_store.triple_store",
+                            RemoteStore(endpoint="http://endpoint", username=None, password=None))
+        with patch("functions.triple_store.requests.get", return_value="response") as mock_get:
+            assert endpoint_get("http://ignored", params={"query": "ASK {}", "format": "json"}) == "response"
+        mock_get.assert_called_once_with("http://endpoint", params={"query": "ASK {}", "format": "json"})
@@ -0,0 +1,51 @@
+"""
+Test compressed responses and report downloads.
+"""
+
+import bz2
+import gzip
+import json
+from unittest.mock import patch
+
+from functions.compression import GZIP, ZSTD, negotiate_encoding
+from werkzeug.http import parse_accept_header
+
+REPORT = {"report": json.dumps({"results": [{"focusNode": f"http://example.org/r{i}"} for i in range(2000)]}),
+          "format": "json", "session_id": "s1"}
+
+
+class TestResponseCompression:
+    """Test content coding negotiation and the after_request hook."""
+
+    def test_negotiation(self):
+        assert negotiate_encoding(parse_accept_header("gzip, deflate, br"), ZSTD) == GZIP
+        assert negotiate_encoding(parse_accept_header("gzip;q=0, identity"), ZSTD) is None
+        assert negotiate_encoding(parse_accept_header(""), GZIP) is None
+
+    @patch('routes.validation_routes.export_validation_report', return_value=REPORT)
+    def test_large_responses_are_encoded_for_accepting_clients(self, _export, client):
+        response = client.get('/api/validation/s1/export', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert gzip.decompress(response.get_data()).decode() == REPORT['report']
+
+        plain = client.get('/api/validation/s1/export')
+        assert 'Content-Encoding' not in plain.headers
+        assert plain.get_data(as_text=True) == REPORT['report']
+
+    def test_small_responses_are_not_encoded(self, client):
+        response = client.get('/api/health', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+
+    @patch('routes.validation_routes.export_validation_report', return_value=REPORT)
+    def test_compressed_download(self, _export, client):
+        response = client.get('/api/validation/s1/export?compress=bz2', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.mimetype == 'application/x-bzip2'
+        assert 'validation_report_s1.json.bz2' in response.headers['Content-Disposition']
+        assert 'Content-Encoding' not in response.headers
+        assert bz2.decompress(response.get_data()).decode() == REPORT['report']
+
+        assert client.get('/api/validation/s1/export?compress=rar').status_code == 400
@@ -0,0 +1,177 @@
+"""
+Test archiving and rehydrating sessions.
+"""
+
+import json
+import os
+import re
+from unittest.mock import patch
+
+import pytest
+from rdflib import BNode, Dataset, Literal, Namespace, URIRef
+from rdflib.namespace import RDF, XSD
+
+from functions.compression import codec_for, open_compressed
+from functions.session_archive import SessionArchive, term_from_binding
+from functions.session_registry import ARCHIVED, VALIDATED, SessionRegistry
+
+EX = Namespace("http://example.org/")
+SH = Namespace("http://www.w3.org/ns/shacl#")
+REPORT = URIRef("http://ex.org/ValidationReport/Session_abc")
+SHAPES = URIRef("http://ex.org/Shapes/Session_abc")
+
+
+@pytest.fixture
+def store():
+    store = Dataset()
+    report = store.graph(REPORT)
+    for i in range(5):
+        result = BNode()
+        report.add((result, RDF.type, SH.ValidationResult))
+        report.add((result, SH.focusNode, EX[f"node{i}"]))
+        report.add((result, SH.resultMessage, Literal(f"Line one\nline \"{i}\"", lang="en")))
+        report.add((result, SH.value, Literal(str(i), datatype=XSD.integer)))
+    store.graph(SHAPES).add((EX.PersonShape, RDF.type, SH.NodeShape))
+    return store
+
+
+@pytest.fixture
+def archive(store, tmp_path):
+    registry = SessionRegistry(str(tmp_path / "sessions.sqlite3"))
+    registry.register("abc", status=VALIDATED, validation_graph=str(REPORT))
+    return SessionArchive(
+        registry=registry,
+        archive_dir=str(tmp_path / "archive"),
+        codec="zstd",
+        page_size=7,
+        wait_seconds=5,
+        execute_query=lambda query: json.loads(store.query(query).serialize(format="json")),
+        execute_update=store.update,
+    )
+
+
+def _snapshot(store, uri):
+    """Triples of a graph with blank nodes replaced by their focus node, for comparison."""
+    graph = store.graph(uri)
+    labels = {s: str(o) for s, o in graph.subject_objects(SH.focusNode)}
+    return {tuple(labels.get(term, term) for term in triple) for triple in graph}
+
+
+class TestSessionArchive:
+    """Test the archive round trip and its registry integration."""
+
+    def test_archive_and_rehydrate_round_trip(self, archive, store):
+        before = {uri: _snapshot(store, uri) for uri in (REPORT, SHAPES)}
+
+        manifest = archive.archive("abc")
+
+        assert manifest["graphs"] == {str(REPORT): 20, str(SHAPES): 1}
+        assert manifest["codec"] in ("gzip", "zstd")
+        assert len(store.graph(REPORT)) == 0 and len(store.graph(SHAPES)) == 0
+        entry = archive.registry.get("abc")
+        assert entry["status"] == ARCHIVED
+        assert codec_for(entry["archive_path"]) == manifest["codec"]
+
+        assert archive.ensure_resident("abc")
+
+        assert archive.registry.get("abc")["status"] == VALIDATED
+        assert archive.registry.get("abc")["archive_path"] is None
+        assert {uri: _snapshot(store, uri) for uri in (REPORT, SHAPES)} == before
+        assert not os.path.exists(archive.session_dir("abc"))
+
+    def test_archive_file_is_valid_nquads(self, archive):
+        manifest = archive.archive("abc")
+        path = os.path.join(archive.session_dir("abc"), manifest["file"])
+
+        parsed = Dataset()
+        with open_compressed(path, "rb") as f:
+            parsed.parse(source=f, format="nquads")
+
+        assert len(parsed.graph(REPORT)) == 20
+
+    def test_corrupt_archive_stays_archived(self, archive):
+        manifest = archive.archive("abc")
+        with open(os.path.join(archive.session_dir("abc"), manifest["file"]), "ab") as f:
+            f.write(b"garbage")
+
+        assert not archive.ensure_resident("abc")
+        assert archive.registry.get("abc")["status"] == ARCHIVED
+        assert "checksum" in archive.errors["abc"]
+
+    def test_incomplete_export_keeps_the_graphs(self, archive, store):
+        with patch.object(archive, "_export_graph", return_value=0):
+            with pytest.raises(RuntimeError):
+                archive.archive("abc")
+
+        assert len(store.graph(REPORT)) == 20
+        assert archive.registry.get("abc")["status"] == VALIDATED
+
+    def test_resident_and_unknown_sessions_need_no_rehydration(self, archive):
+        assert archive.ensure_resident("abc")
+        assert archive.ensure_resident("missing")
+        assert archive.ensure_resident(None)
+
+    def test_inserts_are_paged_without_splitting_blank_nodes(self, archive, store):
+        updates = []
+        archive._execute_update = lambda query: updates.append(query) or store.update(query)
+        archive.archive("abc")
+        before = len(updates)
+
+        archive.rehydrate("abc")
+
+        inserts = updates[before:]
+        # Five results of four triples each (page size 7) and the shapes graph
+        assert len(inserts) == 6
+        assert all(len(set(re.findall(r"_:\w+", query))) <= 1 for query in inserts)
+        assert len(store.graph(REPORT)) == 20 and len(set(store.graph(REPORT).subjects())) == 5
+
+    def test_bulk_loader_rehydrates_the_embedded_store(self, embedded_triple_store, store, tmp_path):
+        from functions.bulk_loader import bulk_loader
+
+        for uri in (REPORT, SHAPES):
+            embedded_triple_store.add_graph(str(uri), store.graph(uri))
+        registry = SessionRegistry(str(tmp_path / "sessions.sqlite3"))
+        registry.register("abc", status=VALIDATED, validation_graph=str(REPORT))
+        archive = SessionArchive(registry=registry, archive_dir=str(tmp_path / "archive"), codec="gzip")
+        archive.archive("abc")
+        assert len(embedded_triple_store.dataset.graph(REPORT)) == 0
+
+        with patch.object(bulk_loader, "submit", wraps=bulk_loader.submit) as submit:
+            archive.rehydrate("abc")
+
+        (files,), _ = submit.call_args
+        assert files[0][0].endswith("graphs.nq.gz")
+        assert len(embedded_triple_store.dataset.graph(REPORT)) == 20
+        assert len(embedded_triple_store.dataset.graph(SHAPES)) == 1
+
+    def test_virtuoso_blank_node_iris(self):
+        term = term_from_binding({"type": "uri", "value": "nodeID://b10001"})
+        assert isinstance(term, BNode)
+        assert term_from_binding({"type": "literal", "value": "x", "xml:lang": "en"}) == Literal("x", lang="en")
+
+
+def test_collector_archives_cold_sessions(archive, store, tmp_path):
+    from functions.session_gc import SessionGarbageCollector
+
+    collector = SessionGarbageCollector(
+        registry=archive.registry, uploads_dir=str(tmp_path / "uploads"),
+        ttl_hours=1000000, max_sessions=0, window="", archive=archive, archive_after_hours=0.0001,
+        execute_query=archive._execute_query, execute_update=store.update,
+    )
+    with patch("functions.session_gc.time.time", return_value=archive.registry.get("abc")["created_at"] + 3600):
+        report = collector.collect()
+
+    assert report["sessions_archived"] == ["abc"]
+    assert archive.registry.get("abc")["status"] == ARCHIVED
+
+
+def test_dashboard_waits_for_rehydration(client, isolated_session_registry):
+    """Test that the dashboard answers 202 while an archived session is rehydrating."""
+    isolated_session_registry.register("abc", status=ARCHIVED)
+
+    with patch("routes.dashboard_routes.session_archive.ensure_resident", return_value=False):
+        response = client.get("/api/dashboard-data?session_id=abc")
+
+    assert response.status_code == 202
+    assert response.headers["Retry-After"] == "5"
+    assert response.get_json()["status"] == "rehydrating"
@@ -0,0 +1,142 @@
+"""
+Test the session garbage collector.
+"""
+
+import os
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+from functions.session_gc import SessionGarbageCollector, in_window, parse_window, session_graph_uris
+from functions.session_registry import SessionRegistry, VALIDATED, VALIDATING
+
+HOUR = 3600
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return SessionRegistry(str(tmp_path / "sessions.sqlite3"))
+
+
+def _store(triples_per_graph=5):
+    """Mocked SPARQL functions; every session graph holds `triples_per_graph` triples."""
+    def query(text):
+        graphs = [token[1:-1] for token in text.split() if token.startswith("<http://ex.org/ValidationReport/")]
+        return {"results": {"bindings": [{"g": {"value": g}, "triples": {"value": str(triples_per_graph)}} for g in graphs]}}
+    return Mock(side_effect=query), Mock()
+
+
+def _collector(registry, tmp_path, **kwargs):
+    query, update = _store()
+    options = dict(
+        registry=registry, uploads_dir=str(tmp_path / "uploads"),
+        ttl_hours=24, max_sessions=2, batch_size=3, window="", execute_query=query, execute_update=update,
+    )
+    options.update(kwargs)
+    return SessionGarbageCollector(**options), query, update
+
+
+def _register(registry, session_id, created_at, status=VALIDATED):
+    with patch("functions.session_registry.time.time", return_value=created_at):
+        registry.register(session_id, status=status)
+
+
+class TestSessionGarbageCollector:
+    """Test TTL and LRU selection, batched drops and the reclaim report."""
+
+    def test_window_parsing_wraps_midnight(self):
+        window = parse_window("22:30-04:00")
+        assert in_window(window, datetime(2024, 1, 1, 23, 0))
+        assert in_window(window, datetime(2024, 1, 1, 3, 59))
+        assert not in_window(window, datetime(2024, 1, 1, 12, 0))
+        assert in_window(parse_window(""), datetime(2024, 1, 1, 12, 0))
+
+    def test_ttl_and_lru_selection(self, registry, tmp_path):
+        now = 1000 * HOUR
+        _register(registry, "old", now - 48 * HOUR)
+        _register(registry, "a", now - 3 * HOUR)
+        _register(registry, "b", now - 2 * HOUR)
+        _register(registry, "c", now - 1 * HOUR)
+        _register(registry, "busy", now - 5 * HOUR, status=VALIDATING)
+        with patch("functions.session_registry.time.time", return_value=now):
+            registry.touch("a")
+
+        collector, _, _ = _collector(registry, tmp_path)
+        selected = {entry["session_id"] for entry in collector.expired_sessions(now)}
+
+        # "old" exceeded the TTL; "b" is the least recently used beyond the two retained; "busy" is validating
+        assert selected == {"old", "b"}
+
+    def test_collect_drops_graphs_in_batches_and_reports(self, registry, tmp_path):
+        _register(registry, "old", 1.0)
+        upload_dir = tmp_path / "uploads" / "old"
+        upload_dir.mkdir(parents=True)
+        (upload_dir / "data_x.ttl").write_bytes(b"x" * 100)
+
+        collector, query, update = _collector(registry, tmp_path)
+        report = collector.collect()
+
+        assert report["sessions"] == ["old"]
+        assert update.call_count == 2
+        statements = update.call_args_list[0][0][0].split(" ;\n")
+        assert statements[0] == "DROP SILENT GRAPH <http://ex.org/ValidationReport/Session_old>"
+        assert len(statements) == 3
+        assert report["graphs_dropped"] == 1
+        assert report["triples_reclaimed"] == 5
+        assert report["files_deleted"] == 1
+        assert report["bytes_reclaimed"] == 100
+        assert not upload_dir.exists()
+        assert registry.get("old") is None
+        assert collector.last_report is report
+
+    def test_dry_run_and_window(self, registry, tmp_path):
+        _register(registry, "old", 1.0)
+        collector, _, update = _collector(registry, tmp_path, window="00:00-00:00")
+
+        assert collector.collect()["skipped"] == "outside_window"
+        report = collector.collect(force=True, dry_run=True)
+
+        update.assert_not_called()
+        assert report["sessions"] == ["old"]
+        assert registry.get("old") is not None
+
+    def test_failed_drop_keeps_the_session(self, registry, tmp_path):
+        _register(registry, "old", 1.0)
+        collector, _, update = _collector(registry, tmp_path)
+        update.side_effect = ConnectionError("store down")
+
+        report = collector.collect()
+
+        assert report["errors"]
+        assert registry.get("old") is not None
+
+    def test_orphaned_upload_directories_are_collected(self, registry, tmp_path):
+        orphan = tmp_path / "uploads" / "legacy"
+        orphan.mkdir(parents=True)
+        os.utime(orphan, (1.0, 1.0))
+
+        collector, _, update = _collector(registry, tmp_path)
+        report = collector.collect()
+
+        assert report["sessions"] == ["legacy"]
+        assert "Session_legacy" in update.call_args_list[0][0][0]
+        assert not orphan.exists()
+
+    def test_graph_uris_include_registered_graphs(self):
+        uris = session_graph_uris("abc", {"validation_graph": "urn:custom"})
+        assert "http://ex.org/Data/Session_abc" in uris
+        assert uris[-1] == "urn:custom"
+
+
+def test_gc_route_runs_a_forced_dry_run(client, isolated_session_registry, tmp_path):
+    """Test POST /api/sessions/gc reports without deleting."""
+    _register(isolated_session_registry, "old", 1.0)
+    collector, _, update = _collector(isolated_session_registry, tmp_path, window="00:00-00:00")
+
+    with patch("routes.session_routes.session_gc", collector):
+        response = client.post("/api/sessions/gc", json={"dry_run": True, "force": True})
+
+    assert response.status_code == 200
+    assert response.get_json()["sessions"] == ["old"]
+    update.assert_not_called()
@@ -0,0 +1,83 @@
+"""
+Test the local session registry.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from functions.session_registry import SessionRegistry, VALIDATED
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return SessionRegistry(str(tmp_path / "sessions.sqlite3"))
+
+
+class TestSessionRegistry:
+    """Test session registration, lookup and paging."""
+
+    def test_register_and_update(self, registry):
+        registry.register("abc", source="upload")
+        assert registry.update("abc", status=VALIDATED, violation_count=3, validation_graph="urn:g")
+        assert not registry.update("missing", status=VALIDATED)
+
+        session = registry.get("abc")
+        assert session["status"] == VALIDATED
+        assert session["violation_count"] == 3
+        assert session["source"] == "upload"
+
+    def test_reregistering_keeps_creation_time(self, registry):
+        created = registry.register("abc")["created_at"]
+        assert registry.register("abc", status=VALIDATED)["created_at"] == created
+        assert registry.count() == 1
+
+    def test_unknown_fields_are_rejected(self, registry):
+        with pytest.raises(ValueError):
+            registry.register("abc", colour="blue")
+
+    def test_latest_and_paging_follow_creation_time(self, registry):
+        with patch("functions.session_registry.time.time", side_effect=[1.0, 3.0, 2.0]):
+            registry.register("zzz", validation_graph="urn:z")
+            registry.register("aaa")
+            registry.register("mmm", validation_graph="urn:m")
+
+        assert registry.latest()["session_id"] == "aaa"
+        assert registry.latest(with_validation_graph=True)["session_id"] == "mmm"
+
+        first_page = registry.list(limit=2)
+        assert [s["session_id"] for s in first_page] == ["aaa", "mmm"]
+        second_page = registry.list(limit=2, before=first_page[-1]["created_at"])
+        assert [s["session_id"] for s in second_page] == ["zzz"]
+
+
+class TestSessionRoutes:
+    """Test the session listing endpoints and the dashboard's latest-session lookup."""
+
+    def test_list_and_get_sessions(self, client, isolated_session_registry):
+        isolated_session_registry.register("abc", status=VALIDATED)
+
+        response = client.get('/api/sessions?limit=1')
+        assert response.status_code == 200
+        assert [s['session_id'] for s in response.get_json()['sessions']] == ['abc']
+        assert response.get_json()['next_before'] is not None
+
+        assert client.get('/api/sessions/abc').get_json()['status'] == VALIDATED
+        assert client.get('/api/sessions/missing').status_code == 404
+
+    @patch('routes.dashboard_routes.virtuoso_service')
+    def test_most_recent_session_uses_the_registry(self, mock_virtuoso, isolated_session_registry):
+        from routes.dashboard_routes import get_most_recent_session_id
+
+        isolated_session_registry.register("abc", validation_graph="http://ex.org/ValidationReport/Session_abc")
+
+        assert get_most_recent_session_id() == "abc"
+        mock_virtuoso.execute_sparql_query.assert_not_called()
+
+    @patch('routes.dashboard_routes.virtuoso_service')
+    def test_most_recent_session_falls_back_to_graph_scan(self, mock_virtuoso):
+        from routes.dashboard_routes import get_most_recent_session_id
+
+        mock_virtuoso.execute_sparql_query.return_value = {
+            'results': {'bindings': [{'sessionGraph': {'value': 'http://ex.org/ValidationReport/Session_old'}}]}
+        }
+        assert get_most_recent_session_id() == "old"
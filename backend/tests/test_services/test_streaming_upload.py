@@ -0,0 +1,146 @@
+"""
+Test uploads that are hashed, stored and parsed while they are received.
+"""
+
+import bz2
+import gzip
+import hashlib
+import io
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+
+from functions.content_store import ContentStore
+from functions.streaming_upload import UploadSink, UploadTooLarge, receive_upload, rdf_format, upload_suffix
+
+NTRIPLES = b"".join(f"<http://example.org/s{i}> <http://example.org/p> \"{i}\" .\n".encode() for i in range(200))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ContentStore(str(tmp_path / "content"))
+
+
+def _write(sink, payload, chunk_size=97):
+    for start in range(0, len(payload), chunk_size):
+        sink.write(payload[start:start + chunk_size])
+    sink.seek(0)
+
+
+class TestUploadSink:
+    """Test hashing, spooling and on-the-fly parsing of one uploaded file."""
+
+    def test_file_names(self):
+        assert rdf_format("data.TTL") == "turtle"
+        assert rdf_format("data.nt.gz") == "nt"
+        assert rdf_format("notes.txt") is None
+        assert upload_suffix("Report.NT.gz") == ".nt.gz"
+        assert rdf_format("data.ttl.bz2") == "turtle" and upload_suffix("data.nt.zst") == ".nt.zst"
+
+    def test_chunks_are_hashed_stored_and_parsed(self, store):
+        sink = UploadSink("data.nt", store=store, parse=True)
+        _write(sink, NTRIPLES)
+        assert sink.read(10) == NTRIPLES[:10]
+
+        stored = sink.finish()
+        sink.close()
+
+        assert stored.digest == hashlib.sha256(NTRIPLES).hexdigest()
+        assert stored.path.endswith(".nt") and os.path.getsize(stored.path) == len(NTRIPLES)
+        assert len(sink.graph) == 200
+        assert [name for name in os.listdir(store.root) if name.endswith(".part")] == []
+
+    def test_gzip_uploads_are_decompressed_for_the_parser_only(self, store):
+        payload = gzip.compress(NTRIPLES)
+        sink = UploadSink("data.nt.gz", store=store, parse=True)
+        _write(sink, payload)
+        stored = sink.finish()
+
+        assert stored.digest == hashlib.sha256(payload).hexdigest() and stored.path.endswith(".nt.gz")
+        assert len(sink.graph) == 200
+        # A later parse from disk reads the stored compressed copy
+        assert len(store.graph(stored, format="nt")) == 200
+
+    def test_bzip2_uploads_are_parsed_while_received(self, store):
+        sink = UploadSink("data.nt.bz2", store=store, parse=True)
+        _write(sink, bz2.compress(NTRIPLES))
+        stored = sink.finish()
+
+        assert stored.path.endswith(".nt.bz2") and len(sink.graph) == 200
+
+    def test_decompressed_size_is_limited(self, store):
+        sink = UploadSink("data.nt.gz", store=store, parse=True, max_decompressed=1000)
+        _write(sink, gzip.compress(NTRIPLES))
+        sink.finish()
+
+        assert isinstance(sink.parse_error, UploadTooLarge)
+
+    def test_parse_errors_do_not_block_the_upload(self, store):
+        sink = UploadSink("data.nt", store=store, parse=True)
+        _write(sink, b"this is not n-triples\n" * 5000)
+        stored = sink.finish()
+
+        assert sink.parse_error is not None and os.path.exists(stored.path)
+
+    def test_known_content_is_not_parsed_again(self, store, sample_shapes_ttl):
+        def upload(filename, payload):
+            sink = UploadSink(filename, store=store, parse=True)
+            _write(sink, payload)
+            file_storage = Mock(stream=sink, filename=filename)
+            return sink, receive_upload(file_storage, store=store)
+
+        # Turtle is parsed after the upload, from the store's parse cache if possible
+        sink, first = upload("shapes.ttl", sample_shapes_ttl.encode())
+        assert sink.graph is None
+        shapes = first.graph()
+        _, second = upload("shapes.ttl", sample_shapes_ttl.encode())
+        assert second.graph() is shapes
+
+        # N-Triples is parsed while received, unless the content turns out to be cached
+        sink, first = upload("data.nt", NTRIPLES)
+        assert sink.graph is not None
+        sink, second = upload("data.nt", NTRIPLES)
+        assert second.graph() is first.graph() and sink.parse_error is None
+        assert store.stats()["parse_misses"] == 1
+
+    def test_unused_uploads_leave_no_files(self, store):
+        sink = UploadSink("data.ttl", store=store)
+        _write(sink, NTRIPLES)
+        sink.close()
+
+        assert os.listdir(store.root) == []
+
+
+class TestStreamingRoutes:
+    """Test that upload routes get the files stored and parsed while received."""
+
+    def test_phoenix_validation_receives_parsed_graphs(self, client, store, sample_shapes_ttl):
+        with patch("functions.streaming_upload.default_content_store", store), \
+             patch("routes.phoenix_routes.validate_with_phoenix", return_value=(True, "[]", "", [], [], [])) as validate:
+            response = client.post("/api/validate-phoenix", data={
+                "data_file": (io.BytesIO(gzip.compress(NTRIPLES)), "data.nt.gz"),
+                "shapes_file": (io.BytesIO(sample_shapes_ttl.encode()), "shapes.ttl"),
+            }, content_type="multipart/form-data")
+
+        assert response.status_code == 200
+        kwargs = validate.call_args.kwargs
+        assert len(kwargs["data_graph"]) == 200 and len(kwargs["shapes_graph"]) > 0
+        assert kwargs["shapes_digest"] == hashlib.sha256(sample_shapes_ttl.encode()).hexdigest()
+        assert os.path.exists(validate.call_args.args[0])
+
+    def test_compressed_uploads_are_allowed(self):
+        from routes.upload_routes import allowed_file
+
+        assert allowed_file("data.ttl.gz") and allowed_file("data.nt.bz2") and allowed_file("data.nt")
+        assert not allowed_file("data.txt.gz")
+        with patch("routes.upload_routes.available", return_value=False):
+            assert not allowed_file("data.nt.zst")
+
+    def test_receive_upload_without_sink(self, store):
+        from werkzeug.datastructures import FileStorage
+
+        upload = receive_upload(FileStorage(io.BytesIO(NTRIPLES), filename="data.nt"), store=store)
+
+        assert upload.stored.digest == hashlib.sha256(NTRIPLES).hexdigest()
+        assert len(upload.graph()) == 200
@@ -0,0 +1,214 @@
+"""
+Test the triple store backends and the clients used by the services.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from rdflib import RDF, Dataset, Graph, URIRef
+from SPARQLWrapper import JSON, TURTLE
+
+from functions.triple_store import EmbeddedStore, RemoteStore, SPARQLWrapper, create_store, endpoint_get
+
+REPORT = "http://ex.org/ValidationReport/Session_abc"
+SHAPES = "http://ex.org/Shapes/Session_abc"
+SH_RESULT = URIRef("http://www.w3.org/ns/shacl#ValidationResult")
+
+SHAPES_DATA = f"""
+INSERT DATA {{
+    GRAPH <{SHAPES}> {{
+        <http://example.org/PersonShape> <http://www.w3.org/ns/shacl#property> _:p .
+        _:p <http://www.w3.org/ns/shacl#in> _:list .
+        _:list <http://www.w3.org/1999/02/22-rdf-syntax-ns#first> "a" .
+    }}
+}}
+"""
+
+
+class TestEmbeddedStore:
+    """Test that the embedded store answers like the Virtuoso endpoint."""
+
+    def test_services_run_against_the_embedded_store(self, embedded_triple_store):
+        from functions import virtuoso_service
+
+        virtuoso_service.execute_sparql_update(
+            f'INSERT DATA {{ GRAPH <{REPORT}> {{ <http://example.org/r1> a <{SH_RESULT}> . }} }}'
+        )
+
+        assert virtuoso_service.get_number_of_violations_in_validation_report(REPORT) == 1
+        assert virtuoso_service.get_number_of_violations_in_validation_report("http://ex.org/Other") == 0
+
+    def test_blank_nodes_can_be_queried_back(self, embedded_triple_store):
+        embedded_triple_store.update(SHAPES_DATA)
+
+        result = embedded_triple_store.query(
+            f"SELECT ?list FROM <{SHAPES}> WHERE {{ ?p <http://www.w3.org/ns/shacl#in> ?list }}"
+        )
+        node = result["results"]["bindings"][0]["list"]["value"]
+        assert node.startswith("nodeID://")
+
+        first = embedded_triple_store.query(
+            f"SELECT ?v WHERE {{ <{node}> <http://www.w3.org/1999/02/22-rdf-syntax-ns#first> ?v }}"
+        )
+        assert first["results"]["bindings"][0]["v"]["value"] == "a"
+
+    def test_wrapper_and_endpoint_get_are_answered_in_process(self, embedded_triple_store):
+        embedded_triple_store.update(SHAPES_DATA)
+
+        sparql = SPARQLWrapper("http://unreachable:8890/sparql")
+        sparql.setQuery(f"CONSTRUCT {{ ?s ?p ?o }} WHERE {{ GRAPH <{SHAPES}> {{ ?s ?p ?o }} }}")
+        sparql.setReturnFormat(TURTLE)
+        assert len(Graph().parse(data=sparql.query().convert(), format="turtle")) == 3
+
+        response = endpoint_get("http://unreachable:8890/sparql", params={"query": "ASK { ?s ?p ?o }", "format": "json"})
+        response.raise_for_status()
+        assert response.json()["boolean"] is True
+
+    def test_load_graphs_without_isql(self, embedded_triple_store, tmp_path, sample_shapes_ttl, sample_data_ttl):
+        from functions.landing_service import load_graphs
+        from config import SHAPES_GRAPH_URI, VALIDATION_REPORT_URI
+
+        (tmp_path / "shapes.ttl").write_text(sample_shapes_ttl)
+        (tmp_path / "report.ttl").write_text(sample_data_ttl)
+        load_graphs(str(tmp_path), "shapes.ttl", "report.ttl")
+
+        assert len(embedded_triple_store.dataset.graph(URIRef(SHAPES_GRAPH_URI))) > 0
+        assert len(embedded_triple_store.dataset.graph(URIRef(VALIDATION_REPORT_URI))) > 0
+
+    def test_in_memory_store_with_path_keeps_a_snapshot(self, tmp_path):
+        path = str(tmp_path / "store.nq")
+        store = EmbeddedStore(path=path)
+        store.update(SHAPES_DATA)
+        store.save()
+
+        assert len(EmbeddedStore(path=path).dataset) == 3
+        snapshot = Dataset()
+        snapshot.parse(path, format="nquads")
+        assert len(snapshot.graph(URIRef(SHAPES))) == 3
+
+
+class TestStoreFactory:
+    """Test the backend selection by TRIPLE_STORE_TYPE."""
+
+    def test_create_store(self):
+        assert isinstance(create_store("embedded"), EmbeddedStore)
+        assert create_store("virtuoso").name == "virtuoso"
+        fuseki = create_store("fuseki")
+        assert isinstance(fuseki, RemoteStore) and not fuseki.embedded
+        with pytest.raises(ValueError):
+            create_store("unknown")
+
+    def test_remote_store_uses_the_endpoint(self):
+        store = RemoteStore(endpoint="http://test:8890/sparql", username=None, password=None)
+        with patch("functions.triple_store.BaseSPARQLWrapper.query") as mock_query:
+            mock_query.return_value.convert.return_value = {"results": {"bindings": []}}
+            assert store.query("SELECT * WHERE { ?s ?p ?o }", JSON) == {"results": {"bindings": []}}
+
+    def test_services_use_the_configured_remote_store(self, monkeypatch):
+        from SPARQLWrapper import BASIC, SPARQLWrapper as BaseSPARQLWrapper
+        from functions import virtuoso_service
+        from functions.triple_store import TripleStore
+
+        store = RemoteStore("fuseki", endpoint="http://fuseki:3030/ds/query", update_endpoint="http://fuseki:3030/ds/update",
+                            username="admin", password="secret", auth=BASIC)
+        monkeypatch.setattr("functions.triple_store.triple_store", store)
+        with patch.object(BaseSPARQLWrapper, "query", autospec=True) as mock_query:
+            mock_query.return_value.convert.return_value = {"results": {"bindings": [{"violationCount": {"value": "3"}}]}}
+            assert virtuoso_service.get_number_of_violations_in_validation_report(REPORT) == 3
+            virtuoso_service.execute_sparql_update(f"DROP SILENT GRAPH <{REPORT}>")
+
+        (query_client,), (update_client,) = (call.args for call in mock_query.call_args_list)
+        assert query_client.endpoint == "http://fuseki:3030/ds/query"
+        assert update_client.updateEndpoint == "http://fuseki:3030/ds/update" and update_client.http_auth == BASIC
+        with pytest.raises(TypeError):
+            TripleStore()
+
+
+def _session_graphs(session_id, violations=2):
+    report = Graph()
+    for i in range(violations):
+        report.add((URIRef(f"http://example.org/r{i}"), RDF.type, SH_RESULT))
+    shapes = Graph()
+    shapes.add((URIRef("http://example.org/PersonShape"), RDF.type, URIRef("http://www.w3.org/ns/shacl#NodeShape")))
+    return {
+        f"http://ex.org/ValidationReport/Session_{session_id}": report,
+        f"http://ex.org/Shapes/Session_{session_id}": shapes,
+    }
+
+
+class TestLocalSessionCache:
+    """Test that small resident sessions are queried in process in hybrid mode."""
+
+    @pytest.fixture
+    def remote(self):
+        with patch("functions.triple_store.BaseSPARQLWrapper.query") as mock_query:
+            mock_query.return_value.convert.return_value = {"results": {"bindings": [{"violationCount": {"value": "7"}}]}}
+            yield mock_query
+
+    def test_resident_session_is_served_locally(self, isolated_local_sessions, remote):
+        from functions import virtuoso_service
+
+        assert isolated_local_sessions.put("abc", _session_graphs("abc"))
+
+        assert virtuoso_service.get_number_of_violations_in_validation_report(REPORT) == 2
+        remote.assert_not_called()
+        assert isolated_local_sessions.stats()["hits"] == 1
+
+    def test_other_graphs_go_to_the_remote_store(self, isolated_local_sessions, remote):
+        from functions import virtuoso_service
+
+        isolated_local_sessions.put("abc", _session_graphs("abc"))
+
+        other_report = "http://ex.org/ValidationReport/Session_xyz"
+        assert virtuoso_service.get_number_of_violations_in_validation_report(other_report) == 7
+        virtuoso_service.execute_sparql_query("SELECT * WHERE { ?s ?p ?o }")
+        virtuoso_service.execute_sparql_query(f"SELECT ?g WHERE {{ GRAPH ?g {{ ?s ?p ?o }} FILTER(?g = <{REPORT}>) }}")
+        assert remote.call_count == 3
+
+    def test_updates_evict_the_session(self, isolated_local_sessions, remote):
+        from functions import virtuoso_service
+
+        isolated_local_sessions.put("abc", _session_graphs("abc"))
+        virtuoso_service.execute_sparql_update(f"DROP SILENT GRAPH <{REPORT}>")
+
+        assert isolated_local_sessions.stats()["sessions"] == 0
+        assert virtuoso_service.get_number_of_violations_in_validation_report(REPORT) == 7
+
+    def test_bounds(self):
+        from functions.triple_store import LocalSessionCache
+
+        cache = LocalSessionCache(max_triples=10, max_sessions=2, max_total_triples=100, enabled=True)
+        assert not cache.put("big", _session_graphs("big", violations=20))
+        for session_id in ("a", "b", "c"):
+            assert cache.put(session_id, _session_graphs(session_id))
+
+        assert cache.store_for("SELECT * FROM <http://ex.org/ValidationReport/Session_a> WHERE { ?s ?p ?o }") is None
+        assert cache.store_for("SELECT * FROM <http://ex.org/Shapes/Session_c> WHERE { ?s ?p ?o }") is not None
+        assert cache.stats()["triples"] == 6
+
+    def test_embedded_backend_needs_no_cache(self, embedded_triple_store, isolated_local_sessions):
+        assert not isolated_local_sessions.put("abc", _session_graphs("abc"))
+
+    def test_resident_session_answers_like_the_store(self, isolated_local_sessions, remote, monkeypatch,
+                                                     sample_shapes_ttl, sample_data_ttl):
+        from pyshacl import validate
+        from functions.dashboard_service import get_dashboard_data
+
+        shapes = Graph().parse(data=sample_shapes_ttl, format="turtle")
+        _, report, _ = validate(Graph().parse(data=sample_data_ttl, format="turtle"), shacl_graph=shapes)
+        graphs = {REPORT: report, SHAPES: shapes}
+
+        assert isolated_local_sessions.put("abc", graphs)
+        local = get_dashboard_data(REPORT)
+        remote.assert_not_called()
+
+        store = EmbeddedStore()
+        for uri, graph in graphs.items():
+            store.add_graph(uri, graph)
+        monkeypatch.setattr("functions.triple_store.triple_store", store)
+        embedded = get_dashboard_data(REPORT)
+
+        focus_nodes = next(tag for tag in local["tags"] if tag["title"] == "Violated Focus Nodes")
+        assert focus_nodes["value"] == "1"
+        local.pop("timestamp"), embedded.pop("timestamp")
+        assert local == embedded
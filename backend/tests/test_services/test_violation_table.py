@@ -0,0 +1,75 @@
+"""
+Test the columnar violation table.
+"""
+
+import numpy as np
+from rdflib.namespace import SH
+
+from functions.analytics_service import prioritize_violations
+from functions.violation_table import ViolationTable
+from functions.xpshacl_engine.xpshacl_architecture import ConstraintViolation, ViolationType
+
+EX = "http://example.org/"
+
+
+def _violation(focus, path, component, severity):
+    return ConstraintViolation(
+        focus_node=EX + focus,
+        shape_id=EX + "PersonShape",
+        constraint_id=str(SH) + component,
+        violation_type=ViolationType.CARDINALITY,
+        property_path=EX + path,
+        severity=severity,
+    )
+
+
+VIOLATIONS = [
+    _violation("a", "name", "MinCountConstraintComponent", "Warning"),
+    _violation("b", "name", "MinCountConstraintComponent", "Violation"),
+    _violation("a", "age", "DatatypeConstraintComponent", None),
+    _violation("c", "name", "MinCountConstraintComponent", "Violation"),
+    _violation("a", "email", "PatternConstraintComponent", "Info"),
+]
+
+
+class TestViolationTable:
+    """Test construction and vectorized analytics."""
+
+    def test_group_count_matches_python_aggregation(self):
+        table = ViolationTable.from_violations(VIOLATIONS)
+        expected = {}
+        for v in VIOLATIONS:
+            expected[v.constraint_id] = expected.get(v.constraint_id, 0) + 1
+
+        assert len(table) == 5
+        assert table.group_count("component") == list(expected.items())
+        assert table.dictionaries["focus_node"] == [EX + "a", EX + "b", EX + "c"]
+        assert table.codes["focus_node"].dtype == np.int32
+
+    def test_group_by_and_top_k(self):
+        table = ViolationTable.from_violations(VIOLATIONS)
+
+        assert table.group_by(["path", "component"])[0] == ((EX + "name", str(SH) + "MinCountConstraintComponent"), 3)
+        assert table.top_k("focus_node", 2) == [(EX + "a", 3), (EX + "b", 1)]
+
+        counts, edges = table.histogram("focus_node", bins=2)
+        assert counts.sum() == 3 and len(edges) == 3
+
+    def test_prioritize_violations_is_a_stable_descending_sort(self):
+        expected = sorted(VIOLATIONS, key=lambda v: v.severity or "", reverse=True)
+        assert prioritize_violations(VIOLATIONS) == expected
+        assert prioritize_violations([]) == []
+
+    def test_from_rows(self):
+        table = ViolationTable.from_rows([(EX + "a", None, None, None, "Violation"), (EX + "a", None, None, None, None)])
+
+        assert table.group_count("focus_node") == [(EX + "a", 2)]
+        assert table.group_count("path") == [(None, 2)]
+        assert list(table.order_by("severity", descending=True)) == [0, 1]
+
+    def test_empty_table(self):
+        table = ViolationTable.from_violations([])
+        assert len(table) == 0
+        assert table.group_count("shape") == []
+        assert table.group_by(["shape"]) == []
+        assert len(table.histogram("shape")[0]) == 0
@@ -0,0 +1,53 @@
+"""
+Test the slotted, memory-compact architecture data classes.
+"""
+
+import pickle
+
+from evaluation.memory_benchmark import PlainConstraintViolation, measure
+from functions.xpshacl_engine.xpshacl_architecture import (
+    ConstraintViolation,
+    DomainContext,
+    ExplanationOutput,
+    JustificationNode,
+    JustificationTree,
+    ViolationType,
+)
+
+EX = "http://example.org/"
+
+
+def _violation(i=0):
+    return ConstraintViolation(
+        focus_node="".join((EX, "p", str(i))),
+        shape_id="".join((EX, "PersonShape")),
+        constraint_id="http://www.w3.org/ns/shacl#MinCountConstraintComponent",
+        violation_type=ViolationType.CARDINALITY,
+        property_path="".join((EX, "name")),
+    )
+
+
+class TestCompactArchitecture:
+    """Test slots, IRI interning and value semantics of the data classes."""
+
+    def test_instances_have_no_dict(self):
+        tree = JustificationTree(root=JustificationNode(statement="s", type="conclusion"), violation=_violation())
+        for instance in (tree.violation, tree.root, tree, DomainContext(), ExplanationOutput("text")):
+            assert not hasattr(instance, "__dict__")
+
+    def test_iris_are_interned(self):
+        first, second = _violation(1), _violation(2)
+        assert first.shape_id is second.shape_id
+        assert first.property_path is second.property_path
+
+    def test_value_semantics_are_unchanged(self):
+        violation = _violation()
+        violation.context["minCount"] = 1
+        restored = pickle.loads(pickle.dumps(violation))
+
+        assert restored == violation
+        assert ConstraintViolation.from_dict(violation.to_dict()) == violation
+        assert DomainContext().similar_cases == []
+
+    def test_footprint_is_smaller_than_plain_dataclass(self):
+        assert measure(ConstraintViolation, 2000) < 0.75 * measure(PlainConstraintViolation, 2000)
@@ -0,0 +1,163 @@
+"""
+Test the shared per-dataset explanation context.
+"""
+
+from unittest.mock import patch
+
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import RDF
+
+from functions.xpshacl_engine.context_retriever import ContextRetriever
+from functions.xpshacl_engine.explanation_context import ExplanationContext
+from functions.xpshacl_engine.justification_tree_builder import JustificationTreeBuilder
+from functions.xpshacl_engine.xpshacl_architecture import ConstraintViolation, ViolationType
+
+DATA = """
+@prefix ex: <http://example.org/> .
+ex:alice a ex:Person ; ex:age "-3" .
+ex:bob a ex:Person ; ex:name "Bob" .
+ex:carol a ex:Person .
+ex:dave a ex:Person .
+"""
+
+SHAPES = """
+@prefix ex: <http://example.org/> .
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+ex:PersonShape a sh:NodeShape ; rdfs:comment "People need a name." ; sh:minCount 1 ; sh:minInclusive 0 .
+"""
+
+EX = "http://example.org/"
+
+
+def _graphs():
+    return Graph().parse(data=DATA, format="turtle"), Graph().parse(data=SHAPES, format="turtle")
+
+
+def _violation(constraint, violation_type, path, value=None):
+    return ConstraintViolation(
+        focus_node=EX + "alice",
+        shape_id=EX + "PersonShape",
+        constraint_id=f"http://www.w3.org/ns/shacl#{constraint}",
+        violation_type=violation_type,
+        property_path=EX + path,
+        value=value,
+    )
+
+
+class TestExplanationContext:
+    """Test the lazily built indexes and their use by the builder and retriever."""
+
+    def test_indexes(self):
+        """The indexes answer the same questions as direct graph lookups."""
+        data_graph, shapes_graph = _graphs()
+        index = ExplanationContext(data_graph, shapes_graph)
+        alice = URIRef(EX + "alice")
+
+        assert index.types_of(alice) == [URIRef(EX + "Person")]
+        assert set(index.instances_of(URIRef(EX + "Person"))) == {URIRef(EX + n) for n in ("alice", "bob", "carol", "dave")}
+        assert index.values(alice, URIRef(EX + "age")) == [Literal("-3")]
+        assert index.subjects_with(URIRef(EX + "name")) == {URIRef(EX + "bob")}
+        assert str(index.shape_value(URIRef(EX + "PersonShape"), URIRef("http://www.w3.org/ns/shacl#minInclusive"))) == "0"
+        assert str(index.prefixes["ex"]) == EX
+
+    def test_shared_context_collects_prefixes_once(self):
+        """Builders and retrievers created with a shared context do no per-instance setup."""
+        data_graph, shapes_graph = _graphs()
+        with patch("functions.xpshacl_engine.explanation_context.collect_prefixes", return_value={}) as mock_collect:
+            index = ExplanationContext(data_graph, shapes_graph)
+            for _ in range(10):
+                JustificationTreeBuilder(data_graph, shapes_graph, index)
+                ContextRetriever(data_graph, shapes_graph, index)
+        mock_collect.assert_called_once()
+
+    def test_outputs_match_unshared_instances(self):
+        """Trees and context are identical whether or not the context is shared."""
+        data_graph, shapes_graph = _graphs()
+        index = ExplanationContext(data_graph, shapes_graph)
+        violations = [
+            _violation("MinCountConstraintComponent", ViolationType.CARDINALITY, "name"),
+            _violation("MinInclusiveConstraintComponent", ViolationType.VALUE_RANGE, "age", value="-3"),
+        ]
+
+        for violation in violations:
+            shared_tree = JustificationTreeBuilder(data_graph, shapes_graph, index).build_justification_tree(violation)
+            own_tree = JustificationTreeBuilder(data_graph, shapes_graph).build_justification_tree(violation)
+            assert shared_tree.to_dict() == own_tree.to_dict()
+
+            shared_context = ContextRetriever(data_graph, shapes_graph, index).retrieve_context(violation)
+            own_context = ContextRetriever(data_graph, shapes_graph).retrieve_context(violation)
+            assert shared_context.to_dict() == own_context.to_dict()
+
+        context = ContextRetriever(data_graph, shapes_graph, index).retrieve_context(violations[0])
+        assert sorted(case["node"] for case in context.similar_cases) == [EX + "carol", EX + "dave"]
+        assert context.shape_documentation == ["People need a name."]
+
+    def test_invalidate_after_data_change(self):
+        """Modifying the data graph and invalidating the context refreshes the indexes."""
+        data_graph, shapes_graph = _graphs()
+        index = ExplanationContext(data_graph, shapes_graph)
+        alice, name = URIRef(EX + "alice"), URIRef(EX + "name")
+
+        assert index.values(alice, name) == []
+        data_graph.add((alice, name, Literal("Alice")))
+        index.invalidate()
+        assert index.values(alice, name) == [Literal("Alice")]
+        assert alice in index.subjects_with(name)
+
+    def test_similar_cases_are_capped_and_shared(self):
+        """Similar cases are sampled deterministically from a list computed once per (type, property)."""
+        data_graph, shapes_graph = Graph(), Graph()
+        person, name = URIRef(EX + "Person"), URIRef(EX + "name")
+        for i in range(1000):
+            node = URIRef(f"{EX}p{i}")
+            data_graph.add((node, RDF.type, person))
+            if i % 5 == 0:
+                data_graph.add((node, name, Literal(f"Person {i}")))
+
+        index = ExplanationContext(data_graph, shapes_graph)
+        retriever = ContextRetriever(data_graph, shapes_graph, index)
+
+        with patch("config.SIMILAR_CASES_LIMIT", 10), \
+             patch.object(index, "subjects_with", wraps=index.subjects_with) as spy:
+            contexts = []
+            for i in (1, 2, 3):
+                violation = _violation("MinCountConstraintComponent", ViolationType.CARDINALITY, "name")
+                violation.focus_node = f"{EX}p{i}"
+                contexts.append(retriever.retrieve_context(violation))
+
+        assert spy.call_count == 1
+        for i, context in zip((1, 2, 3), contexts):
+            nodes = [case["node"] for case in context.similar_cases]
+            assert len(nodes) == 10
+            assert f"{EX}p{i}" not in nodes
+            assert context.similar_cases_total == 799
+        assert contexts[1].similar_cases == contexts[2].similar_cases
+
+    def test_prepared_evidence_matches_per_violation_scans(self):
+        """Batch-prepared counts and evidence produce the same trees, reading each focus node once."""
+        data_graph, shapes_graph = Graph(), Graph()
+        name, email = URIRef(EX + "name"), URIRef(EX + "email")
+        violations = []
+        for i in range(50):
+            node = URIRef(f"{EX}p{i}")
+            data_graph.add((node, name, Literal(f"Person {i}")))
+            data_graph.add((node, name, Literal(f"Alias {i}")))
+            for path in ("name", "email"):
+                violation = _violation("MaxCountConstraintComponent", ViolationType.CARDINALITY, path)
+                violation.focus_node = str(node)
+                violations.append(violation)
+
+        expected = [JustificationTreeBuilder(data_graph, shapes_graph).build_justification_tree(v).to_dict()
+                    for v in violations]
+
+        index = ExplanationContext(data_graph, shapes_graph)
+        builder = JustificationTreeBuilder(data_graph, shapes_graph, index)
+        with patch.object(data_graph, "predicate_objects", wraps=data_graph.predicate_objects) as spy:
+            builder.prepare(violations)
+            trees = [builder.build_justification_tree(v).to_dict() for v in violations]
+
+        assert trees == expected
+        assert spy.call_count == 50
+        assert index.property_evidence(URIRef(f"{EX}p0"), name)[0] == 2
+        assert index.property_evidence(URIRef(f"{EX}p0"), email) == (0, "")
@@ -237,7 +237,7 @@ class TestExtendedShaclValidator:
 
     def test_serialize_focus_node(self, mock_graph):
         """Test focus node serialization."""
-        from functions.xpshacl_engine.extended_shacl_validator import _serialize_focus_node
+        from functions.xpshacl_engine.context_retriever import _serialize_focus_node
 
         # Add data to graph
         ex = Namespace("http://example.org/")
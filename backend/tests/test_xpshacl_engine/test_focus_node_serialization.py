@@ -0,0 +1,90 @@
+"""
+Test memoized focus node serialization and lazily computed violation context.
+"""
+
+import json
+from unittest.mock import patch
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+
+from functions.xpshacl_engine.context_retriever import FocusNodeSerializer
+from functions.xpshacl_engine.xpshacl_architecture import LazyContext
+
+DATA = """
+@prefix ex: <http://example.org/> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+ex:alice a ex:Person ;
+    ex:name "Alice"@en ;
+    ex:age "42"^^xsd:integer ;
+    ex:address [ ex:city "Bonn" ; ex:geo [ ex:lat "50.7" ] ] .
+ex:bob a ex:Person ; ex:knows ex:alice .
+"""
+
+
+class TestLazyContext:
+    """Test deferred computation of violation context values."""
+
+    def test_value_is_computed_once_on_first_read(self):
+        calls = []
+        context = LazyContext(message="too short")
+        context.set_lazy("focusNodeDefinition", lambda: calls.append(1) or "ex:a ex:p 1 .")
+
+        assert "focusNodeDefinition" in context and len(context) == 2
+        assert not context.is_computed("focusNodeDefinition")
+        assert calls == []
+
+        assert context["focusNodeDefinition"] == "ex:a ex:p 1 ."
+        assert context.get("focusNodeDefinition") == "ex:a ex:p 1 ."
+        assert calls == [1]
+        assert context.is_computed("focusNodeDefinition")
+
+    def test_copies_and_json_see_computed_values(self):
+        context = LazyContext()
+        context.set_lazy("focusNodeDefinition", lambda: "definition")
+
+        assert dict(context) == {"focusNodeDefinition": "definition"}
+        assert json.loads(json.dumps(context)) == {"focusNodeDefinition": "definition"}
+        assert context == {"focusNodeDefinition": "definition"}
+
+
+class TestFocusNodeSerializer:
+    """Test the per-run CBD extractor and Turtle writer."""
+
+    def test_serialization_round_trips_the_cbd(self):
+        graph = Graph().parse(data=DATA, format="turtle")
+        alice = URIRef("http://example.org/alice")
+        serializer = FocusNodeSerializer(graph)
+
+        expected = Graph()
+        for triple in serializer.describe(alice):
+            expected.add(triple)
+        parsed = Graph().parse(data=serializer.serialize(alice), format="turtle")
+
+        assert len(expected) == 7
+        assert isomorphic(parsed, expected)
+        assert "@prefix ex: <http://example.org/> ." in serializer.serialize(alice)
+        assert "Alice" in serializer.serialize(alice) and "Bonn" in serializer.serialize(alice)
+
+    def test_each_focus_node_is_serialized_once(self):
+        graph = Graph().parse(data=DATA, format="turtle")
+        alice = URIRef("http://example.org/alice")
+        serializer = FocusNodeSerializer(graph)
+
+        with patch.object(serializer, "_write_turtle", wraps=serializer._write_turtle) as write:
+            first = serializer.serialize(alice)
+            second = serializer.serialize(alice)
+
+        assert first == second
+        assert write.call_count == 1
+
+    def test_literals_and_blank_nodes(self):
+        graph = Graph()
+        node = URIRef("urn:x:1")
+        graph.add((node, URIRef("urn:x:label"), Literal('say "hi"\nnow')))
+        graph.add((node, URIRef("urn:x:ref"), BNode()))
+
+        serialized = FocusNodeSerializer(graph).serialize(node)
+        parsed = Graph().parse(data=serialized, format="turtle")
+
+        assert (node, URIRef("urn:x:label"), Literal('say "hi"\nnow')) in parsed
@@ -0,0 +1,91 @@
+"""
+Test justification tree templates compiled once per shape constraint.
+"""
+
+from unittest.mock import patch
+
+from rdflib import Graph
+
+from functions.xpshacl_engine.justification_tree_builder import JustificationTreeBuilder
+from functions.xpshacl_engine.xpshacl_architecture import ConstraintViolation, ViolationType
+
+DATA = """
+@prefix ex: <http://example.org/> .
+ex:alice a ex:Person ; ex:age "-3" ; ex:email "a@x", "b@x" ; ex:code "ab{2}" .
+ex:bob a ex:Person, ex:Agent ; ex:age "-9" .
+"""
+
+SHAPES = """
+@prefix ex: <http://example.org/> .
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+ex:PersonShape a sh:NodeShape ;
+    sh:minInclusive 0 ; sh:datatype xsd:integer ; sh:pattern "^[a-z]{3}$" ; sh:flags "i" ;
+    sh:lessThan ex:deathDate ; sh:class ex:Organization .
+"""
+
+EX = "http://example.org/"
+SH = "http://www.w3.org/ns/shacl#"
+
+CASES = [
+    ("MinCountConstraintComponent", ViolationType.CARDINALITY, "name", None, {"minCount": 1}),
+    ("MinCountConstraintComponent", ViolationType.CARDINALITY, "email", None, {"actualCount": 7}),
+    ("MaxCountConstraintComponent", ViolationType.CARDINALITY, "email", None, {"maxCount": 1, "actualValues": ["a@x", "b@x"]}),
+    ("DatatypeConstraintComponent", ViolationType.VALUE_TYPE, "age", "-3", {}),
+    ("ClassConstraintComponent", ViolationType.VALUE_TYPE, None, None, {}),
+    ("MinInclusiveConstraintComponent", ViolationType.VALUE_RANGE, "age", "-3", {}),
+    ("PatternConstraintComponent", ViolationType.PATTERN, "code", "ab{2}", {}),
+    ("LessThanConstraintComponent", ViolationType.PROPERTY_PAIR, "birthDate", "2000", {}),
+    ("SparqlConstraintComponent", ViolationType.OTHER, None, None, {}),
+]
+
+
+def _graphs():
+    return Graph().parse(data=DATA, format="turtle"), Graph().parse(data=SHAPES, format="turtle")
+
+
+def _violation(focus, constraint, violation_type, path, value, context):
+    return ConstraintViolation(
+        focus_node=EX + focus,
+        shape_id=EX + "PersonShape",
+        constraint_id=SH + constraint,
+        violation_type=violation_type,
+        property_path=EX + path if path else None,
+        value=value,
+        message=f"{focus} violates {constraint}",
+        context=dict(context),
+    )
+
+
+class TestJustificationTemplates:
+    """Test that compiled templates reproduce the directly built trees."""
+
+    def test_templates_match_direct_construction(self):
+        """Instantiated trees are identical to trees built from scratch for each violation."""
+        data_graph, shapes_graph = _graphs()
+        builder = JustificationTreeBuilder(data_graph, shapes_graph)
+
+        for focus in ("alice", "bob"):
+            for case in CASES:
+                violation = _violation(focus, *case)
+                expected = builder._build_tree(violation).to_dict()
+                tree = builder.build_justification_tree(violation)
+                assert tree.to_dict()["justification"] == expected
+                assert tree.violation is violation
+
+    def test_template_is_compiled_once_per_shape_constraint(self):
+        """Violations of the same shape constraint share one compiled template."""
+        data_graph, shapes_graph = _graphs()
+        builder = JustificationTreeBuilder(data_graph, shapes_graph)
+
+        with patch.object(builder, "_compile_template", wraps=builder._compile_template) as compile_spy:
+            trees = [
+                builder.build_justification_tree(_violation(focus, *CASES[5]))
+                for focus in ("alice", "bob", "alice")
+            ]
+
+        assert compile_spy.call_count == 1
+        statements = [tree.root.children[1].statement for tree in trees]
+        assert "<http://example.org/alice>" in statements[0] and "-3" in statements[0]
+        assert "<http://example.org/bob>" in statements[1] and "-9" not in statements[1]
+        assert trees[0].to_dict() == trees[2].to_dict()
@@ -0,0 +1,112 @@
+"""
+Test process-pool preparation of justification trees and context.
+"""
+
+import os
+import subprocess
+import sys
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.namespace import RDF
+
+import explanation_prep_worker
+from functions.xpshacl_engine.context_retriever import ContextRetriever
+from functions.xpshacl_engine.justification_tree_builder import JustificationTreeBuilder
+from functions.xpshacl_engine.parallel_prep import _transferable, prepare_explanations_parallel, write_snapshot
+from functions.xpshacl_engine.xpshacl_architecture import ConstraintViolation, LazyContext, ViolationType
+
+EX = "http://example.org/"
+
+SHAPES = """
+@prefix ex: <http://example.org/> .
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+ex:PersonShape a sh:NodeShape ; sh:minCount 1 ; sh:minInclusive 0 .
+"""
+
+
+def _graphs():
+    data_graph = Graph()
+    data_graph.bind("ex", EX)
+    for i in range(40):
+        node = URIRef(f"{EX}p{i}")
+        data_graph.add((node, RDF.type, URIRef(EX + "Person")))
+        data_graph.add((node, URIRef(EX + "age"), Literal(-i)))
+        address = BNode()
+        data_graph.add((node, URIRef(EX + "address"), address))
+        data_graph.add((address, URIRef(EX + "city"), Literal(f"City {i}")))
+    return data_graph, Graph().parse(data=SHAPES, format="turtle")
+
+
+def _violations():
+    violations = []
+    for i in range(40):
+        for component, violation_type, path, value in (
+            ("MinCountConstraintComponent", ViolationType.CARDINALITY, "name", None),
+            ("MinInclusiveConstraintComponent", ViolationType.VALUE_RANGE, "age", str(-i)),
+            ("MaxCountConstraintComponent", ViolationType.CARDINALITY, "address", None),
+        ):
+            context = LazyContext(minCount=1)
+            context.set_lazy("focusNodeDefinition", lambda: "not picklable")
+            violations.append(ConstraintViolation(
+                focus_node=f"{EX}p{i}",
+                shape_id=EX + "PersonShape",
+                constraint_id=f"http://www.w3.org/ns/shacl#{component}",
+                violation_type=violation_type,
+                property_path=EX + path,
+                value=value,
+                context=context,
+            ))
+    return violations
+
+
+class TestParallelPrep:
+    """Test that worker processes produce the same trees and context as in-process preparation."""
+
+    def test_matches_sequential_preparation(self):
+        data_graph, shapes_graph = _graphs()
+        violations = _violations()
+
+        parallel = prepare_explanations_parallel(violations, data_graph, shapes_graph, workers=2, chunk_size=25)
+
+        builder = JustificationTreeBuilder(data_graph, shapes_graph)
+        retriever = ContextRetriever(data_graph, shapes_graph)
+        assert len(parallel) == len(violations)
+        for violation, (tree, context) in zip(violations, parallel):
+            assert tree.violation is violation
+            assert tree.to_dict() == builder.build_justification_tree(violation).to_dict()
+            assert context.to_dict() == retriever.retrieve_context(violation).to_dict()
+        assert not violations[0].context.is_computed("focusNodeDefinition")
+
+    def test_worker_entry_points_match_sequential_preparation(self, tmp_path):
+        """The worker initializer and task, run in process, give the same trees and context."""
+        data_graph, shapes_graph = _graphs()
+        violations = _violations()
+
+        explanation_prep_worker.init_worker(write_snapshot(data_graph, shapes_graph, str(tmp_path)))
+        prepared = explanation_prep_worker.prepare_chunk([_transferable(violation) for violation in violations])
+
+        builder = JustificationTreeBuilder(data_graph, shapes_graph)
+        retriever = ContextRetriever(data_graph, shapes_graph)
+        for violation, (root, context) in zip(violations, prepared):
+            assert root.to_dict() == builder.build_justification_tree(violation).root.to_dict()
+            assert context.to_dict() == retriever.retrieve_context(violation).to_dict()
+
+    def test_workers_do_not_import_the_services(self, tmp_path):
+        """A fresh worker process loads the snapshot without running the functions package __init__."""
+        data_graph, shapes_graph = _graphs()
+        snapshot_path = write_snapshot(data_graph, shapes_graph, str(tmp_path))
+        script = (
+            "import sys, explanation_prep_worker\n"
+            f"explanation_prep_worker.init_worker({snapshot_path!r})\n"
+            "print(sorted(name for name in ('functions.phoenix_service', 'litellm', 'flask') if name in sys.modules))\n"
+        )
+        backend_dir = os.path.dirname(explanation_prep_worker.__file__)
+
+        result = subprocess.run([sys.executable, "-c", script], cwd=backend_dir, capture_output=True, text=True, timeout=120)
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
+
+    def test_no_violations(self):
+        data_graph, shapes_graph = _graphs()
+        assert prepare_explanations_parallel([], data_graph, shapes_graph, workers=2) == []
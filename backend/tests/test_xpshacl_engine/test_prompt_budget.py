@@ -0,0 +1,73 @@
+"""
+Test prompt budgeting and context compaction.
+"""
+
+from functions.xpshacl_engine.prompt_budget import compact_json, compact_prompt_context, estimate_tokens
+from functions.xpshacl_engine.xpshacl_architecture import ConstraintViolation, DomainContext, ViolationType
+
+NAME = "http://example.org/name"
+
+
+def _violation(definition=None):
+    context = {"sh:minCount": 1}
+    if definition is not None:
+        context["focusNodeDefinition"] = definition
+    return ConstraintViolation(
+        focus_node="http://example.org/alice",
+        shape_id="http://example.org/PersonShape",
+        constraint_id="http://www.w3.org/ns/shacl#MinCountConstraintComponent",
+        violation_type=ViolationType.CARDINALITY,
+        property_path=NAME,
+        message="Less than 1 values on ex:alice->ex:name",
+        context=context,
+    )
+
+
+def _large_context(cases=5000, fragments=500):
+    return DomainContext(
+        ontology_fragments=[f"<http://example.org/alice> <http://example.org/p{i}> \"value {i}\" ." for i in range(fragments)]
+        + [f"<http://example.org/alice> <{NAME}> \"Alice\" ."],
+        shape_documentation=["Every person must have a name."],
+        similar_cases=[{"node": f"http://example.org/person{i}", "node_type": "http://example.org/Person"}
+                       for i in range(cases)],
+    )
+
+
+class TestCompactPromptContext:
+    """Test the token budget enforced on LLM prompt context."""
+
+    def test_small_context_is_kept_whole(self):
+        """Context that fits the budget is only summarized, not truncated."""
+        context = _large_context(cases=3, fragments=2)
+        sections = compact_prompt_context(_violation(), context=context, max_tokens=4000)
+
+        assert len(sections["context"]["ontology_fragments"]) == 3
+        assert sections["context"]["similar_cases"]["total"] == 3
+        assert len(sections["context"]["similar_cases"]["examples"]) == 3
+        assert "omitted_for_brevity" not in sections["violation"]
+
+    def test_large_context_respects_budget(self):
+        """Thousands of similar cases and fragments are cut down to the budget."""
+        sections = compact_prompt_context(_violation(), context=_large_context(), max_tokens=1500)
+
+        assert estimate_tokens(compact_json(sections)) <= 1500
+        similar = sections["context"]["similar_cases"]
+        assert similar["total"] == 5000
+        assert similar["by_type"] == {"http://example.org/Person": 5000}
+        assert sections["violation"]["omitted_for_brevity"]["ontology_fragments"] > 0
+
+    def test_relevant_fragments_are_kept_first(self):
+        """Fragments about the violated property survive truncation."""
+        sections = compact_prompt_context(_violation(), context=_large_context(), max_tokens=600)
+        assert f"<http://example.org/alice> <{NAME}> \"Alice\" ." in sections["context"]["ontology_fragments"]
+
+    def test_focus_node_definition_is_truncated_by_relevance(self):
+        """The Turtle definition keeps its prefixes and the lines about the violated property."""
+        lines = ["@prefix ex: <http://example.org/> ."] + [f"ex:alice ex:p{i} \"value {i}\" ." for i in range(400)]
+        lines.insert(200, "ex:alice ex:name \"Alice\" .")
+        sections = compact_prompt_context(_violation("\n".join(lines)), max_tokens=500)
+
+        definition = sections["violation"]["context"]["focusNodeDefinition"]
+        assert definition.startswith("@prefix ex:")
+        assert "ex:alice ex:name" in definition
+        assert sections["violation"]["omitted_for_brevity"]["focus_node_definition_lines"] > 0
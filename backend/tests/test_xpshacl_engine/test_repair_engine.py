@@ -0,0 +1,128 @@
+"""
+Test batched repair generation in the SuggestionRepairGenerator.
+"""
+
+import json
+import pytest
+from unittest.mock import Mock, patch
+
+
+def _make_items(paths):
+    from functions.xpshacl_engine.xpshacl_architecture import (
+        ConstraintViolation, JustificationNode, JustificationTree, DomainContext, ViolationType
+    )
+
+    items = []
+    for i, path in enumerate(paths):
+        violation = ConstraintViolation(
+            focus_node=f"http://example.org/resource{i}",
+            shape_id="http://example.org/shapes/PersonShape",
+            constraint_id="http://www.w3.org/ns/shacl#MinCountConstraintComponent",
+            violation_type=ViolationType.CARDINALITY,
+            property_path=path,
+        )
+        tree = JustificationTree(root=JustificationNode(statement="root", type="conclusion"), violation=violation)
+        items.append((violation, tree, DomainContext()))
+    return items
+
+
+def _repair(text, index=None):
+    repair = {
+        "explanation_natural_language": text,
+        "suggestion_natural_language": f"Fix {text}",
+        "proposed_repair": {"type": "SPARQL_UPDATE", "query": f"INSERT DATA {{ <s> <p> '{text}' }}"},
+    }
+    if index is not None:
+        repair["index"] = index
+    return repair
+
+
+def _response(content):
+    return {"choices": [{"message": {"content": json.dumps(content)}}]}
+
+
+class TestBatchedRepairGeneration:
+    """Test multi-violation batched prompts."""
+
+    @pytest.fixture
+    def generator(self):
+        from functions.xpshacl_engine.repair_engine import SuggestionRepairGenerator
+
+        vkg = Mock()
+        vkg.get_feedback_for_signature.return_value = []
+        return SuggestionRepairGenerator(vkg=vkg, model_name="openai/gpt-4")
+
+    @patch('functions.xpshacl_engine.repair_engine.litellm.completion')
+    def test_batch_sends_each_signature_once(self, mock_completion, generator):
+        """Duplicate signatures share one answer and one request covers the rest."""
+        items = _make_items(["http://example.org/ns#name", "http://example.org/ns#age", "http://example.org/ns#name"])
+        mock_completion.return_value = _response([_repair("name", 0), _repair("age", 1)])
+
+        results = generator.generate_repair_objects_batch(items)
+
+        assert mock_completion.call_count == 1
+        assert [r["explanation_natural_language"] for r in results] == ["name", "age", "name"]
+        assert all("index" not in r for r in results)
+        assert len(generator.last_explanation_outputs) == 3
+        assert generator.last_explanation_outputs[2].natural_language_explanation == "name"
+
+    @patch('functions.xpshacl_engine.repair_engine.litellm.completion')
+    def test_shared_repairs_use_each_focus_node_and_value(self, mock_completion, generator):
+        """Violations of one signature get the repair with their own focus node and value."""
+        items = _make_items(["http://example.org/ns#name", "http://example.org/ns#age", "http://example.org/ns#name"])
+        items[0][0].value = "Bob"
+        items[2][0].value = "Alice"
+        name_repair = {
+            "explanation_natural_language": "http://example.org/resource0 has a bad name",
+            "suggestion_natural_language": "Fix the name of http://example.org/resource0",
+            "proposed_repair": {
+                "type": "SPARQL_UPDATE",
+                "query": 'DELETE DATA { <http://example.org/resource0> <http://example.org/ns#name> "Bob" }',
+            },
+            "index": 0,
+        }
+        mock_completion.return_value = _response([name_repair, _repair("age", 1)])
+
+        results = generator.generate_repair_objects_batch(items)
+
+        assert mock_completion.call_count == 1
+        assert results[0]["proposed_repair"]["query"] == name_repair["proposed_repair"]["query"]
+        assert results[2]["proposed_repair"]["query"] == (
+            'DELETE DATA { <http://example.org/resource2> <http://example.org/ns#name> "Alice" }'
+        )
+        assert results[2]["explanation_natural_language"] == "http://example.org/resource2 has a bad name"
+        output = generator.last_explanation_outputs[2]
+        assert output.violation is items[2][0]
+        assert output.proposed_repair_query == results[2]["proposed_repair"]["query"]
+        assert output.correction_suggestions == ["Fix the name of http://example.org/resource2"]
+        assert output.provided_by_model == "openai/gpt-4"
+
+    @patch('functions.xpshacl_engine.repair_engine.litellm.completion')
+    def test_invalid_items_are_retried_individually(self, mock_completion, generator):
+        """Only the items that fail validation are sent again on their own."""
+        items = _make_items(["http://example.org/ns#name", "http://example.org/ns#age"])
+        invalid = {"index": 1, "explanation_natural_language": "incomplete"}
+        mock_completion.side_effect = [
+            _response({"repairs": [_repair("name", 0), invalid]}),
+            _response(_repair("age")),
+        ]
+
+        results = generator.generate_repair_objects_batch(items)
+
+        assert mock_completion.call_count == 2
+        retry_prompt = mock_completion.call_args_list[1].kwargs["messages"][1]["content"]
+        assert "ns#age" in retry_prompt and "ns#name" not in retry_prompt
+        assert results[0]["explanation_natural_language"] == "name"
+        assert results[1]["explanation_natural_language"] == "age"
+
+    def test_batches_respect_token_budget(self, generator):
+        """Sections are split into several requests once the budget is reached."""
+        from functions.xpshacl_engine.repair_engine import BATCH_REPAIR_SYSTEM_PROMPT, estimate_tokens
+
+        sections = {i: "x" * 4000 for i in range(4)}
+        budget = estimate_tokens(BATCH_REPAIR_SYSTEM_PROMPT) + 2500
+
+        batches = generator._pack_batches(list(sections), sections, budget, max_batch_size=10)
+
+        assert batches == [[0, 1], [2, 3]]
+        assert generator._pack_batches(list(sections), sections, 10 ** 6, max_batch_size=3) == [[0, 1, 2], [3]]
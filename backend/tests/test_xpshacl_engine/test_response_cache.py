@@ -0,0 +1,80 @@
+"""
+Test the persistent LLM response cache.
+"""
+
+import os
+from unittest.mock import Mock, patch
+
+from functions.xpshacl_engine.response_cache import ResponseCache, cached_completion
+
+MESSAGES = [{"role": "system", "content": "You are helpful."}, {"role": "user", "content": "Explain  this\nviolation."}]
+
+
+class TestResponseCache:
+    """Test the disk-backed response cache."""
+
+    def test_key_ignores_whitespace_only_differences(self):
+        """Prompts that differ only in formatting share a key; model and temperature do not."""
+        reformatted = [
+            {"role": "system", "content": "You are helpful. "},
+            {"role": "user", "content": "Explain this violation."},
+        ]
+        key = ResponseCache.make_key("gpt-4", MESSAGES, 0.1)
+
+        assert key == ResponseCache.make_key("gpt-4", reformatted, 0.1)
+        assert key != ResponseCache.make_key("gpt-4o", MESSAGES, 0.1)
+        assert key != ResponseCache.make_key("gpt-4", MESSAGES, 1.0)
+
+    def test_responses_survive_a_new_instance(self, tmp_path):
+        """Stored responses are read back from disk by a fresh cache."""
+        key = ResponseCache.make_key("gpt-4", MESSAGES, 0.1)
+        ResponseCache(str(tmp_path)).put(key, '{"answer": 42}', model="gpt-4")
+
+        cache = ResponseCache(str(tmp_path))
+        assert cache.get(key) == '{"answer": 42}'
+        assert cache.get("0" * 64) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path):
+        """The cache stays within its size bound by dropping the oldest entries."""
+        cache = ResponseCache(str(tmp_path), max_bytes=2000)
+        keys = [ResponseCache.make_key("gpt-4", [{"role": "user", "content": str(i)}]) for i in range(10)]
+        for i, key in enumerate(keys):
+            cache.put(key, "x" * 300)
+            os.utime(cache._path(key), (i, i))
+
+        total = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(tmp_path) for f in files)
+        assert total <= 2000
+        assert cache.get(keys[-1]) is not None
+        assert cache.get(keys[0]) is None
+
+    def test_cached_completion_calls_generate_once(self, tmp_path):
+        """The second identical request is served from the cache."""
+        generate = Mock(return_value="response")
+        with patch("config.LLM_CACHE_ENABLED", True), \
+             patch("functions.xpshacl_engine.response_cache._response_cache", ResponseCache(str(tmp_path))):
+            assert cached_completion("gpt-4", MESSAGES, 0.1, generate) == "response"
+            assert cached_completion("gpt-4", MESSAGES, 0.1, generate) == "response"
+
+        generate.assert_called_once()
+
+    def test_only_valid_responses_are_stored(self, tmp_path):
+        """Responses failing `validate` are returned but not stored; invalid cached ones are replaced."""
+        cache = ResponseCache(str(tmp_path))
+        key = cache.make_key("gpt-4", MESSAGES, 0.1)
+        generate = Mock(side_effect=["not json", '{"ok": true}', '{"ok": true}'])
+
+        def is_json(content):
+            return content.startswith("{")
+
+        with patch("config.LLM_CACHE_ENABLED", True), \
+             patch("functions.xpshacl_engine.response_cache._response_cache", cache):
+            assert cached_completion("gpt-4", MESSAGES, 0.1, generate, validate=is_json) == "not json"
+            assert cache.get(key) is None
+            cache.put(key, "stale garbage")
+            assert cached_completion("gpt-4", MESSAGES, 0.1, generate, validate=is_json) == '{"ok": true}'
+            assert cached_completion("gpt-4", MESSAGES, 0.1, generate, validate=is_json) == '{"ok": true}'
+
+        assert generate.call_count == 2
+        cache.invalidate(key)
+        assert cache.get(key) is None and cache._current_size() == 0
@@ -0,0 +1,123 @@
+"""
+Test the template engine used as the first explanation tier.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+
+from functions.xpshacl_engine.template_engine import TemplateEngine, component_name, rdf_term, template_engine
+from functions.xpshacl_engine.xpshacl_architecture import (
+    ConstraintViolation, DomainContext, JustificationNode, JustificationTree, ViolationType
+)
+
+SH = "http://www.w3.org/ns/shacl#"
+FOCUS = "http://example.org/alice"
+PATH = "http://example.org/status"
+
+
+def _item(component, value=None, context=None):
+    violation = ConstraintViolation(
+        focus_node=FOCUS,
+        shape_id="http://example.org/PersonShape",
+        constraint_id=SH + component,
+        violation_type=ViolationType.OTHER,
+        property_path=PATH,
+        value=value,
+        context=context or {},
+    )
+    tree = JustificationTree(root=JustificationNode(statement="root", type="conclusion"), violation=violation)
+    return violation, tree, DomainContext()
+
+
+class TestTemplateEngine:
+    """Test rendering of the built-in templates."""
+
+    def test_component_name_accepts_iris_and_curies(self):
+        assert component_name(SH + "MinCountConstraintComponent") == "MinCountConstraintComponent"
+        assert component_name("sh:MinCountConstraintComponent") == "MinCountConstraintComponent"
+        assert template_engine.covers("sh:InConstraintComponent")
+        assert not template_engine.covers(SH + "SPARQLConstraintComponent")
+
+    def test_mincount_keeps_user_value_placeholder(self):
+        rendered = template_engine.render(SH + "MinCountConstraintComponent", FOCUS, PATH, session_id="abc")
+
+        assert "incomplete" in rendered["explanation_natural_language"]
+        query = rendered["proposed_repair"]["query"]
+        assert query.startswith("INSERT DATA")
+        assert "$user_provided_value" in query
+        assert "Session_abc" in query
+
+    def test_variant_is_chosen_by_available_parameters(self):
+        with_values = template_engine.render(SH + "InConstraintComponent", FOCUS, PATH, "x", allowed_values=["a", "b"])
+        without_values = template_engine.render(SH + "InConstraintComponent", FOCUS, PATH, "x")
+
+        assert "a, b" in with_values["suggestion_natural_language"]
+        assert '"a" .' in with_values["proposed_repair"]["query"]
+        assert "allowed list" in without_values["explanation_natural_language"]
+        assert '"CORRECT_VALUE" .' in without_values["proposed_repair"]["query"]
+
+    def test_values_are_formatted_as_rdf_terms(self):
+        assert rdf_term("http://example.org/x") == "<http://example.org/x>"
+        assert rdf_term('say "hi"') == '"say \\"hi\\""'
+        assert rdf_term(None) == "$user_provided_value"
+
+    def test_uncovered_component_renders_nothing(self):
+        assert template_engine.render(SH + "SPARQLConstraintComponent", FOCUS, PATH) is None
+
+    def test_related_components_fall_back_to_contained_names(self):
+        rendered = template_engine.render(SH + "QualifiedMinCountConstraintComponent", FOCUS, PATH)
+
+        assert template_engine.covers(SH + "QualifiedMaxCountConstraintComponent")
+        assert "incomplete" in rendered["explanation_natural_language"]
+        assert not template_engine.covers(None)
+
+    def test_register_custom_component(self):
+        engine = TemplateEngine()
+        engine.register("ex:Custom", "Bad $property_path ($level)", "Fix it", query="delete_value")
+
+        rendered = engine.render("http://example.org/Custom", FOCUS, PATH, "v", level="high")
+        assert rendered["explanation_natural_language"] == f"Bad {PATH} (high)"
+        assert f'<{FOCUS}> <{PATH}> "v" .' in rendered["proposed_repair"]["query"]
+
+
+class TestTemplateFirstRepairs:
+    """Test the template tier of the SuggestionRepairGenerator."""
+
+    @pytest.fixture
+    def vkg(self):
+        vkg = Mock()
+        vkg.get_feedback_for_signature.return_value = []
+        return vkg
+
+    @patch('functions.xpshacl_engine.repair_engine.litellm.completion')
+    def test_covered_component_skips_the_llm(self, mock_completion, vkg):
+        from functions.xpshacl_engine.repair_engine import SuggestionRepairGenerator, TEMPLATE_MODEL_NAME
+
+        srg = SuggestionRepairGenerator(vkg=vkg, template_first=True)
+        repair = srg.generate_repair_object(*_item("InConstraintComponent", "x", {"allowedValues": ["a"]}))
+
+        mock_completion.assert_not_called()
+        assert "allowed options: a" in repair["suggestion_natural_language"]
+        assert srg.last_explanation_output.provided_by_model == TEMPLATE_MODEL_NAME
+
+    @patch('functions.xpshacl_engine.repair_engine.litellm.completion', side_effect=RuntimeError("offline"))
+    def test_force_llm_and_fallback_share_the_templates(self, mock_completion, vkg):
+        from functions.xpshacl_engine.repair_engine import SuggestionRepairGenerator
+
+        srg = SuggestionRepairGenerator(vkg=vkg, template_first=True)
+        repair = srg.generate_repair_object(*_item("MaxCountConstraintComponent", "x"), force_llm=True)
+
+        mock_completion.assert_called()
+        assert "too many values" in repair["explanation_natural_language"]
+        assert srg.last_explanation_output.provided_by_model == "fallback_generator"
+
+    @patch('functions.xpshacl_engine.repair_engine.litellm.completion')
+    def test_batch_only_sends_uncovered_components(self, mock_completion, vkg):
+        from functions.xpshacl_engine.repair_engine import SuggestionRepairGenerator
+
+        mock_completion.side_effect = RuntimeError("offline")
+        srg = SuggestionRepairGenerator(vkg=vkg, template_first=True)
+        results = srg.generate_repair_objects_batch([_item("MinCountConstraintComponent")] * 2)
+
+        mock_completion.assert_not_called()
+        assert all("incomplete" in result["explanation_natural_language"] for result in results)
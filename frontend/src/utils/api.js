@@ -110,4 +110,24 @@ export default {
     getExplanations(sessionId) {
         return apiClient.get(`/api/explanations/${sessionId}`);
     },
+
+    // Stream explanations as they are generated (Server-Sent Events).
+    // handlers: { onExplanation, onProgress, onDone, onError }; returns the EventSource.
+    streamExplanations(sessionId, handlers = {}) {
+        const source = new EventSource(`${apiClient.defaults.baseURL}/api/explanations/${sessionId}/stream`);
+        const listen = (event, handler) => {
+            source.addEventListener(event, (e) => handler && handler(JSON.parse(e.data)));
+        };
+        listen('explanation', handlers.onExplanation);
+        listen('progress', handlers.onProgress);
+        source.addEventListener('done', (e) => {
+            source.close();
+            if (handlers.onDone) handlers.onDone(JSON.parse(e.data));
+        });
+        source.addEventListener('error', (e) => {
+            source.close();
+            if (handlers.onError) handlers.onError(e.data ? JSON.parse(e.data) : e);
+        });
+        return source;
+    },
 };